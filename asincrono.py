@@ -0,0 +1,255 @@
+# ==============================
+# Ejecución asíncrona: cada dispositivo como una tarea de asyncio
+# ==============================
+# Alternativa al planificador de eventos discretos: se pasa una EjecucionAsincrona donde
+# se pasaría un Planificador (configurar_red, construir_topologia) y cada dispositivo
+# corre como una tarea de asyncio que atiende sus interfaces.
+#
+# - Cada interfaz de cada dispositivo tiene una cola acotada (asyncio.Queue con
+#   CAPACIDAD_COLA tramas). Transmitir por un enlace es encolar en la interfaz del vecino.
+# - El procesamiento de una trama (capas 1..5, reenvío, ARP) es el mismo código síncrono
+#   de simulador_red.py. Las tramas que produce quedan en la bandeja de salida del
+#   dispositivo y su tarea las encola en la interfaz del vecino.
+# - Contrapresión: ejecucion.enviar(pc, ...) encola cada mensaje con "await cola.put(...)",
+#   así que un flujo no genera mensajes mientras la interfaz del primer salto esté llena.
+#   Los dispositivos que reenvían, en cambio, descartan la trama si la cola del vecino
+#   está llena ("cola_llena", como la cola de salida de un router). Si esperaran, la
+#   tarea dejaría de leer todas sus interfaces, y dos vecinos congestionados en ambos
+#   sentidos se bloquearían mutuamente; con espera_maxima se puede esperar un tiempo
+#   acotado antes de descartar (red sin pérdidas mientras no haya ciclos de espera).
+# - La tarea de cada dispositivo atiende sus interfaces por turnos, así que varios flujos
+#   simultáneos (PC1 -> PC2 y PC2 -> PC1 a la vez) se intercalan en cada salto.
+# - El reloj es el tiempo real del bucle de eventos (no se simula RETARDO_SALTO): la
+#   latencia por salto que registran las métricas es el tiempo en cola más el de
+#   procesamiento. Los temporizadores de ARP usan loop.call_later.
+#
+# Uso:
+#     async def demo():
+#         async with EjecucionAsincrona() as ejecucion:
+#             pc1, pc2, router, s1, s2 = configurar_red(ejecucion)
+#             await asyncio.gather(ejecucion.enviar(pc1, mensajes, PC2_IP),
+#                                  ejecucion.enviar(pc2, mensajes, PC1_IP))
+#             await ejecucion.esperar()
+#     asyncio.run(demo())
+
+import asyncio
+import collections
+
+import simulador_red
+
+# Tramas (o lotes) que caben en la cola de cada interfaz
+CAPACIDAD_COLA = 64
+# Segundos que un dispositivo que reenvía espera por una cola llena antes de descartar
+# la trama (0: la descarta enseguida, como la cola de salida de un router)
+ESPERA_MAXIMA = 0.0
+
+
+class _Tarea:
+    # Estado de un dispositivo en la ejecución: colas por interfaz, bandeja de salida
+    # (destino, interfaz_remota, elemento), aviso de trabajo pendiente, la tarea de asyncio
+    # y cuántos enviar() están en curso (mientras haya alguno, ellos vacían la bandeja)
+    __slots__ = ("colas", "salientes", "aviso", "tarea", "emisores")
+
+    def __init__(self):
+        self.colas = {}
+        self.salientes = collections.deque()
+        self.aviso = asyncio.Event()
+        self.tarea = None
+        self.emisores = 0
+
+
+class EjecucionAsincrona:
+    # Se reconoce en Dispositivo._transmitir por este atributo
+    asincrono = True
+
+    # - capacidad: tramas por cola de interfaz
+    # - espera_maxima: segundos que un dispositivo que reenvía espera por una cola llena
+    #   antes de descartar la trama (None: espera indefinidamente)
+    def __init__(self, capacidad=CAPACIDAD_COLA, espera_maxima=ESPERA_MAXIMA):
+        self.capacidad = capacidad
+        self.espera_maxima = espera_maxima
+        self.eventos_procesados = 0
+        self.esperas = 0             # encolados que tuvieron que esperar por una cola llena
+        self._tareas = {}            # dispositivo -> _Tarea
+        self._en_curso = 0           # tramas encoladas o en proceso + temporizadores pendientes
+        self._inactivo = asyncio.Event()
+        self._inactivo.set()
+        self._error = None
+        self._inicio = None
+
+    async def __aenter__(self):
+        self._inicio = asyncio.get_running_loop().time()
+        return self
+
+    async def __aexit__(self, *excepcion):
+        await self.cerrar()
+
+    # Segundos desde el inicio de la ejecución (reloj de los dispositivos)
+    @property
+    def ahora(self):
+        if self._inicio is None:
+            return 0.0
+        return asyncio.get_running_loop().time() - self._inicio
+
+    # Interfaz de Planificador para los temporizadores de los dispositivos (ARP)
+    def programar(self, retardo, funcion, *args):
+        self._sumar(1)
+        asyncio.get_running_loop().call_later(retardo, self._temporizador, funcion, args)
+
+    def programar_en(self, tiempo, funcion, *args):
+        self.programar(max(0.0, tiempo - self.ahora), funcion, *args)
+
+    def _temporizador(self, funcion, args):
+        try:
+            funcion(*args)
+        except Exception as error:
+            self._fallar(error)
+        self._restar(1)
+
+    def _sumar(self, cantidad):
+        self._en_curso += cantidad
+        self._inactivo.clear()
+
+    def _restar(self, cantidad):
+        self._en_curso -= cantidad
+        if self._en_curso == 0:
+            self._inactivo.set()
+
+    def _fallar(self, error):
+        if self._error is None:
+            self._error = error
+        self._inactivo.set()
+
+    # Estado del dispositivo, creando su tarea en el primer uso
+    def _tarea(self, dispositivo):
+        estado = self._tareas.get(dispositivo)
+        if estado is None:
+            estado = self._tareas[dispositivo] = _Tarea()
+            estado.tarea = asyncio.get_running_loop().create_task(
+                self._atender(dispositivo, estado), name=f"dispositivo-{dispositivo.nombre}")
+        return estado
+
+    def _cola(self, dispositivo, interfaz):
+        colas = self._tarea(dispositivo).colas
+        cola = colas.get(interfaz)
+        if cola is None:
+            cola = colas[interfaz] = asyncio.Queue(self.capacidad)
+        return cola
+
+    # Llamado por Dispositivo._transmitir: deja la trama (o el lote) en la bandeja de salida
+    # del emisor; su tarea la encola en la interfaz del vecino
+    def transmitir(self, origen, destino, interfaz_remota, medio, lote):
+        estado = self._tarea(origen)
+        estado.salientes.append((destino, interfaz_remota, (medio, origen, self.ahora, lote)))
+        estado.aviso.set()
+        self._sumar(1)
+
+    # Encola las tramas de la bandeja de salida. Si la interfaz destino está llena espera
+    # como máximo "limite" segundos (None: sin límite) y después descarta la trama.
+    async def _vaciar(self, estado, limite=None):
+        salientes = estado.salientes
+        while salientes:
+            destino, interfaz_remota, elemento = salientes.popleft()
+            cola = self._cola(destino, interfaz_remota)
+            if not cola.full():
+                cola.put_nowait(elemento)
+            elif limite is None or limite > 0:
+                self.esperas += 1
+                try:
+                    await asyncio.wait_for(cola.put(elemento), limite)
+                except asyncio.TimeoutError:
+                    self._descartar(elemento)
+                    continue
+            else:
+                self._descartar(elemento)
+                continue
+            self._tarea(destino).aviso.set()
+
+    def _descartar(self, elemento):
+        medio, origen, _, lote = elemento
+        origen.metricas.descarte("cola_llena", len(medio) if lote else 1)
+        self._restar(1)
+
+    # Bucle de la tarea de un dispositivo: vacía su bandeja de salida y procesa una trama
+    # de cada interfaz con datos, por turnos; si no hay nada que hacer espera un aviso
+    async def _atender(self, dispositivo, estado):
+        try:
+            while True:
+                procesadas = 0
+                for interfaz, cola in list(estado.colas.items()):
+                    if cola.empty():
+                        continue
+                    medio, origen, enviado_en, lote = cola.get_nowait()
+                    dispositivo._llegada(medio, origen, interfaz, enviado_en, lote)
+                    self.eventos_procesados += 1
+                    self._restar(1)
+                    procesadas += 1
+                    if not estado.emisores:
+                        await self._vaciar(estado, self.espera_maxima)
+                if not estado.emisores:
+                    await self._vaciar(estado, self.espera_maxima)
+                if procesadas:
+                    await asyncio.sleep(0)  # cede el turno a los demás dispositivos
+                else:
+                    estado.aviso.clear()
+                    await estado.aviso.wait()
+        except asyncio.CancelledError:
+            raise
+        except Exception as error:
+            self._fallar(error)
+
+    # Envía mensajes desde un PC uno por uno, con "intervalo" segundos entre mensajes. Cada
+    # envío espera a que la PC pueda encolar la trama en el primer salto.
+    # Los argumentos extra se pasan a PC.enviar_mensaje (protocolo, puerto_destino, app).
+    async def enviar(self, pc, mensajes, ip_destino, intervalo=0.0, **opciones):
+        estado = self._tarea(pc)
+        estado.emisores += 1
+        try:
+            for mensaje in mensajes:
+                pc.enviar_mensaje(mensaje, ip_destino, **opciones)
+                await self._vaciar(estado)
+                # Cede el turno aunque no haya tenido que esperar (p. ej. mientras se resuelve
+                # el ARP del primer salto los mensajes quedan en la cola de resolución)
+                await asyncio.sleep(intervalo)
+                if self._error is not None:
+                    break
+        finally:
+            estado.emisores -= 1
+            estado.aviso.set()
+
+    # Espera hasta que no queden tramas en cola, en proceso ni temporizadores pendientes.
+    # Relanza la primera excepción que haya ocurrido en un dispositivo.
+    async def esperar(self):
+        await self._inactivo.wait()
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    # Cancela las tareas de los dispositivos
+    async def cerrar(self):
+        tareas = [estado.tarea for estado in self._tareas.values()]
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+        self._tareas.clear()
+
+    # Ocupación actual de cada cola: (dispositivo, interfaz) -> tramas en espera
+    def ocupacion(self):
+        return {(dispositivo.nombre, interfaz): cola.qsize()
+                for dispositivo, estado in self._tareas.items()
+                for interfaz, cola in estado.colas.items()}
+
+
+# Demo de flujos simultáneos en la topología de configurar_red(): PC1 -> PC2 (UDP) y
+# PC2 -> PC1 (TCP) a la vez, "repeticiones" mensajes en cada sentido. Retorna las PCs.
+async def ambos_sentidos(mensaje, repeticiones=1, app="GENERICA"):
+    async with EjecucionAsincrona() as ejecucion:
+        pc1, pc2, router, switch1, switch2 = simulador_red.configurar_red(ejecucion)
+        mensajes = [mensaje] * repeticiones
+        await asyncio.gather(
+            ejecucion.enviar(pc1, mensajes, simulador_red.PC2_IP, protocolo="UDP",
+                             puerto_destino=simulador_red.UDP_PORT, app=app),
+            ejecucion.enviar(pc2, mensajes, simulador_red.PC1_IP, protocolo="TCP",
+                             puerto_destino=simulador_red.TCP_PORT, app=app))
+        await ejecucion.esperar()
+    return pc1, pc2
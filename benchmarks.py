@@ -0,0 +1,1216 @@
+# ==============================
+# Benchmarks del simulador
+# ==============================
+# Uso: python benchmarks.py [bench_capas bench_escalado ...] [--json archivo] [--comparar anterior.json]
+# Cada benchmark imprime una tabla con el rendimiento medido. Durante las mediciones
+# la traza de los dispositivos se apaga y la salida estándar se descarta. Los resultados
+# se guardan en JSON (benchmarks.json por defecto) junto con el commit, y --comparar
+# muestra la razón entre cada medición y la misma de otra corrida (p. ej. de otro commit).
+
+import argparse
+import asyncio
+import contextlib
+import datetime
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import captura
+import codigos_linea
+import encapsulamiento
+import errores_bits
+import simulador_red
+from asincrono import EjecucionAsincrona, ambos_sentidos
+from codec_binario import (CapaAplicacionBinaria, CapaEnlaceBinaria, CapaRedBinaria, CapaTCPBinaria,
+                           CapaTransporteBinaria, CapaVLANBinaria)
+from conmutacion import TablaMAC
+from enlaces import Enlace
+from planificador import Planificador
+from paralelo import simular_en_paralelo, simular_secuencial
+from rutas import TrieRutas, busqueda_lineal
+from topologia import construir_topologia, generar_aleatoria, generar_hoja_espina
+from codigos_linea import CODIGOS_LINEA
+from capas import (CAPAS_BINARIAS, CAPAS_TEXTO, CapaAplicacion, CapaEnlace, CapaFisica, CapaRed, CapaTransporte,
+                   CapaVLAN)
+from trama import COPIAS, Trama
+import trafico
+import transporte
+from transporte import CapaTCP, PilaTCP
+from trazas import NIVEL_APAGADO, NIVEL_BITS, NIVEL_CAPAS, NIVEL_RESUMEN, NOMBRES_NIVEL, TRAZA
+
+# Argumentos de enviar_mensaje para datagramas
+UDP = {"protocolo": "UDP", "puerto_destino": simulador_red.UDP_PORT}
+
+
+# Ejecuta funcion() "repeticiones" veces y retorna operaciones por segundo
+def _medir(funcion, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    return repeticiones / (time.perf_counter() - inicio)
+
+
+# Fija el nivel de traza (apagada por defecto) y descarta lo que se imprima durante la medición
+@contextlib.contextmanager
+def _silenciar(nivel=NIVEL_APAGADO):
+    nivel_anterior, destinos_anteriores = TRAZA.configurar(nivel=nivel)
+    try:
+        with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+            yield
+    finally:
+        TRAZA.configurar(nivel=nivel_anterior, destinos=destinos_anteriores)
+
+
+# Genera una trama de texto de "tamano" caracteres con la forma que produce el simulador
+def _trama_ejemplo(tamano):
+    encabezados = "[H2:A:C][H3:1:2][H4:UDP:5000:53][APP:11]"
+    return encabezados + "x" * max(0, tamano - len(encabezados))
+
+
+# Capa física: ida y vuelta trama -> medio -> trama, cadena de bits vs bytes (tramas/s)
+def bench_capa_fisica(tamanos=(64, 1500, 64000), repeticiones=200):
+    print("\n== Capa física: tramas/s (encapsular + desencapsular) ==")
+    print(f"{'tamaño (B)':>12} {'bits':>12} {'bytes':>12} {'aceleración':>12}")
+    resultados = []
+    for tamano in tamanos:
+        trama = _trama_ejemplo(tamano)
+        # Ambos modos deben ser intercambiables con la representación de texto
+        assert CapaFisica.bytes_a_bits(CapaFisica.encapsular_bytes(trama)) == CapaFisica.encapsular(trama)
+        assert CapaFisica.desencapsular_bytes(CapaFisica.bits_a_bytes(CapaFisica.encapsular(trama))) == trama
+
+        n = max(1, repeticiones * 1500 // tamano)
+        bits = _medir(lambda: CapaFisica.desencapsular(CapaFisica.encapsular(trama)), n)
+        binario = _medir(lambda: CapaFisica.desencapsular_bytes(CapaFisica.encapsular_bytes(trama)), n)
+        print(f"{tamano:>12} {bits:>12.0f} {binario:>12.0f} {binario / bits:>11.1f}x")
+        resultados.append({"tamano": tamano, "bits": bits, "bytes": binario})
+    return resultados
+
+
+# Capa física anterior: un format() por carácter y un int() por cada 8 bits (referencia)
+def _bits_por_caracter(trama):
+    return ''.join(format(ord(c), '08b') for c in trama)
+
+
+def _caracteres_por_bits(bits):
+    return ''.join(chr(int(bits[i:i + 8], 2)) for i in range(0, len(bits), 8))
+
+
+# Pico de memoria (tracemalloc) de funcion()
+def _pico_memoria(funcion):
+    tracemalloc.start()
+    try:
+        funcion()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+# Códigos de línea de CapaFisica: MB/s de trama codificados y decodificados con la trama
+# entera, e ida y vuelta entera vs por bloques (codificar_en_bloques -> decodificar_en
+# sobre un buffer reservado), y pico de memoria de una trama de "tamano_memoria" bytes
+def bench_codigos_linea(tamano=1000000, repeticiones=5, tamano_memoria=4000000, tamano_referencia=100000):
+    print("\n== Códigos de línea: MB/s de trama ==")
+    trama = _trama_ejemplo(tamano)
+    referencia = _trama_ejemplo(tamano_referencia)
+    inicio = time.perf_counter()
+    assert _caracteres_por_bits(_bits_por_caracter(referencia)) == referencia
+    tasa = 2 * tamano_referencia / 1e6 / (time.perf_counter() - inicio)
+    print(f"  referencia (un format() por carácter, NRZ): {tasa:.1f} MB/s")
+    print(f"{'código':>12} {'símbolos/B':>11} {'codificar':>10} {'decodificar':>12} {'ida y vuelta':>13} "
+          f"{'por bloques':>12}")
+    buffer = bytearray(tamano)
+    resultados = {"referencia": tasa, "codigos": []}
+    for nombre, codigo in CODIGOS_LINEA.items():
+        simbolos = CapaFisica.encapsular(trama, codigo)
+        assert len(simbolos) == tamano * codigo.simbolos_por_byte
+        assert CapaFisica.desencapsular(simbolos, codigo) == trama
+        assert ''.join(CapaFisica.codificar_en_bloques(trama, codigo, bloque=4096)) == simbolos
+        assert CapaFisica.decodificar_en(CapaFisica.codificar_en_bloques(trama, codigo), buffer, codigo) == tamano
+        assert buffer.decode('utf-8') == trama
+        # Los bloques de símbolos pueden cortar un byte a la mitad
+        assert b''.join(CapaFisica.decodificar_en_bloques(
+            (simbolos[i:i + 1001] for i in range(0, len(simbolos), 1001)), codigo)) == trama.encode('utf-8')
+
+        codificar = _medir(lambda: CapaFisica.encapsular(trama, codigo), repeticiones) * tamano / 1e6
+        decodificar = _medir(lambda: CapaFisica.desencapsular(simbolos, codigo), repeticiones) * tamano / 1e6
+        bloques = _medir(lambda: CapaFisica.decodificar_en(CapaFisica.codificar_en_bloques(trama, codigo), buffer,
+                                                           codigo), repeticiones) * tamano / 1e6
+        entera = 1 / (1 / codificar + 1 / decodificar)
+        print(f"{nombre:>12} {codigo.simbolos_por_byte:>11} {codificar:>10.1f} {decodificar:>12.1f} {entera:>13.1f} "
+              f"{bloques:>12.1f}")
+        resultados["codigos"].append({"codigo": nombre, "codificar": codificar, "decodificar": decodificar,
+                                      "bloques": bloques})
+
+    print(f"  Pico de memoria, ida y vuelta de una trama de {_tamano_legible(tamano_memoria)}:")
+    grande = bytes(tamano_memoria)
+    destino = bytearray(tamano_memoria)
+    for fila in resultados["codigos"]:
+        codigo = CODIGOS_LINEA[fila["codigo"]]
+        entera = _pico_memoria(lambda: codigo.decodificar(codigo.codificar(grande)))
+        por_bloques = _pico_memoria(lambda: CapaFisica.decodificar_en(CapaFisica.codificar_en_bloques(grande, codigo),
+                                                                      destino, codigo))
+        print(f"{fila['codigo']:>12} entera {entera / 1e6:>8.1f} MB  por bloques {por_bloques / 1e6:>6.1f} MB")
+        fila["memoria_entera"], fila["memoria_bloques"] = entera, por_bloques
+    return resultados
+
+
+# Desactiva NumPy en codigos_linea y errores_bits durante la medición (camino de Python puro)
+@contextlib.contextmanager
+def _sin_numpy():
+    anteriores = codigos_linea.numpy, errores_bits.numpy
+    codigos_linea.numpy = errores_bits.numpy = None
+    try:
+        yield
+    finally:
+        codigos_linea.numpy, errores_bits.numpy = anteriores
+
+
+# Capa física con y sin NumPy: MB/s de ida y vuelta de tramas de cada tamaño una por una y
+# en lotes de "lote" tramas, y de errores de bits (CanalRuidoso), FCS y suma de verificación
+# sobre un lote. Sin NumPy instalado solo se mide el camino de Python.
+def bench_fisica_vectorial(tamanos=(64, 1500, 100000), lote=1000, bers=(1e-6, 1e-3), repeticiones=3):
+    caminos = [("python", _sin_numpy)]
+    if codigos_linea.numpy is not None:
+        caminos.append(("numpy", contextlib.nullcontext))
+    else:
+        print("\n(NumPy no está instalado: solo se mide el camino de Python)")
+    resultados = {"numpy": codigos_linea.numpy is not None, "codigos": [], "errores": []}
+
+    print("\n== Capa física vectorial: MB/s de ida y vuelta (una trama / lote) ==")
+    print(f"{'código':>12} {'tamaño':>8} " + " ".join(f"{nombre + ' ' + forma:>16}" for nombre, _ in caminos
+                                                    for forma in ("trama", "lote")))
+    for nombre_codigo, codigo in CODIGOS_LINEA.items():
+        for tamano in tamanos:
+            cantidad = max(1, min(lote, 1000000 // tamano))
+            tramas = [_trama_ejemplo(tamano)] * cantidad
+            esperado = [CapaFisica.encapsular(trama, codigo) for trama in tramas]
+            fila = {"codigo": nombre_codigo, "tamano": tamano}
+            columnas = []
+            for camino, contexto in caminos:
+                with contexto():
+                    # Mismos símbolos con y sin NumPy, una por una o en lote
+                    assert CapaFisica.encapsular_lote(tramas, codigo) == esperado
+                    assert CapaFisica.desencapsular_lote(esperado, codigo) == tramas
+                    assert CapaFisica.desencapsular(esperado[0], codigo) == tramas[0]
+                    trama = _medir(lambda: [CapaFisica.desencapsular(CapaFisica.encapsular(t, codigo), codigo)
+                                            for t in tramas], repeticiones) * cantidad * tamano / 1e6
+                    en_lote = _medir(lambda: CapaFisica.desencapsular_lote(
+                        CapaFisica.encapsular_lote(tramas, codigo), codigo), repeticiones) * cantidad * tamano / 1e6
+                fila[camino + "_trama"], fila[camino + "_lote"] = trama, en_lote
+                columnas += [trama, en_lote]
+            print(f"{nombre_codigo:>12} {_tamano_legible(tamano):>8} "
+                  + " ".join(f"{valor:>16.1f}" for valor in columnas))
+            resultados["codigos"].append(fila)
+
+    print(f"\n== Errores de bits y detección sobre {lote} tramas de 1500 B: MB/s ==")
+    tramas = [random.Random(indice).randbytes(1500) for indice in range(lote)]
+    for camino, contexto in caminos:
+        with contexto():
+            fila = {"camino": camino}
+            for ber in bers:
+                canal = errores_bits.CanalRuidoso(ber, semilla=1)
+                recibidas = canal.aplicar_lote(tramas)
+                invertidos = sum(bin(int.from_bytes(a, "big") ^ int.from_bytes(b, "big")).count("1")
+                                 for a, b in zip(tramas, recibidas))
+                assert invertidos == canal.errores
+                fila[f"ber_{ber:g}"] = _medir(lambda: canal.aplicar_lote(tramas), repeticiones) * lote * 1500 / 1e6
+            con_fcs = [errores_bits.agregar_fcs(trama) for trama in tramas]
+            assert all(map(errores_bits.verificar_fcs, con_fcs))
+            recibidas = errores_bits.CanalRuidoso(1e-4, semilla=2).aplicar_lote(con_fcs)
+            assert list(map(errores_bits.verificar_fcs, recibidas)) == [a == b for a, b in zip(recibidas, con_fcs)]
+            fila["fcs"] = _medir(lambda: [errores_bits.verificar_fcs(trama) for trama in con_fcs],
+                                 repeticiones) * lote * 1500 / 1e6
+            sumas = [errores_bits.suma_verificacion(trama) for trama in tramas]
+            assert errores_bits.suma_verificacion_lote(tramas) == sumas
+            fila["suma"] = _medir(lambda: [errores_bits.suma_verificacion(trama) for trama in tramas],
+                                  repeticiones) * lote * 1500 / 1e6
+            fila["suma_lote"] = (_medir(lambda: errores_bits.suma_verificacion_lote(tramas), repeticiones)
+                                 * lote * 1500 / 1e6)
+        print(f"  {camino:>6}: " + "  ".join(f"{clave} {valor:.0f}" for clave, valor in fila.items() if clave != "camino"))
+        resultados["errores"].append(fila)
+    return resultados
+
+
+# Encapsula un mensaje en las capas 5..2 con una pila (capas.Pila)
+def _encapsular(pila, mensaje):
+    return pila.encapsular(mensaje, "11", "UDP", 5000, 53, "10.0.0.1", "10.0.0.2", "A", "C")
+
+
+# Desencapsula una trama por las capas 2..5 y retorna el payload y todos los campos
+def _desencapsular(pila, trama):
+    return pila.desencapsular(trama)
+
+
+# Lo mismo con llamadas escritas a mano, capa por capa
+def _encapsular_a_mano(capas, mensaje):
+    aplicacion, transporte, red, enlace = capas
+    return enlace.encapsular(
+        red.encapsular(
+            transporte.encapsular(aplicacion.encapsular(mensaje, "11"), 5000, 53, "UDP"),
+            "10.0.0.1", "10.0.0.2"),
+        "A", "C")
+
+
+def _desencapsular_a_mano(capas, trama):
+    aplicacion, transporte, red, enlace = capas
+    paquete, mac_origen, mac_destino = enlace.desencapsular(trama)
+    segmento, ip_origen, ip_destino = red.desencapsular(paquete)
+    datos_app, protocolo, puerto_origen, puerto_destino = transporte.desencapsular(segmento)
+    payload, app = aplicacion.desencapsular(datos_app)
+    return (payload, app, protocolo, puerto_origen, puerto_destino,
+            ip_origen, ip_destino, mac_origen, mac_destino)
+
+
+# Lo mismo recorriendo la lista de capas en cada paquete (lo que evita compilar la pila)
+def _encapsular_recorriendo(pila, datos, campos):
+    posicion = 0
+    for capa in pila.capas:
+        valores = dict(zip(capa.campos, campos[posicion:posicion + len(capa.campos)]))
+        posicion += len(capa.campos)
+        datos = capa.encapsular(datos, *(valores[campo] for campo in getattr(capa, "campos_encapsular", capa.campos)))
+    return datos
+
+
+def _desencapsular_recorriendo(pila, datos):
+    campos = []
+    for capa in reversed(pila.capas):
+        if capa.campos:
+            datos, *propios = capa.desencapsular(datos)
+            campos[:0] = propios
+        else:
+            datos = capa.desencapsular(datos)
+    return (datos, *campos)
+
+
+# Pila de capas: paquetes/s encapsulando y desencapsulando 100 B con la pila compilada,
+# recorriendo la lista de capas en cada paquete y con las llamadas escritas a mano (solo
+# para las pilas de 4 capas). Se verifica que las tres den lo mismo.
+def bench_pila(tamano=100, repeticiones=50000):
+    print(f"\n== Pila de capas ({tamano} B): paquetes/s (encapsular + desencapsular) ==")
+    print(f"{'pila':>24} {'compilada':>12} {'recorriendo':>12} {'a mano':>12}")
+    mensaje = "x" * tamano
+    campos = ("11", "UDP", 5000, 53, "10.0.0.1", "10.0.0.2", "A", "C")
+    pilas = (
+        ("texto", CAPAS_TEXTO, str, campos),
+        ("binaria", CAPAS_BINARIAS, Trama.desde_payload, campos),
+        ("texto + VLAN", CAPAS_TEXTO.con(CapaVLAN, debajo_de=CapaRed), str, campos[:6] + (7,) + campos[6:]),
+        ("binaria + VLAN", CAPAS_BINARIAS.con(CapaVLANBinaria, debajo_de=CapaRedBinaria), Trama.desde_payload,
+         campos[:6] + (7,) + campos[6:]),
+    )
+    resultados = {}
+    for nombre, pila, preparar, valores in pilas:
+        datos = preparar(mensaje)
+        trama = pila.encapsular(datos, *valores)
+        recibido = pila.desencapsular(trama)
+        assert recibido[1:] == valores and _desencapsular_recorriendo(pila, trama)[1:] == valores
+        recorrida = _encapsular_recorriendo(pila, datos, valores)
+        assert recorrida == trama if isinstance(trama, str) else bytes(recorrida) == bytes(trama)
+        fila = resultados[nombre] = {
+            "compilada": _medir(lambda: pila.desencapsular(pila.encapsular(datos, *valores)), repeticiones),
+            "recorriendo": _medir(lambda: _desencapsular_recorriendo(pila, _encapsular_recorriendo(pila, datos, valores)),
+                                  repeticiones),
+        }
+        a_mano = ""
+        if len(pila) == 4:
+            assert _desencapsular_a_mano(pila, _encapsular_a_mano(pila, datos))[1:] == valores
+            fila["a_mano"] = _medir(lambda: _desencapsular_a_mano(pila, _encapsular_a_mano(pila, datos)), repeticiones)
+            a_mano = f"{fila['a_mano']:>12.0f}"
+        print(f"{nombre:>24} {fila['compilada']:>12.0f} {fila['recorriendo']:>12.0f} {a_mano:>12}")
+    return resultados
+
+
+# Encabezados: codec de texto vs codec binario (struct). Se mide por separado encapsular
+# (capas 5..2) y desencapsular (capas 2..5), en paquetes/s.
+def bench_cabeceras(tamanos=(16, 1500, 64000), repeticiones=2000):
+    print("\n== Encabezados capas 5..2: paquetes/s ==")
+    print(f"{'tamaño (B)':>12} {'encap texto':>12} {'encap bin':>12} {'desenc texto':>13} {'desenc bin':>12}")
+    esperado = ("11", "UDP", 5000, 53, "10.0.0.1", "10.0.0.2", "A", "C")
+    # El codec binario admite ']' y ':' dentro del payload
+    recibido = _desencapsular(CAPAS_BINARIAS, _encapsular(CAPAS_BINARIAS, "a:b]c"))
+    assert bytes(recibido[0]) == b"a:b]c" and recibido[1:] == esperado, recibido
+    resultados = []
+    for tamano in tamanos:
+        mensaje = "x" * tamano
+        trama_texto = _encapsular(CAPAS_TEXTO, mensaje)
+        trama_binaria = _encapsular(CAPAS_BINARIAS, mensaje)
+        recibido = _desencapsular(CAPAS_TEXTO, trama_texto)
+        assert recibido[0] == mensaje and recibido[1:] == esperado, recibido[1:]
+        recibido = _desencapsular(CAPAS_BINARIAS, trama_binaria)
+        assert bytes(recibido[0]) == mensaje.encode() and recibido[1:] == esperado, recibido[1:]
+
+        fila = {
+            "tamano": tamano,
+            "encapsular_texto": _medir(lambda: _encapsular(CAPAS_TEXTO, mensaje), repeticiones),
+            "encapsular_binario": _medir(lambda: _encapsular(CAPAS_BINARIAS, mensaje), repeticiones),
+            "desencapsular_texto": _medir(lambda: _desencapsular(CAPAS_TEXTO, trama_texto), repeticiones),
+            "desencapsular_binario": _medir(lambda: _desencapsular(CAPAS_BINARIAS, trama_binaria), repeticiones),
+        }
+        print(f"{tamano:>12} {fila['encapsular_texto']:>12.0f} {fila['encapsular_binario']:>12.0f}"
+              f" {fila['desencapsular_texto']:>13.0f} {fila['desencapsular_binario']:>12.0f}")
+        resultados.append(fila)
+    return resultados
+
+
+# Salto de router (capa 2 -> capa 3 -> nueva trama de capa 2): bytes copiados y saltos/s.
+# Con texto cada desencapsular/encapsular crea una cadena nueva del tamaño del paquete;
+# con Trama solo se escribe el nuevo encabezado de enlace sobre el anterior.
+def bench_copias_por_salto(tamanos=(64, 1500, 64000), repeticiones=2000):
+    print("\n== Salto de router: bytes copiados por salto ==")
+    print(f"{'tamaño (B)':>12} {'copias texto':>13} {'copias Trama':>13} {'saltos/s texto':>15} {'saltos/s Trama':>15}")
+    resultados = []
+    for tamano in tamanos:
+        mensaje = "x" * tamano
+        trama_texto = _encapsular(CAPAS_TEXTO, mensaje)
+
+        def salto_texto():
+            paquete, mac_origen, mac_destino = CapaEnlace.desencapsular(trama_texto)
+            segmento, ip_origen, ip_destino = CapaRed.desencapsular(paquete)
+            return paquete, segmento, CapaEnlace.encapsular(paquete, "D", "B")
+
+        # Cada cadena retornada es una copia nueva
+        copias_texto = sum(len(cadena) for cadena in salto_texto())
+
+        trama = _encapsular(CAPAS_BINARIAS, Trama.desde_payload(mensaje))
+
+        def salto_trama():
+            paquete, mac_origen, mac_destino = CapaEnlaceBinaria.desencapsular(trama)
+            segmento, ip_origen, ip_destino = CapaRedBinaria.desencapsular(paquete)
+            return CapaEnlaceBinaria.encapsular(paquete, "D", "B")
+
+        antes = COPIAS.bytes
+        reenviada = salto_trama()
+        copias_trama = COPIAS.bytes - antes
+        # El encabezado se reescribió en el mismo buffer, sin mover el payload
+        assert reenviada.buffer is trama.buffer and reenviada.inicio == trama.inicio
+
+        fila = {
+            "tamano": tamano,
+            "bytes_copiados_texto": copias_texto,
+            "bytes_copiados_trama": copias_trama,
+            "saltos_texto": _medir(salto_texto, repeticiones),
+            "saltos_trama": _medir(salto_trama, repeticiones),
+        }
+        print(f"{tamano:>12} {copias_texto:>13} {copias_trama:>13}"
+              f" {fila['saltos_texto']:>15.0f} {fila['saltos_trama']:>15.0f}")
+        resultados.append(fila)
+    return resultados
+
+
+# Capas por separado: (nombre, preparar(mensaje), encapsular(datos), desencapsular(resultado)).
+# desencapsular retorna el payload, que debe coincidir con lo que se encapsuló.
+def _casos_capas():
+    return (
+        ("CapaAplicacion", str, lambda datos: CapaAplicacion.encapsular(datos, "11"),
+         lambda datos: CapaAplicacion.desencapsular(datos)[0]),
+        ("CapaTransporte", str, lambda datos: CapaTransporte.encapsular(datos, 5000, 53, "UDP"),
+         lambda datos: CapaTransporte.desencapsular(datos)[0]),
+        ("CapaTCP", str, lambda datos: CapaTCP.encapsular(datos, 1, 1, transporte.ACK, 65535),
+         lambda datos: CapaTCP.desencapsular(datos)[0]),
+        ("CapaRed", str, lambda datos: CapaRed.encapsular(datos, "10.0.0.1", "10.0.0.2"),
+         lambda datos: CapaRed.desencapsular(datos)[0]),
+        ("CapaEnlace", str, lambda datos: CapaEnlace.encapsular(datos, "A", "C"),
+         lambda datos: CapaEnlace.desencapsular(datos)[0]),
+        ("CapaFisica (bits)", str, CapaFisica.encapsular, CapaFisica.desencapsular),
+        ("CapaFisica (bytes)", str, CapaFisica.encapsular_bytes, CapaFisica.desencapsular_bytes),
+        ("CapaAplicacionBinaria", Trama.desde_payload, lambda datos: CapaAplicacionBinaria.encapsular(datos, "11"),
+         lambda datos: CapaAplicacionBinaria.desencapsular(datos)[0]),
+        ("CapaTransporteBinaria", Trama.desde_payload,
+         lambda datos: CapaTransporteBinaria.encapsular(datos, 5000, 53, "UDP"),
+         lambda datos: CapaTransporteBinaria.desencapsular(datos)[0]),
+        ("CapaTCPBinaria", Trama.desde_payload,
+         lambda datos: CapaTCPBinaria.encapsular(datos, 1, 1, transporte.ACK, 65535),
+         lambda datos: CapaTCPBinaria.desencapsular(datos)[0]),
+        ("CapaRedBinaria", Trama.desde_payload, lambda datos: CapaRedBinaria.encapsular(datos, "10.0.0.1", "10.0.0.2"),
+         lambda datos: CapaRedBinaria.desencapsular(datos)[0]),
+        ("CapaEnlaceBinaria", Trama.desde_payload, lambda datos: CapaEnlaceBinaria.encapsular(datos, "A", "C"),
+         lambda datos: CapaEnlaceBinaria.desencapsular(datos)[0]),
+        ("CapaVLAN", str, lambda datos: CapaVLAN.encapsular(datos, 7), lambda datos: CapaVLAN.desencapsular(datos)[0]),
+        ("CapaVLANBinaria", Trama.desde_payload, lambda datos: CapaVLANBinaria.encapsular(datos, 7),
+         lambda datos: CapaVLANBinaria.desencapsular(datos)[0]),
+    )
+
+
+# Capas por separado: MB/s de encapsular y desencapsular de cada Capa* de capas.py (las
+# de simulador_red.py y encapsulamiento.py), codec_binario y transporte con mensajes de
+# 10 B a 10 MB. Cada medición
+# procesa del orden de "presupuesto" bytes (al menos una operación, a lo sumo "maximo").
+def bench_capas(tamanos=(10, 1000, 100000, 10000000), presupuesto=20000000, maximo=20000):
+    print("\n== Capas por separado: MB/s (encapsular / desencapsular) ==")
+    print(f"{'capa':>31}" + "".join(f"{_tamano_legible(tamano):>24}" for tamano in tamanos))
+    resultados = {}
+    for nombre, preparar, encapsular, desencapsular in _casos_capas():
+        fila = resultados[nombre] = {}
+        columnas = []
+        for tamano in tamanos:
+            mensaje = "x" * tamano
+            datos = preparar(mensaje)
+            encapsulado = encapsular(datos)
+            payload = desencapsular(encapsulado)
+            assert (payload if isinstance(payload, str) else bytes(payload).decode()) == mensaje, nombre
+            n = max(1, min(maximo, presupuesto // max(tamano, 1)))
+            ida = _medir(lambda: encapsular(datos), n) * tamano / 1e6
+            vuelta = _medir(lambda: desencapsular(encapsulado), n) * tamano / 1e6
+            fila[tamano] = {"encapsular_mb_s": ida, "desencapsular_mb_s": vuelta}
+            columnas.append(f"{ida:>10.1f} / {vuelta:<10.1f}")
+            del datos, encapsulado, payload
+        print(f"{nombre:>31}" + "".join(f"{columna:>24}" for columna in columnas))
+    return resultados
+
+
+def _tamano_legible(tamano):
+    for unidad, escala in (("MB", 1000000), ("kB", 1000)):
+        if tamano >= escala:
+            return f"{tamano / escala:g} {unidad}"
+    return f"{tamano} B"
+
+
+# Extremo a extremo: PC1 -> PC2 sobre configurar_red() con cada combinación de
+# MODO_FISICO y CODEC (mensajes/s), y lo mismo con encapsulamiento.py. Los benchmarks de
+# capas usan UDP, sin el costo de las confirmaciones de TCP (ver bench_tcp).
+def bench_extremo_a_extremo(tamano=1000, repeticiones=200):
+    print("\n== Extremo a extremo PC1 -> PC2: mensajes/s ==")
+    mensaje = "x" * tamano
+    resultados = {}
+    modo_original, codec_original = simulador_red.MODO_FISICO, simulador_red.CODEC
+    try:
+        for modo, codec in (("bits", "texto"), ("bytes", "texto"), ("bytes", "binario")):
+            simulador_red.MODO_FISICO, simulador_red.CODEC = modo, codec
+            pc1, pc2, router, switch1, switch2 = simulador_red.configurar_red()
+            with _silenciar():
+                tasa = _medir(lambda: pc1.enviar_mensaje(mensaje, simulador_red.PC2_IP, **UDP), repeticiones)
+            print(f"  MODO_FISICO={modo!r:8} CODEC={codec!r:10} {tasa:>10.0f} mensajes/s")
+            resultados[f"{modo}/{codec}"] = tasa
+    finally:
+        simulador_red.MODO_FISICO, simulador_red.CODEC = modo_original, codec_original
+    # Versión anterior del simulador (encapsulamiento.py), que imprime cada capa
+    pc1, pc2, router, switch1, switch2 = encapsulamiento.configurar_red()
+    with _silenciar():
+        tasa = _medir(lambda: pc1.enviar_mensaje(mensaje, encapsulamiento.PC2_IP, "UDP", encapsulamiento.UDP_PORT),
+                      repeticiones)
+    print(f"  {'encapsulamiento.py':<39} {tasa:>10.0f} mensajes/s")
+    resultados["encapsulamiento"] = tasa
+    return resultados
+
+
+# Lotes: N mensajes PC1 -> PC2 con un bucle de enviar_mensaje vs un solo enviar_lote (mensajes/s),
+# con UDP y con TCP (el protocolo por defecto: el lote entra de una vez a la conexión)
+def bench_lotes(cantidad=2000, tamano=100, repeticiones=3):
+    print(f"\n== Lote de {cantidad} mensajes PC1 -> PC2: mensajes/s ==")
+    mensajes = ["x" * tamano] * cantidad
+    resultados = {}
+    modo_original, codec_original = simulador_red.MODO_FISICO, simulador_red.CODEC
+    try:
+        for codec in ("texto", "binario"):
+            for protocolo, opciones in (("UDP", UDP), ("TCP", {})):
+                simulador_red.MODO_FISICO, simulador_red.CODEC = "bytes", codec
+                pc1, pc2, router, switch1, switch2 = simulador_red.configurar_red()
+
+                def bucle():
+                    for mensaje in mensajes:
+                        pc1.enviar_mensaje(mensaje, simulador_red.PC2_IP, **opciones)
+
+                with _silenciar():
+                    uno_a_uno = _medir(bucle, repeticiones) * cantidad
+                    entregados = pc2.metricas.entregados
+                    lote = _medir(lambda: pc1.enviar_lote(mensajes, simulador_red.PC2_IP, **opciones),
+                                  repeticiones) * cantidad
+                assert pc2.metricas.entregados - entregados == entregados, (codec, protocolo)
+                print(f"  CODEC={codec!r:10} {protocolo}  enviar_mensaje: {uno_a_uno:>10.0f}   "
+                      f"enviar_lote: {lote:>10.0f}")
+                clave = codec if protocolo == "UDP" else f"{codec}/{protocolo}"
+                resultados[clave] = {"enviar_mensaje": uno_a_uno, "enviar_lote": lote}
+    finally:
+        simulador_red.MODO_FISICO, simulador_red.CODEC = modo_original, codec_original
+    return resultados
+
+
+# Traza: PC1 -> PC2 con cada nivel de traza hacia la salida estándar (descartada), mensajes/s.
+# Con la traza apagada no se formatea ningún mensaje en el camino de datos.
+def bench_trazas(tamano=1000, repeticiones=2000):
+    print("\n== Extremo a extremo PC1 -> PC2 por nivel de traza: mensajes/s ==")
+    mensaje = "x" * tamano
+    resultados = {}
+    modo_original = simulador_red.MODO_FISICO
+    # Medio en bytes para que el costo medido sea el de la traza y no el de la capa física
+    simulador_red.MODO_FISICO = "bytes"
+    try:
+        pc1, pc2, router, switch1, switch2 = simulador_red.configurar_red()
+        for nivel in (NIVEL_BITS, NIVEL_CAPAS, NIVEL_RESUMEN, NIVEL_APAGADO):
+            with _silenciar(nivel):
+                tasa = _medir(lambda: pc1.enviar_mensaje(mensaje, simulador_red.PC2_IP, **UDP), repeticiones)
+            print(f"  {NOMBRES_NIVEL[nivel]:>8} {tasa:>10.0f} mensajes/s")
+            resultados[NOMBRES_NIVEL[nivel]] = tasa
+    finally:
+        simulador_red.MODO_FISICO = modo_original
+    return resultados
+
+
+# Tabla de rutas: "cantidad" prefijos aleatorios (mayoría /24, como una tabla de Internet,
+# más /8../23 y /25../32) y la ruta por defecto. Compara la búsqueda por prefijo más largo
+# del trie con una búsqueda lineal sobre la misma tabla (búsquedas/s).
+def bench_rutas(cantidad=100000, busquedas=100000, busquedas_lineales=20, semilla=0):
+    print(f"\n== Tabla de {cantidad} rutas: búsquedas/s ==")
+    azar = random.Random(semilla)
+    longitudes = [24] * 6 + list(range(8, 24)) + list(range(25, 33))
+    rutas = [(0, 0, "defecto")]
+    for i in range(cantidad):
+        longitud = azar.choice(longitudes)
+        red = azar.getrandbits(32) & ((0xFFFFFFFF << (32 - longitud)) & 0xFFFFFFFF)
+        rutas.append((red, longitud, i))
+
+    inicio = time.perf_counter()
+    trie = TrieRutas()
+    for red, longitud, valor in rutas:
+        trie.insertar((red, longitud), valor)
+    construccion = time.perf_counter() - inicio
+
+    # Destinos: la mitad dentro de prefijos de la tabla, la otra mitad al azar
+    destinos = []
+    for _ in range(busquedas):
+        if azar.random() < 0.5:
+            red, longitud, _ = azar.choice(rutas)
+            destinos.append(red | (azar.getrandbits(32) >> longitud if longitud else azar.getrandbits(32)))
+        else:
+            destinos.append(azar.getrandbits(32))
+
+    # Con prefijos repetidos gana el último insertado; la búsqueda lineal debe hacer lo mismo
+    unicas = list({(red, longitud): (red, longitud, valor) for red, longitud, valor in rutas}.values())
+    for ip in destinos[:busquedas_lineales]:
+        assert trie.buscar(ip) == busqueda_lineal(unicas, ip), ip
+
+    buscar = trie.buscar
+    inicio = time.perf_counter()
+    for ip in destinos:
+        buscar(ip)
+    tasa_trie = busquedas / (time.perf_counter() - inicio)
+    inicio = time.perf_counter()
+    for ip in destinos[:busquedas_lineales]:
+        busqueda_lineal(unicas, ip)
+    tasa_lineal = busquedas_lineales / (time.perf_counter() - inicio)
+
+    print(f"  construcción del trie: {construccion:.2f} s")
+    print(f"  trie: {tasa_trie:>12.0f}   lineal: {tasa_lineal:>10.1f}   ({tasa_trie / tasa_lineal:.0f}x)")
+    return {"construccion_s": construccion, "trie": tasa_trie, "lineal": tasa_lineal}
+
+
+# Tabla MAC de switch: aprendizaje de "cantidad" MACs distintas (rotación de hosts) con
+# capacidad acotada; la tabla no pasa de "capacidad" entradas (operaciones/s)
+def bench_tabla_mac(cantidad=1000000, capacidad=8192):
+    print(f"\n== Tabla MAC ({cantidad} MACs distintas, capacidad {capacidad}): operaciones/s ==")
+    reloj = [0.0]
+    tabla = TablaMAC(lambda: reloj[0], capacidad, envejecimiento=60.0)
+    macs = [f"{i:012x}" for i in range(cantidad)]
+    inicio = time.perf_counter()
+    for i, mac in enumerate(macs):
+        reloj[0] = i * 1e-4
+        tabla.aprender(mac, i & 0xF)
+    aprender = cantidad / (time.perf_counter() - inicio)
+    assert len(tabla) <= capacidad
+    inicio = time.perf_counter()
+    for mac in macs[-capacidad:] * (cantidad // capacidad):
+        tabla.buscar(mac)
+    buscar = capacidad * (cantidad // capacidad) / (time.perf_counter() - inicio)
+    print(f"  aprender: {aprender:>10.0f}   buscar: {buscar:>10.0f}   entradas: {len(tabla)} "
+          f"(desalojadas {tabla.desalojadas}, caducadas {tabla.caducadas})")
+    return {"aprender": aprender, "buscar": buscar, "entradas": len(tabla)}
+
+
+# Construcción de topologías generadas (hoja-espina y aleatoria) de ~1k y ~10k nodos:
+# tiempo de generar la descripción, de construir dispositivos y tablas, y memoria pico
+def bench_topologia():
+    print("\n== Construcción de topologías ==")
+    print(f"{'topología':>28} {'nodos':>7} {'generar (s)':>12} {'construir (s)':>14} {'memoria (MB)':>13} {'B/nodo':>7}")
+    casos = (
+        ("hoja-espina 10x4x96", lambda: generar_hoja_espina(10, 4, 96)),
+        ("hoja-espina 100x4x96", lambda: generar_hoja_espina(100, 4, 96)),
+        ("aleatoria 100 routers x 8", lambda: generar_aleatoria(100, 50, 8)),
+        ("aleatoria 1000 routers x 8", lambda: generar_aleatoria(1000, 500, 8)),
+    )
+    resultados = []
+    for nombre, generar in casos:
+        inicio = time.perf_counter()
+        descripcion = generar()
+        generacion = time.perf_counter() - inicio
+        inicio = time.perf_counter()
+        red = construir_topologia(descripcion)
+        construccion = time.perf_counter() - inicio
+        nodos = len(red)
+        del red
+        # La memoria se mide en una segunda construcción (tracemalloc enlentece la primera medición)
+        tracemalloc.start()
+        red = construir_topologia(descripcion)
+        memoria = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        del red
+        print(f"{nombre:>28} {nodos:>7} {generacion:>12.2f} {construccion:>14.2f}"
+              f" {memoria / 1e6:>13.1f} {memoria // nodos:>7}")
+        resultados.append({"topologia": nombre, "nodos": nodos, "generar_s": generacion,
+                           "construir_s": construccion, "memoria_bytes": memoria})
+    return resultados
+
+
+# Memoria por dispositivo en topologías hoja-espina de ~1k, ~10k y ~100k nodos (2 espinas,
+# hojas con 240 PCs): bytes por nodo tras construir la red y tras compilar todas las FIB
+def bench_memoria(hojas=(4, 41, 413)):
+    print("\n== Memoria por dispositivo ==")
+    print(f"{'nodos':>8} {'construir (s)':>14} {'B/nodo':>8} {'B/nodo con FIB':>15}")
+    resultados = []
+    for cantidad in hojas:
+        descripcion = generar_hoja_espina(cantidad, 2, 240)
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        red = construir_topologia(descripcion)
+        construccion = time.perf_counter() - inicio
+        memoria = tracemalloc.get_traced_memory()[0]
+        for dispositivo in red:
+            dispositivo.fib()
+        memoria_fib = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        nodos = len(red)
+        del red
+        print(f"{nodos:>8} {construccion:>14.2f} {memoria // nodos:>8} {memoria_fib // nodos:>15}")
+        resultados.append({"nodos": nodos, "construir_s": construccion,
+                           "bytes_por_nodo": memoria / nodos, "bytes_por_nodo_fib": memoria_fib / nodos})
+    return resultados
+
+
+# Escalado: mensajes UDP entre PCs al azar (uno cada 10 us) sobre topologías generadas cada
+# vez más grandes. Tiempo de construcción, mensajes/s y eventos/s de la simulación, y
+# entregados (algunos se pierden mientras los routers resuelven ARP).
+def bench_escalado(mensajes=20000, semilla=0):
+    print(f"\n== Escalado del reenvío ({mensajes} mensajes entre PCs al azar) ==")
+    print(f"{'topología':>28} {'nodos':>7} {'construir (s)':>14} {'mensajes/s':>11} {'eventos/s':>10} {'entregados':>11}")
+    casos = (
+        ("hoja-espina 4x2x24", generar_hoja_espina(4, 2, 24)),
+        ("hoja-espina 40x2x24", generar_hoja_espina(40, 2, 24)),
+        ("hoja-espina 400x2x24", generar_hoja_espina(400, 2, 24)),
+        ("aleatoria 200 routers x 8", generar_aleatoria(200, 100, 8)),
+    )
+    modo_original = simulador_red.MODO_FISICO
+    simulador_red.MODO_FISICO = "bytes"
+    resultados = []
+    try:
+        for nombre, descripcion in casos:
+            pcs = descripcion["pcs"]
+            azar = random.Random(semilla)
+            envios = [(i * 1e-5, azar.choice(pcs)["nombre"], azar.choice(pcs)["ip"], "x" * 100, "UDP",
+                       simulador_red.UDP_PORT, "GENERICA") for i in range(mensajes)]
+            planificador = Planificador()
+            inicio = time.perf_counter()
+            red = construir_topologia(descripcion, planificador)
+            construccion = time.perf_counter() - inicio
+            with _silenciar():
+                inicio = time.perf_counter()
+                trafico.reproducir(red, planificador, envios)
+                planificador.ejecutar()
+                duracion = time.perf_counter() - inicio
+            entregados = sum(dispositivo.metricas.entregados for dispositivo in red)
+            print(f"{nombre:>28} {len(red):>7} {construccion:>14.2f} {mensajes / duracion:>11.0f}"
+                  f" {planificador.eventos_procesados / duracion:>10.0f} {entregados:>11}")
+            resultados.append({"topologia": nombre, "nodos": len(red), "construir_s": construccion,
+                               "mensajes_por_segundo": mensajes / duracion,
+                               "eventos_por_segundo": planificador.eventos_procesados / duracion,
+                               "entregados": entregados})
+            del red
+    finally:
+        simulador_red.MODO_FISICO = modo_original
+    return resultados
+
+
+# Simulación en paralelo: la misma carga (mensajes entre PCs al azar sobre una hoja-espina)
+# en un proceso y repartida en 1, 2, 4, ... procesos; tiempo real y aceleración. Se
+# verifica que cada variante entregue los mismos mensajes y procese los mismos eventos.
+def bench_paralelo(procesos=(1, 2, 4, 8), mensajes=20000, semilla=0):
+    nucleos = os.cpu_count() or 1
+    print(f"\n== Simulación en paralelo ({mensajes} mensajes, {nucleos} núcleos disponibles) ==")
+    descripcion = generar_hoja_espina(16, 2, 30)
+    pcs = descripcion["pcs"]
+    azar = random.Random(semilla)
+    envios = [(i * 1e-5, azar.choice(pcs)["nombre"], azar.choice(pcs)["ip"], "x" * 100)
+              for i in range(mensajes)]
+
+    def entregados(resultado):
+        return sum(metricas["entregados"] for metricas in resultado["metricas"].values())
+
+    inicio = time.perf_counter()
+    referencia = simular_secuencial(descripcion, envios, modo_fisico="bytes")
+    secuencial = time.perf_counter() - inicio
+    print(f"  {'secuencial':>12}: {secuencial:>7.2f} s   ({referencia['eventos']} eventos)")
+    resultados = {"secuencial_s": secuencial, "nucleos": nucleos}
+    for cantidad in procesos:
+        inicio = time.perf_counter()
+        resultado = simular_en_paralelo(descripcion, envios, cantidad, modo_fisico="bytes")
+        duracion = time.perf_counter() - inicio
+        assert entregados(resultado) == entregados(referencia)
+        assert resultado["eventos"] == referencia["eventos"]
+        print(f"  {cantidad:>3} procesos: {duracion:>7.2f} s   aceleración {secuencial / duracion:>5.2f}x"
+              f"   ({resultado['ventanas']} ventanas)")
+        resultados[cantidad] = duracion
+    return resultados
+
+
+# Ejecución asíncrona: PC1 -> PC2 y PC2 -> PC1 a la vez (se verifica que lleguen todos),
+# y un flujo por PC hacia PCs al azar en una hoja-espina con colas de distinta capacidad:
+# duración (incluye las esperas de ARP cuando una solicitud se descartó), entregados,
+# descartes por cola llena y envíos que esperaron por contrapresión.
+def bench_asincrono(mensajes=2000, capacidades=(4, 64, 1024), semilla=0):
+    print(f"\n== Ejecución asíncrona ({mensajes} mensajes por flujo) ==")
+    modo_original = simulador_red.MODO_FISICO
+    simulador_red.MODO_FISICO = "bytes"
+    resultados = {}
+    try:
+        with _silenciar():
+            inicio = time.perf_counter()
+            pc1, pc2 = asyncio.run(ambos_sentidos("x" * 100, mensajes))
+            duracion = time.perf_counter() - inicio
+        assert pc1.metricas.entregados == pc2.metricas.entregados == mensajes
+        print(f"  PC1 <-> PC2 a la vez: {2 * mensajes / duracion:>10.0f} mensajes/s")
+        resultados["ambos_sentidos"] = 2 * mensajes / duracion
+
+        descripcion = generar_hoja_espina(4, 2, 10)
+        pcs = descripcion["pcs"]
+        destinos = [random.Random(semilla + i).choice(pcs)["ip"] for i in range(len(pcs))]
+
+        async def flujos(capacidad):
+            async with EjecucionAsincrona(capacidad) as ejecucion:
+                red = construir_topologia(descripcion, ejecucion)
+                await asyncio.gather(*(ejecucion.enviar(red[pc["nombre"]], ["x" * 100] * (mensajes // 10), ip, **UDP)
+                                       for pc, ip in zip(pcs, destinos)))
+                await ejecucion.esperar()
+                return red, ejecucion.esperas
+
+        for capacidad in capacidades:
+            with _silenciar():
+                inicio = time.perf_counter()
+                red, esperas = asyncio.run(flujos(capacidad))
+                duracion = time.perf_counter() - inicio
+            entregados = sum(dispositivo.metricas.entregados for dispositivo in red)
+            llena = sum(dispositivo.metricas.descartes.get("cola_llena", 0) for dispositivo in red)
+            total = len(pcs) * (mensajes // 10)
+            print(f"  {len(pcs)} flujos, cola de {capacidad:>4}: {duracion:>6.2f} s   entregados {entregados}/{total}"
+                  f"   cola llena {llena}   esperas {esperas}")
+            resultados[capacidad] = {"segundos": duracion, "entregados": entregados,
+                                     "cola_llena": llena, "esperas": esperas}
+    finally:
+        simulador_red.MODO_FISICO = modo_original
+    return resultados
+
+
+# Modelo de enlace: costo de Enlace.transmitir por trama (tramas/s) y un cuello de botella
+# de 10 Mbit/s entre Router1 y Switch2 saturado desde PC1. Se verifica que el enlace quede
+# ocupado todo el tiempo y que lo entregado coincida con su capacidad. Con corromper=True
+# las tramas descartadas por FCS deben ser las esperables para la ber.
+def bench_enlaces(tramas=1000000, mensajes=20000, tamano=1000, ber=1e-5):
+    print("\n== Modelo de enlace ==")
+    resultados = {}
+    for nombre, parametros in (("ideal", {}),
+                               ("1 Gbit/s, cola 100", {"ancho_banda": 1e9, "cola": 100}),
+                               ("1 Gbit/s, ber 1e-7", {"ancho_banda": 1e9, "cola": 100, "ber": 1e-7, "semilla": 0})):
+        enlace = Enlace(retardo=1e-3, **parametros)
+        transmitir = enlace.transmitir
+        inicio = time.perf_counter()
+        for i in range(tramas):
+            transmitir(i * 1.3e-6, 150)
+        tasa = tramas / (time.perf_counter() - inicio)
+        print(f"  Enlace.transmitir {nombre:<20} {tasa:>12.0f} tramas/s")
+        resultados[nombre] = tasa
+
+    modo_original = simulador_red.MODO_FISICO
+    simulador_red.MODO_FISICO = "bytes"
+    try:
+        planificador = Planificador()
+        pc1, pc2, router, switch1, switch2 = simulador_red.configurar_red(planificador)
+        router.conectar("if_der", switch2, "puerto2", ancho_banda=10e6, retardo=1e-3, cola=100)
+        # PC1 envía al doble de la capacidad del cuello de botella
+        intervalo = tamano * 8 / 10e6 / 2
+        for i in range(mensajes):
+            planificador.programar_en(i * intervalo, pc1.enviar_mensaje, "x" * tamano,
+                                       simulador_red.PC2_IP, "UDP", simulador_red.UDP_PORT)
+        with _silenciar():
+            inicio = time.perf_counter()
+            planificador.ejecutar()
+            duracion = time.perf_counter() - inicio
+        enlace = router.enlaces["if_der"]
+        entregados = pc2.metricas.entregados
+        # Lo que cabe en el enlace mientras PC1 envía, más lo que quedó en la cola
+        esperados = 10e6 * mensajes * intervalo / (enlace.bytes / enlace.tramas * 8) + 100
+        assert abs(entregados - esperados) <= 0.01 * esperados
+        assert enlace.utilizacion(mensajes * intervalo) > 0.98
+        print(f"  Cuello de botella 10 Mbit/s: {entregados}/{mensajes} entregados, "
+              f"{enlace.descartes.get('cola_enlace_llena', 0)} descartes por cola llena, "
+              f"utilización {enlace.utilizacion(mensajes * intervalo):.3f}, "
+              f"{planificador.eventos_procesados / duracion:.0f} eventos/s")
+        resultados["cuello_de_botella"] = {"entregados": entregados, "eventos_s": planificador.eventos_procesados / duracion}
+
+        # Bits errados de verdad: el receptor (Switch2) descarta las tramas con FCS inválido
+        planificador = Planificador()
+        pc1, pc2, router, switch1, switch2 = simulador_red.configurar_red(planificador)
+        router.conectar("if_der", switch2, "puerto2", ber=ber, semilla=1, corromper=True)
+        # Un mensaje previo resuelve las MACs por ARP, así ningún mensaje espera en la cola de ARP
+        for i in range(mensajes + 1):
+            planificador.programar_en(0.1 + i * 1e-5 if i else 0.0, pc1.enviar_mensaje, "x" * tamano,
+                                       simulador_red.PC2_IP, "UDP", simulador_red.UDP_PORT)
+        with _silenciar():
+            inicio = time.perf_counter()
+            planificador.ejecutar()
+            duracion = time.perf_counter() - inicio
+        enlace = router.enlaces["if_der"]
+        invalidas = switch2.metricas.descartes.get("fcs_invalido", 0)
+        # Cada trama que cruzó el enlace se entregó o se descartó por FCS, salvo la solicitud
+        # ARP que obtuvo respuesta
+        assert pc2.metricas.entregados + invalidas == enlace.tramas - 1
+        esperadas = enlace.tramas * -math.expm1((enlace.bytes / enlace.tramas + 4) * 8 * math.log1p(-ber))
+        assert abs(invalidas - esperadas) <= 5 * math.sqrt(esperadas)
+        print(f"  Enlace con ber {ber:g} y FCS: {invalidas} tramas con FCS inválido (esperadas {esperadas:.0f}), "
+              f"{enlace.canal.errores} bits errados, {mensajes / duracion:.0f} mensajes/s")
+        resultados["fcs"] = {"invalidas": invalidas, "mensajes_s": mensajes / duracion}
+    finally:
+        simulador_red.MODO_FISICO = modo_original
+    return resultados
+
+
+# TCP: PC1 envía "mensajes" de "tamano" bytes a PC2 por un cuello de botella de 10 Mbit/s
+# entre Router1 y Switch2 (en ambos sentidos, con 20 ms de propagación): goodput (bytes de
+# la aplicación entregados por segundo simulado) con Reno y CUBIC, sin y con pérdidas, y
+# con distintas ventanas de recepción. Se verifica que lleguen todos los mensajes.
+def bench_tcp(mensajes=5000, tamano=1000):
+    print(f"\n== TCP PC1 -> PC2 por 10 Mbit/s, 20 ms ({mensajes} mensajes de {tamano} bytes) ==")
+    resultados = {}
+    modo_original, ventana_original = simulador_red.MODO_FISICO, transporte.VENTANA_RECEPCION
+    simulador_red.MODO_FISICO = "bytes"
+    escenarios = [(control, perdida, 65535) for perdida in (0.0, 0.01) for control in ("reno", "cubic")]
+    escenarios += [("cubic", 0.0, ventana) for ventana in (16384, 32768)]
+    try:
+        for control, perdida, ventana in escenarios:
+            transporte.VENTANA_RECEPCION = ventana
+            planificador = Planificador()
+            pc1, pc2, router, switch1, switch2 = simulador_red.configurar_red(planificador)
+            enlace = {"ancho_banda": 10e6, "retardo": 0.02, "cola": 100, "perdida": perdida, "semilla": 0}
+            router.conectar("if_der", switch2, "puerto2", **enlace)
+            switch2.conectar("puerto2", router, "if_der", **enlace)
+            pc1.tcp = PilaTCP(pc1, control=control)
+            with _silenciar():
+                inicio = time.perf_counter()
+                for _ in range(mensajes):
+                    pc1.enviar_mensaje("x" * tamano, simulador_red.PC2_IP)
+                planificador.ejecutar()
+                duracion = time.perf_counter() - inicio
+            assert pc2.metricas.entregados == mensajes
+            estadisticas = pc1.tcp.instantanea()
+            goodput = mensajes * tamano * 8 / planificador.ahora
+            print(f"  {control:>5}, pérdida {perdida:<4}, ventana {ventana:>6}: {goodput / 1e6:>6.2f} Mbit/s"
+                  f"   retransmisiones {estadisticas['retransmitidos']:>4}   vencimientos {estadisticas['timeouts']:>3}"
+                  f"   ({duracion:.2f} s reales)")
+            resultados[f"{control}/{perdida}/{ventana}"] = {
+                "goodput_bps": goodput, "retransmisiones": estadisticas["retransmitidos"],
+                "vencimientos": estadisticas["timeouts"]}
+    finally:
+        simulador_red.MODO_FISICO, transporte.VENTANA_RECEPCION = modo_original, ventana_original
+    return resultados
+
+
+# Mensajes grandes: un mensaje de "tamano" bytes PC1 -> PC2 por enlaces de 100 Mbit/s con
+# MTU simulador_red.MTU. Con TCP el mensaje sale en segmentos de MSS bytes; con UDP el
+# paquete se fragmenta y PC2 lo reensambla. Se verifica que llegue sin que el enlace
+# descarte tramas por MTU, y se mide el pico de memoria (tracemalloc) y las tramas en el medio.
+def bench_mensajes_grandes(tamanos=(65536, 1048576, 4194304)):
+    print(f"\n== Mensajes grandes PC1 -> PC2 con MTU {simulador_red.MTU} ==")
+    print(f"{'tamaño (B)':>12} {'protocolo':>10} {'codec':>8} {'tramas':>8} {'B/trama':>8}"
+          f" {'pico (MB)':>10} {'tiempo (s)':>11}")
+    resultados = []
+    modo_original, codec_original = simulador_red.MODO_FISICO, simulador_red.CODEC
+    simulador_red.MODO_FISICO = "bytes"
+    try:
+        for tamano in tamanos:
+            for protocolo in ("TCP", "UDP"):
+                for codec in ("texto", "binario"):
+                    simulador_red.CODEC = codec
+                    planificador = Planificador()
+                    pc1, pc2, router, switch1, switch2 = simulador_red.configurar_red(planificador)
+                    enlace = {"ancho_banda": 100e6, "retardo": 0.001, "mtu": simulador_red.MTU}
+                    pc1.conectar("eth0", switch1, "puerto1", **enlace)
+                    router.conectar("if_der", switch2, "puerto2", **enlace)
+                    argumentos = UDP if protocolo == "UDP" else {}
+                    with _silenciar():
+                        # Primero un mensaje corto: resuelve ARP en cada salto (la cola de
+                        # espera de ARP es de ARP_MAX_PENDIENTES paquetes, no alcanza para
+                        # todos los fragmentos)
+                        pc1.enviar_mensaje("x", simulador_red.PC2_IP, **argumentos)
+                        planificador.ejecutar()
+                        mensaje = "x" * tamano
+                        tracemalloc.start()
+                        inicio = time.perf_counter()
+                        pc1.enviar_mensaje(mensaje, simulador_red.PC2_IP, **argumentos)
+                        planificador.ejecutar()
+                        duracion = time.perf_counter() - inicio
+                        pico = tracemalloc.get_traced_memory()[1]
+                        tracemalloc.stop()
+                    medio = router.enlaces["if_der"]
+                    assert pc2.metricas.entregados == 2
+                    assert not medio.descartes and not pc1.enlaces["eth0"].descartes
+                    fila = {"tamano": tamano, "protocolo": protocolo, "codec": codec, "tramas": medio.tramas,
+                            "bytes_por_trama": medio.bytes / medio.tramas, "pico_bytes": pico,
+                            "segundos": duracion}
+                    print(f"{tamano:>12} {protocolo:>10} {codec:>8} {medio.tramas:>8}"
+                          f" {fila['bytes_por_trama']:>8.0f} {pico / 1e6:>10.1f} {duracion:>11.2f}")
+                    resultados.append(fila)
+    finally:
+        simulador_red.MODO_FISICO, simulador_red.CODEC = modo_original, codec_original
+    return resultados
+
+
+# Sockets: PC2 tiene "puertos" servidores de eco UDP y PC1 les envía pedidos repartidos entre
+# todos; el despacho por la tabla de puertos no debería depender de cuántos hay. Después,
+# "clientes" sockets TCP de PC1 hacen pedido/respuesta en lazo cerrado (cada respuesta
+# dispara el pedido siguiente) contra un servidor en PC2. Se verifica que lleguen todas las
+# respuestas.
+def bench_sockets(pedidos=20000, puertos=(1, 100, 10000), clientes=(1, 16), transacciones=2000):
+    print("\n== Sockets: pedido/respuesta PC1 <-> PC2 ==")
+    resultados = {}
+    modo_original = simulador_red.MODO_FISICO
+    simulador_red.MODO_FISICO = "bytes"
+    try:
+        for cantidad in puertos:
+            planificador = Planificador()
+            pc1, pc2, router, switch1, switch2 = simulador_red.configurar_red(planificador)
+            for puerto in range(1000, 1000 + cantidad):
+                pc2.socket("UDP", puerto, al_recibir=lambda socket, recibido: socket.responder(recibido, "ok"))
+            # Las respuestas solo se cuentan (socket.recibidos)
+            cliente = pc1.socket("UDP", al_recibir=lambda socket, recibido: None)
+            with _silenciar():
+                cliente.enviar("x", simulador_red.PC2_IP, 1000)  # resuelve ARP
+                planificador.ejecutar()
+                inicio = time.perf_counter()
+                for i in range(pedidos):
+                    cliente.enviar("x" * 100, simulador_red.PC2_IP, 1000 + i % cantidad)
+                    if i % 50 == 49:
+                        planificador.ejecutar()
+                planificador.ejecutar()
+                duracion = time.perf_counter() - inicio
+            assert cliente.recibidos == pedidos + 1
+            tasa = pedidos / duracion
+            print(f"  UDP eco, {cantidad:>6} puertos en PC2: {tasa:>10.0f} pedidos/s")
+            resultados[f"udp/{cantidad}"] = tasa
+
+        for cantidad in clientes:
+            planificador = Planificador()
+            pc1, pc2, router, switch1, switch2 = simulador_red.configurar_red(planificador)
+            pc2.socket("TCP", simulador_red.TCP_PORT, al_recibir=lambda socket, recibido: socket.responder(recibido, "ok"))
+            restantes = [transacciones]
+
+            def siguiente(socket, recibido):
+                if restantes[0] > 0:
+                    restantes[0] -= 1
+                    socket.enviar("x" * 100, simulador_red.PC2_IP, simulador_red.TCP_PORT)
+
+            sockets = [pc1.socket("TCP", al_recibir=siguiente) for _ in range(cantidad)]
+            with _silenciar():
+                inicio = time.perf_counter()
+                for socket in sockets:
+                    siguiente(socket, None)
+                planificador.ejecutar()
+                duracion = time.perf_counter() - inicio
+            assert sum(socket.recibidos for socket in sockets) == transacciones
+            por_segundo = transacciones / planificador.ahora
+            print(f"  TCP pedido/respuesta, {cantidad:>3} clientes: {por_segundo:>8.0f} transacciones/s simuladas"
+                  f"   {transacciones / duracion:>8.0f} transacciones/s reales")
+            resultados[f"tcp/{cantidad}"] = {"simuladas": por_segundo, "reales": transacciones / duracion}
+    finally:
+        simulador_red.MODO_FISICO = modo_original
+    return resultados
+
+
+# Tráfico: envíos/s que genera cada fuente (sin simular) y pico de memoria, que no debe
+# crecer con la cantidad de envíos. Después se reproducen "mensajes" envíos Poisson por
+# configurar_red(), dos veces con la misma semilla, y se verifica que den lo mismo.
+def bench_trafico(envios=1000000, mensajes=20000, semilla=0):
+    print(f"\n== Generador de tráfico ({envios} envíos) ==")
+    resultados = {}
+    fuentes = {
+        "CBR": trafico.CBR(10e6, 1000),
+        "Poisson": trafico.Poisson(1e5, trafico.tamano_pareto(1.2, 64, 65536)),
+        "encendido/apagado": trafico.EncendidoApagado(1e5, trafico.tamano_lognormal(6, 1, 65536), 0.01, 0.01,
+                                                      alfa=1.5),
+    }
+    for nombre, fuente in fuentes.items():
+        flujos = [trafico.Flujo("PC1", simulador_red.PC2_IP, fuente, cantidad=envios)]
+        tracemalloc.start()
+        inicio = time.perf_counter()
+        cantidad = sum(1 for _ in trafico.envios(flujos, semilla))
+        duracion = time.perf_counter() - inicio
+        pico = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        assert cantidad == envios
+        print(f"  {nombre:<18} {cantidad / duracion:>10.0f} envíos/s   pico {pico / 1e3:>8.1f} kB")
+        resultados[nombre] = {"envios_por_segundo": cantidad / duracion, "pico_bytes": pico}
+
+    modo_original = simulador_red.MODO_FISICO
+    simulador_red.MODO_FISICO = "bytes"
+    try:
+        corridas = []
+        for _ in range(2):
+            planificador = Planificador()
+            pc1, pc2, router, switch1, switch2 = simulador_red.configurar_red(planificador)
+            flujos = [trafico.Flujo("PC1", simulador_red.PC2_IP, fuentes["Poisson"], cantidad=mensajes // 2),
+                      trafico.Flujo("PC2", simulador_red.PC1_IP, fuentes["encendido/apagado"],
+                                    cantidad=mensajes // 2)]
+            with _silenciar():
+                inicio = time.perf_counter()
+                reproduccion = trafico.reproducir({"PC1": pc1, "PC2": pc2}, planificador,
+                                                  trafico.envios(flujos, semilla))
+                planificador.ejecutar()
+                duracion = time.perf_counter() - inicio
+            corridas.append((reproduccion.instantanea(), pc1.metricas.instantanea()["descartes"],
+                             pc2.metricas.entregados, pc1.metricas.entregados, planificador.ahora))
+        assert corridas[0] == corridas[1]
+        print(f"  reproducción por configurar_red: {mensajes / duracion:>8.0f} mensajes/s"
+              f"   ({corridas[0][2] + corridas[0][3]} entregados, misma corrida con la misma semilla)")
+        resultados["reproduccion"] = mensajes / duracion
+    finally:
+        simulador_red.MODO_FISICO = modo_original
+    return resultados
+
+
+# Captura: mensajes/s PC1 -> PC2 sin capturar y capturando todas las interfaces de la red en
+# pcap y pcapng. Después se inyectan en Switch1 las tramas que envió PC1 (leídas del pcapng)
+# y se verifica que a PC2 le lleguen los mismos mensajes.
+def bench_captura(mensajes=20000, tamano=1000):
+    print(f"\n== Captura pcap/pcapng ({mensajes} mensajes de {tamano} bytes) ==")
+    resultados = {}
+    modo_original, codec_original = simulador_red.MODO_FISICO, simulador_red.CODEC
+    mensaje = "x" * tamano
+    try:
+        with tempfile.TemporaryDirectory() as directorio:
+            for codec in ("texto", "binario"):
+                simulador_red.MODO_FISICO, simulador_red.CODEC = "bytes", codec
+                for formato in (None, "pcap", "pcapng"):
+                    planificador = Planificador()
+                    red = simulador_red.configurar_red(planificador)
+                    pc1, pc2 = red[0], red[1]
+                    ruta = os.path.join(directorio, f"{codec}.{formato}")
+                    with _silenciar():
+                        inicio = time.perf_counter()
+                        with (captura.Captura(ruta) if formato else contextlib.nullcontext()) as archivo:
+                            for dispositivo in red if formato else ():
+                                archivo.agregar(dispositivo)
+                            # Un primer mensaje resuelve ARP antes de la ráfaga (el router guarda
+                            # hasta ARP_MAX_PENDIENTES paquetes por IP mientras resuelve)
+                            pc1.enviar_mensaje("x", simulador_red.PC2_IP, **UDP)
+                            planificador.ejecutar()
+                            for _ in range(mensajes):
+                                pc1.enviar_mensaje(mensaje, simulador_red.PC2_IP, **UDP)
+                            planificador.ejecutar()
+                        duracion = time.perf_counter() - inicio
+                    assert pc2.metricas.entregados == mensajes + 1
+                    nombre = formato or "sin captura"
+                    detalle = f"   {archivo.tramas} tramas, {os.path.getsize(ruta) / 1e6:.1f} MB" if formato else ""
+                    print(f"  CODEC={codec!r:10} {nombre:<12} {mensajes / duracion:>8.0f} mensajes/s{detalle}")
+                    resultados[f"{codec}/{nombre}"] = mensajes / duracion
+
+                planificador = Planificador()
+                pc1, pc2, router, switch1, switch2 = simulador_red.configurar_red(planificador)
+                puerto = next(nombre for nombre, (vecino, _) in switch1.conexiones.items() if vecino is pc1)
+                with _silenciar():
+                    inicio = time.perf_counter()
+                    inyeccion = captura.inyectar(os.path.join(directorio, f"{codec}.pcapng"), switch1, puerto,
+                                                 planificador, interfaz="PC1.eth0")
+                    planificador.ejecutar()
+                    duracion = time.perf_counter() - inicio
+                assert pc2.metricas.entregados == mensajes + 1
+                print(f"  CODEC={codec!r:10} inyección    {inyeccion.inyectadas / duracion:>8.0f} tramas/s"
+                      f"   ({pc2.metricas.entregados} entregados)")
+                resultados[f"{codec}/inyeccion"] = inyeccion.inyectadas / duracion
+    finally:
+        simulador_red.MODO_FISICO, simulador_red.CODEC = modo_original, codec_original
+    return resultados
+
+
+BENCHMARKS = (bench_capa_fisica, bench_codigos_linea, bench_fisica_vectorial, bench_capas, bench_pila,
+              bench_cabeceras, bench_copias_por_salto, bench_extremo_a_extremo, bench_lotes, bench_trazas,
+              bench_rutas, bench_tabla_mac, bench_topologia, bench_memoria, bench_escalado, bench_paralelo,
+              bench_asincrono, bench_enlaces, bench_tcp, bench_mensajes_grandes, bench_sockets, bench_trafico,
+              bench_captura)
+
+
+# Commit actual (para identificar los resultados), o None fuera de un repositorio git
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Aplana los resultados en {"bench/clave/...": número}. En las listas de filas cada fila se
+# identifica por su tamaño o su topología, así las mismas mediciones de dos corridas coinciden.
+def _aplanar(valor, ruta, salida):
+    if isinstance(valor, dict):
+        for clave, elemento in valor.items():
+            _aplanar(elemento, f"{ruta}/{clave}", salida)
+    elif isinstance(valor, list):
+        for indice, elemento in enumerate(valor):
+            campo = None
+            if isinstance(elemento, dict):
+                campo = next((campo for campo in ("tamano", "topologia", "nodos") if campo in elemento), None)
+            if campo is None:
+                _aplanar(elemento, f"{ruta}/{indice}", salida)
+            else:
+                _aplanar({clave: dato for clave, dato in elemento.items() if clave != campo},
+                         f"{ruta}/{elemento[campo]}", salida)
+    elif isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        salida[ruta] = valor
+    return salida
+
+
+# Compara dos corridas: actual / anterior de cada medición presente en ambas. Con "*" las que
+# cambiaron más que "umbral" (en tasas más es mejor; en tiempos y memoria, menos).
+def comparar(anterior, actual, umbral=0.1):
+    valores_anteriores = _aplanar(anterior["resultados"], "", {})
+    valores_actuales = _aplanar(actual["resultados"], "", {})
+    print(f"\n== Comparación con {anterior.get('commit')} ({anterior.get('fecha')}) ==")
+    print(f"   {'medición':<70} {'anterior':>14} {'actual':>14} {'razón':>8}")
+    for ruta, valor in valores_actuales.items():
+        base = valores_anteriores.get(ruta)
+        if not base:
+            continue
+        razon = valor / base
+        marca = "*" if abs(razon - 1) > umbral else " "
+        print(f" {marca} {ruta[1:]:<70} {base:>14.4g} {valor:>14.4g} {razon:>7.2f}x")
+
+
+def main(argumentos=None):
+    nombres = [bench.__name__ for bench in BENCHMARKS]
+    parser = argparse.ArgumentParser(description="Benchmarks del simulador")
+    parser.add_argument("benchmarks", nargs="*", metavar="bench", help=f"a correr (por defecto todos): {', '.join(nombres)}")
+    parser.add_argument("--json", default="benchmarks.json", help="archivo donde guardar los resultados")
+    parser.add_argument("--comparar", metavar="ANTERIOR", help="resultados JSON de otra corrida para comparar")
+    opciones = parser.parse_args(argumentos)
+    elegidos = [bench for bench in BENCHMARKS if not opciones.benchmarks or bench.__name__ in opciones.benchmarks]
+    desconocidos = set(opciones.benchmarks) - set(nombres)
+    if desconocidos:
+        parser.error(f"benchmarks desconocidos: {', '.join(sorted(desconocidos))}")
+
+    corrida = {
+        "commit": _commit(),
+        "fecha": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "resultados": {},
+    }
+    for bench in elegidos:
+        corrida["resultados"][bench.__name__] = bench()
+    with open(opciones.json, "w", encoding="utf-8") as archivo:
+        json.dump(corrida, archivo, indent=1, ensure_ascii=False)
+    print(f"\nResultados en {opciones.json}")
+    if opciones.comparar:
+        with open(opciones.comparar, encoding="utf-8") as archivo:
+            comparar(json.load(archivo), corrida)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,369 @@
+# ==============================
+# Capas y pilas de protocolos
+# ==============================
+# Capas de texto del simulador (simulador_red.py y encapsulamiento.py las comparten) y
+# Pila, una pila de protocolos armada con una lista ordenada de capas.
+#
+# Cada capa es una clase con encapsular(datos, *campos) y desencapsular(datos), que
+# retorna (datos_interiores, *campos) en el orden de su atributo "campos" (las capas sin
+# campos, como CapaFisica, retornan solo los datos). Si encapsular recibe los campos en
+# otro orden, la capa lo declara en "campos_encapsular". Las capas binarias equivalentes
+# están en codec_binario.py, y las de TCP en transporte.py.
+#
+# Una Pila va de la capa más alta a la más baja y se puede modificar agregando, quitando
+# o reemplazando capas (p. ej. una etiqueta VLAN entre red y enlace, o un encabezado de
+# túnel). Cada modificación crea una Pila nueva, que se compila una sola vez en dos
+# funciones de Python con las llamadas de cada capa escritas una tras otra, así que
+# encapsular o desencapsular un paquete cuesta lo mismo que llamar a las capas a mano.
+#
+# Uso:
+#     pila = CAPAS_TEXTO.con(CapaVLAN, debajo_de=CapaRed)
+#     trama = pila.encapsular("hola", "11", "UDP", 5000, 53, "10.0.0.1", "10.0.0.2", 7, "A", "C")
+#     mensaje, app, protocolo, *resto = pila.desencapsular(trama)
+
+from codec_binario import (CapaAplicacionBinaria, CapaEnlaceBinaria, CapaRedBinaria,
+                           CapaTransporteBinaria)
+from codigos_linea import NRZ
+
+# Bytes de trama por bloque en CapaFisica.codificar_en_bloques/decodificar_en_bloques
+BLOQUE_FISICO = 65536
+
+# Codificación del texto de las tramas en el medio (la misma de Trama y codec_binario)
+CODIFICACION = 'utf-8'
+
+
+# Bytes que ocupan en el medio una trama o una parte de ella: el texto va en UTF-8, y un
+# carácter fuera de ASCII ocupa de 2 a 4 bytes
+def largo_en_bytes(datos):
+    if isinstance(datos, str) and not datos.isascii():
+        return len(datos.encode(CODIFICACION))
+    return len(datos)
+
+
+# Parte de "texto" desde "inicio" que ocupa a lo sumo "maximo" bytes en UTF-8 sin partir
+# ningún carácter. Retorna (caracteres, bytes) de esa parte.
+def cortar_en_bytes(texto, inicio, maximo):
+    if maximo <= 0:
+        return 0, 0
+    trozo = texto[inicio:inicio + maximo]
+    if trozo.isascii():
+        return len(trozo), len(trozo)
+    codificado = trozo.encode(CODIFICACION)
+    if len(codificado) <= maximo:
+        return len(trozo), len(codificado)
+    corte = maximo
+    while codificado[corte] & 0xC0 == 0x80:  # byte de continuación: el carácter empezó antes
+        corte -= 1
+    return len(codificado[:corte].decode(CODIFICACION)), corte
+
+
+class CapaAplicacion:
+    campos = ("app",)
+
+    # Encapsula el mensaje de la aplicación agregando una etiqueta [APP:<codigo>]
+    @staticmethod
+    def encapsular(mensaje, app="GENERICA"):
+        return f"[APP:{app}]" + mensaje
+    
+    # Extrae la cabecera de aplicación y devuelve (payload, app)
+    @staticmethod
+    def desencapsular(datos):
+        if datos.startswith("[APP:"):
+            fin = datos.find(']') + 1  # índice del cierre de la etiqueta
+            app = datos[5:fin-1]       # obtiene el texto entre "APP:" y "]"
+            return datos[fin:], app    # payload sin la cabecera y código de app
+        # Si no viene etiquetado, se asume genérica
+        return datos, "GENERICA"
+
+
+class CapaTransporte:
+    campos = ("protocolo", "puerto_origen", "puerto_destino")
+    campos_encapsular = ("puerto_origen", "puerto_destino", "protocolo")
+
+    # Construye un segmento de transporte con protocolo y puertos: [H4:PROTO:src:dst]
+    @staticmethod
+    def encapsular(datos_app, puerto_origen, puerto_destino, protocolo):
+        encabezado = f"[H4:{protocolo}:{puerto_origen}:{puerto_destino}]"
+        return encabezado + datos_app
+    
+    # Extrae cabecera de transporte y retorna (datos_app, protocolo, puerto_origen, puerto_destino)
+    @staticmethod
+    def desencapsular(segmento):
+        fin = segmento.find(']') + 1        # localiza fin de cabecera
+        encabezado = segmento[:fin]
+        datos_app = segmento[fin:]          # resto es el payload de aplicación
+        partes = encabezado[1:-1].split(':')  # quita [ ] y separa por :
+        protocolo = partes[1]
+        puerto_origen = int(partes[2])
+        puerto_destino = int(partes[3])
+        return datos_app, protocolo, puerto_origen, puerto_destino
+
+
+class CapaRed:
+    campos = ("ip_origen", "ip_destino")
+
+    # Añade cabecera IP simplificada [H3:ip_origen:ip_destino]
+    @staticmethod
+    def encapsular(segmento, ip_origen, ip_destino):
+        return f"[H3:{ip_origen}:{ip_destino}]" + segmento
+    
+    # Quita cabecera IP y retorna (segmento_transporte, ip_origen, ip_destino)
+    @staticmethod
+    def desencapsular(paquete):
+        fin = paquete.find(']') + 1
+        segmento = paquete[fin:]                 # payload de capa 4
+        partes = paquete[1:fin-1].split(':')     # [H3:...]
+        return segmento, partes[1], partes[2]
+
+    # Los fragmentos llevan además identificador, desplazamiento y si siguen más:
+    # [H3:ip_origen:ip_destino:id:desplazamiento:mas]. Retorna esos tres campos, o None si
+    # el paquete está completo.
+    @staticmethod
+    def fragmento(paquete):
+        partes = paquete[1:paquete.find(']')].split(':')
+        if len(partes) < 6:
+            return None
+        return int(partes[3]), int(partes[4]), int(partes[5])
+
+    # Divide un paquete en fragmentos de a lo sumo "tamano_maximo" bytes en UTF-8 (encabezado
+    # incluido), cortando entre caracteres. Como en IP, el desplazamiento cuenta bytes del
+    # segmento. Un fragmento se vuelve a dividir conservando su identificador. Retorna None
+    # si no cabe ni el encabezado con un carácter.
+    @staticmethod
+    def fragmentar(paquete, tamano_maximo, identificador):
+        segmento, ip_origen, ip_destino = CapaRed.desencapsular(paquete)
+        base, mas_final = 0, 0
+        propio = CapaRed.fragmento(paquete)
+        if propio is not None:
+            identificador, base, mas_final = propio
+        fragmentos = []
+        inicio = desplazamiento = 0  # caracteres y bytes del segmento ya fragmentados
+        while inicio < len(segmento):
+            prefijo = f"[H3:{ip_origen}:{ip_destino}:{identificador}:{base + desplazamiento}:"
+            caracteres, carga = cortar_en_bytes(segmento, inicio, tamano_maximo - len(prefijo) - 2)
+            if caracteres <= 0:
+                return None
+            fin = inicio + caracteres
+            mas = 1 if fin < len(segmento) else mas_final
+            fragmentos.append(f"{prefijo}{mas}]" + segmento[inicio:fin])
+            inicio = fin
+            desplazamiento += carga
+        return fragmentos
+
+
+class CapaEnlace:
+    campos = ("mac_origen", "mac_destino")
+
+    # Encapsula en una trama de enlace [H2:mac_origen:mac_destino]
+    @staticmethod
+    def encapsular(paquete, mac_origen, mac_destino):
+        return f"[H2:{mac_origen}:{mac_destino}]" + paquete
+    
+    # Desencapsula la trama de enlace y retorna (paquete_red, mac_origen, mac_destino)
+    @staticmethod
+    def desencapsular(trama):
+        fin = trama.find(']') + 1
+        paquete = trama[fin:]                    # payload de capa 3
+        partes = trama[1:fin-1].split(':')
+        return paquete, partes[1], partes[2]
+
+
+class CapaFisica:
+    # Convierte la trama entera: sin campos, desencapsular retorna solo la trama
+    campos = ()
+
+    # Convierte la cadena (trama) a símbolos del código de línea: la trama se codifica en
+    # UTF-8 y con NRZ cada byte son 8 bits
+    @staticmethod
+    def encapsular(trama, codigo=NRZ):
+        return codigo.codificar(trama.encode(CODIFICACION))
+    
+    # Convierte los símbolos en texto; la cantidad debe formar bytes enteros
+    @staticmethod
+    def desencapsular(simbolos, codigo=NRZ):
+        return str(codigo.decodificar(simbolos), CODIFICACION)
+
+    # Lote de tramas -> lista de cadenas de símbolos, convertidas con una sola llamada al
+    # código de línea
+    @staticmethod
+    def encapsular_lote(tramas, codigo=NRZ):
+        return codigo.codificar_lote([trama.encode(CODIFICACION) for trama in tramas])
+
+    @staticmethod
+    def desencapsular_lote(medios, codigo=NRZ):
+        return [str(datos, CODIFICACION) for datos in codigo.decodificar_lote(medios)]
+
+    # Codifica una trama (str, bytes o memoryview) de a "bloque" caracteres o bytes: genera
+    # cadenas de símbolos sin armar nunca la cadena completa, que con NRZ ocupa 8 veces la trama
+    @staticmethod
+    def codificar_en_bloques(trama, codigo=NRZ, bloque=BLOQUE_FISICO):
+        if isinstance(trama, str):
+            for inicio in range(0, len(trama), bloque):
+                yield codigo.codificar(trama[inicio:inicio + bloque].encode(CODIFICACION))
+            return
+        vista = memoryview(trama)
+        for inicio in range(0, len(vista), bloque):
+            yield codigo.codificar(vista[inicio:inicio + bloque])
+
+    # Decodifica cadenas de símbolos de cualquier largo (p. ej. las de codificar_en_bloques
+    # o lo leído de un archivo): genera bytes de a lo sumo "bloque" bytes. Los símbolos que
+    # no completan un byte pasan al bloque siguiente.
+    @staticmethod
+    def decodificar_en_bloques(bloques, codigo=NRZ, bloque=BLOQUE_FISICO):
+        if isinstance(bloques, str):
+            bloques = (bloques,)
+        por_byte = codigo.simbolos_por_byte
+        ancho = bloque * por_byte
+        pendiente = ''
+        for simbolos in bloques:
+            if pendiente:
+                simbolos = pendiente + simbolos
+            completos = len(simbolos) - len(simbolos) % por_byte
+            pendiente = simbolos[completos:]
+            for inicio in range(0, completos, ancho):
+                yield codigo.decodificar(simbolos[inicio:min(inicio + ancho, completos)])
+        if pendiente:
+            raise ValueError(f"Sobran {len(pendiente)} símbolos {codigo.nombre} al final de la trama")
+
+    # Decodifica en un buffer ya reservado (bytearray o memoryview escribible) y retorna la
+    # cantidad de bytes escritos
+    @staticmethod
+    def decodificar_en(bloques, buffer, codigo=NRZ, bloque=BLOQUE_FISICO):
+        vista = memoryview(buffer)
+        escritos = 0
+        for datos in CapaFisica.decodificar_en_bloques(bloques, codigo, bloque):
+            fin = escritos + len(datos)
+            if fin > len(vista):
+                raise ValueError(f"La trama decodificada no cabe en el buffer ({len(vista)} bytes)")
+            vista[escritos:fin] = datos
+            escritos = fin
+        return escritos
+
+    # Modo binario: la trama en UTF-8, sin expandir a '0'/'1'
+    @staticmethod
+    def encapsular_bytes(trama):
+        return trama.encode(CODIFICACION)
+
+    # Recupera la trama de texto desde bytes/bytearray/memoryview
+    @staticmethod
+    def desencapsular_bytes(datos):
+        return str(datos, CODIFICACION)
+
+    # Convierte bytes a la misma cadena de bits que produce encapsular() (solo para mostrar)
+    @staticmethod
+    def bytes_a_bits(datos):
+        if not datos:
+            return ''
+        return format(int.from_bytes(datos, 'big'), f'0{len(datos) * 8}b')
+
+    # Convierte una cadena de bits (longitud múltiplo de 8) a bytes
+    @staticmethod
+    def bits_a_bytes(bits):
+        if not bits:
+            return b''
+        return int(bits, 2).to_bytes(len(bits) // 8, 'big')
+
+
+# Etiqueta de VLAN (802.1Q simplificado): [VLAN:id], entre las capas de red y de enlace
+class CapaVLAN:
+    campos = ("vlan",)
+
+    @staticmethod
+    def encapsular(paquete, vlan):
+        return f"[VLAN:{vlan}]" + paquete
+
+    # Retorna (paquete, vlan)
+    @staticmethod
+    def desencapsular(trama):
+        fin = trama.find(']') + 1
+        return trama[fin:], int(trama[6:fin - 1])
+
+
+class Pila:
+    # - capas: de la más alta a la más baja, p. ej. (CapaAplicacion, CapaTransporte, ...)
+    # - campos: nombres de los campos de todas las capas en ese orden (los repetidos, como
+    #   las IPs de un túnel, llevan el número de su capa: "ip_origen_3")
+    # - encapsular(datos, *campos) y desencapsular(datos) -> (datos, *campos): funciones
+    #   compiladas para esta lista de capas
+    __slots__ = ("capas", "campos", "encapsular", "desencapsular")
+
+    def __init__(self, capas):
+        self.capas = tuple(capas)
+        nombres = {}
+        for indice, capa in enumerate(self.capas):
+            for campo in capa.campos:
+                nombres[(indice, campo)] = campo if campo not in nombres.values() else f"{campo}_{indice}"
+        self.campos = tuple(nombres.values())
+        self.encapsular, self.desencapsular = _compilar(self.capas, nombres)
+
+    def __repr__(self):
+        return f"Pila({', '.join(capa.__name__ for capa in self.capas)})"
+
+    # Se recorre y se desempaqueta como la tupla de capas:
+    # aplicacion, transporte, red, enlace = CAPAS_TEXTO
+    def __iter__(self):
+        return iter(self.capas)
+
+    def __len__(self):
+        return len(self.capas)
+
+    # Una capa, o una Pila con las capas de un rango (p. ej. pila[:3] para las capas 5..3)
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return Pila(self.capas[indice])
+        return self.capas[indice]
+
+    def _indice(self, capa):
+        try:
+            return self.capas.index(capa)
+        except ValueError:
+            raise ValueError(f"{capa.__name__} no está en {self!r}") from None
+
+    # Pila con "capa" agregada debajo (o encima) de otra, o al final (la más baja)
+    def con(self, capa, debajo_de=None, encima_de=None):
+        if debajo_de is not None:
+            posicion = self._indice(debajo_de) + 1
+        elif encima_de is not None:
+            posicion = self._indice(encima_de)
+        else:
+            posicion = len(self.capas)
+        return Pila(self.capas[:posicion] + (capa,) + self.capas[posicion:])
+
+    # Pila sin "capa"
+    def sin(self, capa):
+        posicion = self._indice(capa)
+        return Pila(self.capas[:posicion] + self.capas[posicion + 1:])
+
+    # Pila con "nueva" en el lugar de "capa"
+    def reemplazar(self, capa, nueva):
+        posicion = self._indice(capa)
+        return Pila(self.capas[:posicion] + (nueva,) + self.capas[posicion + 1:])
+
+
+# Genera el código de encapsular y desencapsular para una lista de capas: una llamada por
+# capa con los campos como variables locales, sin recorrer la lista en cada paquete
+def _compilar(capas, nombres):
+    argumentos = ", ".join(["datos", *nombres.values()])
+    lineas = [f"def encapsular({argumentos}):"]
+    for indice in range(len(capas)):
+        orden = getattr(capas[indice], "campos_encapsular", capas[indice].campos)
+        valores = ", ".join(["datos", *(nombres[(indice, campo)] for campo in orden)])
+        lineas.append(f"    datos = encapsular_{indice}({valores})")
+    lineas.append("    return datos")
+    lineas.append("def desencapsular(datos):")
+    for indice in reversed(range(len(capas))):
+        destino = ", ".join(["datos", *(nombres[(indice, campo)] for campo in capas[indice].campos)])
+        lineas.append(f"    {destino} = desencapsular_{indice}(datos)")
+    lineas.append(f"    return {argumentos}")
+    entorno = {}
+    for indice, capa in enumerate(capas):
+        entorno[f"encapsular_{indice}"] = capa.encapsular
+        entorno[f"desencapsular_{indice}"] = capa.desencapsular
+    nombre = "<pila " + ", ".join(capa.__name__ for capa in capas) + ">"
+    exec(compile("\n".join(lineas), nombre, "exec"), entorno)
+    return entorno["encapsular"], entorno["desencapsular"]
+
+
+# Pilas (aplicación, transporte, red, enlace) de cada codec
+CAPAS_TEXTO = Pila((CapaAplicacion, CapaTransporte, CapaRed, CapaEnlace))
+CAPAS_BINARIAS = Pila((CapaAplicacionBinaria, CapaTransporteBinaria, CapaRedBinaria, CapaEnlaceBinaria))
@@ -0,0 +1,351 @@
+# ==============================
+# Captura de tramas en pcap/pcapng
+# ==============================
+# Una Captura guarda en un archivo .pcap o .pcapng las tramas que los dispositivos envían
+# por las interfaces que se le agregan (enviar_por_interfaz y enviar_lote_por_interfaz),
+# con el tiempo del dispositivo (simulado si hay planificador). Los archivos se pueden
+# abrir con Wireshark o tcpdump:
+#
+# - las tramas de texto se guardan como sus bytes ASCII "[H2:A:C][H3:...]..." con tipo de
+#   enlace LINKTYPE_USER0, y las del codec binario como los bytes de la Trama con
+#   LINKTYPE_USER1 (no son Ethernet/IP reales, ver codec_binario.py). Un pcap tiene un solo
+#   tipo de enlace, el del CODEC al crear la captura; con el codec binario las tramas ARP
+#   siguen siendo de texto y se reconocen al leerlas porque empiezan con "["
+# - en pcapng cada interfaz capturada es una interfaz del archivo ("PC1.eth0"), y las
+#   tramas llevan la marca de salida
+# - cada interfaz puede tener un filtro (función bytes -> bool) y un snaplen
+#
+# Las tramas se acumulan en un buffer y un hilo escribe los bloques llenos en el archivo,
+# así que el disco no frena el envío. leer_captura() recorre un archivo (de este módulo o
+# de otra herramienta) e inyectar() entrega sus tramas a la capa 1 de un dispositivo.
+#
+# Uso:
+#     with Captura("corrida.pcapng") as captura:
+#         captura.agregar(router, "if_der", filtro=lambda datos: b"UDP" in datos)
+#         planificador.ejecutar()
+
+import os
+import queue
+import struct
+import threading
+
+import simulador_red
+from codigos_linea import codigo_linea
+from trama import Trama
+
+LINKTYPE_USER0 = 147      # tramas de texto
+LINKTYPE_USER1 = 148      # tramas del codec binario
+SNAPLEN = 262144          # bytes guardados por trama (como tcpdump)
+TAMANO_BUFFER = 1 << 20   # bytes acumulados antes de pasarlos al hilo escritor
+
+# pcap con tiempos en nanosegundos
+PCAP_MAGICO_NS = 0xA1B23C4D
+PCAP_MAGICO_US = 0xA1B2C3D4
+PCAP_ENCABEZADO = struct.Struct("<IHHiIII")
+PCAP_REGISTRO = struct.Struct("<IIII")
+
+# pcapng: bloques de sección, descripción de interfaz y paquete mejorado
+PCAPNG_SHB = 0x0A0D0D0A
+PCAPNG_IDB = 0x00000001
+PCAPNG_EPB = 0x00000006
+PCAPNG_ORDEN = 0x1A2B3C4D
+OPCION_IF_NAME = 2
+OPCION_IF_TSRESOL = 9
+OPCION_EPB_FLAGS = 2
+SALIENTE = 2              # epb_flags: dirección saliente
+PCAPNG_EPB_CABECERA = struct.Struct("<IIIIIII")
+PCAPNG_LARGO = struct.Struct("<I")
+RELLENOS = (b"", b"\0\0\0", b"\0\0", b"\0")
+
+
+def _relleno(largo):
+    return RELLENOS[largo % 4]
+
+
+def _opcion(codigo, valor):
+    return struct.pack("<HH", codigo, len(valor)) + valor + _relleno(len(valor))
+
+
+# Opciones de cada paquete: epb_flags saliente y fin de opciones
+OPCIONES_EPB = _opcion(OPCION_EPB_FLAGS, struct.pack("<I", SALIENTE)) + struct.pack("<HH", 0, 0)
+
+
+def _bloque(tipo, cuerpo):
+    largo = 12 + len(cuerpo)
+    return struct.pack("<II", tipo, largo) + cuerpo + struct.pack("<I", largo)
+
+
+# Bytes de una trama tal como está en el medio y su tipo de enlace
+def a_bytes(medio):
+    if isinstance(medio, Trama):
+        return medio.vista(), LINKTYPE_USER1
+    if isinstance(medio, str):
+        # Símbolos del código de línea (MODO_FISICO = "bits"): se guardan los bytes de la trama
+        return codigo_linea(simulador_red.CODIGO_LINEA).decodificar(medio), LINKTYPE_USER0
+    return medio, LINKTYPE_USER0
+
+
+class _Interfaz:
+    # Interfaz de un dispositivo agregada a una Captura
+    __slots__ = ("captura", "nombre", "filtro", "snaplen", "indices")
+
+    def __init__(self, captura, nombre, filtro, snaplen):
+        self.captura = captura
+        self.nombre = nombre
+        self.filtro = filtro
+        self.snaplen = snaplen
+        self.indices = {}   # tipo de enlace -> número de interfaz en el pcapng
+
+    def registrar(self, tiempo, medio):
+        datos, enlace = a_bytes(medio)
+        if self.filtro is not None and not self.filtro(datos):
+            return
+        self.captura._escribir(self, tiempo, datos, enlace)
+
+
+class _Escritor(threading.Thread):
+    # Escribe en el archivo los bloques que le pasa la Captura
+    def __init__(self, archivo):
+        super().__init__(daemon=True)
+        self.archivo = archivo
+        self.bloques = queue.SimpleQueue()
+
+    def run(self):
+        while True:
+            bloque = self.bloques.get()
+            if bloque is None:
+                return
+            self.archivo.write(bloque)
+
+
+class Captura:
+    # - ruta: archivo .pcap o .pcapng (formato: "pcap"/"pcapng" para forzarlo)
+    # - hilo: si False, los bloques llenos se escriben en el mismo hilo
+    def __init__(self, ruta, formato=None, tamano_buffer=TAMANO_BUFFER, hilo=True):
+        if formato is None:
+            formato = "pcapng" if os.path.splitext(ruta)[1].lower() == ".pcapng" else "pcap"
+        if formato not in ("pcap", "pcapng"):
+            raise ValueError(f"Formato de captura desconocido: {formato!r}")
+        self.ruta = ruta
+        self.formato = formato
+        self.tamano_buffer = tamano_buffer
+        self.tramas = 0
+        self.bytes = 0
+        self.interfaces = []
+        self._indices = 0             # interfaces descritas en el pcapng
+        self._buffer = bytearray()
+        self._archivo = open(ruta, "wb")
+        self._escritor = _Escritor(self._archivo) if hilo else None
+        if self._escritor is not None:
+            self._escritor.start()
+        if formato == "pcapng":
+            self._buffer += _bloque(PCAPNG_SHB, struct.pack("<IHHq", PCAPNG_ORDEN, 1, 0, -1))
+        else:
+            enlace = LINKTYPE_USER1 if simulador_red.CODEC == "binario" else LINKTYPE_USER0
+            self._buffer += PCAP_ENCABEZADO.pack(PCAP_MAGICO_NS, 2, 4, 0, 0, SNAPLEN, enlace)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excepcion):
+        self.cerrar()
+
+    # Captura lo que "dispositivo" envía por "interfaz" (None: todas las conectadas)
+    def agregar(self, dispositivo, interfaz=None, filtro=None, snaplen=SNAPLEN):
+        nombres = list(dispositivo.conexiones) if interfaz is None else [interfaz]
+        if dispositivo.capturas is None:
+            dispositivo.capturas = {}
+        for nombre in nombres:
+            punto = _Interfaz(self, f"{dispositivo.nombre}.{nombre}", filtro, snaplen)
+            dispositivo.capturas[nombre] = punto
+            self.interfaces.append(punto)
+
+    # Deja de capturar en "dispositivo" (en "interfaz" o en todas)
+    def quitar(self, dispositivo, interfaz=None):
+        if dispositivo.capturas is None:
+            return
+        for nombre, punto in list(dispositivo.capturas.items()):
+            if punto.captura is self and interfaz in (None, nombre):
+                del dispositivo.capturas[nombre]
+
+    def _escribir(self, punto, tiempo, datos, enlace):
+        largo = len(datos)
+        guardados = datos if largo <= punto.snaplen else datos[:punto.snaplen]
+        capturados = len(guardados)
+        nanosegundos = max(0, round(tiempo * 1e9))
+        buffer = self._buffer
+        if self.formato == "pcap":
+            segundos, resto = divmod(nanosegundos, 1000000000)
+            buffer += PCAP_REGISTRO.pack(segundos, resto, capturados, largo)
+            buffer += guardados
+        else:
+            indice = punto.indices.get(enlace)
+            if indice is None:
+                indice = punto.indices[enlace] = self._indices
+                self._indices += 1
+                opciones = (_opcion(OPCION_IF_NAME, punto.nombre.encode("utf-8"))
+                            + _opcion(OPCION_IF_TSRESOL, bytes([9])) + struct.pack("<HH", 0, 0))
+                buffer += _bloque(PCAPNG_IDB, struct.pack("<HHI", enlace, 0, punto.snaplen) + opciones)
+            relleno = RELLENOS[capturados % 4]
+            total = PCAPNG_EPB_CABECERA.size + capturados + len(relleno) + len(OPCIONES_EPB) + 4
+            buffer += PCAPNG_EPB_CABECERA.pack(PCAPNG_EPB, total, indice, nanosegundos >> 32,
+                                               nanosegundos & 0xFFFFFFFF, capturados, largo)
+            buffer += guardados
+            buffer += relleno
+            buffer += OPCIONES_EPB
+            buffer += PCAPNG_LARGO.pack(total)
+        self.tramas += 1
+        self.bytes += capturados
+        if len(buffer) >= self.tamano_buffer:
+            self.vaciar()
+
+    # Pasa lo acumulado al archivo
+    def vaciar(self):
+        if not self._buffer:
+            return
+        bloque, self._buffer = bytes(self._buffer), bytearray()
+        if self._escritor is not None:
+            self._escritor.bloques.put(bloque)
+        else:
+            self._archivo.write(bloque)
+
+    def cerrar(self):
+        if self._archivo.closed:
+            return
+        self.vaciar()
+        if self._escritor is not None:
+            self._escritor.bloques.put(None)
+            self._escritor.join()
+        self._archivo.close()
+
+
+# ====== Lectura ======
+# Recorre un archivo pcap o pcapng y genera (tiempo, interfaz, tipo_de_enlace, datos).
+# interfaz es el nombre de la interfaz en pcapng (o su número si no tiene) y None en pcap.
+def leer_captura(ruta):
+    with open(ruta, "rb") as archivo:
+        inicio = archivo.read(4)
+        if len(inicio) < 4:
+            return
+        if struct.unpack("<I", inicio)[0] == PCAPNG_SHB:
+            yield from _leer_pcapng(archivo, inicio)
+        else:
+            yield from _leer_pcap(archivo, inicio)
+
+
+def _leer_pcap(archivo, inicio):
+    for orden in "<>":
+        magico = struct.unpack(orden + "I", inicio)[0]
+        if magico in (PCAP_MAGICO_NS, PCAP_MAGICO_US):
+            break
+    else:
+        raise ValueError("No es un archivo pcap ni pcapng")
+    escala = 1e-9 if magico == PCAP_MAGICO_NS else 1e-6
+    encabezado = struct.Struct(orden + PCAP_ENCABEZADO.format[1:])
+    registro = struct.Struct(orden + PCAP_REGISTRO.format[1:])
+    enlace = encabezado.unpack(inicio + archivo.read(encabezado.size - 4))[6]
+    while True:
+        campos = archivo.read(registro.size)
+        if len(campos) < registro.size:
+            return
+        segundos, fraccion, guardados, _ = registro.unpack(campos)
+        yield segundos + fraccion * escala, None, enlace, archivo.read(guardados)
+
+
+def _leer_pcapng(archivo, inicio):
+    orden = "<"
+    interfaces = []   # (tipo de enlace, nombre, segundos por unidad de tiempo)
+    tipo_bytes = inicio
+    while True:
+        if len(tipo_bytes) < 4:
+            return
+        largo_bytes = archivo.read(4)
+        if len(largo_bytes) < 4:
+            return
+        tipo = struct.unpack(orden + "I", tipo_bytes)[0]
+        if tipo == PCAPNG_SHB:
+            cuerpo_inicio = archivo.read(4)
+            orden = "<" if struct.unpack("<I", cuerpo_inicio)[0] == PCAPNG_ORDEN else ">"
+            largo = struct.unpack(orden + "I", largo_bytes)[0]
+            archivo.read(largo - 12)
+            interfaces = []
+        else:
+            largo = struct.unpack(orden + "I", largo_bytes)[0]
+            cuerpo = archivo.read(largo - 12)
+            archivo.read(4)
+            if tipo == PCAPNG_IDB:
+                enlace = struct.unpack(orden + "H", cuerpo[:2])[0]
+                opciones = _opciones(cuerpo[8:], orden)
+                nombre = opciones.get(OPCION_IF_NAME)
+                resolucion = opciones.get(OPCION_IF_TSRESOL, b"\x06")[0]
+                escala = 2.0 ** -(resolucion & 0x7F) if resolucion & 0x80 else 10.0 ** -resolucion
+                interfaces.append((enlace, nombre.decode("utf-8") if nombre else len(interfaces), escala))
+            elif tipo == PCAPNG_EPB:
+                indice, alto, bajo, guardados, _ = struct.unpack(orden + "IIIII", cuerpo[:20])
+                enlace, nombre, escala = interfaces[indice]
+                yield ((alto << 32) | bajo) * escala, nombre, enlace, cuerpo[20:20 + guardados]
+        tipo_bytes = archivo.read(4)
+
+
+def _opciones(datos, orden):
+    opciones = {}
+    posicion = 0
+    while posicion + 4 <= len(datos):
+        codigo, largo = struct.unpack(orden + "HH", datos[posicion:posicion + 4])
+        if codigo == 0:
+            break
+        opciones[codigo] = datos[posicion + 4:posicion + 4 + largo]
+        posicion += 4 + largo + (-largo % 4)
+    return opciones
+
+
+# ====== Inyección ======
+class Inyeccion:
+    # Entrega las tramas de una captura a la capa 1 de "dispositivo" como si llegaran por
+    # interfaz_local. Con planificador cada trama llega con la separación de tiempo que
+    # tenía en la captura (desde ahora), programando una sola a la vez; sin él se entregan
+    # todas de inmediato.
+    __slots__ = ("dispositivo", "interfaz_local", "planificador", "_tramas", "_siguiente", "_desfase",
+                 "inyectadas")
+
+    def __init__(self, tramas, dispositivo, interfaz_local, planificador=None):
+        self.dispositivo = dispositivo
+        self.interfaz_local = interfaz_local
+        self.planificador = planificador
+        self._tramas = iter(tramas)
+        self.inyectadas = 0
+        if planificador is None:
+            for _, medio in self._tramas:
+                self._entregar(medio)
+            self._siguiente = None
+            return
+        self._siguiente = next(self._tramas, None)
+        if self._siguiente is not None:
+            self._desfase = planificador.ahora - self._siguiente[0]
+            planificador.programar_en(planificador.ahora, self._llegada)
+
+    def _entregar(self, medio):
+        self.inyectadas += 1
+        self.dispositivo.recibir(medio, 1, None, self.interfaz_local)
+
+    def _llegada(self):
+        self._entregar(self._siguiente[1])
+        self._siguiente = next(self._tramas, None)
+        if self._siguiente is not None:
+            tiempo = max(self._siguiente[0] + self._desfase, self.planificador.ahora)
+            self.planificador.programar_en(tiempo, self._llegada)
+
+
+# Trama del medio a partir de los bytes capturados (las de texto empiezan con "[H2:" o "[ARP")
+def a_medio(datos, enlace):
+    if enlace == LINKTYPE_USER1 and not datos.startswith(b"["):
+        return Trama.desde_payload(datos)
+    return bytes(datos)
+
+
+# Inyecta en la capa 1 de "dispositivo" (por interfaz_local) las tramas de un archivo. Con
+# "interfaz" solo las capturadas en esa interfaz del pcapng (p. ej. "Router1.if_der").
+def inyectar(ruta, dispositivo, interfaz_local, planificador=None, interfaz=None):
+    tramas = ((tiempo, a_medio(datos, enlace)) for tiempo, nombre, enlace, datos in leer_captura(ruta)
+              if interfaz is None or nombre == interfaz)
+    return Inyeccion(tramas, dispositivo, interfaz_local, planificador)
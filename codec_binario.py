@@ -0,0 +1,296 @@
+# ==============================
+# Codec binario de encabezados
+# ==============================
+# Alternativa a los encabezados de texto "[H3:src:dst]" de capas.py.
+# Cada capa antepone un encabezado de tamaño fijo empaquetado con struct sobre un
+# payload de bytes, por lo que desencapsular es de costo constante (no hay que buscar
+# ']' ni hacer split(':')) y el payload puede contener cualquier byte.
+#
+# Las firmas y los valores de retorno son los mismos que los de las capas de texto;
+# desencapsular retorna el payload como memoryview (sin copiar). Si el payload es una
+# Trama (trama.py), el encabezado se escribe en su headroom y desencapsular retorna otra
+# vista de la misma Trama, sin copiar el payload en ninguna dirección.
+#
+# Formato (orden de red, big-endian):
+#   Capa 2: mac_origen(6) mac_destino(6)                         -> 12 bytes
+#   Capa 3: ip_origen(4) ip_destino(4), IPv4 en binario,
+#           identificador(2) desplazamiento(4) mas_fragmentos(1)  -> 15 bytes
+#   Capa 4: protocolo(1) puerto_origen(2) puerto_destino(2)      ->  5 bytes
+#   Capa 5: codigo_app(8)                                        ->  8 bytes
+#   TCP (entre capas 4 y 5, ver transporte.py):
+#           seq(8) ack(8) flags(1) ventana(4)                     -> 21 bytes
+#   VLAN (opcional, entre capas 2 y 3, ver capas.Pila): vlan(2)   ->  2 bytes
+# Las direcciones y el código de app se rellenan con bytes nulos a la derecha.
+#
+# Las direcciones, puertos y códigos de app de un flujo no cambian de un paquete a otro, así
+# que los encabezados de aplicación, transporte, red y enlace se guardan ya empaquetados
+# (y ya leídos) en cachés LRU de CACHE_ENCABEZADOS entradas: encapsular es una búsqueda
+# en la caché y una concatenación, sin convertir cada dirección en cada paquete.
+
+import functools
+import socket
+import struct
+
+from trama import Trama
+
+ENCABEZADO_ENLACE = struct.Struct("!6s6s")
+ENCABEZADO_RED = struct.Struct("!4s4sHIB")
+ENCABEZADO_TRANSPORTE = struct.Struct("!BHH")
+ENCABEZADO_APLICACION = struct.Struct("!8s")
+ENCABEZADO_TCP = struct.Struct("!QQBI")
+ENCABEZADO_VLAN = struct.Struct("!H")
+
+# Encabezados enteros como bytes crudos (claves de las cachés de lectura); del de red solo
+# las direcciones, sin los campos de fragmentación
+CRUDO_ENLACE = struct.Struct(f"{ENCABEZADO_ENLACE.size}s")
+CRUDO_TRANSPORTE = struct.Struct(f"{ENCABEZADO_TRANSPORTE.size}s")
+DIRECCIONES_RED = struct.Struct("8s")
+
+# Encabezados distintos que se recuerdan por capa (en cada sentido)
+CACHE_ENCABEZADOS = 4096
+
+# Número de protocolo IP de cada protocolo de transporte
+PROTOCOLOS = {"TCP": 6, "UDP": 17}
+NOMBRES_PROTOCOLO = {numero: nombre for nombre, numero in PROTOCOLOS.items()}
+
+
+# Convierte una dirección/código (str o bytes) a un campo de "tamano" bytes
+def a_campo(valor, tamano):
+    if isinstance(valor, str):
+        valor = valor.encode('latin-1')
+    if len(valor) > tamano:
+        raise ValueError(f"{valor!r} no cabe en un campo de {tamano} bytes")
+    return valor
+
+
+# Recupera el texto de un campo quitando el relleno de bytes nulos
+def de_campo(campo):
+    return campo.rstrip(b'\0').decode('latin-1')
+
+
+# "192.168.1.10" -> 4 bytes (ValueError si no es una IPv4)
+def a_ipv4(ip):
+    try:
+        return socket.inet_pton(socket.AF_INET, ip)
+    except (OSError, TypeError):
+        raise ValueError(f"Dirección IPv4 inválida: {ip!r}") from None
+
+
+# 4 bytes -> "192.168.1.10"
+def de_ipv4(campo):
+    return socket.inet_ntop(socket.AF_INET, bytes(campo))
+
+
+# ====== Encabezados empaquetados y leídos, con caché ======
+@functools.lru_cache(maxsize=CACHE_ENCABEZADOS)
+def _encabezado_aplicacion(app):
+    return ENCABEZADO_APLICACION.pack(a_campo(app, 8))
+
+
+@functools.lru_cache(maxsize=CACHE_ENCABEZADOS)
+def _campos_aplicacion(crudo):
+    return de_campo(crudo)
+
+
+@functools.lru_cache(maxsize=CACHE_ENCABEZADOS)
+def _encabezado_transporte(puerto_origen, puerto_destino, protocolo):
+    if protocolo not in PROTOCOLOS:
+        raise ValueError(f"Protocolo de transporte desconocido: {protocolo!r}")
+    return ENCABEZADO_TRANSPORTE.pack(PROTOCOLOS[protocolo], puerto_origen, puerto_destino)
+
+
+@functools.lru_cache(maxsize=CACHE_ENCABEZADOS)
+def _campos_transporte(crudo):
+    numero, puerto_origen, puerto_destino = ENCABEZADO_TRANSPORTE.unpack(crudo)
+    return NOMBRES_PROTOCOLO.get(numero, str(numero)), puerto_origen, puerto_destino
+
+
+# Encabezado de red de un paquete sin fragmentar
+@functools.lru_cache(maxsize=CACHE_ENCABEZADOS)
+def _encabezado_red(ip_origen, ip_destino):
+    return ENCABEZADO_RED.pack(a_ipv4(ip_origen), a_ipv4(ip_destino), 0, 0, 0)
+
+
+@functools.lru_cache(maxsize=CACHE_ENCABEZADOS)
+def _campos_red(crudo):
+    return de_ipv4(crudo[:4]), de_ipv4(crudo[4:])
+
+
+@functools.lru_cache(maxsize=CACHE_ENCABEZADOS)
+def _encabezado_enlace(mac_origen, mac_destino):
+    return ENCABEZADO_ENLACE.pack(a_campo(mac_origen, 6), a_campo(mac_destino, 6))
+
+
+@functools.lru_cache(maxsize=CACHE_ENCABEZADOS)
+def _campos_enlace(crudo):
+    return de_campo(crudo[:6]), de_campo(crudo[6:])
+
+
+# Antepone un encabezado ya empaquetado: en el headroom si es una Trama, o concatenando
+# (un mensaje de texto se codifica en UTF-8)
+def _anteponer(encabezado, datos):
+    if isinstance(datos, Trama):
+        return datos.anteponer_bytes(encabezado)
+    if isinstance(datos, str):
+        datos = datos.encode('utf-8')
+    return encabezado + datos
+
+
+# Antepone un encabezado empaquetando sus campos (los que cambian en cada paquete)
+def _anteponer_campos(estructura, datos, *campos):
+    if isinstance(datos, Trama):
+        return datos.anteponer(estructura, *campos)
+    if isinstance(datos, str):
+        datos = datos.encode('utf-8')
+    return estructura.pack(*campos) + datos
+
+
+# Lee el encabezado del inicio y retorna (resto, campos) sin copiar el resto
+def _extraer(estructura, datos):
+    if isinstance(datos, Trama):
+        return datos.recortar(estructura.size), datos.leer(estructura)
+    vista = memoryview(datos)
+    return vista[estructura.size:], estructura.unpack_from(vista)
+
+
+# Como _extraer, pero retorna los bytes crudos de "crudo" (un Struct "Ns" del inicio del
+# encabezado) para buscarlos en una caché; el resto empieza "tamano" bytes después. Es el
+# camino de cada salto, así que con una Trama lee el buffer directamente (lo mismo que
+# leer() y recortar() en una sola llamada).
+def _extraer_crudo(crudo, tamano, datos):
+    if isinstance(datos, Trama):
+        buffer, inicio, fin = datos.buffer, datos.inicio, datos.fin
+    else:
+        buffer, inicio, fin = memoryview(datos), 0, len(datos)
+    if fin - inicio < tamano:
+        raise ValueError(f"Trama de {fin - inicio} bytes demasiado corta para un encabezado de {tamano} bytes")
+    if isinstance(datos, Trama):
+        return Trama(buffer, inicio + tamano, fin), crudo.unpack_from(buffer, inicio)[0]
+    return buffer[tamano:], crudo.unpack_from(buffer)[0]
+
+
+class CapaAplicacionBinaria:
+    campos = ("app",)
+
+    # Antepone el código de aplicación (8 bytes). El mensaje de texto se codifica en UTF-8.
+    @staticmethod
+    def encapsular(mensaje, app="GENERICA"):
+        return _anteponer(_encabezado_aplicacion(app), mensaje)
+
+    # Retorna (payload, app)
+    @staticmethod
+    def desencapsular(datos):
+        payload, crudo = _extraer_crudo(ENCABEZADO_APLICACION, ENCABEZADO_APLICACION.size, datos)
+        return payload, _campos_aplicacion(crudo)
+
+
+class CapaTransporteBinaria:
+    campos = ("protocolo", "puerto_origen", "puerto_destino")
+    campos_encapsular = ("puerto_origen", "puerto_destino", "protocolo")
+
+    # Antepone protocolo y puertos de origen/destino (5 bytes)
+    @staticmethod
+    def encapsular(datos_app, puerto_origen, puerto_destino, protocolo):
+        return _anteponer(_encabezado_transporte(puerto_origen, puerto_destino, protocolo), datos_app)
+
+    # Retorna (datos_app, protocolo, puerto_origen, puerto_destino)
+    @staticmethod
+    def desencapsular(segmento):
+        datos_app, crudo = _extraer_crudo(CRUDO_TRANSPORTE, ENCABEZADO_TRANSPORTE.size, segmento)
+        return (datos_app, *_campos_transporte(crudo))
+
+
+class CapaTCPBinaria:
+    campos = ("seq", "ack", "flags", "ventana")
+
+    # Antepone el control de TCP: números de secuencia y confirmación, flags y ventana
+    @staticmethod
+    def encapsular(datos, seq, ack, flags, ventana):
+        return _anteponer_campos(ENCABEZADO_TCP, datos, seq, ack, flags, ventana)
+
+    # Retorna (datos, seq, ack, flags, ventana)
+    @staticmethod
+    def desencapsular(segmento):
+        datos, (seq, ack, flags, ventana) = _extraer(ENCABEZADO_TCP, segmento)
+        return datos, seq, ack, flags, ventana
+
+
+class CapaRedBinaria:
+    campos = ("ip_origen", "ip_destino")
+
+    # Antepone IP origen y destino (IPv4, 4 bytes cada una) y los campos de fragmentación
+    # en cero (paquete sin fragmentar)
+    @staticmethod
+    def encapsular(segmento, ip_origen, ip_destino):
+        return _anteponer(_encabezado_red(ip_origen, ip_destino), segmento)
+
+    # Retorna (segmento, ip_origen, ip_destino)
+    @staticmethod
+    def desencapsular(paquete):
+        segmento, crudo = _extraer_crudo(DIRECCIONES_RED, ENCABEZADO_RED.size, paquete)
+        ip_origen, ip_destino = _campos_red(crudo)
+        return segmento, ip_origen, ip_destino
+
+    # Retorna (identificador, desplazamiento, mas_fragmentos) si el paquete es un fragmento,
+    # o None si está completo
+    @staticmethod
+    def fragmento(paquete):
+        if isinstance(paquete, Trama):
+            _, _, identificador, desplazamiento, mas = paquete.leer(ENCABEZADO_RED)
+        else:
+            _, _, identificador, desplazamiento, mas = ENCABEZADO_RED.unpack_from(paquete)
+        if not desplazamiento and not mas:
+            return None
+        return identificador, desplazamiento, mas
+
+    # Divide un paquete en fragmentos de a lo sumo "tamano_maximo" bytes (encabezado
+    # incluido), cada uno en su propia Trama. Un fragmento se vuelve a dividir conservando
+    # su identificador. Retorna None si no cabe ni el encabezado.
+    @staticmethod
+    def fragmentar(paquete, tamano_maximo, identificador):
+        segmento, (origen, destino, propio, base, mas_final) = _extraer(ENCABEZADO_RED, paquete)
+        if base or mas_final:
+            identificador = propio
+        carga = tamano_maximo - ENCABEZADO_RED.size
+        if carga <= 0:
+            return None
+        vista = segmento.vista() if isinstance(segmento, Trama) else segmento
+        identificador &= 0xFFFF
+        fragmentos = []
+        for desplazamiento in range(0, len(vista), carga):
+            fin = min(desplazamiento + carga, len(vista))
+            mas = 1 if fin < len(vista) else mas_final
+            fragmentos.append(Trama.desde_payload(vista[desplazamiento:fin]).anteponer(
+                ENCABEZADO_RED, origen, destino, identificador, base + desplazamiento, mas))
+        return fragmentos
+
+
+class CapaEnlaceBinaria:
+    campos = ("mac_origen", "mac_destino")
+
+    # Antepone MAC origen y destino (6 bytes cada una)
+    @staticmethod
+    def encapsular(paquete, mac_origen, mac_destino):
+        return _anteponer(_encabezado_enlace(mac_origen, mac_destino), paquete)
+
+    # Retorna (paquete, mac_origen, mac_destino)
+    @staticmethod
+    def desencapsular(trama):
+        paquete, crudo = _extraer_crudo(CRUDO_ENLACE, ENCABEZADO_ENLACE.size, trama)
+        mac_origen, mac_destino = _campos_enlace(crudo)
+        return paquete, mac_origen, mac_destino
+
+
+class CapaVLANBinaria:
+    campos = ("vlan",)
+
+    # Antepone el identificador de VLAN (2 bytes)
+    @staticmethod
+    def encapsular(paquete, vlan):
+        return _anteponer_campos(ENCABEZADO_VLAN, paquete, vlan)
+
+    # Retorna (paquete, vlan)
+    @staticmethod
+    def desencapsular(trama):
+        paquete, (vlan,) = _extraer(ENCABEZADO_VLAN, trama)
+        return paquete, vlan
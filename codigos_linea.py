@@ -0,0 +1,221 @@
+# ==============================
+# Códigos de línea de la capa física
+# ==============================
+# Un código de línea traduce los bytes de una trama a los símbolos '0'/'1' que viajan por
+# el medio:
+#
+# - NRZ: cada bit es un símbolo (la cadena de bits de siempre)
+# - Manchester (IEEE 802.3): cada bit son dos símbolos, 0 -> "10" y 1 -> "01"; siempre hay
+#   una transición a mitad de bit, a costa del doble de símbolos
+# - 4B/5B (100BASE-X/FDDI): cada grupo de 4 bits se reemplaza por 5 símbolos con
+#   suficientes transiciones (25 % más de símbolos). En el medio real va seguido de NRZI
+#   o MLT-3; aquí solo se aplica el código de bloque.
+#
+# NRZ convierte la trama completa de una vez con int.from_bytes/format e int(..., 2).
+# Los demás códigos unen los símbolos de cada byte desde una tabla de 256 entradas y
+# decodifican separando los grupos con re.findall y buscándolos en la tabla inversa
+# (Manchester, en cambio, con cortes de cadena: el segundo símbolo de cada par es el bit).
+#
+# Si NumPy está instalado (es opcional), las tramas de al menos MINIMO_NUMPY bytes se
+# convierten con operaciones vectoriales: NRZ con numpy.unpackbits/packbits, y los demás
+# indexando la tabla de símbolos como arreglo y empaquetando los símbolos de cada byte con
+# numpy.packbits para buscarlos en la tabla inversa. Si hay símbolos inválidos se repite
+# la decodificación sin NumPy, que informa cuál es el error. codificar_lote y
+# decodificar_lote convierten un lote de tramas chicas con una sola llamada, así que
+# también lo aprovechan.
+#
+# CapaFisica (capas.py) los aplica sobre tramas enteras, por bloques o por lotes.
+
+import itertools
+import re
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Con NumPy, bytes de trama desde los que conviene la conversión vectorial (por debajo
+# cuesta más preparar los arreglos que recorrer la trama)
+MINIMO_NUMPY = 128
+
+# Los lotes con tramas de más de estos bytes en promedio se convierten trama por trama:
+# juntarlas solo agrega una copia
+MAXIMO_LOTE = 1024
+
+MEDIOS_BITS = str.maketrans({"0": "10", "1": "01"})
+COMPLEMENTO = str.maketrans("01", "10")
+CERO = ord("0")
+
+
+# Arreglo de 0/1 (uint8) con los símbolos de la cadena, o None si hay otros caracteres
+def _valores_numpy(simbolos):
+    try:
+        valores = numpy.frombuffer(simbolos.encode("ascii"), numpy.uint8) - CERO
+    except UnicodeEncodeError:
+        return None
+    return None if len(valores) and valores.max() > 1 else valores
+
+
+class CodigoLinea:
+    # - nombre: como se elige en simulador_red.CODIGO_LINEA
+    # - simbolos: dígito hexadecimal (4 bits) -> sus símbolos
+    __slots__ = ("nombre", "simbolos_por_byte", "_tabla", "_inversa", "_bytes", "_tabla_numpy", "_inversa_numpy",
+                 "_relleno")
+
+    def __init__(self, nombre, simbolos):
+        self.nombre = nombre
+        self.simbolos_por_byte = 2 * len(simbolos[0])
+        # Símbolos de cada byte (256 entradas) y su inversa
+        self._tabla = [simbolos[byte >> 4] + simbolos[byte & 15] for byte in range(256)]
+        self._inversa = {simbolos_byte: byte for byte, simbolos_byte in enumerate(self._tabla)}
+        self._bytes = re.compile(f"[01]{{{self.simbolos_por_byte}}}")
+        if numpy is not None:
+            # Símbolos de cada byte como cadenas de ancho fijo, y símbolos de un byte
+            # rellenados a 8 o 16 bits y leídos como número -> byte (-1: código inválido)
+            self._tabla_numpy = numpy.array([simbolos_byte.encode("ascii") for simbolos_byte in self._tabla],
+                                            f"S{self.simbolos_por_byte}")
+            self._relleno = -self.simbolos_por_byte % 8
+            self._inversa_numpy = numpy.full(1 << (self.simbolos_por_byte + self._relleno), -1, numpy.int16)
+            self._inversa_numpy[[int(simbolos_byte, 2) for simbolos_byte in self._tabla]] = numpy.arange(256)
+
+    def __repr__(self):
+        return f"CodigoLinea({self.nombre})"
+
+    # Bytes (bytes, bytearray o memoryview) -> cadena de símbolos
+    def codificar(self, datos):
+        if numpy is not None and len(datos) >= MINIMO_NUMPY:
+            return self._codificar_numpy(numpy.frombuffer(datos, numpy.uint8))
+        return self._codificar(datos)
+
+    # Cadena de símbolos (un múltiplo de simbolos_por_byte) -> bytes
+    def decodificar(self, simbolos):
+        self._verificar_largo(simbolos)
+        if numpy is not None and len(simbolos) >= MINIMO_NUMPY * self.simbolos_por_byte:
+            datos = self._decodificar_numpy(simbolos)
+            if datos is not None:
+                return datos
+        return self._decodificar(simbolos)
+
+    # Lista de tramas (bytes) -> lista de cadenas de símbolos, con una sola conversión
+    def codificar_lote(self, tramas):
+        if sum(map(len, tramas)) > MAXIMO_LOTE * len(tramas):
+            return [self.codificar(trama) for trama in tramas]
+        simbolos = self.codificar(b"".join(tramas))
+        return _partir(simbolos, [len(trama) * self.simbolos_por_byte for trama in tramas])
+
+    # Lista de cadenas de símbolos -> lista de bytes, con una sola conversión
+    def decodificar_lote(self, cadenas):
+        if sum(map(len, cadenas)) > MAXIMO_LOTE * self.simbolos_por_byte * len(cadenas):
+            return [self.decodificar(simbolos) for simbolos in cadenas]
+        for simbolos in cadenas:
+            self._verificar_largo(simbolos)
+        datos = self.decodificar("".join(cadenas))
+        return _partir(datos, [len(simbolos) // self.simbolos_por_byte for simbolos in cadenas])
+
+    def _codificar(self, datos):
+        return "".join(map(self._tabla.__getitem__, datos))
+
+    def _decodificar(self, simbolos):
+        grupos = self._bytes.findall(simbolos)
+        if len(grupos) * self.simbolos_por_byte != len(simbolos):
+            raise ValueError(f"Símbolos {self.nombre} inválidos (solo se admiten '0' y '1')")
+        try:
+            return bytes(map(self._inversa.__getitem__, grupos))
+        except KeyError as error:
+            raise ValueError(f"Símbolos {self.nombre} inválidos: {error.args[0]}") from None
+
+    # Un elemento de la tabla por byte; el arreglo resultante ya es la cadena en ASCII
+    def _codificar_numpy(self, datos):
+        return str(self._tabla_numpy[datos].data, "ascii")
+
+    # Retorna None si hay símbolos inválidos
+    def _decodificar_numpy(self, simbolos):
+        valores = _valores_numpy(simbolos)
+        if valores is None:
+            return None
+        if self._relleno:
+            filas = numpy.zeros((len(valores) // self.simbolos_por_byte, self.simbolos_por_byte + self._relleno),
+                                numpy.uint8)
+            filas[:, self._relleno:] = valores.reshape(-1, self.simbolos_por_byte)
+            valores = filas
+        empaquetados = numpy.packbits(valores)
+        if self.simbolos_por_byte + self._relleno == 16:
+            empaquetados = empaquetados.view(">u2")
+        datos = self._inversa_numpy[empaquetados]
+        if datos.min() < 0:
+            return None
+        return datos.astype(numpy.uint8).tobytes()
+
+    def _verificar_largo(self, simbolos):
+        if len(simbolos) % self.simbolos_por_byte:
+            raise ValueError(f"{len(simbolos)} símbolos {self.nombre} no forman bytes enteros "
+                             f"({self.simbolos_por_byte} por byte)")
+
+
+# Corta "secuencia" en partes consecutivas de los largos dados
+def _partir(secuencia, largos):
+    return [secuencia[inicio:fin] for inicio, fin in zip(itertools.accumulate(largos, initial=0),
+                                                          itertools.accumulate(largos))]
+
+
+class CodigoNRZ(CodigoLinea):
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__("NRZ", [format(digito, "04b") for digito in range(16)])
+
+    # int(..., 2) y format(..., "b") convierten la cadena completa en C
+    def _codificar(self, datos):
+        if not datos:
+            return ""
+        return format(int.from_bytes(datos, "big"), f"0{len(datos) * 8}b")
+
+    def _decodificar(self, simbolos):
+        if not simbolos:
+            return b""
+        try:
+            return int(simbolos, 2).to_bytes(len(simbolos) // 8, "big")
+        except ValueError:
+            raise ValueError("Símbolos NRZ inválidos (solo se admiten '0' y '1')") from None
+
+    def _codificar_numpy(self, datos):
+        return str((numpy.unpackbits(datos) + CERO).data, "ascii")
+
+    def _decodificar_numpy(self, simbolos):
+        valores = _valores_numpy(simbolos)
+        return None if valores is None else numpy.packbits(valores).tobytes()
+
+
+class CodigoManchester(CodigoLinea):
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__("Manchester", [format(digito, "04b").translate(MEDIOS_BITS) for digito in range(16)])
+
+    # El segundo símbolo de cada par es el bit; el primero debe ser su complemento
+    def _decodificar(self, simbolos):
+        bits = simbolos[1::2]
+        if simbolos[0::2] != bits.translate(COMPLEMENTO):
+            raise ValueError("Violación del código Manchester (par de símbolos sin transición)")
+        try:
+            return NRZ._decodificar(bits)
+        except ValueError:
+            raise ValueError("Símbolos Manchester inválidos (solo se admiten '0' y '1')") from None
+
+
+NRZ = CodigoNRZ()
+MANCHESTER = CodigoManchester()
+CUATRO_B_CINCO_B = CodigoLinea("4B5B", ["11110", "01001", "10100", "10101", "01010", "01011", "01110", "01111",
+                                        "10010", "10011", "10110", "10111", "11010", "11011", "11100", "11101"])
+
+CODIGOS_LINEA = {codigo.nombre: codigo for codigo in (NRZ, MANCHESTER, CUATRO_B_CINCO_B)}
+
+
+# Código de línea por nombre ("NRZ", "Manchester" o "4B5B"), o el mismo CodigoLinea
+def codigo_linea(codigo):
+    if isinstance(codigo, CodigoLinea):
+        return codigo
+    try:
+        return CODIGOS_LINEA[codigo]
+    except KeyError:
+        raise ValueError(f"Código de línea desconocido: {codigo!r} (opciones: {', '.join(CODIGOS_LINEA)})") from None
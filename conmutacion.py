@@ -0,0 +1,87 @@
+# ==============================
+# Tabla MAC de un switch con aprendizaje
+# ==============================
+# El switch aprende la MAC origen de cada trama junto con el puerto por el que llegó.
+# La tabla tiene capacidad máxima y envejecimiento: una entrada que no se vuelve a ver
+# durante "envejecimiento" segundos caduca, y si la tabla está llena se descarta la
+# entrada vista hace más tiempo (LRU).
+#
+# Se implementa con un OrderedDict ordenado por última vez vista: aprender mueve la
+# entrada al final, y tanto el desalojo como la caducidad sacan entradas del principio.
+# Aprender, buscar y caducar son O(1) (caducar es O(1) amortizado por entrada).
+
+import collections
+
+# Valores por defecto (802.1D usa 300 s de envejecimiento)
+CAPACIDAD_TABLA_MAC = 8192
+ENVEJECIMIENTO_MAC = 300.0
+
+
+class TablaMAC:
+    # - capacidad: cantidad máxima de MACs aprendidas
+    # - envejecimiento: segundos sin ver una MAC hasta que su entrada caduca (None: nunca)
+    # - reloj: función que retorna el tiempo actual (simulado o real)
+    __slots__ = ("reloj", "capacidad", "envejecimiento", "_entradas", "desalojadas", "caducadas")
+
+    def __init__(self, reloj, capacidad=CAPACIDAD_TABLA_MAC, envejecimiento=ENVEJECIMIENTO_MAC):
+        self.reloj = reloj
+        self.capacidad = capacidad
+        self.envejecimiento = envejecimiento
+        self._entradas = collections.OrderedDict()  # mac -> (puerto, visto_en)
+        self.desalojadas = 0
+        self.caducadas = 0
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def __contains__(self, mac):
+        return self.buscar(mac) is not None
+
+    # Registra que "mac" se vio por "puerto"; retorna True si la MAC es nueva o cambió de puerto
+    def aprender(self, mac, puerto):
+        ahora = self.reloj()
+        entradas = self._entradas
+        anterior = entradas.get(mac)
+        entradas[mac] = (puerto, ahora)
+        if anterior is not None:
+            entradas.move_to_end(mac)
+            return anterior[0] != puerto
+        self.caducar(ahora)
+        if len(entradas) > self.capacidad:
+            entradas.popitem(last=False)
+            self.desalojadas += 1
+        return True
+
+    # Puerto por el que se alcanza la MAC, o None si no se conoce o su entrada caducó
+    def buscar(self, mac):
+        entrada = self._entradas.get(mac)
+        if entrada is None:
+            return None
+        puerto, visto_en = entrada
+        if self.envejecimiento is not None and self.reloj() - visto_en > self.envejecimiento:
+            del self._entradas[mac]
+            self.caducadas += 1
+            return None
+        return puerto
+
+    # Elimina las entradas caducadas (las más antiguas están al principio)
+    def caducar(self, ahora=None):
+        if self.envejecimiento is None:
+            return
+        limite = (self.reloj() if ahora is None else ahora) - self.envejecimiento
+        entradas = self._entradas
+        while entradas:
+            mac, (puerto, visto_en) = next(iter(entradas.items()))
+            if visto_en >= limite:
+                break
+            del entradas[mac]
+            self.caducadas += 1
+
+    # Olvida las MACs aprendidas por un puerto (p. ej. al desconectarlo)
+    def olvidar_puerto(self, puerto):
+        for mac in [mac for mac, (p, _) in self._entradas.items() if p == puerto]:
+            del self._entradas[mac]
+
+    # Copia de la tabla como diccionario mac -> puerto (para mostrar)
+    def a_dict(self):
+        return {mac: puerto for mac, (puerto, _) in self._entradas.items()}
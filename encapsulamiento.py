@@ -1,3 +1,5 @@
+from capas import CapaAplicacion, CapaEnlace, CapaFisica, CapaRed, CapaTransporte
+
 # ==============================
 # Direcciones simplificadas (8 bits)
 # ==============================
@@ -30,80 +32,7 @@ APP_CODES = {
 # ==============================
 # CAPAS
 # ==============================
-class CapaAplicacion:
-    @staticmethod
-    def encapsular(mensaje, protocolo, puerto_destino, app="GENERICA"):
-        # Capa 5: Añade encabezado de aplicación con la app seleccionada
-        encabezado = f"[APP:{app}]"
-        return encabezado + mensaje
-    
-    @staticmethod
-    def desencapsular(datos):
-        # Extrae encabezado de aplicación
-        if datos.startswith("[APP:"):
-            fin = datos.find(']') + 1
-            encabezado = datos[:fin]
-            mensaje = datos[fin:]
-            app = encabezado[5:-1]  # entre "APP:" y "]"
-        else:
-            app = "GENERICA"
-            mensaje = datos
-        return mensaje, app, "TCP", TCP_PORT
-
-
-class CapaTransporte:
-    @staticmethod
-    def encapsular(datos_app, puerto_origen, protocolo):
-        # Capa 4: Añade encabezado de transporte
-        encabezado = f"[H4:{protocolo}:{puerto_origen}]"
-        return encabezado + datos_app
-    
-    @staticmethod
-    def desencapsular(segmento):
-        # Capa 4: Remueve encabezado de transporte
-        fin = segmento.find(']') + 1
-        encabezado = segmento[:fin]
-        datos_app = segmento[fin:]
-        partes = encabezado[1:-1].split(':')
-        protocolo = partes[1]
-        puerto_origen = int(partes[2])
-        return datos_app, protocolo, puerto_origen
-
-class CapaRed:
-    @staticmethod
-    def encapsular(segmento, ip_origen, ip_destino):
-        # Capa 3: Añade encabezado de red
-        encabezado = f"[H3:{ip_origen}:{ip_destino}]"
-        return encabezado + segmento
-    
-    @staticmethod
-    def desencapsular(paquete):
-        # Capa 3: Remueve encabezado de red
-        fin = paquete.find(']') + 1
-        encabezado = paquete[:fin]
-        segmento = paquete[fin:]
-        partes = encabezado[1:-1].split(':')
-        ip_origen = partes[1]
-        ip_destino = partes[2]
-        return segmento, ip_origen, ip_destino
-
-class CapaEnlace:
-    @staticmethod
-    def encapsular(paquete, mac_origen, mac_destino):
-        # Capa 2: Añade encabezado de enlace
-        encabezado = f"[H2:{mac_origen}:{mac_destino}]"
-        return encabezado + paquete
-    
-    @staticmethod
-    def desencapsular(trama):
-        # Capa 2: Remueve encabezado de enlace
-        fin = trama.find(']') + 1
-        encabezado = trama[:fin]
-        paquete = trama[fin:]
-        partes = encabezado[1:-1].split(':')
-        mac_origen = partes[1]
-        mac_destino = partes[2]
-        return paquete, mac_origen, mac_destino
+# CapaAplicacion ... CapaFisica son las de capas.py, las mismas que usa simulador_red.py
 
 #FIXME: Ricardo, aqui se transforma en bits para la capa fisica 2 , pero no se si es lo que quiere el profe
 # para que revise eso y le eche un ojo bien si todo dentro de cada capa tiene sentido (revise si teoricamente 
@@ -111,24 +40,6 @@ class CapaEnlace:
 # Tambien que los bits recibidos se imprimen unicamente en las PC no en los switch o en los routers, 
 # para que se fije que es lo que quiere el profe
 
-class CapaFisica:
-    @staticmethod
-    def encapsular(trama):
-        """Capa 1: Convierte a bits (simulación muy simplificada)"""
-        # Simulamos la conversión a bits representándolo como una cadena de 0s y 1s
-        bits = ''.join(format(ord(c), '08b') for c in trama)
-        return bits
-    
-    @staticmethod
-    def desencapsular(bits):
-        """Convierte bits a trama"""
-        # Convertimos la cadena de bits de vuelta a caracteres
-        chars = []
-        for i in range(0, len(bits), 8):
-            byte = bits[i:i+8]
-            chars.append(chr(int(byte, 2)))
-        return ''.join(chars)
-    
 # ==============================
 # Dispositivos
 # ==============================
@@ -253,14 +164,14 @@ class Dispositivo:
             return
 
         if capa_actual == 4:
-            datos_app, protocolo, puerto_origen = CapaTransporte.desencapsular(datos)
-            print(f"  Transporte: protocolo={protocolo}, puerto_origen={puerto_origen}")
+            datos_app, protocolo, puerto_origen, puerto_destino = CapaTransporte.desencapsular(datos)
+            print(f"  Transporte: protocolo={protocolo}, puerto_origen={puerto_origen}, puerto_destino={puerto_destino}")
             print(" Capa4 ->", datos)
             self.recibir(datos_app, 5, dispositivo_anterior, interfaz_local)
             return
 
         if capa_actual == 5:
-            mensaje, app, protocolo, puerto_destino = CapaAplicacion.desencapsular(datos)
+            mensaje, app = CapaAplicacion.desencapsular(datos)
             
             print(f"  Aplicación ({app}): mensaje recibido: '{mensaje}'")
             print(" Capa5 ->", datos)
@@ -278,12 +189,12 @@ class PC(Dispositivo):
         print(f"\n=== {self.nombre} ENVIANDO ({app}) ===")
         
         # Capa 5: Aplicación (mensaje + app)
-        datos_app = CapaAplicacion.encapsular(mensaje, protocolo, puerto_destino, app)
+        datos_app = CapaAplicacion.encapsular(mensaje, app)
         print(" Capa5 ->", datos_app)
         
         # Capa 4: Transporte (añade H4)
         puerto_origen = 5000
-        segmento = CapaTransporte.encapsular(datos_app, puerto_origen, protocolo)
+        segmento = CapaTransporte.encapsular(datos_app, puerto_origen, puerto_destino, protocolo)
         print(" Capa4 ->", segmento)
         
         # Capa 3: Red (añade H3)
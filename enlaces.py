@@ -0,0 +1,134 @@
+# ==============================
+# Modelo de enlace: ancho de banda, propagación, cola y pérdidas
+# ==============================
+# Por defecto un cable entrega cada trama RETARDO_SALTO después de enviarla, sin límite de
+# velocidad ni pérdidas. Un Enlace modela un sentido del cable (la interfaz que transmite):
+#
+# - ancho_banda (bits/s): la trama ocupa el transmisor durante bits / ancho_banda
+#   (retardo de serialización; si la capa física usa un código de línea se cuentan sus
+#   símbolos en lugar de los bits); las tramas que llegan mientras está ocupado esperan
+#   en una cola FIFO
+# - retardo (s): propagación, desde que termina de transmitirse hasta que llega
+# - mtu (bytes): las tramas más grandes en el medio se descartan ("excede_mtu")
+# - cola (tramas): cuántas pueden esperar detrás de la que se transmite; si la cola está
+#   llena la trama se descarta al llegar (tail-drop, "cola_enlace_llena")
+# - perdida: probabilidad de perder cada trama; ber: probabilidad de error por bit (la
+#   trama se pierde si tiene algún bit errado). Ambas cuentan como "perdida_enlace"
+# - corromper: en lugar de perder las tramas con algún bit errado, los bits se invierten de
+#   verdad con un CanalRuidoso (errores_bits.py). El emisor agrega el FCS a la trama (sus 4
+#   bytes cuentan en la serialización, no en la MTU), el canal invierte bits con
+#   probabilidad ber y el receptor descarta las tramas cuyo FCS no coincide ("fcs_invalido")
+#
+# El costo por trama es O(1): la cola no guarda las tramas, solo los tiempos en que
+# termina cada transmisión pendiente (la trama ya tiene su llegada programada).
+
+import collections
+import math
+import random
+
+from errores_bits import CanalRuidoso
+
+# Motivos de descarte
+EXCEDE_MTU = "excede_mtu"
+COLA_LLENA = "cola_enlace_llena"
+PERDIDA = "perdida_enlace"
+FCS_INVALIDO = "fcs_invalido"     # lo cuenta el receptor (ver simulador_red.Dispositivo._llegada)
+
+
+class Enlace:
+    # - ancho_banda: bits por segundo (None: sin retardo de serialización ni cola)
+    # - retardo: segundos de propagación
+    # - mtu: bytes máximos por trama en el medio (None: sin límite)
+    # - cola: tramas en espera detrás de la que se transmite (None: sin límite)
+    # - perdida, ber: probabilidad de pérdida por trama y de error por bit
+    # - semilla: para que las pérdidas (y los bits errados) sean reproducibles
+    # - corromper: invertir los bits errados con un CanalRuidoso (canal) en vez de perder la trama
+    __slots__ = ("ancho_banda", "retardo", "mtu", "cola", "perdida", "ber", "_azar", "_salidas",
+                 "_probabilidades", "libre_en", "tramas", "bytes", "ocupado", "descartes", "canal")
+
+    def __init__(self, ancho_banda=None, retardo=0.0, mtu=None, cola=None, perdida=0.0, ber=0.0,
+                 semilla=None, corromper=False):
+        if ancho_banda is not None and ancho_banda <= 0:
+            raise ValueError(f"Ancho de banda inválido: {ancho_banda}")
+        if not 0.0 <= perdida <= 1.0 or not 0.0 <= ber <= 1.0:
+            raise ValueError("perdida y ber deben estar entre 0 y 1")
+        self.ancho_banda = ancho_banda
+        self.retardo = retardo
+        self.mtu = mtu
+        self.cola = cola
+        self.perdida = perdida
+        self.ber = ber
+        self.canal = CanalRuidoso(ber, semilla) if corromper else None
+        self._azar = random.Random(semilla) if perdida or (ber and not corromper) else None
+        self._salidas = collections.deque()  # fin de transmisión de las tramas pendientes
+        self._probabilidades = {}            # tamaño -> probabilidad de perder la trama
+        self.libre_en = 0.0                  # cuándo termina la última transmisión pendiente
+        self.tramas = 0                      # tramas transmitidas (incluye las perdidas)
+        self.bytes = 0
+        self.ocupado = 0.0                   # segundos transmitiendo (para la utilización)
+        self.descartes = {}                  # motivo -> cantidad
+
+    # Transmite una trama de "tamano" bytes que llega al transmisor en "ahora" (tiempo
+    # simulado; None sin planificador: solo se aplican MTU y pérdidas). "simbolos" son los
+    # símbolos que ocupa en la línea (None: tamano * 8); solo cambian la serialización.
+    # Retorna (llegada al otro extremo, None) o (None, motivo del descarte).
+    def transmitir(self, ahora, tamano, simbolos=None):
+        if self.mtu is not None and tamano > self.mtu:
+            return self._descartar(EXCEDE_MTU)
+        llegada = None
+        if ahora is not None:
+            inicio = ahora
+            if self.ancho_banda is not None:
+                salidas = self._salidas
+                while salidas and salidas[0] <= ahora:
+                    salidas.popleft()
+                # La primera pendiente es la que se está transmitiendo
+                if self.cola is not None and len(salidas) > self.cola:
+                    return self._descartar(COLA_LLENA)
+                if self.libre_en > ahora:
+                    inicio = self.libre_en
+                serializacion = (tamano * 8 if simbolos is None else simbolos) / self.ancho_banda
+                inicio += serializacion
+                self.libre_en = inicio
+                self.ocupado += serializacion
+                salidas.append(inicio)
+            llegada = inicio + self.retardo
+        self.tramas += 1
+        self.bytes += tamano
+        if self._azar is not None and self._perdida(tamano):
+            return self._descartar(PERDIDA)
+        return llegada, None
+
+    # True si la trama se pierde (pérdida por trama o algún bit errado). La probabilidad
+    # se calcula una vez por tamaño de trama.
+    def _perdida(self, tamano):
+        probabilidad = self._probabilidades.get(tamano)
+        if probabilidad is None:
+            probabilidad = self.perdida
+            if self.ber and self.canal is None:
+                # 1 - (1 - ber)^bits, estable para ber pequeños
+                probabilidad = 1.0 - (1.0 - probabilidad) * math.exp(tamano * 8 * math.log1p(-self.ber))
+            self._probabilidades[tamano] = probabilidad
+        return self._azar.random() < probabilidad
+
+    def _descartar(self, motivo):
+        self.descartes[motivo] = self.descartes.get(motivo, 0) + 1
+        return None, motivo
+
+    # Tramas esperando o transmitiéndose en el tiempo "ahora"
+    def ocupacion(self, ahora):
+        return sum(1 for fin in self._salidas if fin > ahora)
+
+    # Fracción del tiempo "duracion" que el transmisor estuvo ocupado
+    def utilizacion(self, duracion):
+        return self.ocupado / duracion if duracion > 0 else 0.0
+
+    # Resumen para mostrar o comparar
+    def instantanea(self):
+        return {
+            "tramas": self.tramas,
+            "bytes": self.bytes,
+            "ocupado": self.ocupado,
+            "descartes": dict(self.descartes),
+            "bits_errados": self.canal.errores if self.canal is not None else 0,
+        }
@@ -0,0 +1,160 @@
+# ==============================
+# Errores de bits en el medio y su detección
+# ==============================
+# Un CanalRuidoso invierte cada bit de las tramas que pasan por él con probabilidad "ber"
+# (tasa de error de bit). En lugar de sortear bit por bit, se sortea cuántos bits fallan
+# y dónde, y se aplica una máscara:
+#
+# - con NumPy (opcional): la cantidad sale de una binomial, las posiciones de
+#   Generator.choice sin repetición, y la máscara se arma y se aplica con XOR vectorial
+# - sin NumPy: saltos geométricos entre un bit errado y el siguiente, así que hay un paso
+#   de Python por error y no por bit
+#
+# aplicar_lote() trata un lote de tramas como una sola secuencia de bits. Las tramas
+# dañadas se detectan con el FCS (CRC-32 de Ethernet, agregar_fcs / verificar_fcs) o con
+# la suma de verificación de Internet (RFC 1071, suma_verificacion).
+#
+# En la simulación, un enlace conectado con corromper=True (ver enlaces.Enlace) usa un
+# CanalRuidoso: el emisor agrega el FCS, el canal invierte bits y la trama viaja como un
+# MedioConFCS; el receptor verifica el FCS y descarta las tramas dañadas ("fcs_invalido").
+#
+# Uso:
+#     canal = CanalRuidoso(1e-5, semilla=1)
+#     recibidas = canal.aplicar_lote([agregar_fcs(trama) for trama in tramas])
+#     buenas = [trama for trama in recibidas if verificar_fcs(trama)]
+
+import itertools
+import math
+import random
+import struct
+import zlib
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Con NumPy, bytes desde los que la suma de verificación se calcula con un arreglo
+MINIMO_NUMPY = 2048
+
+FCS = struct.Struct("<I")
+# CRC-32 de una trama seguida de su FCS correcto (constante para cualquier trama)
+RESIDUO_CRC32 = 0x2144DF1C
+
+
+class CanalRuidoso:
+    # - ber: probabilidad de que cada bit llegue invertido
+    # - semilla: para que los errores sean reproducibles
+    __slots__ = ("ber", "_azar", "_log_acierto", "tramas", "bits", "errores")
+
+    def __init__(self, ber, semilla=None):
+        if not 0.0 <= ber <= 1.0:
+            raise ValueError("ber debe estar entre 0 y 1")
+        self.ber = ber
+        self._azar = numpy.random.default_rng(semilla) if numpy is not None else random.Random(semilla)
+        self._log_acierto = math.log1p(-ber) if ber < 1.0 else -math.inf
+        self.tramas = 0
+        self.bits = 0
+        self.errores = 0      # bits invertidos
+
+    # Retorna una copia de la trama (bytes, bytearray o memoryview) con los bits errados
+    def aplicar(self, datos):
+        self.tramas += 1
+        self.bits += len(datos) * 8
+        if not self.ber or not datos:
+            return bytes(datos)
+        if isinstance(self._azar, random.Random):
+            return self._aplicar_python(datos)
+        return self._aplicar_numpy(datos)
+
+    # Aplica el canal a un lote de tramas como una sola secuencia de bits
+    def aplicar_lote(self, tramas):
+        datos = self.aplicar(b"".join(tramas))
+        self.tramas += len(tramas) - 1
+        limites = list(itertools.accumulate(map(len, tramas), initial=0))
+        return [datos[inicio:fin] for inicio, fin in zip(limites, limites[1:])]
+
+    def _aplicar_numpy(self, datos):
+        bits = len(datos) * 8
+        errores = int(self._azar.binomial(bits, self.ber))
+        if not errores:
+            return bytes(datos)
+        self.errores += errores
+        posiciones = self._azar.choice(bits, errores, replace=False)
+        mascara = numpy.zeros(len(datos), numpy.uint8)
+        numpy.bitwise_or.at(mascara, posiciones >> 3, (0x80 >> (posiciones & 7)).astype(numpy.uint8))
+        return (numpy.frombuffer(datos, numpy.uint8) ^ mascara).tobytes()
+
+    # La distancia entre dos bits errados es geométrica: log(1 - u) / log(1 - ber) bits
+    def _aplicar_python(self, datos):
+        salida = bytearray(datos)
+        bits = len(salida) * 8
+        azar, log_acierto = self._azar.random, self._log_acierto
+        posicion = -1
+        while True:
+            posicion += 1 + int(math.log(1.0 - azar()) / log_acierto)
+            if posicion >= bits:
+                return bytes(salida)
+            salida[posicion >> 3] ^= 0x80 >> (posicion & 7)
+            self.errores += 1
+
+    # Resumen para mostrar o comparar
+    def instantanea(self):
+        return {"tramas": self.tramas, "bits": self.bits, "errores": self.errores}
+
+
+# ====== Detección ======
+# Trama con su FCS (CRC-32 de Ethernet, 4 bytes al final)
+def agregar_fcs(datos):
+    return bytes(datos) + FCS.pack(zlib.crc32(datos))
+
+
+# True si el FCS del final coincide; el CRC de la trama completa da siempre RESIDUO_CRC32
+def verificar_fcs(trama):
+    return len(trama) >= FCS.size and zlib.crc32(trama) == RESIDUO_CRC32
+
+
+# Trama en el medio seguida de su FCS (Trama, bytes o cadena de símbolos), tal como la
+# entregó el canal: el receptor la reconoce por el tipo y verifica el FCS antes de la capa 1
+class MedioConFCS:
+    __slots__ = ("medio",)
+
+    def __init__(self, medio):
+        self.medio = medio
+
+
+# Suma de verificación de Internet (complemento a uno de la suma de palabras de 16 bits)
+def suma_verificacion(datos):
+    if len(datos) % 2:
+        datos = bytes(datos) + b"\0"
+    if numpy is not None and len(datos) >= MINIMO_NUMPY:
+        suma = int(numpy.frombuffer(datos, ">u2").sum(dtype=numpy.uint64))
+        while suma >> 16:
+            suma = (suma & 0xFFFF) + (suma >> 16)
+    else:
+        # La suma en complemento a uno es el número completo módulo 0xFFFF (2^16 = 1 mod 0xFFFF),
+        # salvo que un número distinto de cero da 0xFFFF y no 0
+        numero = int.from_bytes(datos, "big")
+        suma = numero % 0xFFFF or (0xFFFF if numero else 0)
+    return ~suma & 0xFFFF
+
+
+# Sumas de verificación de un lote de tramas; con NumPy, con una sola suma por segmentos
+def suma_verificacion_lote(tramas):
+    if numpy is None or not tramas:
+        return [suma_verificacion(trama) for trama in tramas]
+    pares = [bytes(trama) + b"\0" if len(trama) % 2 else trama for trama in tramas]
+    largos = numpy.fromiter((len(trama) // 2 for trama in pares), numpy.int64, len(pares))
+    inicios = numpy.concatenate(([0], numpy.cumsum(largos)[:-1]))
+    # Una palabra de más al final para que los inicios de las tramas vacías sean válidos;
+    # reduceat con un segmento vacío toma la palabra siguiente, así que se ponen en cero
+    palabras = numpy.zeros(int(largos.sum()) + 1, numpy.uint64)
+    palabras[:-1] = numpy.frombuffer(b"".join(pares), ">u2")
+    sumas = numpy.add.reduceat(palabras, inicios)
+    sumas[largos == 0] = 0
+    while True:
+        acarreo = sumas >> 16
+        if not acarreo.any():
+            break
+        sumas = (sumas & 0xFFFF) + acarreo
+    return (~sumas.astype(numpy.uint16)).tolist()
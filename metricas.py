@@ -0,0 +1,166 @@
+# ==============================
+# Métricas por dispositivo e interfaz
+# ==============================
+# Cada Dispositivo tiene un objeto Metricas con:
+# - contadores por interfaz: tramas y bytes recibidos (rx) y enviados (tx)
+# - descartes por motivo (MAC desconocida, sin ruta, ...)
+# - tramas reenviadas (inundadas, en los switches) y mensajes entregados a la capa 5
+# - fragmentos IP enviados y paquetes reensamblados
+# - histogramas de latencia por salto (tiempo simulado, requiere planificador) y de
+#   tiempo de procesamiento por capa (tiempo real, si medir_tiempos está activo)
+#
+# instantanea() retorna un diccionario serializable a JSON; con diferencia() se comparan
+# dos corridas y con ranking() se ordenan los dispositivos para encontrar cuellos de botella.
+
+import json
+import math
+
+
+class Histograma:
+    # Histograma logarítmico en base 2: cada cubeta cuenta los valores en (2^(e-1), 2^e]
+    __slots__ = ("cubetas", "cantidad", "suma", "minimo", "maximo")
+
+    def __init__(self):
+        self.cubetas = {}
+        self.cantidad = 0
+        self.suma = 0.0
+        self.minimo = None
+        self.maximo = None
+
+    def registrar(self, valor):
+        exponente = math.frexp(valor)[1] if valor > 0 else -1074
+        self.cubetas[exponente] = self.cubetas.get(exponente, 0) + 1
+        self.cantidad += 1
+        self.suma += valor
+        if self.minimo is None or valor < self.minimo:
+            self.minimo = valor
+        if self.maximo is None or valor > self.maximo:
+            self.maximo = valor
+
+    # Percentil aproximado (límite superior de la cubeta que lo contiene), p en [0, 100]
+    def percentil(self, p):
+        if not self.cantidad:
+            return None
+        objetivo = p / 100 * self.cantidad
+        acumulado = 0
+        for exponente in sorted(self.cubetas):
+            acumulado += self.cubetas[exponente]
+            if acumulado >= objetivo:
+                return min(math.ldexp(1.0, exponente), self.maximo)
+        return self.maximo
+
+    def a_dict(self):
+        return {
+            "cantidad": self.cantidad,
+            "suma": self.suma,
+            "min": self.minimo,
+            "max": self.maximo,
+            "p50": self.percentil(50),
+            "p99": self.percentil(99),
+            "cubetas": {str(math.ldexp(1.0, e)): n for e, n in sorted(self.cubetas.items())},
+        }
+
+
+class Metricas:
+    # medir_tiempos activa la medición de tiempo de procesamiento por capa (perf_counter)
+    __slots__ = ("medir_tiempos", "interfaces", "descartes", "reenviadas", "inundadas", "entregados",
+                 "fragmentos", "reensamblados", "arp_solicitudes", "latencia_salto", "tiempo_capa", "_anidado")
+
+    def __init__(self, medir_tiempos=False):
+        self.medir_tiempos = medir_tiempos
+        self.interfaces = {}   # interfaz -> {"rx_tramas", "rx_bytes", "tx_tramas", "tx_bytes"}
+        self.descartes = {}    # motivo -> cantidad
+        self.reenviadas = 0
+        self.inundadas = 0     # tramas con MAC destino desconocida enviadas por todos los puertos
+        self.entregados = 0
+        self.fragmentos = 0      # fragmentos IP enviados (paquetes más grandes que la MTU)
+        self.reensamblados = 0   # paquetes recibidos en fragmentos y reensamblados
+        self.arp_solicitudes = 0   # solicitudes ARP enviadas (incluidos reintentos)
+        self.latencia_salto = {}   # interfaz -> Histograma (segundos simulados)
+        self.tiempo_capa = {}      # capa -> Histograma (segundos reales, exclusivo de esa capa)
+        # Tiempo de las capas anidadas en la medición en curso (ver Dispositivo.recibir)
+        self._anidado = 0.0
+
+    def _interfaz(self, interfaz):
+        contadores = self.interfaces.get(interfaz)
+        if contadores is None:
+            contadores = self.interfaces[interfaz] = {"rx_tramas": 0, "rx_bytes": 0,
+                                                      "tx_tramas": 0, "tx_bytes": 0}
+        return contadores
+
+    def rx(self, interfaz, tramas, cantidad_bytes):
+        contadores = self._interfaz(interfaz)
+        contadores["rx_tramas"] += tramas
+        contadores["rx_bytes"] += cantidad_bytes
+
+    def tx(self, interfaz, tramas, cantidad_bytes):
+        contadores = self._interfaz(interfaz)
+        contadores["tx_tramas"] += tramas
+        contadores["tx_bytes"] += cantidad_bytes
+
+    def descarte(self, motivo, cantidad=1):
+        self.descartes[motivo] = self.descartes.get(motivo, 0) + cantidad
+
+    def latencia(self, interfaz, segundos):
+        histograma = self.latencia_salto.get(interfaz)
+        if histograma is None:
+            histograma = self.latencia_salto[interfaz] = Histograma()
+        histograma.registrar(segundos)
+
+    def tiempo(self, capa, segundos):
+        histograma = self.tiempo_capa.get(capa)
+        if histograma is None:
+            histograma = self.tiempo_capa[capa] = Histograma()
+        histograma.registrar(segundos)
+
+    # Diccionario serializable con todos los contadores e histogramas
+    def instantanea(self):
+        return {
+            "interfaces": {nombre: dict(contadores) for nombre, contadores in self.interfaces.items()},
+            "descartes": dict(self.descartes),
+            "reenviadas": self.reenviadas,
+            "inundadas": self.inundadas,
+            "entregados": self.entregados,
+            "fragmentos": self.fragmentos,
+            "reensamblados": self.reensamblados,
+            "arp_solicitudes": self.arp_solicitudes,
+            "latencia_salto": {nombre: h.a_dict() for nombre, h in self.latencia_salto.items()},
+            "tiempo_capa": {str(capa): h.a_dict() for capa, h in sorted(self.tiempo_capa.items())},
+            "tiempo_total": sum(h.suma for h in self.tiempo_capa.values()),
+        }
+
+
+# Instantánea de varios dispositivos: nombre -> instantánea
+def instantanea_red(dispositivos):
+    return {dispositivo.nombre: dispositivo.metricas.instantanea() for dispositivo in dispositivos}
+
+
+# Diferencia numérica (despues - antes) entre dos instantáneas de instantanea_red().
+# Se comparan contadores; de los histogramas solo cantidad y suma.
+def diferencia(antes, despues):
+    def restar(a, b):
+        if isinstance(b, dict):
+            a = a if isinstance(a, dict) else {}
+            return {clave: restar(a.get(clave), valor) for clave, valor in b.items()
+                    if clave not in ("cubetas", "min", "max", "p50", "p99")}
+        if isinstance(b, (int, float)):
+            return b - (a or 0)
+        return b
+    return restar(antes, despues)
+
+
+# Ordena los dispositivos de mayor a menor según un campo de la instantánea
+# ("tiempo_total", "reenviadas", "entregados", "rx_tramas", "tx_bytes", ...)
+def ranking(instantanea, campo="tiempo_total"):
+    def valor(metricas):
+        if campo in metricas:
+            return metricas[campo]
+        return sum(contadores.get(campo, 0) for contadores in metricas["interfaces"].values())
+    return sorted(((nombre, valor(m)) for nombre, m in instantanea.items()),
+                  key=lambda par: par[1], reverse=True)
+
+
+# Guarda una instantánea como JSON
+def exportar_json(instantanea, ruta):
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump(instantanea, archivo, indent=2, ensure_ascii=False)
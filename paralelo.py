@@ -0,0 +1,243 @@
+# ==============================
+# Simulación en paralelo: particiones en varios procesos
+# ==============================
+# Una topología de topologia.py se reparte entre varios procesos. Cada proceso construye
+# solo sus dispositivos (con las mismas clases de simulador_red.py) y tiene su propio
+# planificador; los vecinos que quedaron en otra partición se reemplazan por un
+# DispositivoRemoto, que junta las tramas que se le transmiten.
+#
+# Sincronización conservadora por ventanas: toda trama tarda al menos la propagación del
+# enlace (RETARDO_SALTO en un enlace ideal) en llegar al vecino. Con "anticipación" la menor
+# propagación entre enlaces que cruzan de partición, lo que una partición envía a partir
+# del tiempo t llega a otra en t + anticipación o después. El coordinador elige el inicio
+# de la ventana (el próximo evento o llegada más temprano de todas las particiones), cada
+# partición ejecuta sus eventos anteriores a inicio + anticipación, y al terminar la
+# ventana el coordinador reparte las tramas que cruzaron de partición para que se
+# procesen en la siguiente.
+#
+# Las particiones se comunican con el coordinador por multiprocessing.Pipe.
+#
+# Uso:
+#     envios = [(tiempo, "PC0", "10.0.3.10", "hola"), ...]
+#     resultado = simular_en_paralelo(descripcion, envios, procesos=8)
+#     resultado["metricas"]["PC42"]["entregados"]
+
+import collections
+import heapq
+import multiprocessing
+
+import simulador_red
+from metricas import instantanea_red
+from planificador import Planificador
+from topologia import construir_topologia
+from trazas import NIVEL_APAGADO, TRAZA
+
+
+class DispositivoRemoto:
+    # Vecino que vive en otra partición. Las tramas que se le transmiten se agregan a
+    # "salientes" como (partición, mensaje) y se entregan al final de la ventana.
+    __slots__ = ("nombre", "particion", "salientes")
+    remoto = True
+
+    def __init__(self, nombre, particion, salientes):
+        self.nombre = nombre
+        self.particion = particion
+        self.salientes = salientes
+
+    def recibir_remoto(self, medio, origen, interfaz_remota, enviado_en, llegada, lote):
+        self.salientes.append((self.particion, (llegada, self.nombre, interfaz_remota,
+                                                origen.nombre, medio, enviado_en, lote)))
+
+
+# Reparte los dispositivos de una descripción en "partes" particiones: nombre -> índice.
+# Se agrupan en islas (componentes conexas sin contar los enlaces entre routers, p. ej. un
+# router con su LAN) y se asigna cada isla a la partición con menos dispositivos, de la más
+# grande a la más chica. Así solo los enlaces entre routers cruzan de partición.
+def particionar(descripcion, partes):
+    nombres = [d["nombre"] for tipo in ("pcs", "switches", "routers") for d in descripcion.get(tipo, ())]
+    routers = {router["nombre"] for router in descripcion.get("routers", ())}
+    padre = {nombre: nombre for nombre in nombres}
+
+    def raiz(nombre):
+        while padre[nombre] != nombre:
+            padre[nombre] = padre[padre[nombre]]
+            nombre = padre[nombre]
+        return nombre
+
+    for a, _, b, _, *_ in descripcion.get("enlaces", ()):
+        if a in routers and b in routers:
+            continue
+        raiz_a, raiz_b = raiz(a), raiz(b)
+        if raiz_a != raiz_b:
+            padre[raiz_a] = raiz_b
+
+    islas = collections.defaultdict(list)
+    for nombre in nombres:
+        islas[raiz(nombre)].append(nombre)
+
+    cargas = [(0, indice) for indice in range(partes)]
+    asignacion = {}
+    for isla in sorted(islas.values(), key=len, reverse=True):
+        carga, indice = heapq.heappop(cargas)
+        for nombre in isla:
+            asignacion[nombre] = indice
+        heapq.heappush(cargas, (carga + len(isla), indice))
+    return asignacion
+
+
+# Menor propagación de los enlaces entre particiones distintas (ventana de sincronización)
+def anticipacion(descripcion, asignacion):
+    retardos = [parametros[0].get("retardo", simulador_red.RETARDO_SALTO) if parametros
+                else simulador_red.RETARDO_SALTO
+                for a, _, b, _, *parametros in descripcion.get("enlaces", ())
+                if asignacion[a] != asignacion[b]]
+    ventana = min(retardos, default=simulador_red.RETARDO_SALTO)
+    if ventana <= 0:
+        raise ValueError("Los enlaces entre particiones necesitan retardo de propagación positivo")
+    return ventana
+
+
+# Programa los envíos (tiempo, pc_origen, ip_destino, mensaje, *argumentos de enviar_mensaje)
+# de los PCs presentes en la red
+def _programar_envios(red, planificador, envios):
+    for tiempo, origen, ip_destino, mensaje, *extra in envios:
+        if origen in red.dispositivos:
+            planificador.programar_en(tiempo, red[origen].enviar_mensaje, mensaje, ip_destino, *extra)
+
+
+def _configurar(configuracion):
+    simulador_red.MODO_FISICO = configuracion["modo_fisico"]
+    simulador_red.CODIGO_LINEA = configuracion["codigo_linea"]
+    simulador_red.CODEC = configuracion["codec"]
+    TRAZA.configurar(nivel=configuracion["nivel_traza"])
+
+
+# Proceso de una partición: construye sus dispositivos y ejecuta ventanas a pedido del
+# coordinador hasta recibir "fin"
+def _particion(indice, descripcion, asignacion, envios, conexion, configuracion):
+    _configurar(configuracion)
+    planificador = Planificador()
+    salientes = []
+    remotos = {}
+
+    def remoto(nombre):
+        vecino = remotos.get(nombre)
+        if vecino is None:
+            vecino = remotos[nombre] = DispositivoRemoto(nombre, asignacion[nombre], salientes)
+        return vecino
+
+    propios = {nombre for nombre, particion in asignacion.items() if particion == indice}
+    red = construir_topologia(descripcion, planificador, dispositivos=propios, remoto=remoto)
+    _programar_envios(red, planificador, envios)
+    conexion.send((planificador.proximo(), {}))
+
+    while True:
+        orden, fin, entrantes = conexion.recv()
+        if orden == "fin":
+            conexion.send((instantanea_red(red), planificador.eventos_procesados))
+            conexion.close()
+            return
+        for llegada, destino, interfaz, origen, medio, enviado_en, lote in entrantes:
+            planificador.programar_en(llegada, red[destino]._llegada, medio, remoto(origen),
+                                      interfaz, enviado_en, lote)
+        planificador.ejecutar_antes(fin)
+        por_particion = collections.defaultdict(list)
+        for particion, mensaje in salientes:
+            por_particion[particion].append(mensaje)
+        salientes.clear()
+        conexion.send((planificador.proximo(), dict(por_particion)))
+
+
+# Simula la descripción con los envíos dados repartida en "procesos" particiones.
+# - hasta: se procesan los eventos anteriores a este tiempo (None: hasta que no queden)
+# - modo_fisico, codec: valores de simulador_red.MODO_FISICO/CODEC en cada partición
+#   (CODIGO_LINEA se copia del proceso actual)
+# Retorna {"metricas": nombre -> instantánea, "eventos", "ventanas", "asignacion"}.
+def simular_en_paralelo(descripcion, envios, procesos, hasta=None, modo_fisico=None, codec=None,
+                        nivel_traza=NIVEL_APAGADO):
+    configuracion = {
+        "modo_fisico": modo_fisico or simulador_red.MODO_FISICO,
+        "codigo_linea": simulador_red.CODIGO_LINEA,
+        "codec": codec or simulador_red.CODEC,
+        "nivel_traza": nivel_traza,
+    }
+    asignacion = particionar(descripcion, procesos)
+    ventana = anticipacion(descripcion, asignacion)
+    envios_por_particion = [[] for _ in range(procesos)]
+    for envio in envios:
+        envios_por_particion[asignacion[envio[1]]].append(envio)
+
+    contexto = multiprocessing.get_context()
+    conexiones, trabajadores = [], []
+    for indice in range(procesos):
+        local, remota = contexto.Pipe()
+        trabajador = contexto.Process(
+            target=_particion,
+            args=(indice, descripcion, asignacion, envios_por_particion[indice], remota, configuracion),
+            daemon=True)
+        trabajador.start()
+        remota.close()
+        conexiones.append(local)
+        trabajadores.append(trabajador)
+
+    try:
+        proximos = [conexion.recv()[0] for conexion in conexiones]
+        entrantes = [[] for _ in range(procesos)]
+        ventanas = 0
+        while True:
+            candidatos = [t for t in proximos if t is not None]
+            candidatos.extend(mensaje[0] for lista in entrantes for mensaje in lista)
+            if not candidatos:
+                break
+            inicio = min(candidatos)
+            if hasta is not None and inicio >= hasta:
+                break
+            fin = inicio + ventana
+            if hasta is not None:
+                fin = min(fin, hasta)
+            for conexion, mensajes in zip(conexiones, entrantes):
+                conexion.send(("ventana", fin, mensajes))
+            entrantes = [[] for _ in range(procesos)]
+            for indice, conexion in enumerate(conexiones):
+                proximos[indice], salientes = conexion.recv()
+                for particion, mensajes in salientes.items():
+                    entrantes[particion].extend(mensajes)
+            ventanas += 1
+
+        metricas, eventos = {}, 0
+        for conexion in conexiones:
+            conexion.send(("fin", None, None))
+        for conexion in conexiones:
+            instantanea, procesados = conexion.recv()
+            metricas.update(instantanea)
+            eventos += procesados
+    finally:
+        for trabajador in trabajadores:
+            trabajador.join(timeout=5)
+            if trabajador.is_alive():
+                trabajador.terminate()
+    return {"metricas": metricas, "eventos": eventos, "ventanas": ventanas, "asignacion": asignacion}
+
+
+# Misma simulación en un solo proceso (referencia para comparar resultados y tiempos)
+def simular_secuencial(descripcion, envios, hasta=None, modo_fisico=None, codec=None,
+                       nivel_traza=NIVEL_APAGADO):
+    anterior = (simulador_red.MODO_FISICO, simulador_red.CODIGO_LINEA, simulador_red.CODEC, TRAZA.nivel)
+    _configurar({
+        "modo_fisico": modo_fisico or simulador_red.MODO_FISICO,
+        "codigo_linea": simulador_red.CODIGO_LINEA,
+        "codec": codec or simulador_red.CODEC,
+        "nivel_traza": nivel_traza,
+    })
+    try:
+        planificador = Planificador()
+        red = construir_topologia(descripcion, planificador)
+        _programar_envios(red, planificador, envios)
+        if hasta is None:
+            planificador.ejecutar()
+        else:
+            planificador.ejecutar_antes(hasta)
+        return {"metricas": instantanea_red(red), "eventos": planificador.eventos_procesados}
+    finally:
+        simulador_red.MODO_FISICO, simulador_red.CODIGO_LINEA, simulador_red.CODEC, nivel = anterior
+        TRAZA.configurar(nivel=nivel)
@@ -0,0 +1,73 @@
+# ==============================
+# Planificador de eventos discretos
+# ==============================
+# Reemplaza las llamadas anidadas entre dispositivos (enviar_por_interfaz -> recibir -> ...)
+# por una cola de prioridad de eventos ordenada por tiempo simulado. Cada salto se programa
+# como "la trama llega a la interfaz X en el tiempo t", de modo que la pila de llamadas no
+# crece con la longitud del camino y pueden haber muchas tramas en vuelo a la vez.
+
+import heapq
+import itertools
+
+
+class Planificador:
+    # Las tramas se programan como eventos (una EjecucionAsincrona las encola, ver asincrono.py)
+    asincrono = False
+
+    # Inicializa el reloj simulado (en segundos) y la cola de eventos vacía
+    def __init__(self):
+        self.ahora = 0.0
+        self.eventos_procesados = 0
+        self._cola = []
+        # Contador para desempatar eventos con el mismo tiempo (orden FIFO estable)
+        self._secuencia = itertools.count()
+
+    # Programa funcion(*args) para ejecutarse "retardo" segundos después del tiempo actual
+    def programar(self, retardo, funcion, *args):
+        heapq.heappush(self._cola, (self.ahora + retardo, next(self._secuencia), funcion, args))
+
+    # Programa funcion(*args) en un tiempo absoluto (no puede ser anterior al actual)
+    def programar_en(self, tiempo, funcion, *args):
+        if tiempo < self.ahora:
+            raise ValueError(f"No se puede programar en el pasado (t={tiempo} < ahora={self.ahora})")
+        heapq.heappush(self._cola, (tiempo, next(self._secuencia), funcion, args))
+
+    # Cantidad de eventos aún en la cola
+    def pendientes(self):
+        return len(self._cola)
+
+    # Tiempo del próximo evento, o None si la cola está vacía
+    def proximo(self):
+        return self._cola[0][0] if self._cola else None
+
+    # Procesa eventos en orden de tiempo hasta vaciar la cola (o hasta el tiempo "hasta").
+    # Retorna la cantidad de eventos procesados en esta llamada.
+    def ejecutar(self, hasta=None):
+        cola = self._cola
+        pop = heapq.heappop
+        procesados = 0
+        while cola:
+            if hasta is not None and cola[0][0] > hasta:
+                break
+            tiempo, _, funcion, args = pop(cola)
+            self.ahora = tiempo
+            funcion(*args)
+            procesados += 1
+        if hasta is not None and hasta > self.ahora:
+            self.ahora = hasta
+        self.eventos_procesados += procesados
+        return procesados
+
+    # Procesa los eventos con tiempo estrictamente menor que "fin" (ventana de una
+    # simulación sincronizada, ver paralelo.py). No adelanta el reloj hasta "fin".
+    def ejecutar_antes(self, fin):
+        cola = self._cola
+        pop = heapq.heappop
+        procesados = 0
+        while cola and cola[0][0] < fin:
+            tiempo, _, funcion, args = pop(cola)
+            self.ahora = tiempo
+            funcion(*args)
+            procesados += 1
+        self.eventos_procesados += procesados
+        return procesados
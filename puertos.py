@@ -0,0 +1,127 @@
+# ==============================
+# Puertos y sockets de aplicación
+# ==============================
+# Sin sockets, cada mensaje que llega a una PC va a la aplicación por defecto, que solo lo
+# muestra. Con pc.socket(protocolo, puerto) una aplicación se asocia a un puerto TCP o UDP
+# y recibe los mensajes dirigidos a él:
+#
+# - con un callback al_recibir(socket, recibido) se atiende cada mensaje al llegar (p. ej.
+#   para contestar y armar cargas de pedido/respuesta)
+# - sin callback los mensajes esperan en la cola del socket (hasta COLA_SOCKET; los
+#   siguientes se descartan) y se leen con socket.recibir()
+#
+# La tabla de puertos es un diccionario (protocolo, puerto) -> Socket, así que despachar
+# un segmento cuesta lo mismo con una aplicación que con miles. Los puertos sin socket
+# siguen yendo a la aplicación por defecto.
+#
+# Con TCP, socket.enviar() usa la conexión con ese destino desde el puerto del socket, o
+# la abre; un servidor contesta por la misma conexión por la que llegó el pedido.
+
+import collections
+
+COLA_SOCKET = 1024        # mensajes en espera por socket sin callback
+PUERTO_DINAMICO = 32768   # primer puerto de los sockets sin puerto fijo (hasta 49151; desde
+                          # transporte.PUERTO_EFIMERO son de las conexiones sin socket)
+PUERTO_DINAMICO_FIN = 49152
+
+# Mensaje entregado a un socket
+Recibido = collections.namedtuple("Recibido", ["mensaje", "app", "ip_origen", "puerto_origen"])
+
+
+class Socket:
+    # - pc: PC dueña del socket
+    # - protocolo: "TCP" o "UDP"; puerto: puerto local
+    # - app: etiqueta de capa 5 de los mensajes que envía (p. ej. un código de
+    #   simulador_red.APP_CODES)
+    # - al_recibir: callback(socket, recibido) o None para encolar los mensajes
+    __slots__ = ("pc", "protocolo", "puerto", "app", "al_recibir", "cola", "capacidad",
+                 "recibidos", "enviados", "descartados")
+
+    def __init__(self, pc, protocolo, puerto, app="GENERICA", al_recibir=None, capacidad=COLA_SOCKET):
+        self.pc = pc
+        self.protocolo = protocolo
+        self.puerto = puerto
+        self.app = app
+        self.al_recibir = al_recibir
+        self.cola = collections.deque()
+        self.capacidad = capacidad
+        self.recibidos = 0
+        self.enviados = 0
+        self.descartados = 0
+
+    def __repr__(self):
+        return f"Socket({self.pc.nombre}, {self.protocolo}:{self.puerto}, {self.app})"
+
+    # Envía un mensaje a ip:puerto desde el puerto del socket
+    def enviar(self, mensaje, ip_destino, puerto_destino):
+        self.enviados += 1
+        self.pc.enviar_mensaje(mensaje, ip_destino, self.protocolo, puerto_destino, self.app,
+                               puerto_origen=self.puerto)
+
+    # Contesta al origen de un mensaje recibido
+    def responder(self, recibido, mensaje):
+        self.enviar(mensaje, recibido.ip_origen, recibido.puerto_origen)
+
+    # Próximo mensaje en espera (Recibido), o None si no hay
+    def recibir(self):
+        return self.cola.popleft() if self.cola else None
+
+    # Libera el puerto; con TCP además cierra sus conexiones
+    def cerrar(self):
+        self.pc.puertos.liberar(self)
+        if self.protocolo == "TCP":
+            self.pc.tcp.cerrar(self.puerto)
+
+    # Mensaje que llegó al puerto (ya sin encabezados)
+    def _entregar(self, recibido):
+        self.recibidos += 1
+        if self.al_recibir is not None:
+            self.al_recibir(self, recibido)
+        elif len(self.cola) < self.capacidad:
+            self.cola.append(recibido)
+        else:
+            self.descartados += 1
+            self.pc.metricas.descarte("socket_lleno")
+
+
+class TablaPuertos:
+    __slots__ = ("_sockets", "_proximo")
+
+    def __init__(self):
+        self._sockets = {}   # (protocolo, puerto) -> Socket
+        self._proximo = PUERTO_DINAMICO
+
+    def __len__(self):
+        return len(self._sockets)
+
+    def get(self, protocolo, puerto):
+        return self._sockets.get((protocolo, puerto))
+
+    # Asocia un socket a su puerto (puerto None: el próximo libre desde PUERTO_DINAMICO)
+    def asociar(self, socket):
+        if socket.puerto is None:
+            socket.puerto = self._puerto_libre(socket.protocolo)
+        clave = (socket.protocolo, socket.puerto)
+        if clave in self._sockets:
+            raise ValueError(f"Puerto {socket.protocolo}:{socket.puerto} en uso en {socket.pc.nombre}")
+        self._sockets[clave] = socket
+        return socket
+
+    def liberar(self, socket):
+        clave = (socket.protocolo, socket.puerto)
+        if self._sockets.get(clave) is socket:
+            del self._sockets[clave]
+
+    def _puerto_libre(self, protocolo):
+        for _ in range(PUERTO_DINAMICO_FIN - PUERTO_DINAMICO):
+            puerto = self._proximo
+            self._proximo = PUERTO_DINAMICO + (puerto + 1 - PUERTO_DINAMICO) % (PUERTO_DINAMICO_FIN - PUERTO_DINAMICO)
+            if (protocolo, puerto) not in self._sockets:
+                return puerto
+        raise ValueError("No quedan puertos dinámicos libres")
+
+    def instantanea(self):
+        return {f"{protocolo}:{puerto}": {"app": socket.app, "recibidos": socket.recibidos,
+                                         "enviados": socket.enviados, "en_cola": len(socket.cola),
+                                         "descartados": socket.descartados}
+                for (protocolo, puerto), socket in self._sockets.items()}
@@ -0,0 +1,88 @@
+# ==============================
+# Reensamblado de fragmentos IP
+# ==============================
+# Un paquete más grande que la MTU de la interfaz de salida se divide en fragmentos
+# (CapaRed.fragmentar) que viajan como paquetes independientes y el destino los
+# reensambla. Cada datagrama en reensamblado se identifica por (ip_origen, ip_destino,
+# identificador) y guarda sus fragmentos por desplazamiento; está completo cuando llegó el
+# último (mas = 0) y los bytes recibidos cubren todo el datagrama. Los fragmentos de texto
+# se miden en bytes UTF-8, como viajan en el medio y como cuenta su desplazamiento.
+#
+# La memoria está acotada: si los fragmentos en espera superan REENSAMBLADO_MAXIMO bytes se
+# descartan los datagramas más antiguos, y un datagrama que no se completa en
+# REENSAMBLADO_ESPERA segundos se descarta (como ipfrag_high_thresh e ipfrag_time de Linux).
+# Los vencimientos se revisan al llegar cada fragmento, en orden de llegada del primero.
+
+from capas import largo_en_bytes
+
+REENSAMBLADO_ESPERA = 30.0             # segundos para completar un datagrama
+REENSAMBLADO_MAXIMO = 4 * 1024 * 1024  # bytes de fragmentos en espera por dispositivo
+
+
+class _Datagrama:
+    # Fragmentos recibidos (desplazamiento -> carga), bytes recibidos y tamaño total
+    # (None hasta que llega el último fragmento)
+    __slots__ = ("expira_en", "partes", "recibidos", "total")
+
+    def __init__(self, expira_en):
+        self.expira_en = expira_en
+        self.partes = {}
+        self.recibidos = 0
+        self.total = None
+
+
+class Reensamblador:
+    # - reloj: función que retorna el tiempo actual (simulado o real)
+    __slots__ = ("reloj", "espera", "maximo", "_datagramas", "bytes", "vencidos", "desalojados")
+
+    def __init__(self, reloj, espera=REENSAMBLADO_ESPERA, maximo=REENSAMBLADO_MAXIMO):
+        self.reloj = reloj
+        self.espera = espera
+        self.maximo = maximo
+        self._datagramas = {}   # clave -> _Datagrama, en orden de llegada del primer fragmento
+        self.bytes = 0          # bytes de fragmentos en espera
+        self.vencidos = 0       # datagramas descartados por no completarse a tiempo
+        self.desalojados = 0    # datagramas descartados por falta de memoria
+
+    def __len__(self):
+        return len(self._datagramas)
+
+    # Agrega un fragmento. Retorna (partes, descartados): las cargas del datagrama en orden
+    # si quedó completo (None si no) y cuántos datagramas incompletos se descartaron.
+    def agregar(self, clave, desplazamiento, mas, carga):
+        descartados = self._vencer(self.reloj())
+        datagrama = self._datagramas.get(clave)
+        if datagrama is None:
+            datagrama = self._datagramas[clave] = _Datagrama(self.reloj() + self.espera)
+        if desplazamiento in datagrama.partes:
+            return None, descartados  # fragmento duplicado
+        largo = largo_en_bytes(carga)
+        datagrama.partes[desplazamiento] = carga
+        datagrama.recibidos += largo
+        self.bytes += largo
+        if not mas:
+            datagrama.total = desplazamiento + largo
+        if datagrama.total is not None and datagrama.recibidos >= datagrama.total:
+            self._quitar(clave)
+            return [datagrama.partes[inicio] for inicio in sorted(datagrama.partes)], descartados
+        while self.bytes > self.maximo:
+            self._quitar(next(iter(self._datagramas)))
+            self.desalojados += 1
+            descartados += 1
+        return None, descartados
+
+    # Descarta los datagramas vencidos (los más antiguos están primero)
+    def _vencer(self, ahora):
+        vencidos = 0
+        datagramas = self._datagramas
+        while datagramas:
+            clave = next(iter(datagramas))
+            if datagramas[clave].expira_en > ahora:
+                break
+            self._quitar(clave)
+            vencidos += 1
+        self.vencidos += vencidos
+        return vencidos
+
+    def _quitar(self, clave):
+        self.bytes -= self._datagramas.pop(clave).recibidos
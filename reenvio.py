@@ -0,0 +1,165 @@
+# ==============================
+# Interfaces y tabla de reenvío precompilada (FIB)
+# ==============================
+# Cada interfaz guarda su propia MAC/IP. A partir de las interfaces y de las tablas
+# tabla_enlace (MAC -> interfaz) y tabla_red (IP o prefijo -> siguiente salto) de un
+# dispositivo se compila una TablaReenvio inmutable, de modo que por trama basta un acceso
+# a diccionario:
+#
+#   enlace[mac_destino] -> (interfaz_salida, mac_origen)
+#   red[ip_destino]     -> (interfaz_salida, mac_origen, siguiente_mac, siguiente_ip)
+#
+# El siguiente salto de tabla_red puede ser:
+# - el nombre de una interfaz: red conectada, el destino se resuelve por ARP en esa interfaz
+#   (siguiente_mac y siguiente_ip son None)
+# - una IP (puerta de enlace): se resuelve por ARP en la interfaz de la red conectada que la
+#   contiene (siguiente_mac es None)
+# - una MAC: ruta estática sin ARP; la interfaz sale de tabla_enlace (siguiente_ip es None)
+#
+# mac_origen es la MAC de la interfaz de salida, o None en el reenvío de capa 2 de un
+# dispositivo que no reescribe la trama (switch). En "red", interfaz_salida es None si
+# tabla_red tiene la ruta pero no se sabe por qué interfaz alcanzar el siguiente salto.
+#
+# Las claves de tabla_red con prefijo ("10.0.0.0/8", "0.0.0.0/0") van a un TrieRutas, o a
+# una ListaRutas si son pocas (rutas.py); ruta(ip) busca primero la IP exacta y luego el
+# prefijo más largo.
+#
+# La tabla se recompila solo cuando cambian las tablas o las interfaces (TablaObservada
+# avisa al dispositivo en cada modificación).
+
+from collections import namedtuple
+
+from rutas import ListaRutas, TrieRutas, es_ipv4
+
+# Hasta esta cantidad de prefijos se usa una ListaRutas en lugar de un TrieRutas
+MAX_PREFIJOS_LISTA = 8
+
+# Tablas vacías compartidas por todas las FIB (nunca se modifican tras compilar)
+_VACIO = {}
+
+
+class Interfaz:
+    # Interfaz de un dispositivo; mac/ip son None si no tiene (p. ej. puertos de switch)
+    __slots__ = ("nombre", "mac", "ip")
+
+    def __init__(self, nombre, mac=None, ip=None):
+        self.nombre = nombre
+        self.mac = mac
+        self.ip = ip
+
+    def __repr__(self):
+        return f"Interfaz({self.nombre!r}, mac={self.mac!r}, ip={self.ip!r})"
+
+
+class TablaObservada(dict):
+    # Diccionario que llama a al_cambiar() cada vez que se modifica
+    __slots__ = ("_al_cambiar",)
+
+    def __init__(self, al_cambiar, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._al_cambiar = al_cambiar
+
+    def __setitem__(self, clave, valor):
+        super().__setitem__(clave, valor)
+        self._al_cambiar()
+
+    def __delitem__(self, clave):
+        super().__delitem__(clave)
+        self._al_cambiar()
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._al_cambiar()
+
+    def setdefault(self, clave, valor=None):
+        if clave not in self:
+            self[clave] = valor
+        return self[clave]
+
+    def pop(self, *args):
+        valor = super().pop(*args)
+        self._al_cambiar()
+        return valor
+
+    def popitem(self):
+        par = super().popitem()
+        self._al_cambiar()
+        return par
+
+    def clear(self):
+        super().clear()
+        self._al_cambiar()
+
+
+class TablaReenvio(namedtuple("TablaReenvio", ["maces_locales", "ips_locales", "enlace", "red", "prefijos"])):
+    __slots__ = ()
+
+    # (interfaz_salida, mac_origen, siguiente_mac, siguiente_ip) para la IP destino, o None
+    # si no hay ruta
+    def ruta(self, ip):
+        ruta = self.red.get(ip)
+        if ruta is None and self.prefijos is not None:
+            ruta = self.prefijos.buscar_ip(ip)
+        return ruta
+
+
+# Compila la tabla de reenvío de un dispositivo
+# - interfaces: nombre -> Interfaz
+# - reescribe_mac: si el reenvío de capa 2 usa la MAC de la interfaz de salida como origen
+def compilar_fib(interfaces, tabla_enlace, tabla_red, reescribe_mac):
+    maces_locales = frozenset(i.mac for i in interfaces.values() if i.mac is not None)
+    ips_locales = frozenset(i.ip for i in interfaces.values() if i.ip is not None)
+
+    # Si la interfaz de salida no tiene MAC propia se usa la de otra interfaz del dispositivo
+    mac_por_defecto = next((i.mac for i in interfaces.values() if i.mac is not None), "X")
+
+    def mac_de(nombre_interfaz):
+        interfaz = interfaces.get(nombre_interfaz)
+        return interfaz.mac if interfaz is not None and interfaz.mac is not None else mac_por_defecto
+
+    enlace = {
+        mac: (nombre_interfaz, mac_de(nombre_interfaz) if reescribe_mac else None)
+        for mac, nombre_interfaz in tabla_enlace.items() if nombre_interfaz
+    }
+    # Primero las redes conectadas, que se usan para ubicar las puertas de enlace
+    conectadas = None
+    if any(es_ipv4(siguiente_salto) for siguiente_salto in tabla_red.values() if siguiente_salto):
+        conectadas = TablaReenvio(maces_locales, ips_locales, enlace, {}, TrieRutas())
+        for destino, siguiente_salto in tabla_red.items():
+            if siguiente_salto in interfaces:
+                _agregar_ruta(conectadas, destino, (siguiente_salto, mac_de(siguiente_salto), None, None))
+
+    fib = TablaReenvio(maces_locales, ips_locales, enlace, {}, None)
+    for destino, siguiente_salto in tabla_red.items():
+        if not siguiente_salto:
+            continue
+        if siguiente_salto in interfaces:
+            ruta = (siguiente_salto, mac_de(siguiente_salto), None, None)
+        elif es_ipv4(siguiente_salto):
+            conectada = conectadas.ruta(siguiente_salto) if conectadas is not None else None
+            nombre_interfaz = conectada[0] if conectada else None
+            ruta = (nombre_interfaz, mac_de(nombre_interfaz) if nombre_interfaz else None,
+                    None, siguiente_salto)
+        else:
+            nombre_interfaz = tabla_enlace.get(siguiente_salto)
+            if nombre_interfaz:
+                ruta = (nombre_interfaz, mac_de(nombre_interfaz), siguiente_salto, None)
+            else:
+                ruta = (None, None, siguiente_salto, None)
+        if "/" in destino and fib.prefijos is None:
+            cantidad = sum(1 for clave in tabla_red if "/" in clave)
+            fib = fib._replace(prefijos=ListaRutas() if cantidad <= MAX_PREFIJOS_LISTA else TrieRutas())
+        _agregar_ruta(fib, destino, ruta)
+    if not fib.red:
+        fib = fib._replace(red=_VACIO)
+    if not fib.enlace:
+        fib = fib._replace(enlace=_VACIO)
+    return fib
+
+
+# Agrega una ruta al diccionario de IPs exactas o al trie de prefijos de la tabla
+def _agregar_ruta(fib, destino, ruta):
+    if "/" in destino:
+        fib.prefijos.insertar(destino, ruta)
+    else:
+        fib.red[destino] = ruta
@@ -0,0 +1,150 @@
+# ==============================
+# Direcciones IPv4 y búsqueda por prefijo más largo
+# ==============================
+# TrieRutas guarda rutas "a.b.c.d/n" (incluida la ruta por defecto 0.0.0.0/0) y busca,
+# para una IP destino, la ruta con el prefijo más largo que la contiene.
+#
+# Es un trie multibit con pasos de 8 bits (un nivel por byte de la dirección). Un prefijo
+# cuya longitud no es múltiplo de 8 se expande en las 2^(8-r) entradas del último nivel
+# que cubre (r = bits del prefijo en ese nivel); cada entrada recuerda la longitud del
+# prefijo que la ocupa para que uno más corto no pise a uno más largo. Así una búsqueda
+# son a lo sumo 4 accesos a diccionario, independientemente de la cantidad de rutas.
+
+import socket
+
+
+# "10.0.0.1" -> 167772161 (ValueError si no es una IPv4 en notación decimal con puntos)
+def ip_a_entero(ip):
+    try:
+        return int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big")
+    except OSError:
+        raise ValueError(f"Dirección IPv4 inválida: {ip!r}") from None
+
+
+# 167772161 -> "10.0.0.1"
+def entero_a_ip(numero):
+    return socket.inet_ntop(socket.AF_INET, numero.to_bytes(4, "big"))
+
+
+# True si la cadena es una IPv4 en notación decimal con puntos
+def es_ipv4(ip):
+    try:
+        socket.inet_pton(socket.AF_INET, ip)
+        return True
+    except (OSError, TypeError):
+        return False
+
+
+# "10.1.0.0/16" -> (red como entero, 16). Los bits de host se ponen en cero.
+def parsear_prefijo(prefijo):
+    direccion, _, longitud = prefijo.partition("/")
+    longitud = int(longitud) if longitud else 32
+    if not 0 <= longitud <= 32:
+        raise ValueError(f"Longitud de prefijo inválida: {prefijo!r}")
+    mascara = (0xFFFFFFFF << (32 - longitud)) & 0xFFFFFFFF
+    return ip_a_entero(direccion) & mascara, longitud
+
+
+class TrieRutas:
+    def __init__(self):
+        # Cada nivel es un diccionario byte -> [subnivel o None, valor, longitud del prefijo]
+        self._raiz = {}
+        self._por_defecto = None
+        # Prefijos insertados como (red << 6) | longitud; al reemplazar una ruta no se cuenta
+        # de nuevo, y un prefijo tapado por otros más largos en todo su rango sigue contando
+        self._prefijos = set()
+
+    def __len__(self):
+        return len(self._prefijos)
+
+    # Agrega (o reemplaza) la ruta de un prefijo "a.b.c.d/n" o (red_entero, longitud)
+    def insertar(self, prefijo, valor):
+        red, longitud = parsear_prefijo(prefijo) if isinstance(prefijo, str) else prefijo
+        self._prefijos.add((red << 6) | longitud)
+        if longitud == 0:
+            self._por_defecto = valor
+            return
+        nivel = self._raiz
+        ultimo = (longitud - 1) // 8
+        for i in range(ultimo):
+            byte = (red >> (24 - 8 * i)) & 0xFF
+            entrada = nivel.get(byte)
+            if entrada is None:
+                entrada = nivel[byte] = [None, None, -1]
+            if entrada[0] is None:
+                entrada[0] = {}
+            nivel = entrada[0]
+        # Expansión del prefijo en el último nivel
+        bits = longitud - 8 * ultimo
+        base = (red >> (24 - 8 * ultimo)) & 0xFF
+        for byte in range(base, base + (1 << (8 - bits))):
+            entrada = nivel.get(byte)
+            if entrada is None:
+                nivel[byte] = [None, valor, longitud]
+            elif entrada[2] <= longitud:
+                entrada[1] = valor
+                entrada[2] = longitud
+
+    # Valor de la ruta más específica que contiene la IP (entero), o None
+    def buscar(self, ip):
+        mejor = self._por_defecto
+        nivel = self._raiz
+        for desplazamiento in (24, 16, 8, 0):
+            entrada = nivel.get((ip >> desplazamiento) & 0xFF)
+            if entrada is None:
+                break
+            if entrada[2] >= 0:
+                mejor = entrada[1]
+            nivel = entrada[0]
+            if nivel is None:
+                break
+        return mejor
+
+    # Igual que buscar() pero a partir de la IP como texto; None si no es una IPv4
+    def buscar_ip(self, ip):
+        try:
+            return self.buscar(int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big"))
+        except (OSError, TypeError):
+            return None
+
+
+class ListaRutas:
+    # Tabla de pocas rutas (p. ej. la red local y la ruta por defecto de una PC): una lista
+    # de (red, máscara, longitud, valor) ordenada de prefijo más largo a más corto. Tiene la
+    # misma interfaz que TrieRutas y ocupa mucha menos memoria que sus niveles de diccionarios.
+    __slots__ = ("_rutas",)
+
+    def __init__(self):
+        self._rutas = []
+
+    def __len__(self):
+        return len(self._rutas)
+
+    def insertar(self, prefijo, valor):
+        red, longitud = parsear_prefijo(prefijo) if isinstance(prefijo, str) else prefijo
+        mascara = (0xFFFFFFFF << (32 - longitud)) & 0xFFFFFFFF
+        self._rutas = [ruta for ruta in self._rutas if ruta[0] != red or ruta[2] != longitud]
+        self._rutas.append((red, mascara, longitud, valor))
+        self._rutas.sort(key=lambda ruta: -ruta[2])
+
+    def buscar(self, ip):
+        for red, mascara, _, valor in self._rutas:
+            if ip & mascara == red:
+                return valor
+        return None
+
+    def buscar_ip(self, ip):
+        try:
+            return self.buscar(int.from_bytes(socket.inet_pton(socket.AF_INET, ip), "big"))
+        except (OSError, TypeError):
+            return None
+
+
+# Búsqueda lineal de referencia: recorre todas las rutas (red, longitud, valor)
+def busqueda_lineal(rutas, ip):
+    mejor, mejor_longitud = None, -1
+    for red, longitud, valor in rutas:
+        mascara = (0xFFFFFFFF << (32 - longitud)) & 0xFFFFFFFF
+        if ip & mascara == red and longitud > mejor_longitud:
+            mejor, mejor_longitud = valor, longitud
+    return mejor
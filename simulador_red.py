@@ -7,15 +7,45 @@
 # Leonardo Serrano
 # ==============================
 
+import asyncio
+import itertools
+import sys
+import time
+
+from capas import (CAPAS_BINARIAS, CAPAS_TEXTO, CapaAplicacion, CapaEnlace, CapaFisica, CapaRed,
+                   CapaTransporte, largo_en_bytes)
+from codec_binario import (CapaAplicacionBinaria, CapaEnlaceBinaria, CapaRedBinaria,
+                           CapaTransporteBinaria)
+from codigos_linea import codigo_linea
+from metricas import Metricas
+from planificador import Planificador
+from puertos import Recibido, Socket, TablaPuertos
+from reensamblado import Reensamblador
+from conmutacion import CAPACIDAD_TABLA_MAC, ENVEJECIMIENTO_MAC, TablaMAC
+from enlaces import FCS_INVALIDO, Enlace
+from errores_bits import FCS, MedioConFCS, agregar_fcs, verificar_fcs
+from reenvio import Interfaz, TablaObservada, compilar_fib
+from vecinos import (ARP_ESPERA, ARP_REINTENTOS, ARP_RESPUESTA, ARP_SOLICITUD, MAC_DIFUSION,
+                     TablaVecinos, desencapsular_arp, encapsular_arp, es_arp)
+from trama import Trama
+from transporte import PilaTCP
+from trazas import NIVEL_BITS, NIVEL_CAPAS, NIVEL_RESUMEN, TRAZA
 
 # ==============================
-# Direcciones simplificadas (8 bits)
+# Direcciones (IPv4 y MACs simplificadas de 1 carácter)
 # ==============================
-PC1_IP = "1"
-PC2_IP = "2"
+PC1_IP = "192.168.1.10"
+PC2_IP = "192.168.2.10"
+
+ROUTER_IP_LEFT = "192.168.1.1"
+ROUTER_IP_RIGHT = "192.168.2.1"
+
+# Redes conectadas a cada lado del router
+RED_IZQ = "192.168.1.0/24"
+RED_DER = "192.168.2.0/24"
 
-ROUTER_IP_LEFT = "3"
-ROUTER_IP_RIGHT = "4"
+# Ruta por defecto (prefijo de longitud 0): la usan las PCs para llegar a su puerta de enlace
+RUTA_POR_DEFECTO = "0.0.0.0/0"
 
 PC1_MAC = "A"
 PC2_MAC = "B"
@@ -26,6 +56,8 @@ SWITCH2_MAC = "F"
 
 TCP_PORT = 80
 UDP_PORT = 53
+# Puerto origen de los datagramas que no salen de un socket
+PUERTO_ORIGEN = 5000
 
 APP_CODES = {
     "WhatsApp": "11",
@@ -33,88 +65,41 @@ APP_CODES = {
     "Telegram": "13"
 }
 
+# Latencia simulada por salto (medio + procesamiento), en segundos
+RETARDO_SALTO = 0.001
+
+# Representación en el medio físico:
+# - "bits": cadena de '0'/'1' (8 caracteres por byte, útil para mostrar en clase)
+# - "bytes": la trama viaja como bytes y solo se convierte a bits cuando se imprime
+MODO_FISICO = "bits"
+
+# Código de línea de MODO_FISICO = "bits" (ver codigos_linea.py): "NRZ" (un símbolo por
+# bit), "Manchester" (dos por bit) o "4B5B" (cinco por cada cuatro bits)
+CODIGO_LINEA = "NRZ"
+
+# Codec de encabezados con que las PCs construyen los mensajes:
+# - "texto": encabezados "[H3:src:dst]" sobre cadenas (salida didáctica)
+# - "binario": encabezados struct de codec_binario.py escritos en el headroom de una Trama;
+#   ningún salto copia el payload y los routers reescriben la MAC en el mismo buffer
+CODEC = "texto"
+
+# Bytes máximos por trama en el medio para las interfaces cuyo enlace no define "mtu"
+# (None: sin límite). Las PCs y los routers fragmentan los paquetes IP más grandes y el
+# destino los reensambla (ver reensamblado.py); con TCP los mensajes ya se dividen en
+# segmentos de transporte.MSS bytes, que caben en una trama.
+MTU = 1500
+
+# Identificadores de los paquetes fragmentados
+_identificadores_ip = itertools.count(1)
+
 # ==============================
 # CAPAS
 # ==============================
-class CapaAplicacion:
-    # Encapsula el mensaje de la aplicación agregando una etiqueta [APP:<codigo>]
-    @staticmethod
-    def encapsular(mensaje, app="GENERICA"):
-        return f"[APP:{app}]" + mensaje
-    
-    # Extrae la cabecera de aplicación y devuelve (payload, app)
-    @staticmethod
-    def desencapsular(datos):
-        if datos.startswith("[APP:"):
-            fin = datos.find(']') + 1  # índice del cierre de la etiqueta
-            app = datos[5:fin-1]       # obtiene el texto entre "APP:" y "]"
-            return datos[fin:], app    # payload sin la cabecera y código de app
-        # Si no viene etiquetado, se asume genérica
-        return datos, "GENERICA"
-
-class CapaTransporte:
-    # Construye un segmento de transporte con protocolo y puertos: [H4:PROTO:src:dst]
-    @staticmethod
-    def encapsular(datos_app, puerto_origen, puerto_destino, protocolo):
-        encabezado = f"[H4:{protocolo}:{puerto_origen}:{puerto_destino}]"
-        return encabezado + datos_app
-    
-    # Extrae cabecera de transporte y retorna (datos_app, protocolo, puerto_origen, puerto_destino)
-    @staticmethod
-    def desencapsular(segmento):
-        fin = segmento.find(']') + 1        # localiza fin de cabecera
-        encabezado = segmento[:fin]
-        datos_app = segmento[fin:]          # resto es el payload de aplicación
-        partes = encabezado[1:-1].split(':')  # quita [ ] y separa por :
-        protocolo = partes[1]
-        puerto_origen = int(partes[2])
-        puerto_destino = int(partes[3])
-        return datos_app, protocolo, puerto_origen, puerto_destino
-
-class CapaRed:
-    # Añade cabecera IP simplificada [H3:ip_origen:ip_destino]
-    @staticmethod
-    def encapsular(segmento, ip_origen, ip_destino):
-        return f"[H3:{ip_origen}:{ip_destino}]" + segmento
-    
-    # Quita cabecera IP y retorna (segmento_transporte, ip_origen, ip_destino)
-    @staticmethod
-    def desencapsular(paquete):
-        fin = paquete.find(']') + 1
-        segmento = paquete[fin:]                 # payload de capa 4
-        partes = paquete[1:fin-1].split(':')     # [H3:...]
-        return segmento, partes[1], partes[2]
-
-class CapaEnlace:
-    # Encapsula en una trama de enlace [H2:mac_origen:mac_destino]
-    @staticmethod
-    def encapsular(paquete, mac_origen, mac_destino):
-        return f"[H2:{mac_origen}:{mac_destino}]" + paquete
-    
-    # Desencapsula la trama de enlace y retorna (paquete_red, mac_origen, mac_destino)
-    @staticmethod
-    def desencapsular(trama):
-        fin = trama.find(']') + 1
-        paquete = trama[fin:]                    # payload de capa 3
-        partes = trama[1:fin-1].split(':')
-        return paquete, partes[1], partes[2]
-
-class CapaFisica:
-    # Convierte la cadena (trama) a bits ASCII (8 bits por carácter)
-    @staticmethod
-    def encapsular(trama):
-        # Cada char -> su código ASCII binario con longitud 8
-        return ''.join(format(ord(c), '08b') for c in trama)
-    
-    # Convierte los bits en texto interpretando cada 8 bits como un byte ASCII
-    @staticmethod
-    def desencapsular(bits):
-        chars = []
-        # Recorre de 8 en 8; asume longitud múltiplo de 8
-        for i in range(0, len(bits), 8):
-            byte = bits[i:i+8]
-            chars.append(chr(int(byte, 2)))
-        return ''.join(chars)
+# Las capas de texto (CapaAplicacion ... CapaFisica) y las pilas CAPAS_TEXTO y
+# CAPAS_BINARIAS están en capas.py, compartidas con encapsulamiento.py.
+# Capas 5..3 de cada pila, para los encabezados comunes de un lote
+CAPAS_RED_TEXTO = CAPAS_TEXTO[:3]
+CAPAS_RED_BINARIAS = CAPAS_BINARIAS[:3]
 
 # ==============================
 # Dispositivos
@@ -124,237 +109,1200 @@ class Dispositivo:
     # - nombre identificador
     # - conexiones: mapa de interfaz_local -> (dispositivo_destino, interfaz_destino)
     # - tabla_enlace: MAC -> interfaz_salida (conmutación/N2)
-    # - tabla_red: IP -> MAC siguiente salto (encaminamiento simple/N3)
-    def __init__(self, nombre):
+    # - tabla_red: IP o prefijo "a.b.c.d/n" -> siguiente salto (encaminamiento/N3, por
+    #   coincidencia exacta o de prefijo más largo). El siguiente salto es una interfaz (red
+    #   conectada), la IP de una puerta de enlace o una MAC fija (ver reenvio.py)
+    # - vecinos: MACs resueltas por ARP y paquetes a la espera de una resolución (ver vecinos.py)
+    # - planificador: si está definido, cada salto se programa como evento en lugar de
+    #   llamar directamente a recibir() del vecino (ver planificador.py); también puede ser
+    #   una EjecucionAsincrona, con una tarea de asyncio por dispositivo (ver asincrono.py)
+    # - metricas: contadores por interfaz, descartes, latencias y tiempos (ver metricas.py)
+    # - interfaces: nombre -> Interfaz, cada una con su propia MAC/IP (ver reenvio.py)
+    # - tabla_mac: MACs aprendidas por puerto (solo switches, ver conmutacion.py); una MAC
+    #   destino que no está en tabla_enlace ni en tabla_mac se inunda por todos los puertos
+    # - enlaces: interfaz -> Enlace con ancho de banda, propagación, cola y pérdidas para las
+    #   interfaces conectadas con esos parámetros (ver enlaces.py); las demás son ideales
+    # - tcp: conexiones TCP (solo PCs, ver transporte.py); sin pila los segmentos TCP se
+    #   entregan a la aplicación como datagramas
+    # - puertos: sockets de aplicación por (protocolo, puerto) (solo PCs, ver puertos.py); sin
+    #   socket los mensajes van a la aplicación por defecto, que los muestra
+    # - reensamblado: fragmentos IP recibidos a la espera del resto del paquete (ver
+    #   reensamblado.py); las PCs y los routers fragmentan los paquetes que no caben en la
+    #   MTU de la interfaz de salida
+    # - capturas: interfaz -> punto de captura de las tramas enviadas por ella (ver captura.py)
+    # Las tablas y las interfaces se compilan en una tabla de reenvío (fib()) que se
+    # reconstruye solo cuando alguna de ellas cambia.
+    #
+    # Para simular decenas de miles de dispositivos la memoria por dispositivo importa: las
+    # clases usan __slots__, los nombres de interfaz se internan (todas las PCs comparten
+    # el mismo "eth0") y tabla_enlace, tabla_red y vecinos se crean en el primer uso.
+    __slots__ = ("nombre", "conexiones", "interfaces", "_fib", "_tabla_enlace", "_tabla_red",
+                 "planificador", "metricas", "_vecinos", "enlaces", "_reensamblado", "capturas")
+
+    # Si el reenvío de capa 2 reescribe la MAC origen con la de la interfaz de salida
+    reescribe_mac = False
+    tabla_mac = None
+    tcp = None
+    puertos = None
+    # Si divide en fragmentos los paquetes IP más grandes que la MTU (los switches no ven IP)
+    fragmenta_ip = True
+    # Los vecinos en otro proceso (paralelo.DispositivoRemoto) tienen remoto = True
+    remoto = False
+
+    def __init__(self, nombre, planificador=None):
         self.nombre = nombre
         self.conexiones = {}
-        self.tabla_enlace = {}
-        self.tabla_red = {}
+        self.interfaces = {}
+        self._fib = None
+        self._tabla_enlace = None
+        self._tabla_red = None
+        self.planificador = planificador
+        self.metricas = Metricas()
+        self._vecinos = None
+        self.enlaces = None
+        self._reensamblado = None
+        self.capturas = None
+
+    # Al asignar una tabla se envuelve en una TablaObservada que invalida la FIB al modificarse
+    @property
+    def tabla_enlace(self):
+        if self._tabla_enlace is None:
+            self._tabla_enlace = TablaObservada(self.invalidar_fib)
+        return self._tabla_enlace
+
+    @tabla_enlace.setter
+    def tabla_enlace(self, tabla):
+        self._tabla_enlace = TablaObservada(self.invalidar_fib, tabla)
+        self.invalidar_fib()
+
+    @property
+    def tabla_red(self):
+        if self._tabla_red is None:
+            self._tabla_red = TablaObservada(self.invalidar_fib)
+        return self._tabla_red
+
+    @tabla_red.setter
+    def tabla_red(self, tabla):
+        self._tabla_red = TablaObservada(self.invalidar_fib, tabla)
+        self.invalidar_fib()
 
-    # Conecta este dispositivo: interfaz_local <-> (otro_dispositivo, interfaz_remota)
-    def conectar(self, interfaz_local, dispositivo_destino, interfaz_remota):
+    # MACs resueltas por ARP (ver vecinos.py)
+    @property
+    def vecinos(self):
+        if self._vecinos is None:
+            self._vecinos = TablaVecinos(self.reloj)
+        return self._vecinos
+
+    # Fragmentos IP en espera (ver reensamblado.py)
+    @property
+    def reensamblado(self):
+        if self._reensamblado is None:
+            self._reensamblado = Reensamblador(self.reloj)
+        return self._reensamblado
+
+    # Descarta la tabla de reenvío compilada; se recompila en la próxima consulta
+    def invalidar_fib(self):
+        self._fib = None
+
+    # Tabla de reenvío compilada (maces_locales, ips_locales, enlace, red, prefijos)
+    def fib(self):
+        if self._fib is None:
+            self._fib = compilar_fib(self.interfaces, self._tabla_enlace or {}, self._tabla_red or {},
+                                     self.reescribe_mac)
+        return self._fib
+
+    # Crea (o reemplaza) una interfaz con su MAC/IP
+    def agregar_interfaz(self, nombre, mac=None, ip=None):
+        nombre = sys.intern(nombre)
+        interfaz = self.interfaces[nombre] = Interfaz(nombre, mac, ip)
+        self.invalidar_fib()
+        return interfaz
+
+    # Conecta este dispositivo: interfaz_local <-> (otro_dispositivo, interfaz_remota).
+    # Si la interfaz local no existe se crea sin direcciones (p. ej. un puerto de switch).
+    # Los parámetros de enlace (ancho_banda, retardo, mtu, cola, perdida, ber, semilla,
+    # corromper; ver enlaces.Enlace) modelan el sentido que transmite esta interfaz; sin ellos
+    # el enlace es ideal y cada trama llega RETARDO_SALTO después. Con corromper=True las
+    # tramas llevan FCS, el enlace invierte bits y el receptor descarta las que llegan dañadas.
+    def conectar(self, interfaz_local, dispositivo_destino, interfaz_remota, **enlace):
+        interfaz_local, interfaz_remota = sys.intern(interfaz_local), sys.intern(interfaz_remota)
+        if interfaz_local not in self.interfaces:
+            self.agregar_interfaz(interfaz_local)
         self.conexiones[interfaz_local] = (dispositivo_destino, interfaz_remota)
+        if enlace:
+            enlace.setdefault("retardo", RETARDO_SALTO)
+            if self.enlaces is None:
+                self.enlaces = {}
+            self.enlaces[interfaz_local] = Enlace(**enlace)
+        elif self.enlaces is not None:
+            self.enlaces.pop(interfaz_local, None)
+
+    # Tiempo actual: el simulado si hay planificador, si no el real
+    def reloj(self):
+        if self.planificador is not None:
+            return self.planificador.ahora
+        return time.monotonic()
+
+    # Inunda una trama (o un lote) por todos los puertos conectados salvo el de entrada.
+    # Las Tramas se copian para cada puerto extra: un router aguas abajo reescribe el
+    # encabezado de enlace en el mismo buffer.
+    def _inundar(self, datos, interfaz_entrada, lote=False):
+        puertos = [puerto for puerto in self.conexiones if puerto != interfaz_entrada]
+        if TRAZA.nivel >= NIVEL_CAPAS:
+            TRAZA.emitir(NIVEL_CAPAS, self.nombre,
+                         f"  Switch: MAC destino desconocida, inundo por {', '.join(puertos) or '(ninguno)'}")
+        cantidad = len(datos) if lote else 1
+        self.metricas.inundadas += cantidad
+        for i, puerto in enumerate(puertos):
+            if i == 0:
+                copia = datos
+            elif lote:
+                copia = [d.copia() if isinstance(d, Trama) else d for d in datos]
+            else:
+                copia = datos.copia() if isinstance(datos, Trama) else datos
+            self.metricas.reenviadas += cantidad
+            if lote:
+                self.enviar_lote_por_interfaz(puerto, copia)
+            else:
+                self.enviar_por_interfaz(puerto, copia)
+
+    # MAC del siguiente salto "ip" por "interfaz". Si no está resuelta, encola los
+    # elementos (paquete, capa de enlace, es_reenvio) y, si no había una resolución en
+    # curso, envía una solicitud ARP; retorna None y los paquetes salen al llegar la respuesta.
+    def _resolver_vecino(self, ip, interfaz, mac_origen, elementos):
+        mac = self.vecinos.buscar(ip)
+        if mac is not None:
+            return mac
+        if self.vecinos.inalcanzable(ip):
+            if TRAZA.nivel >= NIVEL_RESUMEN:
+                TRAZA.emitir(NIVEL_RESUMEN, self.nombre,
+                             f"  {self.nombre}: {ip} no responde a ARP -> descartar {len(elementos)} paquetes")
+            self.metricas.descarte("vecino_inalcanzable", len(elementos))
+            return None
+        resolucion, nueva, descartados = self.vecinos.encolar(ip, interfaz, mac_origen, elementos)
+        if descartados:
+            self.metricas.descarte("cola_arp_llena", descartados)
+        if nueva:
+            self._solicitar_arp(ip, resolucion)
+        return None
 
-    # Envía una trama por una interfaz. Simula capa física convirtiendo a bits y llamando al receptor.
+    # Envía (o reenvía) la solicitud ARP de una resolución en curso
+    def _solicitar_arp(self, ip, resolucion):
+        resolucion.intentos += 1
+        interfaz = self.interfaces.get(resolucion.interfaz)
+        ip_propia = interfaz.ip if interfaz is not None and interfaz.ip else next(iter(self.fib().ips_locales), "0.0.0.0")
+        if TRAZA.nivel >= NIVEL_RESUMEN:
+            TRAZA.emitir(NIVEL_RESUMEN, self.nombre,
+                         f"  {self.nombre}: ARP ¿quién tiene {ip}? (por {resolucion.interfaz}, intento {resolucion.intentos})")
+        self.metricas.arp_solicitudes += 1
+        solicitud = encapsular_arp(ARP_SOLICITUD, ip_propia, resolucion.mac_origen, ip)
+        self.enviar_por_interfaz(resolucion.interfaz,
+                                 CapaEnlace.encapsular(solicitud, resolucion.mac_origen, MAC_DIFUSION))
+        if self.vecinos.pendientes.get(ip) is not resolucion:
+            return  # ya se resolvió
+        if self.planificador is not None:
+            self.planificador.programar(ARP_ESPERA, self._vencer_arp, ip, resolucion, resolucion.intentos)
+        else:
+            # Sin planificador la respuesta llega durante el envío o no llega
+            self._fallar_resolucion(ip)
+
+    # Vence la espera de una solicitud ARP: se reintenta o se da la IP por inalcanzable
+    def _vencer_arp(self, ip, resolucion, intento):
+        if self.vecinos.pendientes.get(ip) is not resolucion or resolucion.intentos != intento:
+            return
+        if resolucion.intentos < ARP_REINTENTOS:
+            self._solicitar_arp(ip, resolucion)
+        else:
+            self._fallar_resolucion(ip)
+
+    def _fallar_resolucion(self, ip):
+        resolucion = self.vecinos.terminar(ip)
+        self.vecinos.marcar_inalcanzable(ip)
+        if TRAZA.nivel >= NIVEL_RESUMEN:
+            TRAZA.emitir(NIVEL_RESUMEN, self.nombre,
+                         f"  {self.nombre}: sin respuesta ARP de {ip} -> descartar {len(resolucion.paquetes)} paquetes")
+        self.metricas.descarte("vecino_inalcanzable", len(resolucion.paquetes))
+
+    # Envía en lote los paquetes que esperaban la MAC de "ip"
+    def _liberar_pendientes(self, ip, mac):
+        resolucion = self.vecinos.terminar(ip)
+        if resolucion is None or not resolucion.paquetes:
+            return
+        if TRAZA.nivel >= NIVEL_CAPAS:
+            TRAZA.emitir(NIVEL_CAPAS, self.nombre,
+                         f"  {self.nombre}: {ip} está en {mac}; envío {len(resolucion.paquetes)} paquetes en espera")
+        tramas = []
+        for paquete, enlace, es_reenvio in resolucion.paquetes:
+            tramas.append(enlace.encapsular(paquete, resolucion.mac_origen, mac))
+            if es_reenvio:
+                self.metricas.reenviadas += 1
+        if len(tramas) == 1:
+            self.enviar_por_interfaz(resolucion.interfaz, tramas[0])
+        else:
+            self.enviar_lote_por_interfaz(resolucion.interfaz, tramas)
+
+    # Procesa un mensaje ARP recibido por interfaz_local: aprende al emisor si la consulta
+    # es para este dispositivo o si ya lo conocía, contesta las solicitudes por IPs propias
+    # y libera los paquetes que esperaban esa resolución
+    def _recibir_arp(self, paquete, interfaz_local):
+        operacion, ip_emisor, mac_emisor, ip_objetivo, _ = desencapsular_arp(paquete)
+        if TRAZA.nivel >= NIVEL_CAPAS:
+            tipo = "solicitud" if operacion == ARP_SOLICITUD else "respuesta"
+            TRAZA.emitir(NIVEL_CAPAS, self.nombre,
+                         f"  ARP: {tipo} de {ip_emisor} ({mac_emisor}) por {ip_objetivo}")
+        para_mi = ip_objetivo in self.fib().ips_locales
+        if not (para_mi or self.vecinos.conoce(ip_emisor)):
+            return
+        self.vecinos.aprender(ip_emisor, mac_emisor, interfaz_local)
+        if operacion == ARP_SOLICITUD and para_mi:
+            interfaz = self.interfaces.get(interfaz_local)
+            mac_propia = interfaz.mac if interfaz is not None and interfaz.mac else next(iter(self.fib().maces_locales))
+            if TRAZA.nivel >= NIVEL_RESUMEN:
+                TRAZA.emitir(NIVEL_RESUMEN, self.nombre,
+                             f"  {self.nombre}: ARP {ip_objetivo} está en {mac_propia} -> respondo a {ip_emisor}")
+            respuesta = encapsular_arp(ARP_RESPUESTA, ip_objetivo, mac_propia, ip_emisor, mac_emisor)
+            self.enviar_por_interfaz(interfaz_local, CapaEnlace.encapsular(respuesta, mac_propia, mac_emisor))
+        self._liberar_pendientes(ip_emisor, mac_emisor)
+
+    # Capa física del emisor: representación de la trama en el medio según MODO_FISICO.
+    # Una Trama binaria ya contiene los bytes del medio y se entrega tal cual.
+    @staticmethod
+    def _a_medio(trama):
+        if isinstance(trama, Trama):
+            return trama
+        if MODO_FISICO == "bytes":
+            return CapaFisica.encapsular_bytes(trama)
+        return CapaFisica.encapsular(trama, codigo_linea(CODIGO_LINEA))
+
+    # Capa física del receptor: recupera la trama de enlace desde el medio
+    @staticmethod
+    def _desde_medio(datos):
+        if isinstance(datos, Trama):
+            return datos
+        if isinstance(datos, (bytes, bytearray, memoryview)):
+            return CapaFisica.desencapsular_bytes(datos)
+        return CapaFisica.desencapsular(datos, codigo_linea(CODIGO_LINEA))
+
+    # Capa física de un lote: en modo "bits" las tramas de texto se codifican juntas
+    @staticmethod
+    def _a_medio_lote(tramas):
+        if MODO_FISICO != "bytes" and all(isinstance(trama, str) for trama in tramas):
+            return CapaFisica.encapsular_lote(tramas, codigo_linea(CODIGO_LINEA))
+        return [Dispositivo._a_medio(trama) for trama in tramas]
+
+    @staticmethod
+    def _desde_medio_lote(medios):
+        if all(isinstance(datos, str) for datos in medios):
+            return CapaFisica.desencapsular_lote(medios, codigo_linea(CODIGO_LINEA))
+        return [Dispositivo._desde_medio(datos) for datos in medios]
+
+    # Bytes de la trama que lleva el medio (en modo "bits", los símbolos del código de línea
+    # divididos por los símbolos por byte). Con estos se comparan la MTU y las métricas.
+    @staticmethod
+    def _bytes_en_medio(medio):
+        if isinstance(medio, str):
+            return len(medio) // codigo_linea(CODIGO_LINEA).simbolos_por_byte
+        return len(medio)
+
+    # Símbolos que se transmiten por el medio: el tiempo de serialización incluye el exceso
+    # de Manchester o 4B5B y, con "fcs", los 4 bytes del FCS (None: 8 por byte, lo que
+    # supone el enlace)
+    @staticmethod
+    def _simbolos_en_medio(medio, fcs=False):
+        if isinstance(medio, str):
+            return len(medio) + FCS.size * codigo_linea(CODIGO_LINEA).simbolos_por_byte if fcs else len(medio)
+        return (len(medio) + FCS.size) * 8 if fcs else None
+
+    # Emisor en un enlace con corromper=True: agrega el FCS a los bytes de la trama y los pasa
+    # por el canal ruidoso. Siempre es una copia: una Trama puede seguir en uso (TCP la
+    # retransmite, un router reescribe su encabezado en el mismo buffer).
+    @staticmethod
+    def _corromper(canal, medio):
+        if isinstance(medio, Trama):
+            return MedioConFCS(Trama.desde_payload(canal.aplicar(agregar_fcs(medio.vista()))))
+        if isinstance(medio, str):
+            codigo = codigo_linea(CODIGO_LINEA)
+            return MedioConFCS(codigo.codificar(canal.aplicar(agregar_fcs(codigo.decodificar(medio)))))
+        return MedioConFCS(canal.aplicar(agregar_fcs(medio)))
+
+    # Receptor: retorna (medio sin el FCS, si el FCS coincide). Los códigos de línea
+    # convierten cada byte por separado, así que los símbolos del FCS son los últimos.
+    @staticmethod
+    def _quitar_fcs(con_fcs):
+        medio = con_fcs.medio
+        if isinstance(medio, Trama):
+            return Trama(medio.buffer, medio.inicio, medio.fin - FCS.size), verificar_fcs(medio.vista())
+        if isinstance(medio, str):
+            codigo = codigo_linea(CODIGO_LINEA)
+            return medio[:-FCS.size * codigo.simbolos_por_byte], verificar_fcs(codigo.decodificar(medio))
+        return medio[:-FCS.size], verificar_fcs(medio)
+
+    # Descarta las tramas con el FCS inválido; retorna el medio que queda (None si ninguno)
+    def _descartar_fcs_invalido(self, medio, validos, interfaz_local, lote):
+        if not lote:
+            if validos:
+                return medio
+            invalidas, medio = 1, None
+        else:
+            conservados = [datos for datos, valido in zip(medio, validos) if valido]
+            invalidas = len(medio) - len(conservados)
+            if not invalidas:
+                return medio
+            medio = conservados or None
+        if TRAZA.nivel >= NIVEL_RESUMEN:
+            TRAZA.emitir(NIVEL_RESUMEN, self.nombre,
+                         f"{self.nombre}: {invalidas} trama(s) con FCS inválido por {interfaz_local} -> descartar")
+        self.metricas.descarte(FCS_INVALIDO, invalidas)
+        return medio
+
+    # Llegada de una trama (o de un lote) por el medio: registra rx y latencia del salto
+    # y la entrega a la capa 1. Si trae FCS (enlace con corromper=True) se verifica antes.
+    def _llegada(self, medio, dispositivo_anterior, interfaz_local, enviado_en, lote=False):
+        validos = None
+        if lote:
+            if medio and type(medio[0]) is MedioConFCS:
+                medio, validos = map(list, zip(*map(self._quitar_fcs, medio)))
+            self.metricas.rx(interfaz_local, len(medio), sum(map(self._bytes_en_medio, medio)))
+        else:
+            if type(medio) is MedioConFCS:
+                medio, validos = self._quitar_fcs(medio)
+            self.metricas.rx(interfaz_local, 1, self._bytes_en_medio(medio))
+        if self.planificador is not None:
+            self.metricas.latencia(interfaz_local, self.planificador.ahora - enviado_en)
+        if validos is not None:
+            medio = self._descartar_fcs_invalido(medio, validos, interfaz_local, lote)
+            if medio is None:
+                return
+        if lote:
+            self.recibir_lote(medio, dispositivo_anterior, interfaz_local)
+        else:
+            self.recibir(medio, 1, dispositivo_anterior, interfaz_local)
+
+    # Pasa una trama (o un lote) por el modelo de enlace de la interfaz. Retorna (medio,
+    # llegada) con las tramas que no se descartaron (medio None si no queda ninguna). Con
+    # planificador el enlace aplica serialización, cola y propagación; sin él (o con una
+    # EjecucionAsincrona, que usa tiempo real) solo MTU y pérdidas. Si el enlace corrompe
+    # bits, las tramas que pasan salen con FCS y con los bits errados del canal.
+    def _cruzar_enlace(self, enlace, medio, lote):
+        planificador = self.planificador
+        ahora = planificador.ahora if planificador is not None and not planificador.asincrono else None
+        canal = enlace.canal
+        fcs = canal is not None
+        if not lote:
+            llegada, motivo = enlace.transmitir(ahora, self._bytes_en_medio(medio), self._simbolos_en_medio(medio, fcs))
+            if motivo is None:
+                return (self._corromper(canal, medio) if fcs else medio), llegada
+            self._descartar_en_enlace(motivo)
+            return None, None
+        conservados, llegada = [], None
+        for datos in medio:
+            fin, motivo = enlace.transmitir(ahora, self._bytes_en_medio(datos), self._simbolos_en_medio(datos, fcs))
+            if motivo is None:
+                conservados.append(self._corromper(canal, datos) if fcs else datos)
+                llegada = fin
+            else:
+                self._descartar_en_enlace(motivo)
+        return conservados or None, llegada
+
+    def _descartar_en_enlace(self, motivo):
+        if TRAZA.nivel >= NIVEL_RESUMEN:
+            TRAZA.emitir(NIVEL_RESUMEN, self.nombre, f"{self.nombre}: trama descartada en el enlace ({motivo})")
+        self.metricas.descarte(motivo)
+
+    # Programa (o hace de inmediato, sin planificador) la llegada al vecino: RETARDO_SALTO
+    # después, o cuando lo indique el modelo de enlace de la interfaz. Con una
+    # EjecucionAsincrona (asincrono.py) la trama se encola en la interfaz del vecino.
+    def _transmitir(self, interfaz_local, dispositivo_destino, interfaz_remota, medio, lote=False):
+        planificador = self.planificador
+        enlace = self.enlaces.get(interfaz_local) if self.enlaces is not None else None
+        if enlace is not None:
+            medio, llegada = self._cruzar_enlace(enlace, medio, lote)
+            if medio is None:
+                return
+        if planificador is None:
+            dispositivo_destino._llegada(medio, self, interfaz_remota, None, lote)
+            return
+        if planificador.asincrono:
+            planificador.transmitir(self, dispositivo_destino, interfaz_remota, medio, lote)
+            return
+        ahora = planificador.ahora
+        if enlace is None:
+            llegada = ahora + RETARDO_SALTO
+        if dispositivo_destino.remoto:
+            dispositivo_destino.recibir_remoto(medio, self, interfaz_remota, ahora, llegada, lote)
+            return
+        planificador.programar_en(llegada, dispositivo_destino._llegada, medio, self, interfaz_remota, ahora, lote)
+
+    # MTU de una interfaz: la de su enlace, o MTU si el enlace no la define
+    def _mtu(self, interfaz_local):
+        enlace = self.enlaces.get(interfaz_local) if self.enlaces is not None else None
+        if enlace is not None and enlace.mtu is not None:
+            return enlace.mtu
+        return MTU
+
+    # True si la trama ocupa más de "mtu" bytes en el medio. Un carácter ocupa a lo sumo 4
+    # bytes en UTF-8, así que solo se codifican las tramas de texto que podrían no caber.
+    @staticmethod
+    def _excede_mtu(trama, mtu):
+        return len(trama) > mtu or (len(trama) * 4 > mtu and largo_en_bytes(trama) > mtu)
+
+    # Divide una trama de enlace en tramas de a lo sumo "mtu" bytes fragmentando el paquete
+    # IP que lleva, con las mismas MACs. Retorna None si no se puede fragmentar (ARP o MTU
+    # menor que los encabezados); la trama sale entera y el enlace la descarta.
+    def _fragmentar(self, trama, mtu):
+        binaria = isinstance(trama, Trama)
+        enlace, red = (CapaEnlaceBinaria, CapaRedBinaria) if binaria else (CapaEnlace, CapaRed)
+        paquete, mac_origen, mac_destino = enlace.desencapsular(trama)
+        if es_arp(paquete):
+            return None
+        largo = largo_en_bytes(trama)
+        fragmentos = red.fragmentar(paquete, mtu - (largo - largo_en_bytes(paquete)), next(_identificadores_ip))
+        if fragmentos is None:
+            return None
+        self.metricas.fragmentos += len(fragmentos)
+        if TRAZA.nivel >= NIVEL_CAPAS:
+            TRAZA.emitir(NIVEL_CAPAS, self.nombre,
+                         f"  {self.nombre}: trama de {largo} bytes > MTU {mtu} -> {len(fragmentos)} fragmentos")
+        return [enlace.encapsular(fragmento, mac_origen, mac_destino) for fragmento in fragmentos]
+
+    # Envía una trama por una interfaz. Simula capa física convirtiendo a bits y entrega al receptor:
+    # con planificador se programa la llegada RETARDO_SALTO después; sin él se llama de inmediato.
+    # Una trama más grande que la MTU de la interfaz se envía en fragmentos.
     def enviar_por_interfaz(self, interfaz_local, trama):
         if interfaz_local not in self.conexiones:
-            print(f"{self.nombre}: interfaz {interfaz_local} no conectada")
+            if TRAZA.nivel >= NIVEL_RESUMEN:
+                TRAZA.emitir(NIVEL_RESUMEN, self.nombre,
+                             f"{self.nombre}: interfaz {interfaz_local} no conectada")
+            self.metricas.descarte("interfaz_no_conectada")
             return
+        if self.fragmenta_ip:
+            mtu = self._mtu(interfaz_local)
+            if mtu is not None and self._excede_mtu(trama, mtu):
+                fragmentos = self._fragmentar(trama, mtu)
+                if fragmentos is not None:
+                    for fragmento in fragmentos:
+                        self.enviar_por_interfaz(interfaz_local, fragmento)
+                    return
         dispositivo_destino, interfaz_remota = self.conexiones[interfaz_local]
-        print(f"{self.nombre} -> enviando por {interfaz_local} a {dispositivo_destino.nombre}.{interfaz_remota}")
-        medio = CapaFisica.encapsular(trama)  # simulación del medio
+        if TRAZA.nivel >= NIVEL_RESUMEN:
+            TRAZA.emitir(NIVEL_RESUMEN, self.nombre,
+                         f"{self.nombre} -> enviando por {interfaz_local} a {dispositivo_destino.nombre}.{interfaz_remota}")
+        medio = self._a_medio(trama)  # simulación del medio
+        if self.capturas is not None and interfaz_local in self.capturas:
+            self.capturas[interfaz_local].registrar(self.reloj(), medio)
+        self.metricas.tx(interfaz_local, 1, self._bytes_en_medio(medio))
         # El destino recibe "por el medio" en capa 1
-        dispositivo_destino.recibir(medio, 1, self, interfaz_remota)
+        self._transmitir(interfaz_local, dispositivo_destino, interfaz_remota, medio)
+
+    # Recibe datos en una capa dada y procesa desencapsulando hasta llegar a aplicación o reenviando.
+    # Si metricas.medir_tiempos está activo, registra el tiempo propio de cada capa (sin contar
+    # el de las capas superiores que esta invoca).
+    def recibir(self, datos, capa_actual, dispositivo_anterior=None, interfaz_local=None, ip_origen=None):
+        metricas = self.metricas
+        if not metricas.medir_tiempos:
+            self._recibir_capa(datos, capa_actual, dispositivo_anterior, interfaz_local, ip_origen)
+            return
+        anidado_exterior = metricas._anidado
+        metricas._anidado = 0.0
+        inicio = time.perf_counter()
+        try:
+            self._recibir_capa(datos, capa_actual, dispositivo_anterior, interfaz_local, ip_origen)
+        finally:
+            total = time.perf_counter() - inicio
+            metricas.tiempo(capa_actual, total - metricas._anidado)
+            metricas._anidado = anidado_exterior + total
 
-    # Recibe datos en una capa dada y procesa desencapsulando hasta llegar a aplicación o reenviando
-    def recibir(self, datos, capa_actual, dispositivo_anterior=None, interfaz_local=None):
-        print(f"{self.nombre} recibió datos en capa {capa_actual}:")
+    def _recibir_capa(self, datos, capa_actual, dispositivo_anterior, interfaz_local, ip_origen):
+        if TRAZA.nivel >= NIVEL_CAPAS:
+            TRAZA.emitir(NIVEL_CAPAS, self.nombre, f"{self.nombre} recibió datos en capa {capa_actual}:")
         
         if capa_actual == 1:
-            # Capa física: siempre mostramos los bits para depuración
-            print(f"  Bits recibidos ({len(datos)} bits): {datos[:64]}...")
-            trama = CapaFisica.desencapsular(datos)
+            if self.planificador is not None and TRAZA.nivel >= NIVEL_CAPAS:
+                TRAZA.emitir(NIVEL_CAPAS, self.nombre,
+                             f"  Llegada por {interfaz_local} en t={self.planificador.ahora * 1e3:.3f} ms")
+            # Capa física: en nivel de bits se muestran los primeros 64 bits recibidos
+            if TRAZA.nivel >= NIVEL_BITS:
+                if isinstance(datos, Trama):
+                    bits = f"{len(datos) * 8} bits): {CapaFisica.bytes_a_bits(datos.vista()[:8])}"
+                elif isinstance(datos, (bytes, bytearray, memoryview)):
+                    # Modo binario: solo se convierten a bits los 8 bytes que se muestran
+                    bits = f"{len(datos) * 8} bits): {CapaFisica.bytes_a_bits(datos[:8])}"
+                else:
+                    bits = f"{len(datos)} símbolos {CODIGO_LINEA}): {datos[:64]}"
+                TRAZA.emitir(NIVEL_BITS, self.nombre, f"  Bits recibidos ({bits}...")
+            trama = self._desde_medio(datos)
             # Sube a capa 2 con la trama de enlace ya decodificada
             self.recibir(trama, 2, dispositivo_anterior, interfaz_local)
             return
 
+        # Las Tramas binarias se procesan con las capas de codec_binario
+        binaria = isinstance(datos, Trama)
+
         if capa_actual == 2:
-            paquete, mac_origen, mac_destino = CapaEnlace.desencapsular(datos)
-            print(f"  Enlace: origen MAC={mac_origen}, destino MAC={mac_destino}")
+            enlace = CapaEnlaceBinaria if binaria else CapaEnlace
+            paquete, mac_origen, mac_destino = enlace.desencapsular(datos)
+            if TRAZA.nivel >= NIVEL_CAPAS:
+                TRAZA.emitir(NIVEL_CAPAS, self.nombre,
+                             f"  Enlace: origen MAC={mac_origen}, destino MAC={mac_destino}")
+            if self.tabla_mac is not None and interfaz_local is not None:
+                self.tabla_mac.aprender(mac_origen, interfaz_local)
             
-            # Determina las MACs locales soportadas por el dispositivo (PC, Switch o Router)
-            maces_locales = []
-            if hasattr(self, 'MAC_IZQ'): maces_locales.append(self.MAC_IZQ)
-            if hasattr(self, 'MAC_DER'): maces_locales.append(self.MAC_DER)
-            if hasattr(self, 'MAC'): maces_locales.append(self.MAC)
-                
-            if mac_destino in maces_locales:
+            fib = self.fib()
+            difusion = mac_destino == MAC_DIFUSION and self.tabla_mac is None
+            if difusion or mac_destino in fib.maces_locales:
+                if es_arp(paquete):
+                    self._recibir_arp(paquete, interfaz_local)
+                    return
+                if difusion:
+                    return
                 # La trama es para este dispositivo -> sube a capa 3
-                print(f"  Trama para {self.nombre}. Entregando a Capa 3.")
+                if TRAZA.nivel >= NIVEL_CAPAS:
+                    TRAZA.emitir(NIVEL_CAPAS, self.nombre,
+                                 f"  Trama para {self.nombre}. Entregando a Capa 3.")
                 self.recibir(paquete, 3, dispositivo_anterior, interfaz_local)
                 return
             
             # Si la dirección MAC destino no coincide con ninguna dirección local,
             # se consulta la tabla de enlace para determinar la interfaz de salida (conmutación L2).
-            interfaz_salida = self.tabla_enlace.get(mac_destino)
-            if interfaz_salida:
-                if isinstance(self, Router):
+            # Un switch además consulta las MACs aprendidas, e inunda si tampoco está ahí.
+            entrada = fib.enlace.get(mac_destino)
+            if not entrada and self.tabla_mac is not None:
+                puerto = self.tabla_mac.buscar(mac_destino)
+                if puerto is None:
+                    self._inundar(datos, interfaz_local)
+                    return
+                entrada = (puerto, None)
+            if entrada:
+                interfaz_salida, nueva_mac_origen = entrada
+                if nueva_mac_origen is not None:
                     # Router reescribe MAC origen según la interfaz de salida
-                    nueva_mac_origen = self.MAC_IZQ if interfaz_salida == "if_izq" else \
-                                       self.MAC_DER if interfaz_salida == "if_der" else getattr(self, 'MAC', 'X')
-                    print(f"  Router: reescribo MAC origen -> {nueva_mac_origen} y reenvío por {interfaz_salida}")
-                    nueva_trama = CapaEnlace.encapsular(paquete, nueva_mac_origen, mac_destino)
+                    if TRAZA.nivel >= NIVEL_CAPAS:
+                        TRAZA.emitir(NIVEL_CAPAS, self.nombre,
+                                     f"  Router: reescribo MAC origen -> {nueva_mac_origen} y reenvío por {interfaz_salida}")
+                    nueva_trama = enlace.encapsular(paquete, nueva_mac_origen, mac_destino)
+                    self.metricas.reenviadas += 1
                     self.enviar_por_interfaz(interfaz_salida, nueva_trama)
+                elif interfaz_salida == interfaz_local:
+                    # El destino está del mismo lado por el que llegó la trama: se filtra
+                    if TRAZA.nivel >= NIVEL_CAPAS:
+                        TRAZA.emitir(NIVEL_CAPAS, self.nombre,
+                                     f"  Switch: destino {mac_destino} en el puerto de entrada -> filtrar")
+                    self.metricas.descarte("filtrada")
                 else:
                     # Switch no modifica la trama
-                    print(f"  Switch: reenvío sin cambios por {interfaz_salida}")
+                    if TRAZA.nivel >= NIVEL_CAPAS:
+                        TRAZA.emitir(NIVEL_CAPAS, self.nombre,
+                                     f"  Switch: reenvío sin cambios por {interfaz_salida}")
+                    self.metricas.reenviadas += 1
                     self.enviar_por_interfaz(interfaz_salida, datos)
             else:
-                print(f"  {self.nombre}: MAC destino {mac_destino} desconocida -> descartar")
+                if TRAZA.nivel >= NIVEL_RESUMEN:
+                    TRAZA.emitir(NIVEL_RESUMEN, self.nombre,
+                                 f"  {self.nombre}: MAC destino {mac_destino} desconocida -> descartar")
+                self.metricas.descarte("mac_desconocida")
             return
 
         if capa_actual == 3:
-            segmento, ip_origen, ip_destino = CapaRed.desencapsular(datos)
-            print(f"  Red: origen IP={ip_origen}, destino IP={ip_destino}")
+            red = CapaRedBinaria if binaria else CapaRed
+            segmento, ip_origen, ip_destino = red.desencapsular(datos)
+            if TRAZA.nivel >= NIVEL_CAPAS:
+                TRAZA.emitir(NIVEL_CAPAS, self.nombre,
+                             f"  Red: origen IP={ip_origen}, destino IP={ip_destino}")
             
-            # IPs locales que este dispositivo posee
-            ips_locales = []
-            if hasattr(self, 'IP_IZQ'): ips_locales.append(self.IP_IZQ)
-            if hasattr(self, 'IP_DER'): ips_locales.append(self.IP_DER)
-            if hasattr(self, 'IP'): ips_locales.append(self.IP)
-                
-            if ip_destino in ips_locales:
-                # El paquete IP es para mí -> sube a capa 4
-                print(f"  Paquete IP destinado a {self.nombre}. Entregando a Capa 4.")
-                self.recibir(segmento, 4, dispositivo_anterior, interfaz_local)
+            fib = self.fib()
+            if ip_destino in fib.ips_locales:
+                # El paquete IP es para mí -> sube a capa 4 (si es un fragmento, cuando
+                # llegue el resto del paquete)
+                segmento = self._reensamblar(red, datos, segmento, ip_origen, ip_destino)
+                if segmento is None:
+                    return
+                if TRAZA.nivel >= NIVEL_CAPAS:
+                    TRAZA.emitir(NIVEL_CAPAS, self.nombre,
+                                 f"  Paquete IP destinado a {self.nombre}. Entregando a Capa 4.")
+                self.recibir(segmento, 4, dispositivo_anterior, interfaz_local, ip_origen)
                 return
             
-            # Encaminamiento por IP (router o host con puerta de enlace): IP -> MAC siguiente salto
-            siguiente_mac = self.tabla_red.get(ip_destino)
-            if siguiente_mac:
-                interfaz_salida = self.tabla_enlace.get(siguiente_mac)
+            # Encaminamiento por IP (router o host con puerta de enlace):
+            # IP -> (interfaz de salida, MAC origen de esa interfaz, MAC e IP del siguiente salto)
+            ruta = fib.ruta(ip_destino)
+            if ruta:
+                interfaz_salida, nueva_mac_origen, siguiente_mac, siguiente_ip = ruta
                 if interfaz_salida:
-                    # Determina la MAC origen correcta según interfaz de salida (en router)
-                    nueva_mac_origen = self.MAC_IZQ if interfaz_salida == "if_izq" else \
-                                       self.MAC_DER if interfaz_salida == "if_der" else getattr(self, 'MAC', 'X')
-                    print(f"  Router: siguiente salto MAC {siguiente_mac} por {interfaz_salida} (MAC origen {nueva_mac_origen})")
-                    # Re-encapsula a nivel 2 el paquete IP original
-                    nueva_trama = CapaEnlace.encapsular(datos, nueva_mac_origen, siguiente_mac)
+                    enlace = CapaEnlaceBinaria if binaria else CapaEnlace
+                    if siguiente_mac is None:
+                        # MAC por ARP; si hay que preguntarla el paquete sale al llegar la respuesta
+                        siguiente_mac = self._resolver_vecino(siguiente_ip or ip_destino, interfaz_salida,
+                                                              nueva_mac_origen, [(datos, enlace, True)])
+                        if siguiente_mac is None:
+                            return
+                    if TRAZA.nivel >= NIVEL_CAPAS:
+                        TRAZA.emitir(NIVEL_CAPAS, self.nombre,
+                                     f"  Router: siguiente salto MAC {siguiente_mac} por {interfaz_salida} (MAC origen {nueva_mac_origen})")
+                    # Re-encapsula a nivel 2 el paquete IP original (en una Trama, sobre el
+                    # mismo espacio que ocupaba el encabezado de enlace recibido)
+                    nueva_trama = enlace.encapsular(datos, nueva_mac_origen, siguiente_mac)
+                    self.metricas.reenviadas += 1
                     self.enviar_por_interfaz(interfaz_salida, nueva_trama)
                 else:
-                    print(f"  {self.nombre}: No hay interfaz para la MAC {siguiente_mac}")
+                    if TRAZA.nivel >= NIVEL_RESUMEN:
+                        TRAZA.emitir(NIVEL_RESUMEN, self.nombre,
+                                     f"  {self.nombre}: No hay interfaz para el siguiente salto {siguiente_mac or siguiente_ip}")
+                    self.metricas.descarte("sin_interfaz")
             else:
-                print(f"  {self.nombre}: No hay ruta para IP {ip_destino}")
+                if TRAZA.nivel >= NIVEL_RESUMEN:
+                    TRAZA.emitir(NIVEL_RESUMEN, self.nombre,
+                                 f"  {self.nombre}: No hay ruta para IP {ip_destino}")
+                self.metricas.descarte("sin_ruta")
             return
 
         if capa_actual == 4:
-            datos_app, protocolo, psrc, pdst = CapaTransporte.desencapsular(datos)
-            print(f"  Transporte: protocolo={protocolo}, src={psrc}, dst={pdst}")
-            # Entrega a capa de aplicación
-            self.recibir(datos_app, 5, dispositivo_anterior, interfaz_local)
+            transporte = CapaTransporteBinaria if binaria else CapaTransporte
+            datos_app, protocolo, psrc, pdst = transporte.desencapsular(datos)
+            if TRAZA.nivel >= NIVEL_CAPAS:
+                TRAZA.emitir(NIVEL_CAPAS, self.nombre,
+                             f"  Transporte: protocolo={protocolo}, src={psrc}, dst={pdst}")
+            if protocolo == "TCP" and self.tcp is not None and ip_origen is not None:
+                # Segmento de una conexión: la pila TCP entrega los datos a capa 5 en orden
+                self.tcp.recibir(datos_app, ip_origen, psrc, pdst)
+                return
+            # Entrega al socket del puerto destino o a la aplicación por defecto
+            self._entregar_aplicacion(datos_app, protocolo, ip_origen, psrc, pdst)
             return
 
         if capa_actual == 5:
-            mensaje, app = CapaAplicacion.desencapsular(datos)
-            print(f"  Aplicación ({app}): mensaje recibido: '{mensaje}'")
+            aplicacion = CapaAplicacionBinaria if binaria else CapaAplicacion
+            mensaje, app = aplicacion.desencapsular(datos)
+            if binaria:
+                mensaje = mensaje.texto()
+            self.metricas.entregados += 1
+            if TRAZA.nivel >= NIVEL_RESUMEN:
+                TRAZA.emitir(NIVEL_RESUMEN, self.nombre,
+                             f"  Aplicación ({app}): mensaje recibido: '{mensaje}'")
+            return
+
+    # Segmento de capa 4 de un paquete dirigido a este dispositivo. Los fragmentos quedan
+    # en el reensamblado: retorna None hasta que llega el último que falta, y entonces el
+    # segmento completo.
+    def _reensamblar(self, red, paquete, segmento, ip_origen, ip_destino):
+        fragmento = red.fragmento(paquete)
+        if fragmento is None:
+            return segmento
+        identificador, desplazamiento, mas = fragmento
+        partes, descartados = self.reensamblado.agregar((ip_origen, ip_destino, identificador),
+                                                        desplazamiento, mas, segmento)
+        if descartados:
+            if TRAZA.nivel >= NIVEL_RESUMEN:
+                TRAZA.emitir(NIVEL_RESUMEN, self.nombre,
+                             f"  {self.nombre}: {descartados} paquetes sin completar descartados del reensamblado")
+            self.metricas.descarte("reensamblado_incompleto", descartados)
+        if partes is None:
+            return None
+        self.metricas.reensamblados += 1
+        if isinstance(segmento, Trama):
+            return Trama.concatenar(partes)
+        return "".join(partes)
+
+    # Capa 4 -> capa 5: entrega los datos al socket asociado al puerto destino (O(1) en la
+    # tabla de puertos) o, si no hay ninguno, a la aplicación por defecto
+    def _entregar_aplicacion(self, datos_app, protocolo, ip_origen, puerto_origen, puerto_destino):
+        socket = self.puertos.get(protocolo, puerto_destino) if self.puertos is not None else None
+        if socket is None:
+            self.recibir(datos_app, 5)
+            return
+        binaria = isinstance(datos_app, Trama)
+        mensaje, app = (CapaAplicacionBinaria if binaria else CapaAplicacion).desencapsular(datos_app)
+        if binaria:
+            mensaje = mensaje.texto()
+        self.metricas.entregados += 1
+        if TRAZA.nivel >= NIVEL_RESUMEN:
+            TRAZA.emitir(NIVEL_RESUMEN, self.nombre,
+                         f"  Aplicación ({app}) en {protocolo}:{puerto_destino}: mensaje de "
+                         f"{ip_origen}:{puerto_origen}: '{mensaje}'")
+        socket._entregar(Recibido(mensaje, app, ip_origen, puerto_origen))
+
+    # Envía un lote de tramas por una interfaz como una sola unidad (un único evento de llegada)
+    def enviar_lote_por_interfaz(self, interfaz_local, tramas):
+        if interfaz_local not in self.conexiones:
+            if TRAZA.nivel >= NIVEL_RESUMEN:
+                TRAZA.emitir(NIVEL_RESUMEN, self.nombre,
+                             f"{self.nombre}: interfaz {interfaz_local} no conectada")
+            self.metricas.descarte("interfaz_no_conectada", len(tramas))
             return
+        if self.fragmenta_ip:
+            mtu = self._mtu(interfaz_local)
+            if mtu is not None and any(self._excede_mtu(trama, mtu) for trama in tramas):
+                tramas = self._fragmentar_lote(tramas, mtu)
+        dispositivo_destino, interfaz_remota = self.conexiones[interfaz_local]
+        if TRAZA.nivel >= NIVEL_RESUMEN:
+            TRAZA.emitir(NIVEL_RESUMEN, self.nombre,
+                         f"{self.nombre} -> enviando lote de {len(tramas)} tramas por {interfaz_local} "
+                         f"a {dispositivo_destino.nombre}.{interfaz_remota}")
+        medios = self._a_medio_lote(tramas)
+        if self.capturas is not None and interfaz_local in self.capturas:
+            punto, tiempo = self.capturas[interfaz_local], self.reloj()
+            for medio in medios:
+                punto.registrar(tiempo, medio)
+        self.metricas.tx(interfaz_local, len(medios), sum(map(self._bytes_en_medio, medios)))
+        self._transmitir(interfaz_local, dispositivo_destino, interfaz_remota, medios, lote=True)
+
+    # Reemplaza en un lote las tramas más grandes que la MTU por sus fragmentos
+    def _fragmentar_lote(self, tramas, mtu):
+        resultado = []
+        for trama in tramas:
+            fragmentos = self._fragmentar(trama, mtu) if self._excede_mtu(trama, mtu) else None
+            if fragmentos is None:
+                resultado.append(trama)
+            else:
+                resultado.extend(fragmentos)
+        return resultado
+
+    # Recibe un lote de tramas. Agrupa por MAC destino (capa 2) y por IP destino (capa 3)
+    # para consultar las tablas una sola vez por destino distinto, y reenvía un lote por
+    # cada interfaz de salida.
+    def recibir_lote(self, medios, dispositivo_anterior=None, interfaz_local=None):
+        if TRAZA.nivel >= NIVEL_RESUMEN:
+            TRAZA.emitir(NIVEL_RESUMEN, self.nombre,
+                         f"{self.nombre} recibió lote de {len(medios)} tramas por {interfaz_local}")
+        if not medios:
+            return
+        tramas = self._desde_medio_lote(medios)
+        binaria = isinstance(tramas[0], Trama)
+        enlace = CapaEnlaceBinaria if binaria else CapaEnlace
+        salida = {}  # interfaz_salida -> tramas a reenviar
+
+        # Capa 2: agrupa por MAC destino conservando el orden de llegada
+        por_mac = {}
+        tabla_mac = self.tabla_mac if interfaz_local is not None else None
+        ultima_mac_origen = None
+        for trama in tramas:
+            paquete, mac_origen, mac_destino = enlace.desencapsular(trama)
+            por_mac.setdefault(mac_destino, []).append((trama, paquete))
+            if tabla_mac is not None and mac_origen != ultima_mac_origen:
+                tabla_mac.aprender(mac_origen, interfaz_local)
+                ultima_mac_origen = mac_origen
+
+        fib = self.fib()
+        paquetes_locales = []
+        for mac_destino, grupo in por_mac.items():
+            difusion = mac_destino == MAC_DIFUSION and self.tabla_mac is None
+            if difusion or mac_destino in fib.maces_locales:
+                for _, paquete in grupo:
+                    if es_arp(paquete):
+                        self._recibir_arp(paquete, interfaz_local)
+                    elif not difusion:
+                        paquetes_locales.append(paquete)
+                continue
+            entrada = fib.enlace.get(mac_destino)
+            if not entrada and tabla_mac is not None:
+                puerto = tabla_mac.buscar(mac_destino)
+                if puerto is None:
+                    self._inundar([trama for trama, _ in grupo], interfaz_local, lote=True)
+                    continue
+                entrada = (puerto, None)
+            if not entrada:
+                if TRAZA.nivel >= NIVEL_RESUMEN:
+                    TRAZA.emitir(NIVEL_RESUMEN, self.nombre,
+                                 f"  {self.nombre}: MAC destino {mac_destino} desconocida -> descartar {len(grupo)} tramas")
+                self.metricas.descarte("mac_desconocida", len(grupo))
+                continue
+            interfaz_salida, nueva_mac_origen = entrada
+            if nueva_mac_origen is None and interfaz_salida == interfaz_local:
+                self.metricas.descarte("filtrada", len(grupo))
+                continue
+            self.metricas.reenviadas += len(grupo)
+            lote = salida.setdefault(interfaz_salida, [])
+            if nueva_mac_origen is not None:
+                # Router reescribe MAC origen según la interfaz de salida
+                lote.extend(enlace.encapsular(paquete, nueva_mac_origen, mac_destino) for _, paquete in grupo)
+            else:
+                # Switch no modifica las tramas
+                lote.extend(trama for trama, _ in grupo)
+
+        # Capa 3: agrupa por IP destino los paquetes dirigidos a este dispositivo
+        if paquetes_locales:
+            red = CapaRedBinaria if binaria else CapaRed
+            por_ip = {}
+            for paquete in paquetes_locales:
+                segmento, ip_origen, ip_destino = red.desencapsular(paquete)
+                por_ip.setdefault(ip_destino, []).append((paquete, segmento, ip_origen))
+
+            for ip_destino, grupo in por_ip.items():
+                if ip_destino in fib.ips_locales:
+                    segmentos = []
+                    for paquete, segmento, ip_origen in grupo:
+                        segmento = self._reensamblar(red, paquete, segmento, ip_origen, ip_destino)
+                        if segmento is not None:
+                            segmentos.append((segmento, ip_origen))
+                    if segmentos:
+                        self._entregar_lote(segmentos, binaria)
+                    continue
+                interfaz_salida, nueva_mac_origen, siguiente_mac, siguiente_ip = (
+                    fib.ruta(ip_destino) or (None, None, None, None))
+                if not interfaz_salida:
+                    if TRAZA.nivel >= NIVEL_RESUMEN:
+                        TRAZA.emitir(NIVEL_RESUMEN, self.nombre,
+                                     f"  {self.nombre}: No hay ruta para IP {ip_destino} -> descartar {len(grupo)} paquetes")
+                    self.metricas.descarte("sin_ruta", len(grupo))
+                    continue
+                if siguiente_mac is None:
+                    siguiente_mac = self._resolver_vecino(siguiente_ip or ip_destino, interfaz_salida, nueva_mac_origen,
+                                                          [(paquete, enlace, True) for paquete, _, _ in grupo])
+                    if siguiente_mac is None:
+                        continue
+                self.metricas.reenviadas += len(grupo)
+                salida.setdefault(interfaz_salida, []).extend(
+                    enlace.encapsular(paquete, nueva_mac_origen, siguiente_mac) for paquete, _, _ in grupo)
+
+        for interfaz_salida, lote in salida.items():
+            self.enviar_lote_por_interfaz(interfaz_salida, lote)
+
+    # Capas 4 y 5 para un lote de segmentos (segmento, ip_origen) dirigidos a este
+    # dispositivo. Los segmentos TCP pasan uno por uno por la pila TCP, y los dirigidos a un
+    # puerto con socket van a ese socket.
+    def _entregar_lote(self, segmentos, binaria):
+        transporte = CapaTransporteBinaria if binaria else CapaTransporte
+        aplicacion = CapaAplicacionBinaria if binaria else CapaAplicacion
+        puertos = self.puertos
+        mensaje, app = None, None
+        entregados = 0
+        for segmento, ip_origen in segmentos:
+            datos_app, protocolo, psrc, pdst = transporte.desencapsular(segmento)
+            if protocolo == "TCP" and self.tcp is not None:
+                self.tcp.recibir(datos_app, ip_origen, psrc, pdst)
+                continue
+            if puertos is not None and puertos.get(protocolo, pdst) is not None:
+                self._entregar_aplicacion(datos_app, protocolo, ip_origen, psrc, pdst)
+                continue
+            mensaje, app = aplicacion.desencapsular(datos_app)
+            entregados += 1
+        if not entregados:
+            return
+        if binaria:
+            mensaje = mensaje.texto()
+        self.metricas.entregados += entregados
+        if TRAZA.nivel >= NIVEL_RESUMEN:
+            TRAZA.emitir(NIVEL_RESUMEN, self.nombre,
+                         f"  Aplicación ({app}): {entregados} mensajes recibidos en lote (último: '{mensaje}')")
 
 # ====== Dispositivos concretos ======
 class PC(Dispositivo):
     # PC con una sola IP y una sola MAC
+    __slots__ = ("IP", "MAC", "_tcp", "puertos", "_tcp_en_lote")
+
     def __init__(self, nombre, ip, mac):
         super().__init__(nombre)
         self.IP = ip
         self.MAC = mac
+        self._tcp = None
+        self.puertos = None
+        self._tcp_en_lote = None  # segmentos TCP que esperan salir juntos (ver _agrupar_tcp)
+        self.agregar_interfaz("eth0", mac=mac, ip=ip)
+
+    # Pila TCP de la PC, creada en el primer uso. Se puede reemplazar por otra configurada,
+    # p. ej. pc.tcp = PilaTCP(pc, control="reno")
+    @property
+    def tcp(self):
+        if self._tcp is None:
+            self._tcp = PilaTCP(self)
+        return self._tcp
+
+    @tcp.setter
+    def tcp(self, pila):
+        self._tcp = pila
+
+    # Abre un socket de aplicación en un puerto (None: uno libre; ver puertos.py). Los
+    # mensajes a ese puerto van al callback al_recibir(socket, recibido) o a la cola del socket.
+    # Ejemplo de servidor de eco:
+    #   pc2.socket("UDP", 7, al_recibir=lambda s, r: s.responder(r, r.mensaje))
+    def socket(self, protocolo="UDP", puerto=None, app="GENERICA", al_recibir=None):
+        if self.puertos is None:
+            self.puertos = TablaPuertos()
+        socket = self.puertos.asociar(Socket(self, protocolo, puerto, app, al_recibir))
+        if protocolo == "TCP":
+            self.tcp.escuchar(socket.puerto)
+        return socket
 
     # Construye y envía un mensaje desde la PC:
     # 1) Capa 5: etiqueta de aplicación
-    # 2) Capa 4: segmento transporte
+    # 2) Capa 4: segmento transporte (con TCP, a través de la conexión con el destino)
     # 3) Capa 3: paquete IP
     # 4) Capa 2: trama enlace hacia el siguiente salto (MAC)
     # 5) Capa 1: bits y envío por interfaz correspondiente
-    def enviar_mensaje(self, mensaje, ip_destino, protocolo="TCP", puerto_destino=TCP_PORT, app="GENERICA"):
-        print(f"\n=== {self.nombre} ENVIANDO ({app}) ===")
+    # Con puerto_origen (un socket) el mensaje sale desde ese puerto; si no, UDP usa
+    # PUERTO_ORIGEN y TCP la conexión abierta con el destino desde un puerto efímero.
+    def enviar_mensaje(self, mensaje, ip_destino, protocolo="TCP", puerto_destino=TCP_PORT, app="GENERICA",
+                       puerto_origen=None):
+        if TRAZA.nivel >= NIVEL_RESUMEN:
+            TRAZA.emitir(NIVEL_RESUMEN, self.nombre, f"\n=== {self.nombre} ENVIANDO ({app}) ===")
+
+        # Con el codec binario el mensaje se copia una única vez a una Trama con headroom
+        binaria = CODEC == "binario"
+        if binaria:
+            aplicacion, transporte, _, _ = CAPAS_BINARIAS
+            mensaje = Trama.desde_payload(mensaje)
+        else:
+            aplicacion, transporte, _, _ = CAPAS_TEXTO
         
         # Capa de aplicación
-        datos_app = CapaAplicacion.encapsular(mensaje, app)
-        print(" Capa5 ->", datos_app)
-        
-        # Capa de transporte (puerto_origen arbitrario fijo 5000 para demo)
-        segmento = CapaTransporte.encapsular(datos_app, puerto_origen=5000,
-                                             puerto_destino=puerto_destino,
-                                             protocolo=protocolo)
-        print(" Capa4 ->", segmento)
-        
-        # Capa de red (IP origen = self.IP)
-        paquete = CapaRed.encapsular(segmento, self.IP, ip_destino)
-        print(" Capa3 ->", paquete)
-        
-        # Búsqueda del siguiente salto (MAC) en la tabla de red local de la PC
-        siguiente_mac = self.tabla_red.get(ip_destino)
-        if not siguiente_mac:
-            print(f" {self.nombre}: No hay ruta para {ip_destino}")
+        datos_app = aplicacion.encapsular(mensaje, app)
+        if TRAZA.nivel >= NIVEL_CAPAS:
+            TRAZA.emitir(NIVEL_CAPAS, self.nombre, f" Capa5 -> {datos_app}")
+
+        if protocolo == "TCP":
+            # La conexión agrega el encabezado TCP y envía según su ventana (_enviar_tcp)
+            self.tcp.enviar(ip_destino, puerto_destino, datos_app, binaria, puerto_origen)
             return
         
-        # Capa de enlace: MAC origen local y MAC destino = siguiente salto
-        trama = CapaEnlace.encapsular(paquete, self.MAC, siguiente_mac)
-        print(" Capa2 ->", trama)
-        
-        # Capa física: mostrar prefijo de bits
-        bits = CapaFisica.encapsular(trama)
-        print(f" Capa1 -> Bits: {bits}")
+        # Capa de transporte (sin socket, puerto_origen fijo PUERTO_ORIGEN)
+        segmento = transporte.encapsular(datos_app, puerto_origen=puerto_origen or PUERTO_ORIGEN,
+                                         puerto_destino=puerto_destino,
+                                         protocolo=protocolo)
+        self._enviar_paquete(segmento, ip_destino, binaria)
+
+    # Envía un segmento TCP (encabezado TCP y datos) de una conexión: capas 4..1. Dentro de
+    # _agrupar_tcp el segmento espera y sale en lote con los demás de la misma pasada.
+    def _enviar_tcp(self, datos_tcp, conexion):
+        transporte = CapaTransporteBinaria if conexion.binaria else CapaTransporte
+        segmento = transporte.encapsular(datos_tcp, conexion.puerto_local, conexion.puerto_remoto, "TCP")
+        if self._tcp_en_lote is not None:
+            self._tcp_en_lote.append((segmento, conexion.ip_remota, conexion.binaria))
+            return
+        self._enviar_paquete(segmento, conexion.ip_remota, conexion.binaria)
+
+    # Llama a funcion(*args) juntando los segmentos TCP que se envíen mientras tanto, y al
+    # terminar los manda en un lote por destino (un evento de llegada por lote, como
+    # enviar_lote con UDP). Los segmentos son los mismos que sin agrupar: cambia cómo viajan,
+    # no cuántos son. Sin planificador los ACKs vuelven durante el envío y la conexión sigue
+    # enviando; esos segmentos se suman a la lista y se vacían en el mismo bucle, sin recursión.
+    def _agrupar_tcp(self, funcion, *args):
+        if self._tcp_en_lote is not None:
+            return funcion(*args)
+        self._tcp_en_lote = pendientes = []
+        try:
+            resultado = funcion(*args)
+            while pendientes:
+                por_destino = {}
+                for segmento, ip_destino, binaria in pendientes:
+                    por_destino.setdefault((ip_destino, binaria), []).append(segmento)
+                pendientes.clear()
+                for (ip_destino, binaria), segmentos in por_destino.items():
+                    self._enviar_paquetes(segmentos, ip_destino, binaria)
+        finally:
+            self._tcp_en_lote = None
+        return resultado
+
+    # Los ACKs y segmentos que la pila TCP genera al procesar un lote recibido salen juntos
+    def _entregar_lote(self, segmentos, binaria):
+        self._agrupar_tcp(super()._entregar_lote, segmentos, binaria)
+
+    # Capas 3..1 para un segmento ya encapsulado
+    def _enviar_paquete(self, segmento, ip_destino, binaria):
+        self._enviar_paquetes((segmento,), ip_destino, binaria)
+
+    # Capas 3..1 para segmentos ya encapsulados hacia un mismo destino: la ruta se busca una
+    # vez y, si son varios, las tramas salen juntas por la interfaz
+    def _enviar_paquetes(self, segmentos, ip_destino, binaria):
+        red, enlace = (CapaRedBinaria, CapaEnlaceBinaria) if binaria else (CapaRed, CapaEnlace)
+        paquetes = []
+        for segmento in segmentos:
+            if TRAZA.nivel >= NIVEL_CAPAS:
+                TRAZA.emitir(NIVEL_CAPAS, self.nombre, f" Capa4 -> {segmento}")
+            # Capa de red (IP origen = self.IP)
+            paquete = red.encapsular(segmento, self.IP, ip_destino)
+            if TRAZA.nivel >= NIVEL_CAPAS:
+                TRAZA.emitir(NIVEL_CAPAS, self.nombre, f" Capa3 -> {paquete}")
+            paquetes.append(paquete)
         
-        # Obtener interfaz por la que se alcanza esa MAC (desde tabla_enlace de la PC)
-        interfaz_local = self.tabla_enlace.get(siguiente_mac)
+        # Búsqueda del siguiente salto en la tabla de reenvío de la PC:
+        # (interfaz de salida, MAC origen de esa interfaz, MAC e IP del siguiente salto)
+        ruta = self.fib().ruta(ip_destino)
+        if not ruta:
+            if TRAZA.nivel >= NIVEL_RESUMEN:
+                TRAZA.emitir(NIVEL_RESUMEN, self.nombre, f" {self.nombre}: No hay ruta para {ip_destino}")
+            self.metricas.descarte("sin_ruta", len(paquetes))
+            return
+        interfaz_local, mac_origen, siguiente_mac, siguiente_ip = ruta
+        # Interfaz por la que se alcanza el siguiente salto
         if not interfaz_local:
-            print(f" {self.nombre}: No hay interfaz de enlace")
+            if TRAZA.nivel >= NIVEL_RESUMEN:
+                TRAZA.emitir(NIVEL_RESUMEN, self.nombre, f" {self.nombre}: No hay interfaz de enlace")
+            self.metricas.descarte("sin_interfaz", len(paquetes))
             return
+        if siguiente_mac is None:
+            # MAC del siguiente salto por ARP; si hay que preguntarla los paquetes quedan en
+            # espera y se envían al llegar la respuesta
+            siguiente_mac = self._resolver_vecino(siguiente_ip or ip_destino, interfaz_local,
+                                                  mac_origen or self.MAC,
+                                                  [(paquete, enlace, False) for paquete in paquetes])
+            if siguiente_mac is None:
+                return
+        
+        tramas = []
+        for paquete in paquetes:
+            # Capa de enlace: MAC origen de la interfaz y MAC destino = siguiente salto
+            trama = enlace.encapsular(paquete, mac_origen or self.MAC, siguiente_mac)
+            if TRAZA.nivel >= NIVEL_CAPAS:
+                TRAZA.emitir(NIVEL_CAPAS, self.nombre, f" Capa2 -> {trama}")
+            
+            # Capa física: mostrar los bits (solo se calculan si la traza los incluye)
+            if TRAZA.nivel >= NIVEL_BITS:
+                if isinstance(trama, Trama):
+                    bits = CapaFisica.bytes_a_bits(trama.vista())
+                elif MODO_FISICO == "bytes":
+                    bits = CapaFisica.bytes_a_bits(CapaFisica.encapsular_bytes(trama))
+                else:
+                    bits = CapaFisica.encapsular(trama, codigo_linea(CODIGO_LINEA))
+                TRAZA.emitir(NIVEL_BITS, self.nombre, f" Capa1 -> Bits: {bits}")
+            tramas.append(trama)
         
         # Envío por la interfaz
-        self.enviar_por_interfaz(interfaz_local, trama)
+        if len(tramas) == 1:
+            self.enviar_por_interfaz(interfaz_local, tramas[0])
+        else:
+            self.enviar_lote_por_interfaz(interfaz_local, tramas)
+
+    # Envía un lote de mensajes al mismo destino en una sola pasada:
+    # - resuelve la ruta (tabla_red/tabla_enlace compiladas en la FIB) una única vez
+    # - construye los encabezados de capas 5..2 una única vez (son iguales para todo el lote)
+    #   y los antepone a cada mensaje
+    # - entrega el lote completo a la interfaz como una unidad
+    # Con TCP (el protocolo por defecto) el encabezado de aplicación se arma una vez y el lote
+    # entero entra de una vez al buffer de envío de la conexión, que lo segmenta según su
+    # ventana; los segmentos de cada pasada (y los ACKs del receptor) viajan en lote.
+    def enviar_lote(self, mensajes, ip_destino, protocolo="TCP", puerto_destino=TCP_PORT, app="GENERICA",
+                    puerto_origen=None):
+        mensajes = list(mensajes)
+        if TRAZA.nivel >= NIVEL_RESUMEN:
+            TRAZA.emitir(NIVEL_RESUMEN, self.nombre,
+                         f"\n=== {self.nombre} ENVIANDO LOTE de {len(mensajes)} mensajes ({app}) ===")
+        binario = CODEC == "binario"
+        if protocolo == "TCP":
+            encabezado = (CapaAplicacionBinaria if binario else CapaAplicacion).encapsular(
+                b"" if binario else "", app)
+            if binario:
+                lote = [Trama.desde_payload(mensaje).anteponer_bytes(encabezado) for mensaje in mensajes]
+            else:
+                lote = [encabezado + mensaje for mensaje in mensajes]
+            self._agrupar_tcp(self.tcp.enviar_lote, ip_destino, puerto_destino, lote, binario, puerto_origen)
+            return
+
+        ruta = self.fib().ruta(ip_destino)
+        if not ruta:
+            if TRAZA.nivel >= NIVEL_RESUMEN:
+                TRAZA.emitir(NIVEL_RESUMEN, self.nombre, f" {self.nombre}: No hay ruta para {ip_destino}")
+            self.metricas.descarte("sin_ruta", len(mensajes))
+            return
+        interfaz_local, mac_origen, siguiente_mac, siguiente_ip = ruta
+        if not interfaz_local:
+            if TRAZA.nivel >= NIVEL_RESUMEN:
+                TRAZA.emitir(NIVEL_RESUMEN, self.nombre, f" {self.nombre}: No hay interfaz de enlace")
+            self.metricas.descarte("sin_interfaz", len(mensajes))
+            return
+
+        # Encabezados comunes: se encapsula un payload vacío con el codec correspondiente
+        enlace = CapaEnlaceBinaria if binario else CapaEnlace
+        encabezados_red = (CAPAS_RED_BINARIAS if binario else CAPAS_RED_TEXTO).encapsular(
+            b"" if binario else "", app, protocolo, puerto_origen or PUERTO_ORIGEN, puerto_destino,
+            self.IP, ip_destino)
+        if siguiente_mac is None:
+            ip_salto = siguiente_ip or ip_destino
+            siguiente_mac = self.vecinos.buscar(ip_salto)
+            if siguiente_mac is None:
+                # Sin MAC resuelta los paquetes (capas 5..3) esperan la respuesta ARP y salen en lote
+                if binario:
+                    paquetes = [Trama.desde_payload(mensaje).anteponer_bytes(encabezados_red) for mensaje in mensajes]
+                else:
+                    paquetes = [encabezados_red + mensaje for mensaje in mensajes]
+                self._resolver_vecino(ip_salto, interfaz_local, mac_origen,
+                                      [(paquete, enlace, False) for paquete in paquetes])
+                return
+        encabezados = enlace.encapsular(encabezados_red, mac_origen, siguiente_mac)
+        if TRAZA.nivel >= NIVEL_CAPAS:
+            TRAZA.emitir(NIVEL_CAPAS, self.nombre, f" Encabezados -> {encabezados}")
+
+        if binario:
+            tramas = [Trama.desde_payload(mensaje).anteponer_bytes(encabezados) for mensaje in mensajes]
+        else:
+            tramas = [encabezados + mensaje for mensaje in mensajes]
+        self.enviar_lote_por_interfaz(interfaz_local, tramas)
 
 class Router(Dispositivo):
-    # Router con dos interfaces: izquierda y derecha (IP y MAC por interfaz)
-    def __init__(self, nombre, ip_izq, mac_izq, ip_der, mac_der):
+    # Router con dos interfaces: izquierda y derecha (IP y MAC por interfaz).
+    # Sin direcciones se crea sin interfaces y se agregan con agregar_interfaz (ver topologia.py).
+    __slots__ = ("IP_IZQ", "MAC_IZQ", "IP_DER", "MAC_DER")
+    reescribe_mac = True
+
+    def __init__(self, nombre, ip_izq=None, mac_izq=None, ip_der=None, mac_der=None):
         super().__init__(nombre)
         self.IP_IZQ = ip_izq
         self.MAC_IZQ = mac_izq
         self.IP_DER = ip_der
         self.MAC_DER = mac_der
+        if mac_izq is not None:
+            self.agregar_interfaz("if_izq", mac=mac_izq, ip=ip_izq)
+        if mac_der is not None:
+            self.agregar_interfaz("if_der", mac=mac_der, ip=ip_der)
 
 class Switch(Dispositivo):
-    # Switch con una MAC administrativa (para mostrar) y tabla de conmutación
-    def __init__(self, nombre, mac):
+    # Switch con una MAC administrativa (para mostrar) y tabla MAC con aprendizaje.
+    # tabla_enlace puede tener entradas estáticas, que tienen prioridad sobre las aprendidas.
+    __slots__ = ("MAC", "tabla_mac")
+
+    # Los switches reenvían tramas sin mirar IP: las que exceden la MTU del enlace se descartan
+    fragmenta_ip = False
+
+    def __init__(self, nombre, mac, capacidad_mac=CAPACIDAD_TABLA_MAC, envejecimiento_mac=ENVEJECIMIENTO_MAC):
         super().__init__(nombre)
         self.MAC = mac
+        # La MAC administrativa pertenece a la interfaz de gestión (no conectada)
+        self.agregar_interfaz("gestion", mac=mac)
+        self.tabla_mac = TablaMAC(self.reloj, capacidad_mac, envejecimiento_mac)
 
 # ==============================
 # Configuración topología y tablas
 # ==============================
-# Crea los dispositivos, conecta las interfaces y define tablas de enlace (N2) y de red (N3)
-def configurar_red():
-    pc1 = PC("PC1", PC1_IP, PC1_MAC)
-    pc2 = PC("PC2", PC2_IP, PC2_MAC)
-    router = Router("Router1", ROUTER_IP_LEFT, ROUTER_MAC_LEFT, ROUTER_IP_RIGHT, ROUTER_MAC_RIGHT)
-    switch1 = Switch("Switch1", SWITCH1_MAC)
-    switch2 = Switch("Switch2", SWITCH2_MAC)
-
+# Topología de la demo en el formato de topologia.py
+TOPOLOGIA_DEMO = {
+    "pcs": [
+        {"nombre": "PC1", "mac": PC1_MAC, "ip": PC1_IP, "red": RED_IZQ, "puerta_enlace": ROUTER_IP_LEFT},
+        {"nombre": "PC2", "mac": PC2_MAC, "ip": PC2_IP, "red": RED_DER, "puerta_enlace": ROUTER_IP_RIGHT},
+    ],
+    "switches": [
+        {"nombre": "Switch1", "mac": SWITCH1_MAC},
+        {"nombre": "Switch2", "mac": SWITCH2_MAC},
+    ],
+    "routers": [
+        {"nombre": "Router1", "interfaces": [
+            {"nombre": "if_izq", "mac": ROUTER_MAC_LEFT, "ip": ROUTER_IP_LEFT, "red": RED_IZQ},
+            {"nombre": "if_der", "mac": ROUTER_MAC_RIGHT, "ip": ROUTER_IP_RIGHT, "red": RED_DER},
+        ]},
+    ],
     # Conexiones físicas (cableado lógico)
-    pc1.conectar("eth0", switch1, "puerto1")
-    switch1.conectar("puerto1", pc1, "eth0")
-    switch1.conectar("puerto2", router, "if_izq")
-    router.conectar("if_izq", switch1, "puerto2")
-    router.conectar("if_der", switch2, "puerto2")
-    switch2.conectar("puerto2", router, "if_der")
-    switch2.conectar("puerto1", pc2, "eth0")
-    pc2.conectar("eth0", switch2, "puerto1")
-
-    # Tablas de red/enlace en cada equipo
-    # PCs: IP destino -> MAC de siguiente salto (puerta de enlace)
-    pc1.tabla_red = {PC2_IP: ROUTER_MAC_LEFT}
-    pc1.tabla_enlace = {ROUTER_MAC_LEFT: "eth0"}
-
-    pc2.tabla_red = {PC1_IP: ROUTER_MAC_RIGHT}
-    pc2.tabla_enlace = {ROUTER_MAC_RIGHT: "eth0"}
-
-    # Switches: MAC destino -> puerto de salida
-    switch1.tabla_enlace = {PC1_MAC: "puerto1", ROUTER_MAC_LEFT: "puerto2"}
-    switch2.tabla_enlace = {PC2_MAC: "puerto1", ROUTER_MAC_RIGHT: "puerto2"}
-
-    # Router:
-    # - tabla_red: IP destino -> MAC del host final (modelo simplificado sin ARP)
-    # - tabla_enlace: MAC -> interfaz por la que alcanzarla
-    router.tabla_red = {PC1_IP: PC1_MAC, PC2_IP: PC2_MAC}
-    router.tabla_enlace = {PC1_MAC: "if_izq", PC2_MAC: "if_der"}
-
-    return pc1, pc2, router, switch1, switch2
+    "enlaces": [
+        ["PC1", "eth0", "Switch1", "puerto1"],
+        ["Switch1", "puerto2", "Router1", "if_izq"],
+        ["Router1", "if_der", "Switch2", "puerto2"],
+        ["Switch2", "puerto1", "PC2", "eth0"],
+    ],
+}
+
+
+# Construye la topología de la demo. Las tablas de red se calculan a partir de las redes
+# de cada interfaz, las MACs se resuelven por ARP y los switches aprenden solos.
+# Si se pasa un planificador, todos los dispositivos lo comparten (simulación por eventos).
+def configurar_red(planificador=None):
+    # Importación diferida: topologia.py usa las clases de dispositivos de este módulo
+    from topologia import construir_topologia
+    red = construir_topologia(TOPOLOGIA_DEMO, planificador)
+    return red["PC1"], red["PC2"], red["Router1"], red["Switch1"], red["Switch2"]
 
 # ==============================
 # Interfaz simple CLI
 # ==============================
 # Bucle principal de interacción: permite elegir dirección, mensaje y aplicación, y dispara el envío
 def main():
-    pc1, pc2, router, switch1, switch2 = configurar_red()
+    planificador = Planificador()
+    pc1, pc2, router, switch1, switch2 = configurar_red(planificador)
     print("=== SIMULADOR DE RED SIMPLE ===")
     print("Topología: PC1 - Switch1 - Router1 - Switch2 - PC2")
     
@@ -362,10 +1310,11 @@ def main():
         print("\nOpciones para enviar mensaje:")
         print("1) PC1 -> PC2")
         print("2) PC2 -> PC1")
-        print("3) Salir")
-        opt = input("Selecciona (1-3): ").strip()
+        print("3) PC1 -> PC2 y PC2 -> PC1 a la vez")
+        print("4) Salir")
+        opt = input("Selecciona (1-4): ").strip()
         
-        if opt in ["1", "2"]:
+        if opt in ["1", "2", "3"]:
             msg = input("Mensaje: ")
             print("Selecciona aplicación:")
             print("1) WhatsApp")
@@ -389,8 +1338,15 @@ def main():
             elif opt == "2":
                 # PC2 -> PC1 usando TCP: puerto destino = TCP_PORT
                 pc2.enviar_mensaje(msg, PC1_IP, protocolo="TCP", puerto_destino=TCP_PORT, app=codigo_app)
+            elif opt == "3":
+                # Ambos sentidos al mismo tiempo: cada dispositivo corre como tarea de asyncio
+                from asincrono import ambos_sentidos
+                asyncio.run(ambos_sentidos(msg, app=codigo_app))
+                continue
+            # Procesa todos los saltos programados hasta que la trama llegue (o se descarte)
+            planificador.ejecutar()
         
-        elif opt == "3":
+        elif opt == "4":
             break
         else:
             print("Opción inválida.")
@@ -0,0 +1,173 @@
+# ==============================
+# Pruebas de ida y vuelta de los codecs de texto y binario
+# ==============================
+# Cada capa (y cada Pila completa) debe recuperar exactamente lo que se encapsuló.
+
+import pytest
+
+import codec_binario
+from capas import (CAPAS_BINARIAS, CAPAS_TEXTO, CapaAplicacion, CapaEnlace, CapaFisica, CapaRed,
+                   CapaTransporte)
+from codec_binario import (CapaAplicacionBinaria, CapaEnlaceBinaria, CapaRedBinaria, CapaTCPBinaria,
+                           CapaTransporteBinaria, CapaVLANBinaria)
+from codigos_linea import CODIGOS_LINEA
+from trama import Trama
+
+CAMPOS = ("11", "UDP", 5000, 53, "10.0.0.1", "10.0.0.2", "A", "C")
+
+MENSAJES = ["hola", "", "a:b:c", "fin]", "[H3:1.2.3.4:5.6.7.8]dentro", "precio 5€ 👍", "x" * 5000]
+
+
+# ====== Codec de texto ======
+@pytest.mark.parametrize("mensaje", MENSAJES)
+def test_capas_texto_ida_y_vuelta(mensaje):
+    assert CapaAplicacion.desencapsular(CapaAplicacion.encapsular(mensaje, "DNS")) == (mensaje, "DNS")
+    segmento = CapaTransporte.encapsular(mensaje, 5000, 53, "TCP")
+    assert CapaTransporte.desencapsular(segmento) == (mensaje, "TCP", 5000, 53)
+    assert CapaRed.desencapsular(CapaRed.encapsular(mensaje, "10.0.0.1", "10.0.0.2")) == \
+        (mensaje, "10.0.0.1", "10.0.0.2")
+    assert CapaEnlace.desencapsular(CapaEnlace.encapsular(mensaje, "A", "C")) == (mensaje, "A", "C")
+
+
+@pytest.mark.parametrize("mensaje", MENSAJES)
+def test_pila_texto_ida_y_vuelta(mensaje):
+    assert CAPAS_TEXTO.desencapsular(CAPAS_TEXTO.encapsular(mensaje, *CAMPOS)) == (mensaje, *CAMPOS)
+
+
+def test_texto_sin_etiqueta_de_aplicacion_es_generica():
+    assert CapaAplicacion.desencapsular("hola") == ("hola", "GENERICA")
+
+
+def test_fragmentos_de_texto_se_reensamblan():
+    paquete = CapaRed.encapsular("[H4:UDP:1:2]" + "dato:]" * 50, "10.0.0.1", "10.0.0.2")
+    fragmentos = CapaRed.fragmentar(paquete, 64, 7)
+    assert all(len(fragmento) <= 64 for fragmento in fragmentos)
+    assert [CapaRed.fragmento(fragmento)[0] for fragmento in fragmentos] == [7] * len(fragmentos)
+    assert CapaRed.fragmento(fragmentos[-1])[2] == 0
+    segmento = "".join(CapaRed.desencapsular(fragmento)[0] for fragmento in fragmentos)
+    assert segmento == CapaRed.desencapsular(paquete)[0]
+    assert CapaRed.fragmentar(paquete, 10, 7) is None
+
+
+# ====== Codec binario ======
+@pytest.mark.parametrize("mensaje", MENSAJES)
+def test_capas_binarias_ida_y_vuelta(mensaje):
+    datos, app = CapaAplicacionBinaria.desencapsular(CapaAplicacionBinaria.encapsular(mensaje, "DNS"))
+    assert (str(datos, "utf-8"), app) == (mensaje, "DNS")
+    datos, *campos = CapaTransporteBinaria.desencapsular(CapaTransporteBinaria.encapsular(mensaje, 5000, 53, "TCP"))
+    assert (str(datos, "utf-8"), *campos) == (mensaje, "TCP", 5000, 53)
+    datos, *campos = CapaRedBinaria.desencapsular(CapaRedBinaria.encapsular(mensaje, "10.0.0.1", "10.0.0.2"))
+    assert (str(datos, "utf-8"), *campos) == (mensaje, "10.0.0.1", "10.0.0.2")
+    datos, *campos = CapaEnlaceBinaria.desencapsular(CapaEnlaceBinaria.encapsular(mensaje, "A", "C"))
+    assert (str(datos, "utf-8"), *campos) == (mensaje, "A", "C")
+
+
+@pytest.mark.parametrize("mensaje", MENSAJES)
+def test_pila_binaria_ida_y_vuelta(mensaje):
+    datos, *campos = CAPAS_BINARIAS.desencapsular(CAPAS_BINARIAS.encapsular(mensaje, *CAMPOS))
+    assert (str(datos, "utf-8"), *campos) == (mensaje, *CAMPOS)
+
+
+def test_binario_admite_cualquier_byte():
+    payload = bytes(range(256)) + b":]:]"
+    datos, *campos = CAPAS_BINARIAS.desencapsular(CAPAS_BINARIAS.encapsular(payload, *CAMPOS))
+    assert (bytes(datos), *campos) == (payload, *CAMPOS)
+
+
+def test_tcp_y_vlan_binarios_ida_y_vuelta():
+    datos, *campos = CapaTCPBinaria.desencapsular(CapaTCPBinaria.encapsular(b"x]", 2 ** 40, 3, 0x12, 65535))
+    assert (bytes(datos), *campos) == (b"x]", 2 ** 40, 3, 0x12, 65535)
+    datos, vlan = CapaVLANBinaria.desencapsular(CapaVLANBinaria.encapsular(b"y:", 4094))
+    assert (bytes(datos), vlan) == (b"y:", 4094)
+
+
+def test_direcciones_y_codigos_de_mas_bytes_fallan():
+    with pytest.raises(ValueError, match="no cabe"):
+        CapaEnlaceBinaria.encapsular(b"", "MAC-LARGA", "C")
+    with pytest.raises(ValueError, match="no cabe"):
+        CapaEnlaceBinaria.encapsular(b"", "A", b"1234567")
+    with pytest.raises(ValueError, match="no cabe"):
+        CapaAplicacionBinaria.encapsular("hola", "APLICACION")
+    # Los que caben justo se recuperan sin el relleno
+    assert CapaAplicacionBinaria.desencapsular(CapaAplicacionBinaria.encapsular("", "12345678"))[1] == "12345678"
+    assert CapaEnlaceBinaria.desencapsular(CapaEnlaceBinaria.encapsular(b"", "AAAAAA", "B"))[1:] == ("AAAAAA", "B")
+
+
+@pytest.mark.parametrize("ip", ["10.0.0.256", "10.0.0", "::1", "pc1", None])
+def test_ip_invalida_falla(ip):
+    with pytest.raises(ValueError, match="IPv4 inválida"):
+        CapaRedBinaria.encapsular(b"", ip, "10.0.0.2")
+
+
+def test_protocolo_desconocido():
+    with pytest.raises(ValueError, match="Protocolo de transporte desconocido"):
+        CapaTransporteBinaria.encapsular(b"", 1, 2, "SCTP")
+    # Al recibir, un número sin nombre se conserva como texto
+    segmento = codec_binario.ENCABEZADO_TRANSPORTE.pack(132, 1, 2) + b"datos"
+    datos, protocolo, puerto_origen, puerto_destino = CapaTransporteBinaria.desencapsular(segmento)
+    assert (bytes(datos), protocolo, puerto_origen, puerto_destino) == (b"datos", "132", 1, 2)
+
+
+# ====== Tramas ======
+@pytest.mark.parametrize("mensaje", MENSAJES)
+def test_pila_binaria_sobre_trama(mensaje):
+    trama = CAPAS_BINARIAS.encapsular(Trama.desde_payload(mensaje), *CAMPOS)
+    assert isinstance(trama, Trama)
+    datos, *campos = CAPAS_BINARIAS.desencapsular(trama)
+    assert isinstance(datos, Trama) and datos.buffer is trama.buffer
+    assert (datos.texto(), *campos) == (mensaje, *CAMPOS)
+    # El resultado es el mismo que encapsulando bytes
+    assert bytes(trama) == CAPAS_BINARIAS.encapsular(mensaje, *CAMPOS)
+
+
+def test_trama_sin_espacio_para_encabezados():
+    with pytest.raises(ValueError, match="Sin espacio"):
+        CAPAS_BINARIAS.encapsular(Trama.desde_payload("hola", espacio_cabeceras=8), *CAMPOS)
+
+
+def test_fragmentos_binarios_sobre_trama():
+    payload = bytes(range(256)) * 4
+    paquete = CapaRedBinaria.encapsular(Trama.desde_payload(payload), "10.0.0.1", "10.0.0.2")
+    fragmentos = CapaRedBinaria.fragmentar(paquete, 100, 0x1_0005)
+    assert all(len(fragmento) <= 100 for fragmento in fragmentos)
+    assert {CapaRedBinaria.fragmento(fragmento)[0] for fragmento in fragmentos} == {5}
+    assert CapaRedBinaria.fragmento(paquete) is None
+    reensamblado = Trama.concatenar([CapaRedBinaria.desencapsular(fragmento)[0] for fragmento in fragmentos])
+    assert bytes(reensamblado) == payload
+
+
+def test_copia_de_trama_es_independiente():
+    trama = CAPAS_BINARIAS.encapsular(Trama.desde_payload("hola"), *CAMPOS)
+    copia = trama.copia()
+    assert bytes(copia) == bytes(trama) and copia.buffer is not trama.buffer
+    # Reescribir el encabezado de enlace de la copia no toca el original
+    paquete = CapaEnlaceBinaria.desencapsular(copia)[0]
+    CapaEnlaceBinaria.encapsular(paquete, "D", "B")
+    assert CapaEnlaceBinaria.desencapsular(trama)[1:] == ("A", "C")
+
+
+# ====== Capa física ======
+@pytest.mark.parametrize("codigo", list(CODIGOS_LINEA.values()), ids=list(CODIGOS_LINEA))
+def test_capa_fisica_ida_y_vuelta(codigo):
+    # Los símbolos y los bytes del medio llevan la trama en UTF-8
+    trama = CAPAS_TEXTO.encapsular("año :] precio 5€ 👍", *CAMPOS)
+    assert CapaFisica.desencapsular(CapaFisica.encapsular(trama, codigo), codigo) == trama
+    # Por bloques (de tamaños que no coinciden) se obtienen los mismos bytes
+    bloques = CapaFisica.codificar_en_bloques(trama, codigo, bloque=7)
+    medio = b"".join(CapaFisica.decodificar_en_bloques(bloques, codigo, bloque=5))
+    assert medio == CapaFisica.encapsular_bytes(trama)
+    assert CapaFisica.desencapsular_bytes(CapaFisica.encapsular_bytes(trama)) == trama
+    assert CapaFisica.bytes_a_bits(CapaFisica.encapsular_bytes(trama)) == CapaFisica.encapsular(trama)
+    assert CapaFisica.bits_a_bytes(CapaFisica.encapsular(trama)) == CapaFisica.encapsular_bytes(trama)
+
+
+@pytest.mark.parametrize("codigo", list(CODIGOS_LINEA.values()), ids=list(CODIGOS_LINEA))
+@pytest.mark.parametrize("pila", [CAPAS_TEXTO, CAPAS_BINARIAS], ids=["texto", "binario"])
+def test_pila_sobre_el_medio(pila, codigo):
+    trama = pila.encapsular("precio 5€ :] 👍", *CAMPOS)
+    if isinstance(trama, str):
+        recibida = CapaFisica.desencapsular(CapaFisica.encapsular(trama, codigo), codigo)
+    else:
+        recibida = codigo.decodificar(codigo.codificar(trama))
+    datos, *campos = pila.desencapsular(recibida)
+    assert (datos if isinstance(datos, str) else str(datos, "utf-8"), *campos) == ("precio 5€ :] 👍", *CAMPOS)
@@ -0,0 +1,122 @@
+# ==============================
+# Pruebas de la tabla MAC con aprendizaje
+# ==============================
+# Aprendizaje y cambio de puerto, caducidad por envejecimiento y desalojo LRU cuando la
+# tabla está llena; al final, el aprendizaje de los switches de la topología de demo.
+
+import pytest
+
+import simulador_red
+from conmutacion import TablaMAC
+from planificador import Planificador
+from trazas import NIVEL_APAGADO, TRAZA
+
+
+# Reloj manual: la prueba avanza el tiempo asignando "ahora"
+class Reloj:
+    def __init__(self):
+        self.ahora = 0.0
+
+    def __call__(self):
+        return self.ahora
+
+
+@pytest.fixture
+def reloj():
+    return Reloj()
+
+
+def test_aprende_y_cambia_de_puerto(reloj):
+    tabla = TablaMAC(reloj)
+    assert tabla.buscar("A") is None
+    assert tabla.aprender("A", "puerto1")
+    assert not tabla.aprender("A", "puerto1")
+    assert tabla.buscar("A") == "puerto1"
+    assert tabla.aprender("A", "puerto2")
+    assert tabla.buscar("A") == "puerto2"
+    assert "A" in tabla and "B" not in tabla
+    assert len(tabla) == 1
+
+
+def test_caducidad(reloj):
+    tabla = TablaMAC(reloj, envejecimiento=10)
+    tabla.aprender("A", "puerto1")
+    reloj.ahora = 5
+    tabla.aprender("B", "puerto2")
+    reloj.ahora = 10
+    assert tabla.buscar("A") == "puerto1"  # justo en el límite todavía vale
+    reloj.ahora = 10.5
+    assert tabla.buscar("A") is None
+    assert tabla.caducadas == 1
+    assert tabla.buscar("B") == "puerto2"
+    # Volver a ver una MAC renueva su entrada
+    reloj.ahora = 14
+    tabla.aprender("B", "puerto2")
+    reloj.ahora = 20
+    tabla.caducar()
+    assert tabla.a_dict() == {"B": "puerto2"}
+    reloj.ahora = 24.5
+    tabla.caducar()
+    assert len(tabla) == 0
+    assert tabla.caducadas == 2
+
+
+def test_sin_envejecimiento(reloj):
+    tabla = TablaMAC(reloj, envejecimiento=None)
+    tabla.aprender("A", "puerto1")
+    reloj.ahora = 1e9
+    tabla.caducar()
+    assert tabla.buscar("A") == "puerto1"
+
+
+def test_desalojo_lru(reloj):
+    tabla = TablaMAC(reloj, capacidad=3)
+    for i, mac in enumerate("ABC"):
+        reloj.ahora = i
+        tabla.aprender(mac, f"puerto{i}")
+    # Ver "A" de nuevo la vuelve la más reciente: la próxima en salir es "B"
+    reloj.ahora = 3
+    tabla.aprender("A", "puerto0")
+    reloj.ahora = 4
+    tabla.aprender("D", "puerto3")
+    assert len(tabla) == 3
+    assert tabla.desalojadas == 1
+    assert set(tabla.a_dict()) == {"A", "C", "D"}
+    reloj.ahora = 5
+    tabla.aprender("E", "puerto4")
+    assert set(tabla.a_dict()) == {"A", "D", "E"}
+    assert tabla.desalojadas == 2
+
+
+def test_caducadas_no_cuentan_como_desalojadas(reloj):
+    tabla = TablaMAC(reloj, capacidad=2, envejecimiento=10)
+    tabla.aprender("A", "puerto1")
+    tabla.aprender("B", "puerto1")
+    reloj.ahora = 20
+    tabla.aprender("C", "puerto2")
+    assert tabla.a_dict() == {"C": "puerto2"}
+    assert tabla.caducadas == 2
+    assert tabla.desalojadas == 0
+
+
+def test_olvidar_puerto(reloj):
+    tabla = TablaMAC(reloj)
+    tabla.aprender("A", "puerto1")
+    tabla.aprender("B", "puerto2")
+    tabla.aprender("C", "puerto1")
+    tabla.olvidar_puerto("puerto1")
+    assert tabla.a_dict() == {"B": "puerto2"}
+
+
+def test_switches_de_la_demo_aprenden():
+    nivel, destinos = TRAZA.configurar(nivel=NIVEL_APAGADO)
+    try:
+        planificador = Planificador()
+        pc1, pc2, router, switch1, switch2 = simulador_red.configurar_red(planificador)
+        pc1.enviar_mensaje("hola", simulador_red.PC2_IP, "UDP", simulador_red.UDP_PORT)
+        planificador.ejecutar(hasta=5)
+    finally:
+        TRAZA.configurar(nivel=nivel, destinos=destinos)
+    assert pc2.metricas.entregados == 1
+    assert switch1.tabla_mac.buscar(simulador_red.PC1_MAC) == "puerto1"
+    assert switch2.tabla_mac.buscar(simulador_red.ROUTER_MAC_RIGHT) == "puerto2"
@@ -0,0 +1,61 @@
+# ==============================
+# Pruebas de los enlaces que corrompen bits (FCS en el camino de datos)
+# ==============================
+# Con corromper=True el emisor agrega el FCS, el canal invierte bits y el receptor
+# descarta las tramas dañadas: a la aplicación solo llegan mensajes intactos.
+
+import pytest
+
+import simulador_red
+from planificador import Planificador
+from trazas import NIVEL_APAGADO, TRAZA
+
+MENSAJE = "dato:] 5€ " * 100
+
+
+@pytest.fixture(autouse=True)
+def configuracion():
+    anterior = (simulador_red.MODO_FISICO, simulador_red.CODEC, simulador_red.CODIGO_LINEA)
+    nivel, destinos = TRAZA.configurar(nivel=NIVEL_APAGADO)
+    yield
+    simulador_red.MODO_FISICO, simulador_red.CODEC, simulador_red.CODIGO_LINEA = anterior
+    TRAZA.configurar(nivel=nivel, destinos=destinos)
+
+
+# Envía "mensajes" UDP (uno a uno y en lote) y un lote TCP de PC1 a PC2 con el enlace
+# Router1 -> Switch2 corrompiendo bits. Retorna (mensajes recibidos por UDP, PC2, Switch2, enlace).
+def _enviar(ber, mensajes=60):
+    planificador = Planificador()
+    pc1, pc2, router, switch1, switch2 = simulador_red.configurar_red(planificador)
+    router.conectar("if_der", switch2, "puerto2", ancho_banda=1e7, ber=ber, semilla=3, corromper=True)
+    recibidos = []
+    pc2.socket("UDP", simulador_red.UDP_PORT, al_recibir=lambda socket, recibido: recibidos.append(recibido.mensaje))
+    for i in range(mensajes):
+        planificador.programar_en(i * 1e-3, pc1.enviar_mensaje, MENSAJE, simulador_red.PC2_IP, "UDP",
+                                  simulador_red.UDP_PORT)
+    planificador.programar_en(0.5, pc1.enviar_lote, [MENSAJE] * mensajes, simulador_red.PC2_IP, "UDP",
+                              simulador_red.UDP_PORT)
+    planificador.programar_en(0.6, pc1.enviar_lote, [MENSAJE] * mensajes, simulador_red.PC2_IP)
+    planificador.ejecutar(hasta=30)
+    return recibidos, pc2, switch2, router.enlaces["if_der"]
+
+
+@pytest.mark.parametrize("codigo", ["NRZ", "Manchester", "4B5B"])
+@pytest.mark.parametrize("codec", ["texto", "binario"])
+@pytest.mark.parametrize("modo", ["bytes", "bits"])
+def test_tramas_danadas_se_descartan(modo, codec, codigo):
+    simulador_red.MODO_FISICO, simulador_red.CODEC, simulador_red.CODIGO_LINEA = modo, codec, codigo
+    recibidos, pc2, switch2, enlace = _enviar(2e-5)
+    invalidas = switch2.metricas.descartes.get("fcs_invalido", 0)
+    assert invalidas > 0 and enlace.canal.errores >= invalidas
+    assert enlace.instantanea()["bits_errados"] == enlace.canal.errores
+    # UDP pierde las tramas dañadas; TCP las retransmite y entrega todo el lote
+    assert len(recibidos) + invalidas >= 120 > len(recibidos)
+    assert pc2.metricas.entregados == len(recibidos) + 60
+    assert all(str(mensaje) == MENSAJE for mensaje in recibidos)
+
+
+def test_sin_errores_llega_todo():
+    recibidos, pc2, switch2, enlace = _enviar(0.0)
+    assert len(recibidos) == 120 and pc2.metricas.entregados == 180
+    assert "fcs_invalido" not in switch2.metricas.descartes and enlace.canal.errores == 0
@@ -0,0 +1,156 @@
+# ==============================
+# Pruebas de fragmentación y reensamblado IP
+# ==============================
+# Los fragmentos se miden en bytes del medio (el texto en UTF-8) y nunca parten un
+# carácter; el reensamblado recupera el mensaje exacto y acota espera y memoria.
+
+import random
+
+import pytest
+
+import simulador_red
+from capas import CODIFICACION, CapaRed, cortar_en_bytes, largo_en_bytes
+from codec_binario import CapaRedBinaria
+from planificador import Planificador
+from reensamblado import Reensamblador
+from trama import Trama
+from trazas import NIVEL_APAGADO, TRAZA
+
+TEXTO = "añb€c😀d" * 700  # caracteres de 1, 2, 3 y 4 bytes
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 0.0
+
+    def __call__(self):
+        return self.ahora
+
+
+# Pasa los fragmentos (en cualquier orden) por un Reensamblador; retorna el segmento armado
+def _reensamblar(red, fragmentos, orden=None):
+    reensamblador = Reensamblador(Reloj())
+    partes = None
+    for fragmento in (fragmentos if orden is None else [fragmentos[i] for i in orden]):
+        segmento, ip_origen, ip_destino = red.desencapsular(fragmento)
+        identificador, desplazamiento, mas = red.fragmento(fragmento)
+        assert partes is None
+        partes, _ = reensamblador.agregar((ip_origen, ip_destino, identificador), desplazamiento, mas, segmento)
+    assert partes is not None and reensamblador.bytes == 0
+    return partes
+
+
+@pytest.mark.parametrize("maximo", [4, 7, 64, 1500])
+def test_cortar_en_bytes(maximo):
+    inicio = 0
+    partes = []
+    while inicio < len(TEXTO):
+        caracteres, largo = cortar_en_bytes(TEXTO, inicio, maximo)
+        parte = TEXTO[inicio:inicio + caracteres]
+        assert 0 < largo <= maximo
+        assert largo == len(parte.encode(CODIFICACION))
+        # Cabe lo más posible: el carácter siguiente ya no entra
+        if inicio + caracteres < len(TEXTO):
+            assert largo + largo_en_bytes(TEXTO[inicio + caracteres]) > maximo
+        partes.append(parte)
+        inicio += caracteres
+    assert "".join(partes) == TEXTO
+    assert cortar_en_bytes(TEXTO, 0, 0) == (0, 0)
+    assert cortar_en_bytes("😀", 0, 3) == (0, 0)
+
+
+@pytest.mark.parametrize("tamano_maximo", [60, 100, 577, 1500])
+def test_fragmentos_de_texto_en_bytes(tamano_maximo):
+    paquete = CapaRed.encapsular(TEXTO, "10.0.0.1", "10.0.0.2")
+    fragmentos = CapaRed.fragmentar(paquete, tamano_maximo, 42)
+    assert len(fragmentos) > 1
+    desplazamiento = 0
+    for fragmento in fragmentos:
+        assert largo_en_bytes(fragmento) <= tamano_maximo
+        segmento, _, _ = CapaRed.desencapsular(fragmento)
+        assert CapaRed.fragmento(fragmento)[:2] == (42, desplazamiento)
+        desplazamiento += largo_en_bytes(segmento)
+    assert desplazamiento == largo_en_bytes(TEXTO)
+    orden = list(range(len(fragmentos)))
+    random.Random(tamano_maximo).shuffle(orden)
+    assert "".join(_reensamblar(CapaRed, fragmentos, orden)) == TEXTO
+
+
+def test_fragmentar_un_fragmento():
+    paquete = CapaRed.encapsular(TEXTO, "10.0.0.1", "10.0.0.2")
+    fragmentos = []
+    # Como un router con una MTU menor en el siguiente salto
+    for fragmento in CapaRed.fragmentar(paquete, 1500, 7):
+        fragmentos.extend(CapaRed.fragmentar(fragmento, 300, 99))
+    assert all(largo_en_bytes(fragmento) <= 300 for fragmento in fragmentos)
+    assert {CapaRed.fragmento(fragmento)[0] for fragmento in fragmentos} == {7}
+    assert "".join(_reensamblar(CapaRed, fragmentos)) == TEXTO
+
+
+def test_sin_lugar_para_la_carga():
+    paquete = CapaRed.encapsular("😀", "10.0.0.1", "10.0.0.2")
+    prefijo = len("[H3:10.0.0.1:10.0.0.2:1:0:0]")
+    assert CapaRed.fragmentar(paquete, prefijo + 3, 1) is None
+    assert len(CapaRed.fragmentar(paquete, prefijo + 4, 1)) == 1
+
+
+def test_fragmentos_binarios():
+    datos = TEXTO.encode(CODIFICACION)
+    paquete = CapaRedBinaria.encapsular(Trama.desde_payload(datos), "10.0.0.1", "10.0.0.2")
+    fragmentos = CapaRedBinaria.fragmentar(paquete, 600, 5)
+    assert all(len(fragmento) <= 600 for fragmento in fragmentos)
+    assert bytes(Trama.concatenar(_reensamblar(CapaRedBinaria, fragmentos)).vista()) == datos
+
+
+def test_vencimiento():
+    reloj = Reloj()
+    reensamblador = Reensamblador(reloj, espera=30)
+    assert reensamblador.agregar("a", 0, 1, "ñ" * 10) == (None, 0)
+    reloj.ahora = 20
+    assert reensamblador.agregar("b", 0, 1, "x" * 10) == (None, 0)
+    reloj.ahora = 30
+    # Vence "a" (llegó primero); "b" sigue esperando y se completa
+    partes, descartados = reensamblador.agregar("b", 10, 0, "y")
+    assert descartados == 1 and reensamblador.vencidos == 1
+    assert partes == ["x" * 10, "y"]
+    # El fragmento final de "a" llega tarde: empieza un datagrama nuevo que no se completa
+    assert reensamblador.agregar("a", 20, 0, "z") == (None, 0)
+    assert len(reensamblador) == 1
+
+
+def test_limite_en_bytes():
+    reensamblador = Reensamblador(Reloj(), maximo=100)
+    # 30 caracteres de 2 bytes: 60 bytes, aunque sean 30 caracteres
+    reensamblador.agregar("a", 0, 1, "ñ" * 30)
+    assert reensamblador.bytes == 60
+    partes, descartados = reensamblador.agregar("b", 0, 1, "ñ" * 30)
+    assert descartados == 1 and reensamblador.desalojados == 1
+    assert reensamblador.bytes == 60 and len(reensamblador) == 1
+    # Los duplicados no suman
+    assert reensamblador.agregar("b", 0, 1, "ñ" * 30) == (None, 0)
+    assert reensamblador.bytes == 60
+    partes, _ = reensamblador.agregar("b", 60, 0, "fin")
+    assert partes == ["ñ" * 30, "fin"] and reensamblador.bytes == 0
+
+
+@pytest.mark.parametrize("codec", ["texto", "binario"])
+@pytest.mark.parametrize("modo", ["bits", "bytes"])
+def test_mensaje_no_ascii_fragmentado_en_la_red(modo, codec):
+    anterior = (simulador_red.MODO_FISICO, simulador_red.CODEC)
+    nivel, destinos = TRAZA.configurar(nivel=NIVEL_APAGADO)
+    try:
+        simulador_red.MODO_FISICO, simulador_red.CODEC = modo, codec
+        planificador = Planificador()
+        pc1, pc2, router, switch1, switch2 = simulador_red.configurar_red(planificador)
+        # El router fragmenta de nuevo hacia un enlace con MTU menor
+        router.conectar("if_der", switch2, "puerto2", mtu=576)
+        recibidos = []
+        pc2.socket("UDP", simulador_red.UDP_PORT, al_recibir=lambda socket, recibido: recibidos.append(recibido.mensaje))
+        pc1.enviar_mensaje(TEXTO, simulador_red.PC2_IP, "UDP", simulador_red.UDP_PORT)
+        planificador.ejecutar(hasta=5)
+    finally:
+        simulador_red.MODO_FISICO, simulador_red.CODEC = anterior
+        TRAZA.configurar(nivel=nivel, destinos=destinos)
+    assert recibidos == [TEXTO]
+    assert router.metricas.fragmentos > 0
+    assert not router.metricas.descartes and not pc2.metricas.descartes
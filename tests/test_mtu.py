@@ -0,0 +1,99 @@
+# ==============================
+# Pruebas de MTU
+# ==============================
+# La MTU y las métricas de bytes se miden en bytes de la trama, no en símbolos del código
+# de línea: Manchester y 4B5B solo alargan el tiempo de transmisión. Las tramas de texto
+# viajan en UTF-8: la MTU, los fragmentos y los segmentos TCP se miden en esos bytes y no
+# en caracteres.
+
+import pytest
+
+import simulador_red
+import transporte
+from capas import largo_en_bytes
+from codigos_linea import CODIGOS_LINEA
+from planificador import Planificador
+from trazas import NIVEL_APAGADO, TRAZA
+
+PUERTO = 9000
+
+
+@pytest.fixture(autouse=True)
+def configuracion():
+    anterior = (simulador_red.MODO_FISICO, simulador_red.CODEC, simulador_red.CODIGO_LINEA)
+    nivel, destinos = TRAZA.configurar(nivel=NIVEL_APAGADO)
+    yield
+    simulador_red.MODO_FISICO, simulador_red.CODEC, simulador_red.CODIGO_LINEA = anterior
+    TRAZA.configurar(nivel=nivel, destinos=destinos)
+
+
+# Envía "mensajes" de PC1 a PC2 con todos los enlaces de la demo con "mtu" (None: solo la
+# MTU por defecto). Retorna (mensajes recibidos, dispositivos).
+def _enviar(mensajes, protocolo, modo, mtu):
+    simulador_red.MODO_FISICO = modo
+    planificador = Planificador()
+    dispositivos = simulador_red.configurar_red(planificador)
+    pc1, pc2, router, switch1, switch2 = dispositivos
+    if mtu is not None:
+        for a, interfaz_a, b, interfaz_b in ((pc1, "eth0", switch1, "puerto1"), (switch1, "puerto2", router, "if_izq"),
+                                             (router, "if_der", switch2, "puerto2"), (switch2, "puerto1", pc2, "eth0")):
+            a.conectar(interfaz_a, b, interfaz_b, mtu=mtu)
+            b.conectar(interfaz_b, a, interfaz_a, mtu=mtu)
+    recibidos = []
+    pc2.socket(protocolo, PUERTO, al_recibir=lambda socket, recibido: recibidos.append(recibido.mensaje))
+    for mensaje in mensajes:
+        pc1.enviar_mensaje(mensaje, simulador_red.PC2_IP, protocolo, PUERTO)
+    planificador.ejecutar(hasta=60)
+    return recibidos, dispositivos
+
+
+@pytest.mark.parametrize("codigo", list(CODIGOS_LINEA))
+@pytest.mark.parametrize("protocolo", ["UDP", "TCP"])
+def test_codigos_de_linea_con_mtu(protocolo, codigo):
+    simulador_red.CODIGO_LINEA = codigo
+    mensajes = ["x" * 3000, "y" * 100]
+    recibidos, dispositivos = _enviar(mensajes, protocolo, "bits", 1500)
+    assert recibidos == mensajes
+    for dispositivo in dispositivos:
+        assert not dispositivo.metricas.descartes, dispositivo.nombre
+    # Los bytes enviados son los de las tramas, los mismos con cualquier código
+    simulador_red.CODIGO_LINEA = "NRZ"
+    _, con_nrz = _enviar(mensajes, protocolo, "bits", 1500)
+    assert dispositivos[0].metricas.interfaces == con_nrz[0].metricas.interfaces
+
+
+@pytest.mark.parametrize("mtu", [1500, None])
+@pytest.mark.parametrize("modo", ["bits", "bytes"])
+@pytest.mark.parametrize("protocolo", ["UDP", "TCP"])
+def test_texto_no_ascii_con_mtu(protocolo, modo, mtu):
+    # 3000 caracteres son 6000 bytes; 1000 caracteres (2000 bytes) caben en la MTU en
+    # caracteres pero no en bytes
+    mensajes = ["ñ" * 3000, "€" * 1000, "ñ" * 700 + "x"]
+    recibidos, dispositivos = _enviar(mensajes, protocolo, modo, mtu)
+    assert recibidos == mensajes
+    for dispositivo in dispositivos:
+        assert not dispositivo.metricas.descartes, dispositivo.nombre
+    pc1 = dispositivos[0]
+    if protocolo == "TCP":
+        # Los segmentos de MSS bytes caben en una trama sin fragmentar
+        assert pc1.metricas.fragmentos == 0
+        conexion = pc1.tcp.cerradas[0] if pc1.tcp.cerradas else next(iter(pc1.tcp.conexiones.values()))
+        assert conexion.bytes_confirmados >= sum(largo_en_bytes(mensaje) for mensaje in mensajes)
+    else:
+        assert pc1.metricas.fragmentos > 0
+
+
+def test_segmentos_tcp_en_bytes():
+    pc1, pc2, router, switch1, switch2 = simulador_red.configurar_red(Planificador())
+    mensaje = "😀a" * 2000  # 4000 caracteres, 10000 bytes
+    pc1.enviar_mensaje(mensaje, simulador_red.PC2_IP)
+    conexion = next(iter(pc1.tcp.conexiones.values()))
+    # Sin ejecutar el planificador solo sale el SYN; al establecerse la conexión sale la
+    # primera ventana, que alcanza para todo el mensaje
+    conexion.recibir("", 0, 1, transporte.SYN | transporte.ACK, transporte.VENTANA_RECEPCION)
+    segmentos = [segmento for segmento in conexion.sin_confirmar if segmento.datos is not None]
+    assert len(segmentos) == 8
+    for segmento in segmentos:
+        assert segmento.largo == largo_en_bytes(segmento.datos) <= transporte.MSS
+    assert "".join(segmento.datos for segmento in segmentos).endswith(mensaje)
+    assert conexion.snd_nxt == 1 + largo_en_bytes("".join(segmento.datos for segmento in segmentos))
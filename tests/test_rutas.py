@@ -0,0 +1,88 @@
+# ==============================
+# Pruebas de la búsqueda por prefijo más largo
+# ==============================
+# TrieRutas y ListaRutas deben responder lo mismo que la búsqueda lineal de referencia,
+# con la ruta por defecto y con prefijos que se reemplazan.
+
+import random
+
+import pytest
+
+from rutas import ListaRutas, TrieRutas, busqueda_lineal, entero_a_ip, parsear_prefijo
+
+
+# Prefijos al azar de todas las longitudes (con repetidos), con la ruta por defecto incluida
+def _prefijos_al_azar(generador, cantidad):
+    prefijos = ["0.0.0.0/0"]
+    for _ in range(cantidad):
+        longitud = generador.randint(1, 32)
+        prefijos.append(f"{entero_a_ip(generador.getrandbits(32))}/{longitud}")
+    prefijos.extend(generador.sample(prefijos, cantidad // 4))
+    generador.shuffle(prefijos)
+    return prefijos
+
+
+@pytest.mark.parametrize("clase", [TrieRutas, ListaRutas])
+@pytest.mark.parametrize("semilla", range(5))
+def test_coincide_con_busqueda_lineal(clase, semilla):
+    generador = random.Random(semilla)
+    tabla, referencia = clase(), {}
+    for i, prefijo in enumerate(_prefijos_al_azar(generador, 300)):
+        tabla.insertar(prefijo, i)
+        referencia[parsear_prefijo(prefijo)] = i  # el último valor de cada prefijo
+    rutas = [(red, longitud, valor) for (red, longitud), valor in referencia.items()]
+    direcciones = [generador.getrandbits(32) for _ in range(2000)]
+    # Direcciones dentro de cada prefijo, para ejercitar las coincidencias largas
+    direcciones += [red | generador.getrandbits(32 - longitud) if longitud < 32 else red
+                    for red, longitud, _ in rutas]
+    for ip in direcciones:
+        assert tabla.buscar(ip) == busqueda_lineal(rutas, ip)
+    assert len(tabla) == len(referencia)
+
+
+@pytest.mark.parametrize("clase", [TrieRutas, ListaRutas])
+def test_ruta_por_defecto(clase):
+    tabla = clase()
+    assert tabla.buscar_ip("8.8.8.8") is None
+    tabla.insertar("0.0.0.0/0", "defecto")
+    tabla.insertar("10.0.0.0/8", "diez")
+    assert tabla.buscar_ip("8.8.8.8") == "defecto"
+    assert tabla.buscar_ip("10.1.2.3") == "diez"
+    tabla.insertar("0.0.0.0/0", "otra")
+    assert tabla.buscar_ip("8.8.8.8") == "otra"
+    assert len(tabla) == 2
+
+
+@pytest.mark.parametrize("clase", [TrieRutas, ListaRutas])
+def test_reemplazo_de_prefijo(clase):
+    tabla = clase()
+    tabla.insertar("10.1.0.0/16", "a")
+    tabla.insertar("10.1.128.0/17", "mas_largo")
+    tabla.insertar("10.1.0.0/16", "b")
+    # Reemplazar el /16 no pisa al /17 que está dentro de su rango
+    assert tabla.buscar_ip("10.1.0.1") == "b"
+    assert tabla.buscar_ip("10.1.200.1") == "mas_largo"
+    # Los bits de host del prefijo se ignoran: es el mismo /16
+    tabla.insertar("10.1.7.7/16", "c")
+    assert tabla.buscar_ip("10.1.0.1") == "c"
+    assert len(tabla) == 2
+
+
+def test_prefijo_tapado_se_cuenta_una_vez():
+    tabla = TrieRutas()
+    tabla.insertar("10.0.0.0/31", "a")
+    tabla.insertar("10.0.0.0/32", "b")
+    tabla.insertar("10.0.0.1/32", "c")
+    # El /31 no ocupa ninguna entrada, pero reinsertarlo no lo cuenta dos veces
+    tabla.insertar("10.0.0.0/31", "d")
+    assert len(tabla) == 3
+    assert tabla.buscar_ip("10.0.0.0") == "b"
+    assert tabla.buscar_ip("10.0.0.2") is None
+
+
+def test_ip_invalida():
+    tabla = TrieRutas()
+    tabla.insertar("0.0.0.0/0", "defecto")
+    assert tabla.buscar_ip("no-es-una-ip") is None
+    with pytest.raises(ValueError):
+        parsear_prefijo("10.0.0.0/33")
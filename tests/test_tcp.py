@@ -0,0 +1,112 @@
+# ==============================
+# Pruebas del transporte TCP
+# ==============================
+# Entrega en orden con pérdidas en el enlace (Reno y CUBIC), envío en lote con y sin
+# planificador, y cambio de codec con conexiones abiertas.
+
+import pytest
+
+import simulador_red
+from planificador import Planificador
+from transporte import PilaTCP
+from trazas import NIVEL_APAGADO, TRAZA
+
+PUERTO = 7000
+
+
+@pytest.fixture(autouse=True)
+def configuracion():
+    anterior = (simulador_red.MODO_FISICO, simulador_red.CODEC)
+    nivel, destinos = TRAZA.configurar(nivel=NIVEL_APAGADO)
+    yield
+    simulador_red.MODO_FISICO, simulador_red.CODEC = anterior
+    TRAZA.configurar(nivel=nivel, destinos=destinos)
+
+
+# Topología de demo con un socket TCP en PC2 que guarda los mensajes recibidos. Con
+# "enlace" se configuran ambos sentidos entre Router1 y Switch2.
+def _red(planificador=None, control="cubic", **enlace):
+    pc1, pc2, router, switch1, switch2 = simulador_red.configurar_red(planificador)
+    if enlace:
+        router.conectar("if_der", switch2, "puerto2", **enlace)
+        switch2.conectar("puerto2", router, "if_der", **enlace)
+    pc1.tcp = PilaTCP(pc1, control=control)
+    recibidos = []
+    pc2.socket("TCP", PUERTO, al_recibir=lambda socket, recibido: recibidos.append(recibido.mensaje))
+    return pc1, pc2, recibidos
+
+
+@pytest.mark.parametrize("codec", ["texto", "binario"])
+@pytest.mark.parametrize("control", ["reno", "cubic"])
+def test_recuperacion_con_perdidas(control, codec):
+    simulador_red.MODO_FISICO, simulador_red.CODEC = "bytes", codec
+    planificador = Planificador()
+    pc1, pc2, recibidos = _red(planificador, control, ancho_banda=10e6, retardo=0.005, cola=50,
+                               perdida=0.03, semilla=1)
+    # Mensajes de varios segmentos y de uno solo, para que se pierdan segmentos intermedios y finales
+    mensajes = [f"{i:04d}:" + "ox" * (300 * (i % 5) + 10) for i in range(200)]
+    for mensaje in mensajes:
+        pc1.enviar_mensaje(mensaje, simulador_red.PC2_IP, puerto_destino=PUERTO)
+    planificador.ejecutar(hasta=120)
+    assert recibidos == mensajes
+    estadisticas = pc1.tcp.instantanea()
+    assert estadisticas["retransmitidos"] > 0
+    assert estadisticas["recuperaciones"] + estadisticas["timeouts"] > 0
+    assert pc1.metricas.descartes.get("tcp_reintentos_agotados") is None
+
+
+@pytest.mark.parametrize("control", ["reno", "cubic"])
+def test_cuello_de_botella_con_cola_llena(control):
+    simulador_red.MODO_FISICO = "bytes"
+    planificador = Planificador()
+    pc1, pc2, recibidos = _red(planificador, control, ancho_banda=2e6, retardo=0.01, cola=8)
+    mensajes = ["y" * 1000] * 400
+    for mensaje in mensajes:
+        pc1.enviar_mensaje(mensaje, simulador_red.PC2_IP, puerto_destino=PUERTO)
+    planificador.ejecutar(hasta=120)
+    assert len(recibidos) == len(mensajes)
+    # La ventana crece hasta llenar la cola: las pérdidas se recuperan sin abortar
+    assert pc1.tcp.instantanea()["retransmitidos"] > 0
+
+
+@pytest.mark.parametrize("codec", ["texto", "binario"])
+@pytest.mark.parametrize("con_planificador", [False, True])
+def test_lote_en_orden(codec, con_planificador):
+    simulador_red.MODO_FISICO, simulador_red.CODEC = "bytes", codec
+    planificador = Planificador() if con_planificador else None
+    pc1, pc2, recibidos = _red(planificador)
+    mensajes = [f"m{i}:" + "z" * (i * 37 % 3000) for i in range(500)]
+    pc1.enviar_lote(mensajes, simulador_red.PC2_IP, puerto_destino=PUERTO)
+    if planificador is not None:
+        planificador.ejecutar(hasta=60)
+    assert recibidos == mensajes
+    assert pc1.tcp.instantanea()["retransmitidos"] == 0
+
+
+def test_cambio_de_codec_con_conexion_abierta():
+    simulador_red.MODO_FISICO, simulador_red.CODEC = "bytes", "texto"
+    pc1, pc2, recibidos = _red()
+    pc1.enviar_mensaje("texto", simulador_red.PC2_IP, puerto_destino=PUERTO)
+    simulador_red.CODEC = "binario"
+    pc1.enviar_mensaje("binario", simulador_red.PC2_IP, puerto_destino=PUERTO)
+    pc1.enviar_lote(["lote1", "lote2"], simulador_red.PC2_IP, puerto_destino=PUERTO)
+    simulador_red.CODEC = "texto"
+    pc1.enviar_mensaje("texto otra vez", simulador_red.PC2_IP, puerto_destino=PUERTO)
+    assert recibidos == ["texto", "binario", "lote1", "lote2", "texto otra vez"]
+    # Una conexión por codec, y la de texto se reutiliza
+    assert len(pc1.tcp.conexiones) == 2
+
+
+def test_cambio_de_codec_en_un_socket():
+    simulador_red.MODO_FISICO, simulador_red.CODEC = "bytes", "texto"
+    pc1, pc2, recibidos = _red()
+    cliente = pc1.socket("TCP")
+    cliente.enviar("hola", simulador_red.PC2_IP, PUERTO)
+    # La conexión del socket ya usa texto: con el otro codec los datos se descartan
+    simulador_red.CODEC = "binario"
+    cliente.enviar("chau", simulador_red.PC2_IP, PUERTO)
+    assert recibidos == ["hola"]
+    assert pc1.metricas.descartes.get("tcp_codec_distinto") == 1
+    simulador_red.CODEC = "texto"
+    cliente.enviar("de nuevo", simulador_red.PC2_IP, PUERTO)
+    assert recibidos == ["hola", "de nuevo"]
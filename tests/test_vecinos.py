@@ -0,0 +1,134 @@
+# ==============================
+# Pruebas de la resolución ARP y la tabla de vecinos
+# ==============================
+# La tabla con un reloj manual (TTL, caché negativa, cola de espera acotada) y la
+# resolución en la topología de demo: los paquetes en espera salen al llegar la
+# respuesta, y una IP que no responde queda en caché negativa.
+
+import pytest
+
+import simulador_red
+from planificador import Planificador
+from trazas import NIVEL_APAGADO, TRAZA
+from vecinos import (ARP_ESPERA, ARP_MAX_PENDIENTES, ARP_REINTENTOS, ARP_RESPUESTA, ARP_SOLICITUD,
+                     ARP_TTL_NEGATIVO, TablaVecinos, desencapsular_arp, encapsular_arp, es_arp)
+
+IP_AUSENTE = "192.168.1.99"  # en la red de PC1, sin nadie que la tenga
+
+
+class Reloj:
+    def __init__(self):
+        self.ahora = 0.0
+
+    def __call__(self):
+        return self.ahora
+
+
+@pytest.fixture(autouse=True)
+def silencio():
+    nivel, destinos = TRAZA.configurar(nivel=NIVEL_APAGADO)
+    yield
+    TRAZA.configurar(nivel=nivel, destinos=destinos)
+
+
+def test_mensaje_arp_ida_y_vuelta():
+    mensaje = encapsular_arp(ARP_SOLICITUD, "10.0.0.1", "A", "10.0.0.2")
+    assert es_arp(mensaje)
+    assert not es_arp(b"[ARP:") and not es_arp("[H3:...]")
+    assert desencapsular_arp(mensaje) == (ARP_SOLICITUD, "10.0.0.1", "A", "10.0.0.2", "")
+    respuesta = encapsular_arp(ARP_RESPUESTA, "10.0.0.2", "B", "10.0.0.1", "A")
+    assert desencapsular_arp(respuesta) == (ARP_RESPUESTA, "10.0.0.2", "B", "10.0.0.1", "A")
+
+
+def test_tabla_ttl():
+    reloj = Reloj()
+    tabla = TablaVecinos(reloj, ttl=10)
+    tabla.aprender("10.0.0.1", "A", "eth0")
+    assert tabla.buscar("10.0.0.1") == "A"
+    assert tabla.a_dict() == {"10.0.0.1": ("A", "eth0")}
+    reloj.ahora = 10
+    assert tabla.buscar("10.0.0.1") is None
+    assert len(tabla) == 0
+
+
+def test_tabla_cache_negativa():
+    reloj = Reloj()
+    tabla = TablaVecinos(reloj, ttl_negativo=5)
+    tabla.aprender("10.0.0.1", "A", "eth0")
+    tabla.marcar_inalcanzable("10.0.0.1")
+    assert tabla.buscar("10.0.0.1") is None
+    assert tabla.inalcanzable("10.0.0.1")
+    reloj.ahora = 5
+    assert not tabla.inalcanzable("10.0.0.1")
+    # Aprender la IP la saca de la caché negativa
+    tabla.marcar_inalcanzable("10.0.0.1")
+    tabla.aprender("10.0.0.1", "A", "eth0")
+    assert not tabla.inalcanzable("10.0.0.1")
+
+
+def test_tabla_cola_acotada():
+    tabla = TablaVecinos(Reloj(), max_pendientes=3)
+    resolucion, nueva, descartados = tabla.encolar("10.0.0.1", "eth0", "A", [1, 2])
+    assert nueva and descartados == 0
+    otra, nueva, descartados = tabla.encolar("10.0.0.1", "eth0", "A", [3, 4, 5])
+    assert otra is resolucion and not nueva and descartados == 2
+    assert resolucion.paquetes == [1, 2, 3]
+    assert tabla.conoce("10.0.0.1")
+    assert tabla.terminar("10.0.0.1") is resolucion
+    assert tabla.terminar("10.0.0.1") is None
+    assert not tabla.conoce("10.0.0.1")
+
+
+def _demo():
+    planificador = Planificador()
+    pc1, pc2, router, switch1, switch2 = simulador_red.configurar_red(planificador)
+    return planificador, pc1, pc2, router
+
+
+def test_resolucion_libera_la_cola():
+    planificador, pc1, pc2, router = _demo()
+    mensajes = [f"m{i}" for i in range(10)]
+    for mensaje in mensajes:
+        pc1.enviar_mensaje(mensaje, simulador_red.PC2_IP, "UDP", simulador_red.UDP_PORT)
+    # Los diez esperan una sola resolución de la puerta de enlace
+    assert len(pc1.vecinos.pendientes[simulador_red.ROUTER_IP_LEFT].paquetes) == 10
+    assert pc1.metricas.arp_solicitudes == 1
+    planificador.ejecutar(hasta=5)
+    assert pc2.metricas.entregados == len(mensajes)
+    assert pc1.vecinos.buscar(simulador_red.ROUTER_IP_LEFT) == simulador_red.ROUTER_MAC_LEFT
+    assert not pc1.vecinos.pendientes
+    # El router aprendió a PC1 por la solicitud y resolvió a PC2 una sola vez
+    assert router.vecinos.buscar(simulador_red.PC1_IP) == simulador_red.PC1_MAC
+    assert router.metricas.arp_solicitudes == 1
+    # Resuelta la MAC, los siguientes mensajes no preguntan de nuevo
+    pc1.enviar_mensaje("otro", simulador_red.PC2_IP, "UDP", simulador_red.UDP_PORT)
+    planificador.ejecutar(hasta=10)
+    assert pc2.metricas.entregados == len(mensajes) + 1
+    assert pc1.metricas.arp_solicitudes == 1
+
+
+def test_cola_llena_descarta():
+    planificador, pc1, pc2, router = _demo()
+    pc1.enviar_lote([f"m{i}" for i in range(ARP_MAX_PENDIENTES + 6)], simulador_red.PC2_IP, "UDP",
+                    simulador_red.UDP_PORT)
+    planificador.ejecutar(hasta=5)
+    assert pc1.metricas.descartes.get("cola_arp_llena") == 6
+    assert pc2.metricas.entregados == ARP_MAX_PENDIENTES
+
+
+def test_cache_negativa_en_la_red():
+    planificador, pc1, pc2, router = _demo()
+    pc1.enviar_mensaje("a", IP_AUSENTE, "UDP", simulador_red.UDP_PORT)
+    pc1.enviar_mensaje("b", IP_AUSENTE, "UDP", simulador_red.UDP_PORT)
+    planificador.ejecutar(hasta=ARP_ESPERA * ARP_REINTENTOS + 0.5)
+    assert pc1.metricas.arp_solicitudes == ARP_REINTENTOS
+    assert pc1.metricas.descartes.get("vecino_inalcanzable") == 2
+    assert pc1.vecinos.inalcanzable(IP_AUSENTE)
+    # Mientras dura la caché negativa se descarta sin volver a preguntar
+    pc1.enviar_mensaje("c", IP_AUSENTE, "UDP", simulador_red.UDP_PORT)
+    assert pc1.metricas.arp_solicitudes == ARP_REINTENTOS
+    assert pc1.metricas.descartes["vecino_inalcanzable"] == 3
+    # Vencida, la IP se vuelve a consultar
+    planificador.ejecutar(hasta=planificador.ahora + ARP_TTL_NEGATIVO + 1)
+    pc1.enviar_mensaje("d", IP_AUSENTE, "UDP", simulador_red.UDP_PORT)
+    assert pc1.metricas.arp_solicitudes == ARP_REINTENTOS + 1
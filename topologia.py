@@ -0,0 +1,321 @@
+# ==============================
+# Topologías: carga desde archivo, generadores y cálculo de tablas
+# ==============================
+# Una topología se describe con un diccionario (o un archivo JSON/TOML/YAML equivalente):
+#
+#   {
+#     "pcs":      [{"nombre": "PC1", "mac": "A", "ip": "192.168.1.10", "red": "192.168.1.0/24",
+#                   "puerta_enlace": "192.168.1.1"}],          # puerta_enlace es opcional
+#     "switches": [{"nombre": "Switch1", "mac": "E"}],
+#     "routers":  [{"nombre": "Router1", "interfaces": [
+#                     {"nombre": "if_izq", "mac": "C", "ip": "192.168.1.1", "red": "192.168.1.0/24"}]}],
+#     "enlaces":  [["PC1", "eth0", "Switch1", "puerto1"]],     # cables (los dos sentidos)
+#     "rutas":    {"Router1": {"10.0.0.0/8": "192.168.1.254"}} # rutas estáticas extra (opcional)
+#   }
+#
+# Un enlace puede llevar un quinto elemento con parámetros de enlace (ancho de banda,
+# propagación, cola y pérdidas; ver enlaces.py), que se aplican a los dos sentidos:
+#   ["Router1", "if_der", "Switch2", "puerto2", {"ancho_banda": 1e6, "retardo": 0.01, "cola": 50}]
+#
+# Las tablas de red se calculan solas (calcular_rutas): cada PC recibe su red conectada y
+# una ruta por defecto a su puerta de enlace; cada router recibe sus redes conectadas y,
+# para las demás, la IP del primer router del camino más corto (en saltos) hacia ellas.
+# Las MACs de los siguientes saltos se resuelven por ARP y los switches aprenden solos.
+#
+# Los generadores (generar_hoja_espina, generar_arbol, generar_anillo, generar_aleatoria)
+# retornan descripciones, que se pueden guardar con guardar_topologia() o construir.
+
+import collections
+import json
+import os
+import random
+
+import simulador_red
+from rutas import entero_a_ip, ip_a_entero
+
+
+class Red:
+    # Dispositivos construidos a partir de una descripción, por nombre
+    def __init__(self):
+        self.dispositivos = {}
+
+    def __getitem__(self, nombre):
+        return self.dispositivos[nombre]
+
+    def __iter__(self):
+        return iter(self.dispositivos.values())
+
+    def __len__(self):
+        return len(self.dispositivos)
+
+    # Dispositivos de una clase (PC, Switch, Router), en orden de creación
+    def de_tipo(self, clase):
+        return [d for d in self.dispositivos.values() if isinstance(d, clase)]
+
+
+# Lee una descripción desde un archivo .json, .toml o .yaml/.yml
+def leer_topologia(ruta):
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == ".json":
+        with open(ruta, encoding="utf-8") as archivo:
+            return json.load(archivo)
+    if extension == ".toml":
+        import tomllib
+        with open(ruta, "rb") as archivo:
+            return tomllib.load(archivo)
+    if extension in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise ImportError("Para leer topologías YAML se necesita PyYAML (pip install pyyaml)") from None
+        with open(ruta, encoding="utf-8") as archivo:
+            return yaml.safe_load(archivo)
+    raise ValueError(f"Formato de topología no soportado: {ruta!r} (use .json, .toml o .yaml)")
+
+
+# Guarda una descripción como JSON
+def guardar_topologia(descripcion, ruta):
+    with open(ruta, "w", encoding="utf-8") as archivo:
+        json.dump(descripcion, archivo, indent=1, ensure_ascii=False)
+
+
+# Lee y construye una topología desde un archivo
+def cargar_topologia(ruta, planificador=None):
+    return construir_topologia(leer_topologia(ruta), planificador)
+
+
+# Crea los dispositivos, los cables y las tablas de red de una descripción.
+# Para construir solo una parte (una partición de paralelo.py):
+# - dispositivos: nombres de los dispositivos a crear (None: todos)
+# - remoto: función nombre -> objeto que representa a un vecino que no se crea
+def construir_topologia(descripcion, planificador=None, dispositivos=None, remoto=None):
+    red = Red()
+    nombres = {d["nombre"] for tipo in ("pcs", "switches", "routers") for d in descripcion.get(tipo, ())}
+
+    def incluido(nombre):
+        return dispositivos is None or nombre in dispositivos
+
+    def agregar(dispositivo):
+        if dispositivo.nombre in red.dispositivos:
+            raise ValueError(f"Nombre de dispositivo repetido: {dispositivo.nombre!r}")
+        dispositivo.planificador = planificador
+        red.dispositivos[dispositivo.nombre] = dispositivo
+
+    for pc in descripcion.get("pcs", ()):
+        if incluido(pc["nombre"]):
+            agregar(simulador_red.PC(pc["nombre"], pc["ip"], pc["mac"]))
+    for switch in descripcion.get("switches", ()):
+        if incluido(switch["nombre"]):
+            agregar(simulador_red.Switch(switch["nombre"], switch["mac"]))
+    for router in descripcion.get("routers", ()):
+        if not incluido(router["nombre"]):
+            continue
+        dispositivo = simulador_red.Router(router["nombre"])
+        for interfaz in router.get("interfaces", ()):
+            dispositivo.agregar_interfaz(interfaz["nombre"], mac=interfaz.get("mac"), ip=interfaz.get("ip"))
+        agregar(dispositivo)
+
+    for a, interfaz_a, b, interfaz_b, *parametros in descripcion.get("enlaces", ()):
+        for nombre in (a, b):
+            if nombre not in nombres:
+                raise ValueError(f"Enlace con dispositivo desconocido: {nombre!r}")
+        parametros = parametros[0] if parametros else {}
+        local_a, local_b = incluido(a), incluido(b)
+        if local_a:
+            red.dispositivos[a].conectar(interfaz_a, red.dispositivos[b] if local_b else remoto(b), interfaz_b,
+                                         **parametros)
+        if local_b:
+            red.dispositivos[b].conectar(interfaz_b, red.dispositivos[a] if local_a else remoto(a), interfaz_a,
+                                         **parametros)
+
+    for nombre, tabla in calcular_rutas(descripcion).items():
+        if incluido(nombre):
+            red.dispositivos[nombre].tabla_red = tabla
+    return red
+
+
+# Calcula la tabla_red de cada PC y router de una descripción: nombre -> tabla
+def calcular_rutas(descripcion):
+    # Red -> [(dispositivo, interfaz, ip)] de los routers conectados a ella
+    routers_en_red = collections.defaultdict(list)
+    redes_de_router = {}
+    for router in descripcion.get("routers", ()):
+        redes_de_router[router["nombre"]] = {}
+        for interfaz in router.get("interfaces", ()):
+            if interfaz.get("red"):
+                routers_en_red[interfaz["red"]].append((router["nombre"], interfaz["nombre"], interfaz.get("ip")))
+                redes_de_router[router["nombre"]][interfaz["red"]] = interfaz["nombre"]
+
+    tablas = {}
+    for pc in descripcion.get("pcs", ()):
+        tabla = {}
+        if pc.get("red"):
+            tabla[pc["red"]] = "eth0"
+        puerta_enlace = pc.get("puerta_enlace")
+        if puerta_enlace is None:
+            puerta_enlace = next((ip for _, _, ip in routers_en_red.get(pc.get("red"), ()) if ip), None)
+        if puerta_enlace:
+            tabla[simulador_red.RUTA_POR_DEFECTO] = puerta_enlace
+        tablas[pc["nombre"]] = tabla
+
+    # Vecinos entre routers: comparten una red. router -> [(vecino, ip del vecino en esa red)]
+    vecinos = collections.defaultdict(list)
+    for conectados in routers_en_red.values():
+        for router, _, _ in conectados:
+            for otro, _, ip_otro in conectados:
+                if otro != router and ip_otro:
+                    vecinos[router].append((otro, ip_otro))
+
+    # BFS desde cada router: distancia y primer salto (IP del vecino) hacia cada otro router.
+    # Cada red no conectada se encamina hacia el router conectado a ella más cercano.
+    redes = [(red, [nombre for nombre, _, _ in conectados]) for red, conectados in routers_en_red.items()]
+    for router, conectadas in redes_de_router.items():
+        distancia = {router: 0}
+        primer_salto = {router: None}
+        cola = collections.deque([router])
+        while cola:
+            actual = cola.popleft()
+            for vecino, ip_vecino in vecinos[actual]:
+                if vecino not in distancia:
+                    distancia[vecino] = distancia[actual] + 1
+                    primer_salto[vecino] = ip_vecino if actual == router else primer_salto[actual]
+                    cola.append(vecino)
+        tabla = dict(conectadas)
+        for red, nombres in redes:
+            if red in conectadas:
+                continue
+            mejor = None
+            for nombre in nombres:
+                d = distancia.get(nombre)
+                if d is not None and (mejor is None or d < mejor_distancia):
+                    mejor, mejor_distancia = nombre, d
+            if mejor is not None:
+                tabla[red] = primer_salto[mejor]
+        tablas[router] = tabla
+
+    for nombre, rutas_extra in descripcion.get("rutas", {}).items():
+        tablas.setdefault(nombre, {}).update(rutas_extra)
+    return tablas
+
+
+# ==============================
+# Generadores
+# ==============================
+class _Generador:
+    # Acumula una descripción asignando nombres, MACs y redes únicos:
+    # - LANs: 10.x.y.0/24 (router en .1, PCs desde .10)
+    # - enlaces entre routers: /30 dentro de 172.16.0.0/12
+    def __init__(self):
+        self.descripcion = {"pcs": [], "switches": [], "routers": [], "enlaces": []}
+        self._macs = 0
+        self._lans = 0
+        self._enlaces_routers = 0
+        self._routers = {}   # nombre -> descripción del router
+
+    def mac(self):
+        self._macs += 1
+        return f"{self._macs:06X}"
+
+    def router(self, nombre):
+        router = self._routers[nombre] = {"nombre": nombre, "interfaces": []}
+        self.descripcion["routers"].append(router)
+        return nombre
+
+    def _interfaz(self, router, ip, red):
+        interfaces = self._routers[router]["interfaces"]
+        nombre = f"if{len(interfaces)}"
+        interfaces.append({"nombre": nombre, "mac": self.mac(), "ip": ip, "red": red})
+        return nombre
+
+    # LAN colgando de un router: un switch con "cantidad" PCs
+    def lan(self, router, cantidad):
+        if cantidad > 240:
+            raise ValueError("Una LAN /24 admite hasta 240 PCs")
+        base = ip_a_entero("10.0.0.0") + (self._lans << 8)
+        self._lans += 1
+        red = f"{entero_a_ip(base)}/24"
+        ip_router = entero_a_ip(base + 1)
+        switch = f"S{self._lans - 1}"
+        self.descripcion["switches"].append({"nombre": switch, "mac": self.mac()})
+        interfaz = self._interfaz(router, ip_router, red)
+        self.descripcion["enlaces"].append([router, interfaz, switch, "puerto0"])
+        for i in range(cantidad):
+            pc = f"PC{len(self.descripcion['pcs'])}"
+            self.descripcion["pcs"].append({"nombre": pc, "mac": self.mac(), "ip": entero_a_ip(base + 10 + i),
+                                            "red": red, "puerta_enlace": ip_router})
+            self.descripcion["enlaces"].append([switch, f"puerto{i + 1}", pc, "eth0"])
+
+    # Enlace punto a punto entre dos routers
+    def enlace(self, router_a, router_b):
+        base = ip_a_entero("172.16.0.0") + (self._enlaces_routers << 2)
+        self._enlaces_routers += 1
+        red = f"{entero_a_ip(base)}/30"
+        interfaz_a = self._interfaz(router_a, entero_a_ip(base + 1), red)
+        interfaz_b = self._interfaz(router_b, entero_a_ip(base + 2), red)
+        self.descripcion["enlaces"].append([router_a, interfaz_a, router_b, interfaz_b])
+
+
+# Hoja-espina: cada hoja es un router con una LAN de pcs_por_hoja PCs, conectado a todas
+# las espinas (routers sin LAN)
+def generar_hoja_espina(hojas, espinas, pcs_por_hoja):
+    generador = _Generador()
+    nombres_espinas = [generador.router(f"E{i}") for i in range(espinas)]
+    for i in range(hojas):
+        hoja = generador.router(f"H{i}")
+        generador.lan(hoja, pcs_por_hoja)
+        for espina in nombres_espinas:
+            generador.enlace(hoja, espina)
+    return generador.descripcion
+
+
+# Árbol de routers de la profundidad dada con "ramas" hijos por nodo; las hojas tienen
+# una LAN de pcs_por_hoja PCs
+def generar_arbol(profundidad, ramas, pcs_por_hoja):
+    generador = _Generador()
+    nivel = [generador.router("R0")]
+    for _ in range(profundidad):
+        siguiente = []
+        for padre in nivel:
+            for _ in range(ramas):
+                hijo = generador.router(f"R{len(generador.descripcion['routers'])}")
+                generador.enlace(padre, hijo)
+                siguiente.append(hijo)
+        nivel = siguiente
+    for hoja in nivel:
+        generador.lan(hoja, pcs_por_hoja)
+    return generador.descripcion
+
+
+# Anillo de routers, cada uno con una LAN de pcs_por_router PCs
+def generar_anillo(routers, pcs_por_router):
+    generador = _Generador()
+    nombres = [generador.router(f"R{i}") for i in range(routers)]
+    for i, router in enumerate(nombres):
+        generador.lan(router, pcs_por_router)
+        if routers > 1 and (routers > 2 or i == 0):
+            generador.enlace(router, nombres[(i + 1) % routers])
+    return generador.descripcion
+
+
+# Grafo aleatorio conexo de routers (árbol aleatorio más enlaces_extra enlaces al azar),
+# cada uno con una LAN de pcs_por_router PCs
+def generar_aleatoria(routers, enlaces_extra, pcs_por_router, semilla=0):
+    azar = random.Random(semilla)
+    generador = _Generador()
+    nombres = [generador.router(f"R{i}") for i in range(routers)]
+    pares = set()
+    for i in range(1, routers):
+        j = azar.randrange(i)
+        pares.add((j, i))
+        generador.enlace(nombres[j], nombres[i])
+    intentos = 0
+    while routers > 2 and enlaces_extra > 0 and intentos < 100 * enlaces_extra:
+        intentos += 1
+        i, j = sorted(azar.sample(range(routers), 2))
+        if (i, j) not in pares:
+            pares.add((i, j))
+            generador.enlace(nombres[i], nombres[j])
+            enlaces_extra -= 1
+    for router in nombres:
+        generador.lan(router, pcs_por_router)
+    return generador.descripcion
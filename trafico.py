@@ -0,0 +1,279 @@
+# ==============================
+# Generación de tráfico y reproducción de trazas
+# ==============================
+# Un Flujo envía mensajes de una PC a una IP según una fuente:
+#
+# - CBR: tasa constante en bits/s (un mensaje cada tamaño * 8 / tasa segundos)
+# - Poisson: llegadas con tiempos entre mensajes exponenciales
+# - EncendidoApagado: ráfagas a tasa constante separadas por silencios; con "alfa" los
+#   períodos siguen una Pareto (colas pesadas), que agregada da tráfico autosimilar
+#
+# El tamaño de los mensajes es fijo o una distribución (tamano_uniforme, tamano_pareto,
+# tamano_lognormal). Cada flujo usa su propio random.Random derivado de la semilla, así
+# que el resultado no depende de cuántos flujos haya ni del orden en que se procesen.
+#
+# Todo es perezoso: envios() combina los flujos en orden de tiempo con un generador, y
+# reproducir() programa un solo evento a la vez (el próximo envío), de modo que se pueden
+# simular millones de mensajes sin tenerlos en memoria. Los envíos tienen la forma de
+# paralelo.py: (tiempo, pc_origen, ip_destino, mensaje, protocolo, puerto_destino, app).
+#
+# Las trazas se guardan y leen como JSONL o CSV (guardar_traza / leer_traza), con los
+# campos tiempo, origen, destino, tamano (o mensaje), protocolo, puerto y app.
+#
+# Uso:
+#     flujos = [Flujo("PC1", PC2_IP, Poisson(1000, tamano_pareto(1.2, 64, 65536)), fin=10.0)]
+#     reproduccion = reproducir(dispositivos, planificador, envios(flujos, semilla=1))
+#     planificador.ejecutar()
+
+import csv
+import heapq
+import itertools
+import json
+import math
+import os
+import random
+
+import simulador_red
+
+
+# ====== Tamaños de mensaje: funciones azar -> bytes ======
+def tamano_uniforme(minimo, maximo):
+    return lambda azar: azar.randint(minimo, maximo)
+
+
+# Pareto truncada en "maximo": la mayoría de los mensajes son chicos y unos pocos muy grandes
+def tamano_pareto(alfa, minimo, maximo):
+    return lambda azar: min(maximo, int(minimo * azar.paretovariate(alfa)))
+
+
+def tamano_lognormal(mu, sigma, maximo):
+    return lambda azar: max(1, min(maximo, int(azar.lognormvariate(mu, sigma))))
+
+
+def _tamano(tamano, azar):
+    return tamano(azar) if callable(tamano) else tamano
+
+
+# ====== Fuentes: generan (tiempo, tamaño) desde "inicio" ======
+class CBR:
+    # - tasa: bits por segundo; tamano: bytes por mensaje (fijo o distribución)
+    __slots__ = ("tasa", "tamano")
+
+    def __init__(self, tasa, tamano):
+        if tasa <= 0:
+            raise ValueError(f"Tasa inválida: {tasa}")
+        self.tasa = tasa
+        self.tamano = tamano
+
+    def llegadas(self, azar, inicio):
+        tiempo = inicio
+        while True:
+            tamano = _tamano(self.tamano, azar)
+            yield tiempo, tamano
+            tiempo += tamano * 8 / self.tasa
+
+
+class Poisson:
+    # - tasa: mensajes por segundo en promedio
+    __slots__ = ("tasa", "tamano")
+
+    def __init__(self, tasa, tamano):
+        if tasa <= 0:
+            raise ValueError(f"Tasa inválida: {tasa}")
+        self.tasa = tasa
+        self.tamano = tamano
+
+    def llegadas(self, azar, inicio):
+        tiempo = inicio
+        while True:
+            tiempo += azar.expovariate(self.tasa)
+            yield tiempo, _tamano(self.tamano, azar)
+
+
+class EncendidoApagado:
+    # - tasa: mensajes por segundo durante las ráfagas
+    # - encendido, apagado: duración media (s) de las ráfagas y de los silencios
+    # - alfa: None para períodos exponenciales, o el parámetro de una Pareto (> 1) con esa media
+    __slots__ = ("tasa", "tamano", "encendido", "apagado", "alfa")
+
+    def __init__(self, tasa, tamano, encendido, apagado, alfa=None):
+        if tasa <= 0:
+            raise ValueError(f"Tasa inválida: {tasa}")
+        if alfa is not None and alfa <= 1:
+            raise ValueError("alfa debe ser mayor que 1 para que la duración media sea finita")
+        self.tasa = tasa
+        self.tamano = tamano
+        self.encendido = encendido
+        self.apagado = apagado
+        self.alfa = alfa
+
+    def _duracion(self, azar, media):
+        if self.alfa is None:
+            return azar.expovariate(1.0 / media)
+        return media * (self.alfa - 1) / self.alfa * azar.paretovariate(self.alfa)
+
+    def llegadas(self, azar, inicio):
+        tiempo = inicio
+        intervalo = 1.0 / self.tasa
+        while True:
+            fin_rafaga = tiempo + self._duracion(azar, self.encendido)
+            while tiempo < fin_rafaga:
+                yield tiempo, _tamano(self.tamano, azar)
+                tiempo += intervalo
+            tiempo = fin_rafaga + self._duracion(azar, self.apagado)
+
+
+class Flujo:
+    # Mensajes de la PC "origen" (nombre) a ip_destino según "fuente", desde "inicio" y
+    # hasta "fin" (segundos) o hasta "cantidad" mensajes
+    __slots__ = ("origen", "ip_destino", "fuente", "protocolo", "puerto_destino", "app", "inicio", "fin",
+                 "cantidad")
+
+    def __init__(self, origen, ip_destino, fuente, protocolo="UDP", puerto_destino=simulador_red.UDP_PORT,
+                 app="GENERICA", inicio=0.0, fin=None, cantidad=None):
+        self.origen = origen
+        self.ip_destino = ip_destino
+        self.fuente = fuente
+        self.protocolo = protocolo
+        self.puerto_destino = puerto_destino
+        self.app = app
+        self.inicio = inicio
+        self.fin = fin
+        self.cantidad = cantidad
+
+    # Envíos del flujo, en orden de tiempo
+    def envios(self, azar):
+        llegadas = self.fuente.llegadas(azar, self.inicio)
+        if self.cantidad is not None:
+            llegadas = itertools.islice(llegadas, self.cantidad)
+        for tiempo, tamano in llegadas:
+            if self.fin is not None and tiempo >= self.fin:
+                return
+            yield (tiempo, self.origen, self.ip_destino, "x" * tamano, self.protocolo, self.puerto_destino,
+                   self.app)
+
+
+def _tiempo(envio):
+    return envio[0]
+
+
+# Envíos de todos los flujos combinados en orden de tiempo (generador). Con "hasta" se
+# corta en ese tiempo; un flujo sin fin ni cantidad genera mensajes indefinidamente.
+def envios(flujos, semilla=0, hasta=None):
+    # heapq.merge es estable: en tiempos iguales se respeta el orden de los flujos
+    combinados = heapq.merge(*(flujo.envios(random.Random(semilla * 1000003 + indice))
+                               for indice, flujo in enumerate(flujos)), key=_tiempo)
+    for envio in combinados:
+        if hasta is not None and envio[0] >= hasta:
+            return
+        yield envio
+
+
+class Reproduccion:
+    # Envíos en curso de reproducir(): programa el próximo envío al procesar el actual.
+    # Los envíos consecutivos con el mismo tiempo, origen, destino y opciones salen juntos
+    # con PC.enviar_lote.
+    __slots__ = ("dispositivos", "planificador", "_envios", "_siguiente", "enviados", "bytes", "lotes",
+                 "desconocidos")
+
+    def __init__(self, dispositivos, planificador, envios):
+        self.dispositivos = dispositivos
+        self.planificador = planificador
+        self._envios = iter(envios)
+        self._siguiente = next(self._envios, None)
+        self.enviados = 0
+        self.bytes = 0
+        self.lotes = 0
+        self.desconocidos = 0    # envíos desde una PC que no está en "dispositivos"
+        if self._siguiente is not None:
+            planificador.programar_en(self._siguiente[0], self._enviar)
+
+    # True mientras queden envíos por programar
+    @property
+    def activa(self):
+        return self._siguiente is not None
+
+    def _enviar(self):
+        envio = self._siguiente
+        tiempo, origen, ip_destino, mensaje, *opciones = envio
+        mensajes = [mensaje]
+        siguiente = next(self._envios, None)
+        while (siguiente is not None and siguiente[0] == tiempo and siguiente[1] == origen
+               and siguiente[2] == ip_destino and siguiente[4:] == envio[4:]):
+            mensajes.append(siguiente[3])
+            siguiente = next(self._envios, None)
+        self._siguiente = siguiente
+        pc = self._buscar(origen)
+        if pc is None:
+            self.desconocidos += len(mensajes)
+        elif len(mensajes) == 1:
+            pc.enviar_mensaje(mensaje, ip_destino, *opciones)
+        else:
+            pc.enviar_lote(mensajes, ip_destino, *opciones)
+            self.lotes += 1
+        self.enviados += len(mensajes)
+        self.bytes += sum(map(len, mensajes))
+        if siguiente is not None:
+            self.planificador.programar_en(siguiente[0], self._enviar)
+
+    def _buscar(self, nombre):
+        try:
+            return self.dispositivos[nombre]
+        except KeyError:
+            return None
+
+    def instantanea(self):
+        return {"enviados": self.enviados, "bytes": self.bytes, "lotes": self.lotes,
+                "desconocidos": self.desconocidos}
+
+
+# Programa los envíos (en orden de tiempo) desde las PCs de "dispositivos" (nombre -> PC,
+# p. ej. la Red de topologia.construir_topologia). Los envíos se consumen de a uno a
+# medida que avanza la simulación.
+def reproducir(dispositivos, planificador, envios):
+    return Reproduccion(dispositivos, planificador, envios)
+
+
+# ====== Trazas ======
+CAMPOS_TRAZA = ("tiempo", "origen", "destino", "tamano", "protocolo", "puerto", "app")
+
+
+def _es_csv(ruta):
+    return os.path.splitext(ruta)[1].lower() == ".csv"
+
+
+# Guarda envíos en un archivo .jsonl o .csv (con el tamaño de cada mensaje, no su contenido).
+# Retorna la cantidad de envíos guardados.
+def guardar_traza(envios, ruta):
+    cantidad = 0
+    with open(ruta, "w", encoding="utf-8", newline="") as archivo:
+        escritor = csv.writer(archivo) if _es_csv(ruta) else None
+        if escritor is not None:
+            escritor.writerow(CAMPOS_TRAZA)
+        for tiempo, origen, ip_destino, mensaje, protocolo, puerto, app in envios:
+            fila = (tiempo, origen, ip_destino, len(mensaje), protocolo, puerto, app)
+            if escritor is not None:
+                escritor.writerow(fila)
+            else:
+                archivo.write(json.dumps(dict(zip(CAMPOS_TRAZA, fila)), ensure_ascii=False) + "\n")
+            cantidad += 1
+    return cantidad
+
+
+# Lee una traza .jsonl o .csv como generador de envíos. Cada registro tiene "tamano" o el
+# "mensaje" mismo; protocolo, puerto y app son opcionales. Los tiempos deben estar en orden.
+def leer_traza(ruta):
+    with open(ruta, encoding="utf-8", newline="") as archivo:
+        registros = csv.DictReader(archivo) if _es_csv(ruta) else (json.loads(linea) for linea in archivo
+                                                                   if linea.strip())
+        anterior = -math.inf
+        for registro in registros:
+            tiempo = float(registro["tiempo"])
+            if tiempo < anterior:
+                raise ValueError(f"Traza desordenada en {ruta!r}: t={tiempo} después de t={anterior}")
+            anterior = tiempo
+            tamano = registro.get("tamano")
+            mensaje = "x" * int(tamano) if tamano not in (None, "") else registro.get("mensaje", "")
+            yield (tiempo, registro["origen"], registro["destino"], mensaje,
+                   registro.get("protocolo") or "UDP", int(registro.get("puerto") or simulador_red.UDP_PORT),
+                   registro.get("app") or "GENERICA")
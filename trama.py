@@ -0,0 +1,114 @@
+# ==============================
+# Trama con espacio reservado para encabezados
+# ==============================
+# Equivalente simplificado de un skb: el mensaje se copia una sola vez a un bytearray
+# que deja espacio libre (headroom) al inicio. Cada capa antepone su encabezado
+# escribiéndolo en ese espacio y moviendo el desplazamiento de inicio, y desencapsular
+# solo avanza el desplazamiento. Ninguna operación copia el payload.
+#
+# Una Trama es una vista (buffer, inicio, fin): anteponer() y recortar() retornan una
+# nueva vista sobre el mismo buffer. Así un router que desencapsula la capa 2 y vuelve a
+# encapsular con otra MAC origen reescribe el encabezado de enlace en su mismo lugar.
+
+# Espacio reservado por defecto: alcanza para los encabezados de capas 2..5 de codec_binario
+ESPACIO_CABECERAS = 64
+
+
+# Total de bytes escritos en buffers de tramas (payloads, encabezados y copias). Es un objeto
+# aparte y no un atributo de Trama: escribir un atributo de la clase en cada paquete invalida
+# las cachés de atributos que el intérprete guarda para sus instancias.
+class ContadorCopias:
+    __slots__ = ("bytes",)
+
+    def __init__(self):
+        self.bytes = 0
+
+
+COPIAS = ContadorCopias()
+
+
+class Trama:
+    __slots__ = ("buffer", "inicio", "fin")
+
+    def __init__(self, buffer, inicio, fin):
+        self.buffer = buffer
+        self.inicio = inicio
+        self.fin = fin
+
+    # Crea una trama copiando el payload (str en UTF-8 o bytes) detrás del headroom
+    @classmethod
+    def desde_payload(cls, payload, espacio_cabeceras=ESPACIO_CABECERAS):
+        if isinstance(payload, str):
+            payload = payload.encode('utf-8')
+        buffer = bytearray(espacio_cabeceras + len(payload))
+        buffer[espacio_cabeceras:] = payload
+        COPIAS.bytes += len(payload)
+        return cls(buffer, espacio_cabeceras, len(buffer))
+
+    # Crea una trama con el contenido de varias tramas seguidas (p. ej. fragmentos
+    # reensamblados), copiándolas una sola vez detrás del headroom
+    @classmethod
+    def concatenar(cls, tramas, espacio_cabeceras=ESPACIO_CABECERAS):
+        buffer = bytearray(espacio_cabeceras + sum(map(len, tramas)))
+        posicion = espacio_cabeceras
+        for trama in tramas:
+            buffer[posicion:posicion + len(trama)] = trama.vista()
+            posicion += len(trama)
+        COPIAS.bytes += posicion - espacio_cabeceras
+        return cls(buffer, espacio_cabeceras, posicion)
+
+    # Escribe un encabezado (struct.Struct) justo antes del inicio y retorna la vista resultante
+    def anteponer(self, estructura, *valores):
+        inicio = self.inicio - estructura.size
+        if inicio < 0:
+            raise ValueError(f"Sin espacio para un encabezado de {estructura.size} bytes "
+                             f"(quedan {self.inicio})")
+        estructura.pack_into(self.buffer, inicio, *valores)
+        COPIAS.bytes += estructura.size
+        return Trama(self.buffer, inicio, self.fin)
+
+    # Antepone bytes ya empaquetados (un encabezado de la caché o los comunes de un lote)
+    def anteponer_bytes(self, encabezado):
+        inicio = self.inicio - len(encabezado)
+        if inicio < 0:
+            raise ValueError(f"Sin espacio para un encabezado de {len(encabezado)} bytes "
+                             f"(quedan {self.inicio})")
+        self.buffer[inicio:self.inicio] = encabezado
+        COPIAS.bytes += len(encabezado)
+        return Trama(self.buffer, inicio, self.fin)
+
+    # Lee un encabezado (struct.Struct) en el inicio actual sin moverlo
+    def leer(self, estructura):
+        if self.fin - self.inicio < estructura.size:
+            raise ValueError(f"Trama de {len(self)} bytes demasiado corta para un encabezado "
+                             f"de {estructura.size} bytes")
+        return estructura.unpack_from(self.buffer, self.inicio)
+
+    # Retorna la vista sin los primeros n bytes (quita un encabezado)
+    def recortar(self, n):
+        return Trama(self.buffer, self.inicio + n, self.fin)
+
+    # Copia independiente del contenido actual, con el mismo headroom (p. ej. para inundar).
+    # Solo se copian los bytes de la trama: el headroom del buffer nuevo queda en cero.
+    def copia(self):
+        buffer = bytearray(self.fin)
+        buffer[self.inicio:] = self.vista()
+        COPIAS.bytes += self.fin - self.inicio
+        return Trama(buffer, self.inicio, self.fin)
+
+    # memoryview del contenido actual (sin copiar)
+    def vista(self):
+        return memoryview(self.buffer)[self.inicio:self.fin]
+
+    # Contenido como texto (solo para mostrar el mensaje entregado a la aplicación)
+    def texto(self, codificacion='utf-8'):
+        return str(self.vista(), codificacion, 'replace')
+
+    def __len__(self):
+        return self.fin - self.inicio
+
+    def __bytes__(self):
+        return bytes(self.vista())
+
+    def __str__(self):
+        return repr(bytes(self))
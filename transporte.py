@@ -0,0 +1,743 @@
+# ==============================
+# Transporte confiable tipo TCP
+# ==============================
+# CapaTransporte solo agrega protocolo y puertos; con UDP cada mensaje sale como un
+# datagrama independiente. Para TCP cada PC tiene una PilaTCP con conexiones:
+#
+# - Establecimiento en tres pasos (SYN, SYN+ACK, ACK) y cierre con FIN en cada sentido
+#   (sin TIME_WAIT: la conexión se libera al confirmarse ambos FIN).
+# - Números de secuencia y confirmación en bytes. Cada mensaje de la aplicación (con su
+#   etiqueta de capa 5) se divide en segmentos de a lo sumo MSS bytes; el último lleva PSH
+#   y el receptor entrega el mensaje completo a la capa 5, en orden y una sola vez. Los
+#   segmentos que llegan adelantados esperan en un buffer acotado por la ventana.
+# - Ventana deslizante: en vuelo puede haber hasta min(cwnd, ventana anunciada) bytes.
+# - Retransmisión por temporizador (RTO calculado con SRTT/RTTVAR, RFC 6298, con backoff
+#   exponencial) y retransmisión rápida al tercer ACK duplicado, con recuperación rápida
+#   NewReno.
+# - Control de congestión Reno o CUBIC (CONTROL_CONGESTION o el argumento de PilaTCP).
+#
+# El encabezado TCP se antepone a los datos de la aplicación y luego CapaTransporte
+# agrega protocolo y puertos: [H4:TCP:src:dst][TCP:seq:ack:flags:ventana][APP:x]mensaje
+# (o CapaTCPBinaria con el codec binario).
+#
+# Los temporizadores usan el planificador del dispositivo (o una EjecucionAsincrona); sin
+# planificador las llamadas son inmediatas y no hay retransmisiones, así que con enlaces
+# con pérdidas hace falta un planificador.
+
+import collections
+import math
+
+from capas import cortar_en_bytes, largo_en_bytes
+from codec_binario import CapaTCPBinaria
+from trama import Trama
+from trazas import NIVEL_CAPAS, NIVEL_RESUMEN, TRAZA
+
+# Flags (mismos bits que TCP)
+FIN = 0x01
+SYN = 0x02
+RST = 0x04
+PSH = 0x08
+ACK = 0x10
+
+# Estados de una conexión
+CERRADA = "CERRADA"
+SYN_ENVIADO = "SYN_ENVIADO"
+SYN_RECIBIDO = "SYN_RECIBIDO"
+ESTABLECIDA = "ESTABLECIDA"
+FIN_ESPERA_1 = "FIN_ESPERA_1"
+FIN_ESPERA_2 = "FIN_ESPERA_2"
+CERRANDO = "CERRANDO"
+CIERRE_ESPERA = "CIERRE_ESPERA"
+ULTIMO_ACK = "ULTIMO_ACK"
+
+# Bytes de datos por segmento. Menos que los 1460 de Ethernet: los encabezados de texto de
+# simulador_red son más largos que los 40 bytes de TCP/IP, y así un segmento completo
+# cabe en una trama de simulador_red.MTU sin fragmentarse.
+MSS = 1360
+VENTANA_RECEPCION = 65535   # bytes que el receptor acepta fuera de orden
+CWND_INICIAL = 10           # segmentos (RFC 6928)
+RTO_INICIAL = 1.0           # segundos
+RTO_MINIMO = 0.2
+RTO_MAXIMO = 60.0
+REINTENTOS_MAXIMOS = 8      # vencimientos seguidos antes de abortar la conexión
+ACKS_DUPLICADOS = 3         # ACKs duplicados que disparan la retransmisión rápida
+PUERTO_EFIMERO = 49152      # primer puerto origen de las conexiones salientes
+CONTROL_CONGESTION = "cubic"
+
+
+class CapaTCP:
+    campos = ("seq", "ack", "flags", "ventana")
+
+    # Antepone el control de TCP: [TCP:seq:ack:flags:ventana]
+    @staticmethod
+    def encapsular(datos, seq, ack, flags, ventana):
+        return f"[TCP:{seq}:{ack}:{flags}:{ventana}]" + datos
+
+    # Retorna (datos, seq, ack, flags, ventana)
+    @staticmethod
+    def desencapsular(segmento):
+        fin = segmento.find(']') + 1
+        _, seq, ack, flags, ventana = segmento[1:fin - 1].split(':')
+        return segmento[fin:], int(seq), int(ack), int(flags), int(ventana)
+
+
+# Flags como texto para las trazas, p. ej. "SYN+ACK"
+def nombres_flags(flags):
+    nombres = [nombre for bit, nombre in ((SYN, "SYN"), (FIN, "FIN"), (RST, "RST"), (PSH, "PSH"), (ACK, "ACK"))
+               if flags & bit]
+    return "+".join(nombres) or "-"
+
+
+class ControlReno:
+    # Arranque lento hasta ssthresh y después un MSS por RTT; ante una pérdida la ventana
+    # se reduce a la mitad (o a un segmento si venció el temporizador)
+    __slots__ = ()
+    nombre = "reno"
+
+    def al_confirmar(self, conexion, confirmados, ahora):
+        if conexion.cwnd < conexion.ssthresh:
+            conexion.cwnd += min(confirmados, MSS)
+        else:
+            conexion.cwnd += MSS * min(confirmados, MSS) / conexion.cwnd
+
+    def al_medir(self, conexion, muestra):
+        pass
+
+    def al_perder(self, conexion, ahora):
+        conexion.ssthresh = max(conexion.en_vuelo() / 2, 2 * MSS)
+        conexion.cwnd = conexion.ssthresh
+
+    def al_vencer(self, conexion, ahora):
+        conexion.ssthresh = max(conexion.en_vuelo() / 2, 2 * MSS)
+        conexion.cwnd = MSS
+
+
+class ControlCubic:
+    # CUBIC (RFC 9438): después de una pérdida la ventana sigue W(t) = C (t - K)^3 + W_max,
+    # que se acerca rápido a la ventana donde hubo pérdida, se mantiene cerca de ella y luego
+    # la supera. Nunca crece más lento que Reno (región "amigable"). Ventanas en segmentos.
+    # El arranque lento termina antes de la primera pérdida si el RTT empieza a subir
+    # (HyStart, como en Linux): la cola del cuello de botella se está llenando.
+    __slots__ = ("w_max", "k", "epoca", "origen", "w_est", "rtt_minimo", "ronda_hasta", "rtt_ronda",
+                 "muestras_ronda")
+    MUESTRAS_HYSTART = 8
+    nombre = "cubic"
+    C = 0.4
+    BETA = 0.7
+
+    def __init__(self):
+        self.w_max = 0.0
+        self.k = 0.0
+        self.epoca = None
+        self.origen = 0.0
+        self.w_est = 0.0
+        self.rtt_minimo = math.inf
+        self.ronda_hasta = 0
+        self.rtt_ronda = math.inf
+        self.muestras_ronda = 0
+
+    def al_confirmar(self, conexion, confirmados, ahora):
+        if conexion.cwnd < conexion.ssthresh:
+            conexion.cwnd += min(confirmados, MSS)
+            return
+        cwnd = conexion.cwnd / MSS
+        if self.epoca is None:
+            self.epoca = ahora
+            if cwnd < self.w_max:
+                self.k = ((self.w_max - cwnd) / self.C) ** (1 / 3)
+                self.origen = self.w_max
+            else:
+                self.k = 0.0
+                self.origen = cwnd
+            self.w_est = cwnd
+        t = ahora - self.epoca + (conexion.srtt or 0.0)
+        objetivo = self.origen + self.C * (t - self.k) ** 3
+        segmentos = confirmados / MSS
+        self.w_est += 3 * (1 - self.BETA) / (1 + self.BETA) * segmentos / cwnd
+        if objetivo > cwnd:
+            cwnd += (objetivo - cwnd) / cwnd * segmentos
+        conexion.cwnd = max(cwnd, self.w_est) * MSS
+
+    # HyStart: en cada ronda (una ventana de datos) se toma el mínimo de las primeras
+    # muestras; si supera al mínimo histórico en más de un octavo (entre 4 y 16 ms) termina
+    # el arranque lento
+    def al_medir(self, conexion, muestra):
+        self.rtt_minimo = min(self.rtt_minimo, muestra)
+        if conexion.cwnd >= conexion.ssthresh:
+            return
+        if conexion.snd_una >= self.ronda_hasta:
+            self.ronda_hasta = conexion.snd_nxt
+            self.rtt_ronda = math.inf
+            self.muestras_ronda = 0
+        if self.muestras_ronda < self.MUESTRAS_HYSTART:
+            self.muestras_ronda += 1
+            self.rtt_ronda = min(self.rtt_ronda, muestra)
+            umbral = min(max(self.rtt_minimo / 8, 0.004), 0.016)
+            if (self.muestras_ronda == self.MUESTRAS_HYSTART and conexion.cwnd >= 16 * MSS
+                    and self.rtt_ronda >= self.rtt_minimo + umbral):
+                conexion.ssthresh = conexion.cwnd
+
+    def _reducir(self, conexion):
+        cwnd = conexion.cwnd / MSS
+        # Convergencia rápida: si la pérdida llegó antes que el W_max anterior, se cede ancho de banda
+        self.w_max = cwnd * (1 + self.BETA) / 2 if cwnd < self.w_max else cwnd
+        self.epoca = None
+        conexion.ssthresh = max(conexion.cwnd * self.BETA, 2 * MSS)
+
+    def al_perder(self, conexion, ahora):
+        self._reducir(conexion)
+        conexion.cwnd = conexion.ssthresh
+
+    def al_vencer(self, conexion, ahora):
+        self._reducir(conexion)
+        conexion.cwnd = MSS
+
+
+CONTROLES = {"reno": ControlReno, "cubic": ControlCubic}
+
+
+class _Segmento:
+    # Segmento enviado y todavía sin confirmar (datos None para SYN/FIN)
+    __slots__ = ("seq", "largo", "flags", "datos", "enviado_en", "retransmitido")
+
+    def __init__(self, seq, largo, flags, datos, enviado_en):
+        self.seq = seq
+        self.largo = largo
+        self.flags = flags
+        self.datos = datos
+        self.enviado_en = enviado_en
+        self.retransmitido = False
+
+
+class ConexionTCP:
+    __slots__ = ("pila", "puerto_local", "ip_remota", "puerto_remoto", "binaria", "estado", "control",
+                 "snd_una", "snd_nxt", "por_enviar", "enviado_del_primero", "sin_confirmar", "ventana_remota",
+                 "cwnd", "ssthresh", "duplicados", "recuperacion_hasta", "tras_vencimiento", "srtt", "rttvar",
+                 "rto", "vence_en", "_temporizador", "vencimientos", "rcv_nxt", "fuera_de_orden",
+                 "bytes_fuera_de_orden", "mensaje_parcial", "cerrar_al_vaciar", "_enviando", "enviados",
+                 "retransmitidos", "bytes_confirmados", "bytes_recibidos", "recuperaciones", "timeouts")
+
+    def __init__(self, pila, puerto_local, ip_remota, puerto_remoto, binaria, control):
+        self.pila = pila
+        self.puerto_local = puerto_local
+        self.ip_remota = ip_remota
+        self.puerto_remoto = puerto_remoto
+        self.binaria = binaria
+        self.estado = CERRADA
+        self.control = CONTROLES[control]()
+        # Envío
+        self.snd_una = 0                          # primer byte sin confirmar
+        self.snd_nxt = 0                          # próximo byte a enviar
+        self.por_enviar = collections.deque()     # mensajes de la aplicación aún no enviados
+        self.enviado_del_primero = 0              # caracteres (o bytes) ya segmentados de por_enviar[0]
+        self.sin_confirmar = collections.deque()  # _Segmento en vuelo, en orden de secuencia
+        self.ventana_remota = VENTANA_RECEPCION
+        self.cwnd = CWND_INICIAL * MSS
+        self.ssthresh = math.inf
+        self.duplicados = 0
+        self.recuperacion_hasta = None            # snd_nxt al entrar en recuperación
+        self.tras_vencimiento = False             # la recuperación empezó por el temporizador
+        self.srtt = None
+        self.rttvar = None
+        self.rto = RTO_INICIAL
+        self.vence_en = None                      # vencimiento del temporizador de retransmisión
+        self._temporizador = None                 # tiempo del evento de vencimiento programado
+        self.vencimientos = 0
+        # Recepción
+        self.rcv_nxt = 0
+        self.fuera_de_orden = {}                  # seq -> (datos, flags, bytes)
+        self.bytes_fuera_de_orden = 0
+        self.mensaje_parcial = []                 # segmentos recibidos del mensaje en curso
+        self.cerrar_al_vaciar = False
+        self._enviando = False
+        # Estadísticas
+        self.enviados = 0
+        self.retransmitidos = 0
+        self.bytes_confirmados = 0
+        self.bytes_recibidos = 0
+        self.recuperaciones = 0
+        self.timeouts = 0
+
+    def __repr__(self):
+        return (f"ConexionTCP({self.puerto_local} -> {self.ip_remota}:{self.puerto_remoto}, {self.estado}, "
+                f"cwnd={self.cwnd / MSS:.1f} MSS)")
+
+    # Bytes enviados y sin confirmar
+    def en_vuelo(self):
+        return self.snd_nxt - self.snd_una
+
+    def _reloj(self):
+        return self.pila.dispositivo.reloj()
+
+    # ====== Envío ======
+    # Encola datos de la aplicación y envía lo que permita la ventana
+    def enviar(self, datos):
+        return self.enviar_lote((datos,))
+
+    # Encola varios mensajes de una vez (cada uno sigue siendo un mensaje, con su PSH) y
+    # recorre la ventana una sola vez para todos
+    def enviar_lote(self, lote):
+        if self.estado not in (SYN_ENVIADO, SYN_RECIBIDO, ESTABLECIDA, CIERRE_ESPERA) or self.cerrar_al_vaciar:
+            self.pila.dispositivo.metricas.descarte("tcp_conexion_cerrada", len(lote))
+            return False
+        self.por_enviar.extend(lote)
+        self._enviar_pendientes()
+        return True
+
+    # Cierra el sentido de envío cuando se terminen de enviar los datos encolados
+    def cerrar(self):
+        if self.estado in (SYN_ENVIADO, SYN_RECIBIDO, ESTABLECIDA, CIERRE_ESPERA):
+            self.cerrar_al_vaciar = True
+            self._enviar_pendientes()
+
+    # Envía segmentos mientras haya datos y lugar en la ventana. No es reentrante: sin
+    # planificador un ACK puede llegar mientras se está enviando, y el bucle externo sigue.
+    # Los mensajes se cortan en segmentos de MSS bytes a medida que la ventana lo permite,
+    # así que un mensaje grande no tiene más de una ventana de segmentos en vuelo. El texto
+    # se mide en bytes UTF-8 (como viaja en el medio) y se corta entre caracteres.
+    def _enviar_pendientes(self):
+        if self._enviando or self.estado in (SYN_ENVIADO, SYN_RECIBIDO):
+            return
+        self._enviando = True
+        try:
+            por_enviar = self.por_enviar
+            while por_enviar and self.estado in (ESTABLECIDA, CIERRE_ESPERA):
+                mensaje = por_enviar[0]
+                inicio = self.enviado_del_primero
+                if isinstance(mensaje, str):
+                    caracteres, largo = cortar_en_bytes(mensaje, inicio, MSS)
+                    fin = inicio + caracteres
+                else:
+                    largo = min(len(mensaje) - inicio, MSS)
+                    fin = inicio + largo
+                ventana = min(self.cwnd, self.ventana_remota)
+                # Con la ventana vacía sale igual un segmento (sondea la ventana del receptor)
+                if self.sin_confirmar and self.en_vuelo() + largo > ventana:
+                    break
+                if inicio == 0 and fin == len(mensaje):
+                    datos = mensaje
+                elif isinstance(mensaje, Trama):
+                    datos = Trama.desde_payload(mensaje.vista()[inicio:fin])
+                else:
+                    datos = mensaje[inicio:fin]
+                if fin == len(mensaje):
+                    por_enviar.popleft()
+                    self.enviado_del_primero = 0
+                    self._enviar_segmento(ACK | PSH, datos, largo)
+                else:
+                    self.enviado_del_primero = fin
+                    self._enviar_segmento(ACK, datos, largo)
+            if self.cerrar_al_vaciar and not por_enviar and self.estado in (ESTABLECIDA, CIERRE_ESPERA):
+                self.estado = FIN_ESPERA_1 if self.estado == ESTABLECIDA else ULTIMO_ACK
+                self._enviar_segmento(FIN | ACK, None, 1)
+        finally:
+            self._enviando = False
+
+    # Envía un segmento nuevo que ocupa "largo" números de secuencia (SYN y FIN ocupan uno)
+    def _enviar_segmento(self, flags, datos, largo):
+        segmento = _Segmento(self.snd_nxt, largo, flags, datos, self._reloj())
+        self.sin_confirmar.append(segmento)
+        self.snd_nxt += largo
+        self.enviados += 1
+        self._emitir(segmento.seq, flags, datos)
+        if self.vence_en is None:
+            self._armar_temporizador()
+
+    # Arma el envío de un segmento con el ACK y la ventana actuales. Los datos binarios se
+    # copian al retransmitir: los encabezados se escriben en el headroom de la Trama y la
+    # primera copia puede seguir en vuelo.
+    def _emitir(self, seq, flags, datos, copiar=False):
+        if datos is None:
+            datos = Trama.desde_payload(b"") if self.binaria else ""
+        elif copiar and isinstance(datos, Trama):
+            datos = datos.copia()
+        tcp = CapaTCPBinaria if self.binaria else CapaTCP
+        ventana = max(0, VENTANA_RECEPCION - self.bytes_fuera_de_orden)
+        ack = self.rcv_nxt if flags & ACK else 0
+        if TRAZA.nivel >= NIVEL_CAPAS:
+            TRAZA.emitir(NIVEL_CAPAS, self.pila.dispositivo.nombre,
+                         f"  TCP {self.puerto_local} -> {self.ip_remota}:{self.puerto_remoto} "
+                         f"{nombres_flags(flags)} seq={seq} ack={ack} ventana={ventana}")
+        self.pila.dispositivo._enviar_tcp(tcp.encapsular(datos, seq, ack, flags, ventana), self)
+
+    def _enviar_ack(self):
+        self._emitir(self.snd_nxt, ACK, None)
+
+    # ====== Temporizador de retransmisión ======
+    # Cada ACK mueve el vencimiento (vence_en) pero no programa un evento nuevo: el evento
+    # programado, al dispararse antes del vencimiento, se reprograma para ese momento. Solo
+    # se programa otro si el vencimiento se adelanta (bajó el RTO); el anterior queda
+    # obsoleto y se ignora.
+    def _armar_temporizador(self):
+        self.vence_en = self._reloj() + self.rto
+        planificador = self.pila.dispositivo.planificador
+        if planificador is not None and (self._temporizador is None or self.vence_en < self._temporizador):
+            self._programar_vencimiento(planificador, self.rto)
+
+    def _programar_vencimiento(self, planificador, retardo):
+        self._temporizador = self.vence_en
+        planificador.programar(retardo, self._vencer, self.vence_en)
+
+    def _vencer(self, programado):
+        if programado != self._temporizador:
+            return
+        self._temporizador = None
+        if self.vence_en is None or not self.sin_confirmar or self.estado == CERRADA:
+            return
+        ahora = self._reloj()
+        if ahora < self.vence_en:
+            self._programar_vencimiento(self.pila.dispositivo.planificador, self.vence_en - ahora)
+            return
+        self.vencimientos += 1
+        self.timeouts += 1
+        if self.vencimientos > REINTENTOS_MAXIMOS:
+            self._abortar("tcp_reintentos_agotados")
+            return
+        if TRAZA.nivel >= NIVEL_RESUMEN:
+            TRAZA.emitir(NIVEL_RESUMEN, self.pila.dispositivo.nombre,
+                         f"  TCP: venció el temporizador (RTO={self.rto:.3f} s), retransmito seq={self.snd_una}")
+        if self.estado not in (SYN_ENVIADO, SYN_RECIBIDO):
+            self.control.al_vencer(self, ahora)
+            # Los demás segmentos de la ventana se retransmiten a medida que llegan ACKs parciales
+            self.recuperacion_hasta = self.snd_nxt
+            self.tras_vencimiento = True
+        self.duplicados = 0
+        self.rto = min(self.rto * 2, RTO_MAXIMO)
+        self._retransmitir(self.sin_confirmar[0])
+        self.vence_en = None
+        self._armar_temporizador()
+
+    def _retransmitir(self, segmento):
+        segmento.retransmitido = True
+        self.retransmitidos += 1
+        flags = segmento.flags | (ACK if self.estado != SYN_ENVIADO else 0)
+        self._emitir(segmento.seq, flags, segmento.datos, copiar=True)
+
+    # Actualiza SRTT, RTTVAR y RTO con una muestra de RTT (RFC 6298)
+    def _medir_rtt(self, muestra):
+        if self.srtt is None:
+            self.srtt = muestra
+            self.rttvar = muestra / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - muestra)
+            self.srtt = 0.875 * self.srtt + 0.125 * muestra
+        self.rto = min(max(self.srtt + 4 * self.rttvar, RTO_MINIMO), RTO_MAXIMO)
+        self.control.al_medir(self, muestra)
+
+    # ====== Recepción ======
+    def recibir(self, datos, seq, ack, flags, ventana):
+        if flags & RST:
+            self._abortar("tcp_reiniciada")
+            return
+        ahora = self._reloj()
+        if self.estado == SYN_ENVIADO:
+            if flags & SYN and flags & ACK and ack == self.snd_nxt:
+                self.rcv_nxt = seq + 1
+                self.estado = ESTABLECIDA
+                self._confirmar(ack, ventana, ahora)
+                self._enviar_ack()
+                self._enviar_pendientes()
+            return
+        if flags & SYN:
+            # SYN o SYN+ACK repetido (se perdió nuestra respuesta): se vuelve a confirmar
+            if self.estado == SYN_RECIBIDO:
+                self._retransmitir(self.sin_confirmar[0])
+            else:
+                self._enviar_ack()
+            return
+        if flags & ACK:
+            if self.estado == SYN_RECIBIDO and ack == self.snd_nxt:
+                self.estado = ESTABLECIDA
+            self._procesar_ack(ack, ventana, bool(datos) or bool(flags & FIN), ahora)
+        if len(datos) or flags & FIN:
+            self._procesar_datos(datos, seq, flags)
+        self._enviar_pendientes()
+
+    def _procesar_ack(self, ack, ventana, con_datos, ahora):
+        if ack > self.snd_una:
+            self._confirmar(ack, ventana, ahora)
+        elif ack == self.snd_una and self.sin_confirmar and not con_datos:
+            # La ventana anunciada no se compara: baja mientras el receptor guarda segmentos
+            # fuera de orden, justamente cuando llegan los ACKs duplicados
+            self.ventana_remota = ventana
+            self._ack_duplicado(ahora)
+        else:
+            self.ventana_remota = ventana
+
+    # ACK que confirma datos nuevos
+    def _confirmar(self, ack, ventana, ahora):
+        confirmados = ack - self.snd_una
+        # La ventana solo crece si se estaba usando (RFC 7661): una aplicación que envía poco
+        # no debe acumular una cwnd que después salga de golpe
+        limitado = 2 * (self.snd_nxt - self.snd_una) >= self.cwnd
+        self.snd_una = ack
+        self.ventana_remota = ventana
+        self.bytes_confirmados += confirmados
+        if self.vencimientos:
+            # Datos nuevos confirmados: se deja el backoff sin esperar una muestra de RTT (como
+            # Linux); si no, cada retransmisión perdida durante la recuperación lo duplica
+            self.vencimientos = 0
+            if self.srtt is not None:
+                self.rto = min(max(self.srtt + 4 * self.rttvar, RTO_MINIMO), RTO_MAXIMO)
+        sin_confirmar = self.sin_confirmar
+        enviado_en = None
+        ambiguo = False
+        fin_confirmado = False
+        while sin_confirmar and sin_confirmar[0].seq + sin_confirmar[0].largo <= ack:
+            segmento = sin_confirmar.popleft()
+            enviado_en = segmento.enviado_en
+            ambiguo = ambiguo or segmento.retransmitido
+            fin_confirmado = fin_confirmado or bool(segmento.flags & FIN)
+        # Algoritmo de Karn: si el ACK cubre un segmento retransmitido no se sabe a qué envío
+        # responde (y los posteriores esperaron a que se llenara el hueco), así que no se mide
+        if enviado_en is not None and not ambiguo:
+            self._medir_rtt(ahora - enviado_en)
+
+        crecer = limitado and self.estado not in (SYN_ENVIADO, SYN_RECIBIDO)
+        if self.recuperacion_hasta is not None:
+            if ack >= self.recuperacion_hasta:
+                self.recuperacion_hasta = None
+                if not self.tras_vencimiento:
+                    # Fin de la recuperación rápida: la ventana se desinfla a ssthresh
+                    self.cwnd = self.ssthresh
+                    crecer = False
+                self.tras_vencimiento = False
+            elif sin_confirmar:
+                # ACK parcial (NewReno): se perdió otro segmento de la misma ventana
+                self._retransmitir(sin_confirmar[0])
+                if not self.tras_vencimiento:
+                    self.cwnd = max(self.cwnd - confirmados + MSS, MSS)
+                    crecer = False
+        if crecer:
+            self.control.al_confirmar(self, confirmados, ahora)
+        self.duplicados = 0
+
+        self.vence_en = None
+        if sin_confirmar:
+            self._armar_temporizador()
+        if fin_confirmado:
+            if self.estado == FIN_ESPERA_1:
+                self.estado = FIN_ESPERA_2
+            elif self.estado in (ULTIMO_ACK, CERRANDO):
+                self._terminar()
+
+    def _ack_duplicado(self, ahora):
+        self.duplicados += 1
+        if self.recuperacion_hasta is not None:
+            if not self.tras_vencimiento:
+                # Cada ACK duplicado es un segmento que dejó la red: se infla la ventana
+                self.cwnd += MSS
+        elif self.duplicados == ACKS_DUPLICADOS:
+            if TRAZA.nivel >= NIVEL_RESUMEN:
+                TRAZA.emitir(NIVEL_RESUMEN, self.pila.dispositivo.nombre,
+                             f"  TCP: {ACKS_DUPLICADOS} ACKs duplicados, retransmisión rápida de seq={self.snd_una}")
+            self.recuperaciones += 1
+            self.control.al_perder(self, ahora)
+            self.cwnd = self.ssthresh + ACKS_DUPLICADOS * MSS
+            self.recuperacion_hasta = self.snd_nxt
+            self._retransmitir(self.sin_confirmar[0])
+
+    # Datos (o FIN) recibidos: se entregan en orden; los adelantados esperan en el buffer.
+    # Los números de secuencia cuentan bytes (el texto, en UTF-8).
+    def _procesar_datos(self, datos, seq, flags):
+        largo = largo_en_bytes(datos)
+        if seq == self.rcv_nxt:
+            self._aceptar(datos, flags, largo)
+            fuera_de_orden = self.fuera_de_orden
+            while self.rcv_nxt in fuera_de_orden:
+                datos, flags, largo = fuera_de_orden.pop(self.rcv_nxt)
+                self.bytes_fuera_de_orden -= largo
+                self._aceptar(datos, flags, largo)
+        elif seq > self.rcv_nxt and seq not in self.fuera_de_orden:
+            if self.bytes_fuera_de_orden + largo <= VENTANA_RECEPCION:
+                self.fuera_de_orden[seq] = (datos, flags, largo)
+                self.bytes_fuera_de_orden += largo
+            else:
+                self.pila.dispositivo.metricas.descarte("tcp_ventana_llena")
+        # Se confirma siempre: un segmento fuera de orden produce un ACK duplicado
+        if self.estado != CERRADA:
+            self._enviar_ack()
+
+    # "largo": bytes de datos (sin contar el FIN)
+    def _aceptar(self, datos, flags, largo):
+        self.rcv_nxt += largo + (1 if flags & FIN else 0)
+        if largo:
+            self.bytes_recibidos += largo
+            # PSH marca el último segmento de un mensaje
+            if not flags & PSH:
+                self.mensaje_parcial.append(datos)
+            else:
+                if self.mensaje_parcial:
+                    self.mensaje_parcial.append(datos)
+                    partes, self.mensaje_parcial = self.mensaje_parcial, []
+                    datos = Trama.concatenar(partes) if isinstance(datos, Trama) else "".join(partes)
+                self.pila.dispositivo._entregar_aplicacion(datos, "TCP", self.ip_remota, self.puerto_remoto,
+                                                           self.puerto_local)
+        if flags & FIN:
+            if self.estado == ESTABLECIDA:
+                # El otro extremo terminó de enviar; no hay aplicación que siga escribiendo,
+                # así que se cierra este sentido al vaciar lo pendiente
+                self.estado = CIERRE_ESPERA
+                self.cerrar_al_vaciar = True
+            elif self.estado == FIN_ESPERA_1:
+                self.estado = CERRANDO
+            elif self.estado == FIN_ESPERA_2:
+                self._enviar_ack()
+                self._terminar()
+
+    def _abortar(self, motivo):
+        if TRAZA.nivel >= NIVEL_RESUMEN:
+            TRAZA.emitir(NIVEL_RESUMEN, self.pila.dispositivo.nombre,
+                         f"  TCP: conexión con {self.ip_remota}:{self.puerto_remoto} abortada ({motivo})")
+        # Mensajes perdidos: los no enviados y los que tienen su último segmento sin confirmar
+        perdidos = len(self.por_enviar) + sum(1 for segmento in self.sin_confirmar if segmento.flags & PSH)
+        if perdidos:
+            self.pila.dispositivo.metricas.descarte(motivo, perdidos)
+        self.por_enviar.clear()
+        self.sin_confirmar.clear()
+        self._terminar()
+
+    def _terminar(self):
+        self.estado = CERRADA
+        self.vence_en = None
+        self.pila._quitar(self)
+
+    # Resumen para mostrar o comparar
+    def instantanea(self):
+        return {
+            "estado": self.estado,
+            "control": self.control.nombre,
+            "cwnd": self.cwnd,
+            "ssthresh": self.ssthresh,
+            "srtt": self.srtt,
+            "rto": self.rto,
+            "enviados": self.enviados,
+            "retransmitidos": self.retransmitidos,
+            "recuperaciones": self.recuperaciones,
+            "timeouts": self.timeouts,
+            "bytes_confirmados": self.bytes_confirmados,
+            "bytes_recibidos": self.bytes_recibidos,
+        }
+
+
+class PilaTCP:
+    # Conexiones TCP de un dispositivo, por (puerto_local, ip_remota, puerto_remoto).
+    # - aceptar_todo: acepta conexiones entrantes en cualquier puerto (los PCs del
+    #   simulador reciben mensajes en cualquier puerto); si no, solo en los de escuchar()
+    # - control: "reno" o "cubic"
+    __slots__ = ("dispositivo", "control", "aceptar_todo", "escuchando", "conexiones", "_salientes",
+                 "_proximo_puerto", "cerradas")
+
+    def __init__(self, dispositivo, control=None, aceptar_todo=True):
+        self.dispositivo = dispositivo
+        self.control = control or CONTROL_CONGESTION
+        if self.control not in CONTROLES:
+            raise ValueError(f"Control de congestión desconocido: {self.control!r}")
+        self.aceptar_todo = aceptar_todo
+        self.escuchando = set()
+        self.conexiones = {}
+        # (ip_remota, puerto_remoto, binaria) -> conexión abierta desde acá. Cada codec tiene
+        # su conexión: los encabezados de texto y binarios no se mezclan en un mismo flujo.
+        self._salientes = {}
+        self._proximo_puerto = PUERTO_EFIMERO
+        self.cerradas = []        # conexiones terminadas (para consultar sus estadísticas)
+
+    def escuchar(self, puerto):
+        self.escuchando.add(puerto)
+
+    # Abre una conexión hacia ip:puerto (envía el SYN) desde puerto_local, o desde un puerto
+    # efímero si no se indica
+    def abrir(self, ip_remota, puerto_remoto, binaria=False, puerto_local=None):
+        conexion = ConexionTCP(self, puerto_local, ip_remota, puerto_remoto, binaria, self.control)
+        if puerto_local is None:
+            conexion.puerto_local = self._proximo_puerto
+            self._proximo_puerto = PUERTO_EFIMERO + (self._proximo_puerto + 1 - PUERTO_EFIMERO) % (65536 - PUERTO_EFIMERO)
+            self._salientes[(ip_remota, puerto_remoto, binaria)] = conexion
+        self.conexiones[(conexion.puerto_local, ip_remota, puerto_remoto)] = conexion
+        conexion.estado = SYN_ENVIADO
+        conexion._enviar_segmento(SYN, None, 1)
+        return conexion
+
+    # Envía datos de la aplicación a ip:puerto reutilizando la conexión abierta (o abriendo
+    # una). Con puerto_local (un socket, ver puertos.py) se usa la conexión desde ese puerto,
+    # sea saliente o aceptada; si esa conexión usa el otro codec los datos se descartan.
+    def enviar(self, ip_remota, puerto_remoto, datos, binaria=False, puerto_local=None):
+        return self.enviar_lote(ip_remota, puerto_remoto, (datos,), binaria, puerto_local)
+
+    # Igual que enviar, con una lista de mensajes que entran juntos a la conexión
+    def enviar_lote(self, ip_remota, puerto_remoto, lote, binaria=False, puerto_local=None):
+        conexion = self._conexion(ip_remota, puerto_remoto, binaria, puerto_local)
+        if conexion.binaria != binaria:
+            if TRAZA.nivel >= NIVEL_RESUMEN:
+                TRAZA.emitir(NIVEL_RESUMEN, self.dispositivo.nombre,
+                             f"  TCP: la conexión {puerto_local} -> {ip_remota}:{puerto_remoto} usa el codec "
+                             f"{'binario' if conexion.binaria else 'texto'} -> descartar {len(lote)} mensajes")
+            self.dispositivo.metricas.descarte("tcp_codec_distinto", len(lote))
+            return False
+        return conexion.enviar_lote(lote)
+
+    def _conexion(self, ip_remota, puerto_remoto, binaria, puerto_local):
+        if puerto_local is not None:
+            conexion = self.conexiones.get((puerto_local, ip_remota, puerto_remoto))
+            if conexion is None:
+                conexion = self.abrir(ip_remota, puerto_remoto, binaria, puerto_local)
+            return conexion
+        conexion = self._salientes.get((ip_remota, puerto_remoto, binaria))
+        if conexion is None or conexion.cerrar_al_vaciar:
+            conexion = self.abrir(ip_remota, puerto_remoto, binaria)
+        return conexion
+
+    # Cierra todas las conexiones, o las de un puerto local (cada una después de enviar lo
+    # pendiente)
+    def cerrar(self, puerto_local=None):
+        for conexion in list(self.conexiones.values()):
+            if puerto_local is None or conexion.puerto_local == puerto_local:
+                conexion.cerrar()
+
+    # Segmento TCP recibido (datos_tcp: encabezado TCP y datos, sin el encabezado de capa 4)
+    def recibir(self, datos_tcp, ip_origen, puerto_origen, puerto_destino):
+        binaria = isinstance(datos_tcp, Trama)
+        tcp = CapaTCPBinaria if binaria else CapaTCP
+        datos, seq, ack, flags, ventana = tcp.desencapsular(datos_tcp)
+        if TRAZA.nivel >= NIVEL_CAPAS:
+            TRAZA.emitir(NIVEL_CAPAS, self.dispositivo.nombre,
+                         f"  TCP: {nombres_flags(flags)} seq={seq} ack={ack} ventana={ventana}, {largo_en_bytes(datos)} bytes")
+        clave = (puerto_destino, ip_origen, puerto_origen)
+        conexion = self.conexiones.get(clave)
+        if conexion is not None:
+            conexion.recibir(datos, seq, ack, flags, ventana)
+            return
+        if flags & SYN and not flags & ACK and (self.aceptar_todo or puerto_destino in self.escuchando):
+            # Apertura pasiva: se responde SYN+ACK
+            conexion = ConexionTCP(self, puerto_destino, ip_origen, puerto_origen, binaria, self.control)
+            self.conexiones[clave] = conexion
+            conexion.estado = SYN_RECIBIDO
+            conexion.rcv_nxt = seq + 1
+            conexion.ventana_remota = ventana
+            conexion._enviar_segmento(SYN | ACK, None, 1)
+            return
+        self.dispositivo.metricas.descarte("tcp_sin_conexion")
+        if not flags & RST:
+            # Segmento para una conexión que no existe: se responde RST
+            conexion = ConexionTCP(self, puerto_destino, ip_origen, puerto_origen, binaria, self.control)
+            conexion._emitir(ack, RST, None)
+
+    def _quitar(self, conexion):
+        clave = (conexion.puerto_local, conexion.ip_remota, conexion.puerto_remoto)
+        if self.conexiones.get(clave) is conexion:
+            del self.conexiones[clave]
+            self.cerradas.append(conexion)
+        saliente = (conexion.ip_remota, conexion.puerto_remoto, conexion.binaria)
+        if self._salientes.get(saliente) is conexion:
+            del self._salientes[saliente]
+
+    # Estadísticas sumadas de las conexiones abiertas y cerradas
+    def instantanea(self):
+        totales = collections.Counter()
+        for conexion in list(self.conexiones.values()) + self.cerradas:
+            for campo in ("enviados", "retransmitidos", "recuperaciones", "timeouts",
+                          "bytes_confirmados", "bytes_recibidos"):
+                totales[campo] += getattr(conexion, campo)
+        totales["abiertas"] = len(self.conexiones)
+        totales["cerradas"] = len(self.cerradas)
+        return dict(totales)
@@ -0,0 +1,91 @@
+# ==============================
+# Trazas del simulador
+# ==============================
+# Reemplaza los print() del camino de datos. Cada mensaje tiene un nivel y solo se
+# formatea si el nivel activo lo incluye; los dispositivos lo verifican antes de
+# construir el f-string:
+#
+#     if TRAZA.nivel >= NIVEL_CAPAS:
+#         TRAZA.emitir(NIVEL_CAPAS, self.nombre, f"...")
+#
+# Niveles (cada uno incluye a los anteriores):
+# - NIVEL_APAGADO: nada
+# - NIVEL_RESUMEN: un renglón por salto, entregas y descartes
+# - NIVEL_CAPAS: además, el detalle de encapsulación/desencapsulación por capa
+# - NIVEL_BITS: además, los bits en el medio físico (salida didáctica original)
+#
+# Los eventos se entregan a uno o más destinos: SalidaEstandar, BufferCircular o ArchivoJSONL.
+
+import collections
+import json
+
+NIVEL_APAGADO = 0
+NIVEL_RESUMEN = 1
+NIVEL_CAPAS = 2
+NIVEL_BITS = 3
+
+NOMBRES_NIVEL = {
+    NIVEL_APAGADO: "apagado",
+    NIVEL_RESUMEN: "resumen",
+    NIVEL_CAPAS: "capas",
+    NIVEL_BITS: "bits",
+}
+
+
+class SalidaEstandar:
+    # Imprime el mensaje tal cual (mismo formato que los print() originales)
+    def escribir(self, evento):
+        print(evento["mensaje"])
+
+
+class BufferCircular:
+    # Guarda en memoria los últimos "capacidad" eventos
+    def __init__(self, capacidad=10000):
+        self.eventos = collections.deque(maxlen=capacidad)
+
+    def escribir(self, evento):
+        self.eventos.append(evento)
+
+
+class ArchivoJSONL:
+    # Escribe un evento JSON por línea
+    def __init__(self, ruta):
+        self._archivo = open(ruta, "w", encoding="utf-8")
+
+    def escribir(self, evento):
+        self._archivo.write(json.dumps(evento, ensure_ascii=False) + "\n")
+
+    def cerrar(self):
+        self._archivo.close()
+
+
+class Traza:
+    # - nivel: nivel máximo de los mensajes que se emiten
+    # - destinos: lista de objetos con escribir(evento); por defecto la salida estándar
+    # - reloj: función opcional que retorna el tiempo simulado para anotar cada evento
+    def __init__(self, nivel=NIVEL_BITS, destinos=None, reloj=None):
+        self.nivel = nivel
+        self.destinos = [SalidaEstandar()] if destinos is None else list(destinos)
+        self.reloj = reloj
+
+    # Cambia el nivel y/o los destinos; retorna la configuración anterior (nivel, destinos)
+    def configurar(self, nivel=None, destinos=None):
+        anterior = (self.nivel, self.destinos)
+        if nivel is not None:
+            self.nivel = nivel
+        if destinos is not None:
+            self.destinos = list(destinos)
+        return anterior
+
+    # Entrega el mensaje a todos los destinos. Quien llama debe verificar el nivel antes
+    # de formatear el mensaje.
+    def emitir(self, nivel, dispositivo, mensaje):
+        evento = {"nivel": NOMBRES_NIVEL[nivel], "dispositivo": dispositivo, "mensaje": mensaje}
+        if self.reloj is not None:
+            evento["t"] = self.reloj()
+        for destino in self.destinos:
+            destino.escribir(evento)
+
+
+# Traza compartida por todos los dispositivos
+TRAZA = Traza()
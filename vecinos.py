@@ -0,0 +1,129 @@
+# ==============================
+# Resolución de direcciones (ARP) y tabla de vecinos
+# ==============================
+# Cuando una ruta no trae la MAC del siguiente salto, el dispositivo la resuelve por el
+# enlace: envía una solicitud ARP a la MAC de difusión preguntando por la IP, y el dueño
+# de esa IP contesta con su MAC. El resultado se guarda en una TablaVecinos con un
+# tiempo de vida (TTL).
+#
+# Mientras la resolución está en curso los paquetes hacia esa IP esperan en una cola y
+# se envían todos juntos (en lote) al llegar la respuesta. Si no hay respuesta tras
+# ARP_REINTENTOS solicitudes, la IP queda en caché negativa durante ARP_TTL_NEGATIVO: los
+# paquetes hacia ella se descartan sin volver a preguntar, de modo que el tráfico hacia
+# un host caído no genera una solicitud ARP por paquete.
+#
+# Los mensajes ARP viajan como payload de capa 2 con formato de texto (con cualquier
+# codec): [ARP:operacion:ip_emisor:mac_emisor:ip_objetivo:mac_objetivo]
+
+# MAC de difusión: los switches la inundan y todos los hosts la aceptan
+MAC_DIFUSION = "*"
+
+ARP_SOLICITUD = 1
+ARP_RESPUESTA = 2
+
+ARP_TTL = 300.0           # segundos que una entrada resuelta es válida
+ARP_TTL_NEGATIVO = 20.0   # segundos que una IP sin respuesta no se vuelve a consultar
+ARP_ESPERA = 1.0          # segundos entre solicitudes (solo con planificador)
+ARP_REINTENTOS = 3        # solicitudes antes de dar la IP por inalcanzable
+ARP_MAX_PENDIENTES = 64   # paquetes en espera por IP; los siguientes se descartan
+
+
+# Mensaje ARP como texto
+def encapsular_arp(operacion, ip_emisor, mac_emisor, ip_objetivo, mac_objetivo=""):
+    return f"[ARP:{operacion}:{ip_emisor}:{mac_emisor}:{ip_objetivo}:{mac_objetivo}]"
+
+
+# Retorna (operacion, ip_emisor, mac_emisor, ip_objetivo, mac_objetivo)
+def desencapsular_arp(paquete):
+    _, operacion, ip_emisor, mac_emisor, ip_objetivo, mac_objetivo = paquete[1:-1].split(":")
+    return int(operacion), ip_emisor, mac_emisor, ip_objetivo, mac_objetivo
+
+
+# True si el payload de una trama es un mensaje ARP
+def es_arp(paquete):
+    return isinstance(paquete, str) and paquete.startswith("[ARP:")
+
+
+class Resolucion:
+    # Resolución en curso de una IP: interfaz por la que se pregunta, MAC origen de las
+    # tramas en espera, solicitudes enviadas y paquetes en cola
+    # (paquete, capa de enlace, True si es un reenvío)
+    __slots__ = ("interfaz", "mac_origen", "intentos", "paquetes")
+
+    def __init__(self, interfaz, mac_origen):
+        self.interfaz = interfaz
+        self.mac_origen = mac_origen
+        self.intentos = 0
+        self.paquetes = []
+
+
+class TablaVecinos:
+    # - reloj: función que retorna el tiempo actual (simulado o real)
+    __slots__ = ("reloj", "ttl", "ttl_negativo", "max_pendientes", "_entradas", "_negativas", "pendientes")
+
+    def __init__(self, reloj, ttl=ARP_TTL, ttl_negativo=ARP_TTL_NEGATIVO,
+                 max_pendientes=ARP_MAX_PENDIENTES):
+        self.reloj = reloj
+        self.ttl = ttl
+        self.ttl_negativo = ttl_negativo
+        self.max_pendientes = max_pendientes
+        self._entradas = {}    # ip -> (mac, interfaz, expira_en)
+        self._negativas = {}   # ip -> expira_en
+        self.pendientes = {}   # ip -> Resolucion
+
+    def __len__(self):
+        return len(self._entradas)
+
+    # MAC de la IP si está resuelta y vigente, o None
+    def buscar(self, ip):
+        entrada = self._entradas.get(ip)
+        if entrada is None:
+            return None
+        if self.reloj() >= entrada[2]:
+            del self._entradas[ip]
+            return None
+        return entrada[0]
+
+    # True si la IP está en caché negativa (no respondió hace poco)
+    def inalcanzable(self, ip):
+        expira_en = self._negativas.get(ip)
+        if expira_en is None:
+            return False
+        if self.reloj() >= expira_en:
+            del self._negativas[ip]
+            return False
+        return True
+
+    # Guarda (o renueva) la MAC de una IP
+    def aprender(self, ip, mac, interfaz):
+        self._entradas[ip] = (mac, interfaz, self.reloj() + self.ttl)
+        self._negativas.pop(ip, None)
+
+    def marcar_inalcanzable(self, ip):
+        self._entradas.pop(ip, None)
+        self._negativas[ip] = self.reloj() + self.ttl_negativo
+
+    # True si la IP ya está resuelta o se está resolviendo (para actualizarla con un ARP recibido)
+    def conoce(self, ip):
+        return ip in self._entradas or ip in self.pendientes
+
+    # Encola paquetes a la espera de la resolución de la IP. Retorna (resolucion, nueva,
+    # descartados): los que no caben en la cola de esa IP se descartan.
+    def encolar(self, ip, interfaz, mac_origen, elementos):
+        resolucion = self.pendientes.get(ip)
+        nueva = resolucion is None
+        if nueva:
+            resolucion = self.pendientes[ip] = Resolucion(interfaz, mac_origen)
+        lugar = max(0, self.max_pendientes - len(resolucion.paquetes))
+        resolucion.paquetes.extend(elementos[:lugar])
+        return resolucion, nueva, max(0, len(elementos) - lugar)
+
+    # Quita y retorna la resolución en curso de la IP (o None)
+    def terminar(self, ip):
+        return self.pendientes.pop(ip, None)
+
+    # Copia de las entradas vigentes como diccionario ip -> (mac, interfaz) (para mostrar)
+    def a_dict(self):
+        ahora = self.reloj()
+        return {ip: (mac, interfaz) for ip, (mac, interfaz, expira_en) in self._entradas.items()
+                if ahora < expira_en}